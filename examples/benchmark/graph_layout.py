@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Measure the time and memory of an iteration of the force-directed layout,
+with the exact repulsion between all pairs of nodes and with the Barnes-Hut
+approximation, on random graphs with 4 edges per node.
+
+Usage: python graph_layout.py [n_nodes ...]
+"""
+import sys
+import tracemalloc
+from time import perf_counter
+
+import numpy as np
+
+from vispy.visuals.graphs.layouts.force_directed import (
+    _calculate_delta_pos, _calculate_sparse_delta_pos)
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    t0 = perf_counter()
+    func(*args)
+    duration = perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return duration, peak / 1e6
+
+
+def main(sizes):
+    rng = np.random.RandomState(0)
+    for n in sizes:
+        edges = rng.randint(0, n, (2 * n, 2))
+        edges = np.concatenate([edges, edges[:, ::-1]])
+        weights = np.ones(len(edges))
+        pos = rng.uniform(size=(n, 2)).astype(np.float32)
+        optimal = 1 / np.sqrt(n)
+        print('%d nodes, %d edges' % (n, len(edges)))
+        for theta in (0.5, 1.0):
+            duration, peak = measure(_calculate_sparse_delta_pos, edges,
+                                     weights, pos, 0.1, optimal, theta)
+            print('  Barnes-Hut, theta %.1f: %.3f s, %.0f MB'
+                  % (theta, duration, peak))
+        if n <= 10000:
+            adjacency = np.zeros((n, n))
+            adjacency[edges[:, 0], edges[:, 1]] = 1
+            duration, peak = measure(_calculate_delta_pos, adjacency, pos,
+                                     0.1, optimal)
+            print('  exact: %.3f s, %.0f MB' % (duration, peak))
+        else:
+            print('  exact: about %.0f GB' % (n * n * 32 / 1e9))
+
+
+if __name__ == '__main__':
+    main([int(n) for n in sys.argv[1:]] or [10000, 100000])
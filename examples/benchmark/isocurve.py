@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+# vispy: testskip
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Compare the array-based marching squares of vispy.geometry.isocurve to the
+previous implementation, which processed the grid cells one by one.
+
+Usage: python isocurve.py [size [n_levels]]
+"""
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from vispy.geometry.isocurve import isocurve
+
+
+def isocurve_loops(data, level, connected=False, extend_to_edge=False):
+    """The previous, cell by cell implementation"""
+    if extend_to_edge:
+        d2 = np.empty((data.shape[0]+2, data.shape[1]+2), dtype=data.dtype)
+        d2[1:-1, 1:-1] = data
+        d2[0, 1:-1] = data[0]
+        d2[-1, 1:-1] = data[-1]
+        d2[1:-1, 0] = data[:, 0]
+        d2[1:-1, -1] = data[:, -1]
+        d2[0, 0] = d2[0, 1]
+        d2[0, -1] = d2[1, -1]
+        d2[-1, 0] = d2[-1, 1]
+        d2[-1, -1] = d2[-1, -2]
+        data = d2
+
+    side_table = [
+        [],
+        [0, 1],
+        [1, 2],
+        [0, 2],
+        [0, 3],
+        [1, 3],
+        [0, 1, 2, 3],
+        [2, 3],
+        [2, 3],
+        [0, 1, 2, 3],
+        [1, 3],
+        [0, 3],
+        [0, 2],
+        [1, 2],
+        [0, 1],
+        []
+    ]
+
+    edge_key = [
+        [(0, 1), (0, 0)],
+        [(0, 0), (1, 0)],
+        [(1, 0), (1, 1)],
+        [(1, 1), (0, 1)]
+    ]
+
+    level = float(level)
+    lines = []
+
+    # mark everything below the isosurface level
+    mask = data < level
+
+    ## make four sub-fields and compute indexes for grid cells
+    index = np.zeros([x-1 for x in data.shape], dtype=np.ubyte)
+    fields = np.empty((2, 2), dtype=object)
+    slices = [slice(0, -1), slice(1, None)]
+    for i in [0, 1]:
+        for j in [0, 1]:
+            fields[i, j] = mask[slices[i], slices[j]]
+            vertIndex = i+2*j
+            index += (fields[i, j] * 2**vertIndex).astype(np.ubyte)
+
+    # add lines
+    for i in range(index.shape[0]):                 # data x-axis
+        for j in range(index.shape[1]):             # data y-axis
+            sides = side_table[index[i, j]]
+            for side_idx in range(0, len(sides), 2):  # faces for this grid cell
+                edges = sides[side_idx:side_idx+2]
+                pts = []
+                for m in [0, 1]:      # points in this face
+                    # p1, p2 are points at either side of an edge
+                    p1 = edge_key[edges[m]][0]
+                    p2 = edge_key[edges[m]][1]
+                    # v1 and v2 are the values at p1 and p2
+                    v1 = data[i+p1[0], j+p1[1]]
+                    v2 = data[i+p2[0], j+p2[1]]
+                    f = (level-v1) / (v2-v1)
+                    fi = 1.0 - f
+                    # interpolate between corners
+                    p = (p1[0]*fi + p2[0]*f + i + 0.5,
+                         p1[1]*fi + p2[1]*f + j + 0.5)
+                    if extend_to_edge:
+                        # check bounds
+                        p = (min(data.shape[0]-2, max(0, p[0]-1)),
+                             min(data.shape[1]-2, max(0, p[1]-1)))
+                    if connected:
+                        gridKey = (i + (1 if edges[m] == 2 else 0),
+                                   j + (1 if edges[m] == 3 else 0),
+                                   edges[m] % 2)
+                        # give the actual position and a key identifying the
+                        # grid location (for connecting segments)
+                        pts.append((p, gridKey))
+                    else:
+                        pts.append(p)
+
+                lines.append(pts)
+
+    if not connected:
+        return lines
+
+    # turn disjoint list of segments into continuous lines
+
+    points = {}  # maps each point to its connections
+    for a, b in lines:
+        if a[1] not in points:
+            points[a[1]] = []
+        points[a[1]].append([a, b])
+        if b[1] not in points:
+            points[b[1]] = []
+        points[b[1]].append([b, a])
+
+    # rearrange into chains
+    for k in list(points.keys()):
+        try:
+            chains = points[k]
+        except KeyError:  # already used this point elsewhere
+            continue
+        for chain in chains:
+            x = None
+            while True:
+                if x == chain[-1][1]:
+                    break  # nothing left to do on this chain
+
+                x = chain[-1][1]
+                if x == k:
+                    # chain has looped; we're done and can ignore the opposite
+                    # chain
+                    break
+                y = chain[-2][1]
+                connects = points[x]
+                for conn in connects[:]:
+                    if conn[1][1] != y:
+                        chain.extend(conn[1:])
+                del points[x]
+            if chain[0][1] == chain[-1][1]:
+                # looped chain; no need to continue the other direction
+                chains.pop()
+                break
+
+    # extract point locations
+    lines = []
+    for chain in points.values():
+        if len(chain) == 2:
+            # join together ends of chain
+            chain = chain[1][1:][::-1] + chain[0]
+        else:
+            chain = chain[0]
+        lines.append([pt[0] for pt in chain])
+
+    return lines  # a list of pairs of points
+
+
+def field(size):
+    x, y = np.indices((size, size))
+    noise = np.random.RandomState(0).normal(size=x.shape)
+    return np.sin(x / 50.) * np.cos(y / 37.) + noise * 0.05
+
+
+def bench(func, data, levels, **kwargs):
+    t0 = perf_counter()
+    results = [func(data, level, **kwargs) for level in levels]
+    return perf_counter() - t0, results
+
+
+if __name__ == '__main__':
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_levels = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    data = field(size)
+    levels = np.linspace(-0.9, 0.9, n_levels)
+    print('%d x %d field, %d levels' % (size, size, n_levels))
+    for connected in (False, True):
+        t_new, new = bench(isocurve, data, levels, connected=connected)
+        t_old, old = bench(isocurve_loops, data, levels, connected=connected)
+        if connected:
+            assert [len(p) for p in new] == [len(p) for p in old]
+        else:
+            assert all(np.array_equal(np.reshape(o, (-1, 2, 2)), n)
+                       for o, n in zip(old, new))
+        print('connected=%-5s  cell by cell: %7.3f s  arrays: %7.3f s  '
+              '(%.0fx)' % (connected, t_old, t_new, t_old / t_new))
@@ -9,6 +9,7 @@ import re
 import numpy as np
 
 from ...util.logs import _serialize_buffer
+from ...gloo.glir import encode_glir
 
 
 # -----------------------------------------------------------------------------
@@ -77,7 +78,32 @@ def _serialize_command(command_modified):
     return _serialize_item(command_modified)
 
 
-def create_glir_message(commands, array_serialization=None):
+def _create_packed_glir_message(commands, array_serialization):
+    """Create a message where the GLIR commands are packed in the binary
+    GLIR representation (see ``vispy.gloo.glir.encode_glir``). The first
+    buffer holds the packed command stream, the remaining buffers hold the
+    arrays it references (so buffer index ``i`` in the stream refers to
+    ``buffers[i + 1]``)."""
+    packed = encode_glir(commands)
+    buffers = [np.frombuffer(packed.header, np.uint8)] + packed.buffers
+    if array_serialization == 'binary':
+        # Pass the arrays without copying them
+        buffers_serialized = [memoryview(buffer).cast('B')
+                              for buffer in buffers]
+    else:
+        buffers_serialized = [_serialize_buffer(buffer, array_serialization)
+                              for buffer in buffers]
+    msg = {
+        'msg_type': 'glir_commands',
+        'command_serialization': 'binary',
+        'commands': {'buffer_index': 0},
+        'buffers': buffers_serialized,
+    }
+    return msg
+
+
+def create_glir_message(commands, array_serialization=None,
+                        command_serialization=None):
     """Create a JSON-serializable message of GLIR commands. NumPy arrays
     are serialized according to the specified method.
 
@@ -90,11 +116,23 @@ def create_glir_message(commands, array_serialization=None):
         Serialization method for NumPy arrays. Possible values are:
             'binary' (default) : use a binary string
             'base64' : base64 encoded string of the array
+    command_serialization : string or None
+        Serialization method for the commands. Possible values are:
+            'json' (default) : a JSON list for each command
+            'binary' : the packed binary GLIR representation, sent as
+            the first buffer
 
     """
     # Default serialization method for NumPy arrays.
     if array_serialization is None:
         array_serialization = 'binary'
+    if command_serialization is None:
+        command_serialization = 'json'
+    if command_serialization == 'binary':
+        return _create_packed_glir_message(commands, array_serialization)
+    elif command_serialization != 'json':
+        raise ValueError("The command serialization method should be 'json' "
+                         "or 'binary'.")
     # Extract the buffers.
     commands_modified, buffers = _extract_buffers(commands)
     # Serialize the modified commands (with buffer pointers) and the buffers.
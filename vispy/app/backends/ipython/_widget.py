@@ -60,6 +60,9 @@ class VispyWidget(DOMWidget):
     height = Int().tag(sync=True)
     resizable = Bool(value=True).tag(sync=True)
     webgl_config = Dict(value={}).tag(sync=True)
+    # 'json' or 'binary'; the latter requires a frontend that can decode
+    # the packed GLIR representation
+    command_serialization = 'json'
 
     def __init__(self, **kwargs):
         if DOMWidget is object:
@@ -94,7 +97,8 @@ class VispyWidget(DOMWidget):
         # older versions of ipython (<3.0) use base64
         # array_serialization = 'base64'
         array_serialization = 'binary'
-        msg = create_glir_message(commands, array_serialization)
+        msg = create_glir_message(commands, array_serialization,
+                                  self.command_serialization)
         msg['array_serialization'] = array_serialization
         if array_serialization == 'base64':
             self.send(msg)
@@ -6,6 +6,7 @@ import numpy as np
 from vispy.app.backends._ipynb_util import (_extract_buffers,
                                             _serialize_command,
                                             create_glir_message)
+from vispy.gloo.glir import decode_glir
 from vispy.testing import run_tests_if_main, assert_equal
 
 
@@ -124,4 +125,28 @@ def test_create_glir_message_base64():
                  'AQABAAEAAQABAAEAAQABAAEAAQABAAEAAQABAAEAAQABAAEAAQABAA==')
 
 
+def test_create_glir_message_packed():
+    arr = np.zeros((30, 2)).astype(np.float32)
+
+    commands = [('CREATE', 1, 'VertexBuffer'),
+                ('UNIFORM', 2, 'u_scale', 'vec3', (1, 2, 3)),
+                ('DATA', 3, 0, arr)]
+    msg = create_glir_message(commands, command_serialization='binary')
+    assert_equal(msg['msg_type'], 'glir_commands')
+    assert_equal(msg['command_serialization'], 'binary')
+    assert_equal(msg['commands'], {'buffer_index': 0})
+
+    buffers = msg['buffers']
+    assert_equal(len(buffers), 2)
+    assert_equal(bytes(buffers[1]), arr.tobytes())
+    commands_decoded = decode_glir(bytes(buffers[0]), buffers[1:])
+    assert_equal(commands_decoded[:2], commands[:2])
+    assert_equal(commands_decoded[2][:3], commands[2][:3])
+    assert np.array_equal(commands_decoded[2][3], arr)
+
+    msg = create_glir_message(commands, array_serialization='base64',
+                              command_serialization='binary')
+    assert_equal(msg['buffers'][1]['storage_type'], 'base64')
+
+
 run_tests_if_main()
@@ -3,7 +3,10 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 
 from __future__ import division  # just to be safe...
+import hashlib
 import inspect
+import weakref
+from collections import OrderedDict
 
 import numpy as np
 
@@ -425,21 +428,99 @@ class Colormap(BaseColormap):
         return self._map_function(self.colors.rgba, x, self._controls)
 
     def texture_lut(self):
-        """Return a texture2D object for LUT after its value is set."""
+        """Return a texture2D object for LUT after its value is set.
+
+        Colormaps with the same LUT and interpolation share their texture
+        within the objects shared by the current canvas.
+        """
         if self.texture_map_data is not None:
             interpolation_mode = 'linear' \
                 if(str(self.interpolation) == 'linear') \
                 else 'nearest'
-            texture_LUT = \
-                vispy.gloo.Texture2D(np.zeros(self.texture_map_data.shape),
-                                     interpolation=interpolation_mode)
-            texture_LUT.set_data(self.texture_map_data,
-                                 offset=None, copy=True)
+            texture_LUT = get_lut_cache().get(self.texture_map_data,
+                                              interpolation_mode)
         else:
             texture_LUT = None
         return texture_LUT
 
 
+class LUTCache(object):
+    """Cache of the LUT textures of colormaps
+
+    The textures are looked up by the content of their LUT and their
+    interpolation. A texture is kept as long as it is used, e.g. by the
+    program of a visual, and the most recently requested textures are kept
+    even when unused, such that switching back and forth between colormaps
+    does not create new textures. Older unused textures are deleted.
+
+    Parameters
+    ----------
+    max_unused : int
+        The number of recently requested textures to keep when unused.
+    """
+
+    def __init__(self, max_unused=16):
+        self.max_unused = max_unused
+        self._textures = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+
+    def __len__(self):
+        return len(self._textures)
+
+    def get(self, data, interpolation='linear'):
+        """Get the texture of a LUT
+
+        Parameters
+        ----------
+        data : ndarray
+            The LUT, of shape (n, 1, 4).
+        interpolation : str
+            The interpolation of the texture, 'linear' or 'nearest'.
+
+        Returns
+        -------
+        texture : instance of Texture2D
+            The texture of the LUT, to be used without modification.
+        """
+        data = np.ascontiguousarray(data)
+        key = (data.shape, data.dtype.str, interpolation,
+               hashlib.sha1(data.tobytes()).hexdigest())
+        texture = self._textures.get(key)
+        if texture is None:
+            texture = vispy.gloo.Texture2D(data, interpolation=interpolation)
+            self._textures[key] = texture
+        self._recent[key] = texture
+        self._recent.move_to_end(key)
+        while len(self._recent) > self.max_unused:
+            self._recent.popitem(last=False)
+        return texture
+
+
+_lut_caches = weakref.WeakKeyDictionary()
+
+
+def get_lut_cache():
+    """Get the LUT cache of the current canvas
+
+    The canvases sharing their objects share the cache. Without a current
+    canvas, a new cache is returned, since its textures could not be shared
+    with the canvas they are eventually used in.
+
+    Returns
+    -------
+    cache : instance of LUTCache
+        The cache.
+    """
+    from ..gloo.context import get_current_canvas
+    canvas = get_current_canvas()
+    if canvas is None:
+        return LUTCache(max_unused=0)
+    shared = canvas.context.shared
+    if shared not in _lut_caches:
+        _lut_caches[shared] = LUTCache()
+    return _lut_caches[shared]
+
+
 class MatplotlibColormap(Colormap):
     """Use matplotlib colormaps if installed.
 
@@ -2,6 +2,8 @@
 # Copyright (c) Vispy Development Team. All Rights Reserved.
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 
+import gc
+
 import numpy as np
 from numpy.testing import assert_array_equal, assert_allclose
 
@@ -349,4 +351,29 @@ def test_normalize():
     assert_allclose([y.min(), y.max()], [0.2975, 1-0.2975], 1e-1, 1e-1)
 
 
+def test_lut_cache():
+    """Test the sharing of the LUT textures of colormaps."""
+    from vispy.color.colormap import LUTCache
+    luts = [Colormap(colors).texture_map_data
+            for colors in (['k', 'w'], ['r', 'g'], ['g', 'b'], ['b', 'y'],
+                           ['y', 'c'])]
+    cache = LUTCache(max_unused=2)
+    texture = cache.get(luts[0])
+    assert cache.get(luts[0].copy()) is texture
+    assert cache.get(luts[0], 'nearest') is not texture
+    assert cache.get(luts[1]) is not texture
+    assert len(cache) == 3
+
+    # The least recently requested textures are deleted when unused
+    del texture
+    gc.collect()
+    assert len(cache) == 2
+    texture = cache.get(luts[1])
+    for lut in luts[2:]:
+        cache.get(lut)
+    gc.collect()
+    assert len(cache) == 3
+    assert cache.get(luts[1]) is texture
+
+
 run_tests_if_main()
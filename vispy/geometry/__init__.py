@@ -8,14 +8,15 @@ This module implements classes and methods for handling geometric data.
 
 from __future__ import division
 
-__all__ = ['MeshData', 'PolygonData', 'Rect', 'Triangulation', 'triangulate',
-           'create_arrow', 'create_box', 'create_cone', 'create_cube',
-           'create_cylinder', 'create_grid_mesh', 'create_plane',
+__all__ = ['GridIndex', 'MeshData', 'PolygonData', 'Rect', 'Triangulation',
+           'triangulate', 'create_arrow', 'create_box', 'create_cone',
+           'create_cube', 'create_cylinder', 'create_grid_mesh', 'create_plane',
            'create_sphere', 'resize']
 
 from .polygon import PolygonData  # noqa
 from .meshdata import MeshData  # noqa
 from .rect import Rect  # noqa
+from .spatial_index import GridIndex  # noqa
 from .triangulation import Triangulation, triangulate  # noqa
 from .torusknot import TorusKnot  # noqa
 from .calculations import (_calculate_normals, _fast_cross_3d,  # noqa
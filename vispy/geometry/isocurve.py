@@ -9,6 +9,63 @@ from __future__ import division
 import numpy as np
 
 
+# The grid cell edges crossed by the isocurve segments, for each of the 16
+# cases of corners below the level. Cases 6 and 9 have two segments.
+_SIDE_TABLE = [
+    [],
+    [0, 1],
+    [1, 2],
+    [0, 2],
+    [0, 3],
+    [1, 3],
+    [0, 1, 2, 3],
+    [2, 3],
+    [2, 3],
+    [0, 1, 2, 3],
+    [1, 3],
+    [0, 3],
+    [0, 2],
+    [1, 2],
+    [0, 1],
+    []
+]
+
+# the corners at either end of each edge of a grid cell
+_EDGE_KEY = np.array([
+    [(0, 1), (0, 0)],
+    [(0, 0), (1, 0)],
+    [(1, 0), (1, 1)],
+    [(1, 1), (0, 1)]
+])
+
+
+def _segment_tables():
+    """Arrays (16, 2, 2) of the edges of the segments of each case, as
+    listed in the side table and oriented with the region below the level
+    on their left
+    """
+    edges = np.zeros((16, 2, 2), dtype=np.intp)
+    oriented = np.zeros((16, 2, 2), dtype=np.intp)
+    mid = _EDGE_KEY.mean(axis=1)
+    for case, sides in enumerate(_SIDE_TABLE):
+        for k in range(len(sides) // 2):
+            a, b = sides[2 * k:2 * k + 2]
+            edges[case, k] = a, b
+            # a corner on one side of the segment
+            shared = set(map(tuple, _EDGE_KEY[a])) & \
+                set(map(tuple, _EDGE_KEY[b]))
+            corner = np.array(shared.pop() if shared else (0, 0))
+            below = bool(case & (1 << (corner[0] + 2 * corner[1])))
+            d, c = mid[b] - mid[a], corner - mid[a]
+            left = d[0] * c[1] - d[1] * c[0] > 0
+            oriented[case, k] = (a, b) if left == below else (b, a)
+    return edges, oriented
+
+
+_SEGMENT_EDGES, _ORIENTED_EDGES = _segment_tables()
+_N_SEGMENTS = np.array([len(sides) // 2 for sides in _SIDE_TABLE])
+
+
 def isocurve(data, level, connected=False, extend_to_edge=False):
     """
     Generate isocurve from 2D data using marching squares algorithm.
@@ -20,16 +77,14 @@ def isocurve(data, level, connected=False, extend_to_edge=False):
     level : float
         The level at which to generate an isosurface
     connected : bool
-        If False, return a single long list of point pairs
-        If True, return multiple long lists of connected point 
-        locations. (This is slower but better for drawing 
+        If False, return an array (N, 2, 2) of point pairs
+        If True, return a list of arrays (N, 2) of connected point
+        locations. (This is slower but better for drawing
         continuous lines)
     extend_to_edge : bool
-        If True, extend the curves to reach the exact edges of 
-        the data. 
-    """    
-    # This function is SLOW; plenty of room for optimization here.
-    
+        If True, extend the curves to reach the exact edges of
+        the data.
+    """
     if extend_to_edge:
         d2 = np.empty((data.shape[0]+2, data.shape[1]+2), dtype=data.dtype)
         d2[1:-1, 1:-1] = data
@@ -42,134 +97,111 @@ def isocurve(data, level, connected=False, extend_to_edge=False):
         d2[-1, 0] = d2[-1, 1]
         d2[-1, -1] = d2[-1, -2]
         data = d2
-    
-    side_table = [
-        [],
-        [0, 1],
-        [1, 2],
-        [0, 2],
-        [0, 3],
-        [1, 3],
-        [0, 1, 2, 3],
-        [2, 3],
-        [2, 3],
-        [0, 1, 2, 3],
-        [1, 3],
-        [0, 3],
-        [0, 2],
-        [1, 2],
-        [0, 1],
-        []
-    ]
-    
-    edge_key = [
-        [(0, 1), (0, 0)],
-        [(0, 0), (1, 0)],
-        [(1, 0), (1, 1)],
-        [(1, 1), (0, 1)]
-    ]
-    
+
     level = float(level)
-    lines = []
-    
+
     # mark everything below the isosurface level
     mask = data < level
-    
-    ## make four sub-fields and compute indexes for grid cells
+
+    # compute the case of each grid cell from its four corners
     index = np.zeros([x-1 for x in data.shape], dtype=np.ubyte)
-    fields = np.empty((2, 2), dtype=object)
     slices = [slice(0, -1), slice(1, None)]
     for i in [0, 1]:
         for j in [0, 1]:
-            fields[i, j] = mask[slices[i], slices[j]]
-            vertIndex = i+2*j
-            index += (fields[i, j] * 2**vertIndex).astype(np.ubyte)
-    
-    # add lines
-    for i in range(index.shape[0]):                 # data x-axis
-        for j in range(index.shape[1]):             # data y-axis     
-            sides = side_table[index[i, j]]
-            for side_idx in range(0, len(sides), 2):  # faces for this grid cell
-                edges = sides[side_idx:side_idx+2]
-                pts = []
-                for m in [0, 1]:      # points in this face
-                    # p1, p2 are points at either side of an edge
-                    p1 = edge_key[edges[m]][0] 
-                    p2 = edge_key[edges[m]][1]
-                    # v1 and v2 are the values at p1 and p2
-                    v1 = data[i+p1[0], j+p1[1]] 
-                    v2 = data[i+p2[0], j+p2[1]]
-                    f = (level-v1) / (v2-v1)
-                    fi = 1.0 - f
-                    # interpolate between corners
-                    p = (p1[0]*fi + p2[0]*f + i + 0.5, 
-                         p1[1]*fi + p2[1]*f + j + 0.5)
-                    if extend_to_edge:
-                        # check bounds
-                        p = (min(data.shape[0]-2, max(0, p[0]-1)),
-                             min(data.shape[1]-2, max(0, p[1]-1)))
-                    if connected:
-                        gridKey = (i + (1 if edges[m] == 2 else 0), 
-                                   j + (1 if edges[m] == 3 else 0), 
-                                   edges[m] % 2)
-                        # give the actual position and a key identifying the 
-                        # grid location (for connecting segments)
-                        pts.append((p, gridKey))
-                    else:
-                        pts.append(p)
-                
-                lines.append(pts)
+            index += mask[slices[i], slices[j]] * np.ubyte(2**(i+2*j))
+
+    # the segments of the cells crossed by the isocurve, in cell order
+    ci, cj = np.nonzero((index != 0) & (index != 15))
+    cases = index[ci, cj]
+    second = _N_SEGMENTS[cases] == 2
+    order = np.argsort(np.concatenate([2 * np.arange(len(ci)),
+                                       2 * np.nonzero(second)[0] + 1]),
+                       kind='stable')
+    si = np.concatenate([ci, ci[second]])[order]
+    sj = np.concatenate([cj, cj[second]])[order]
+    sk = np.concatenate([np.zeros(len(ci), np.intp),
+                         np.ones(second.sum(), np.intp)])[order]
+    table = _ORIENTED_EDGES if connected else _SEGMENT_EDGES
+    edges = table[np.concatenate([cases, cases[second]])[order], sk]
+
+    # interpolate the points along the crossed edges
+    points = np.empty((len(si), 2, 2))
+    for m in [0, 1]:
+        p1 = _EDGE_KEY[edges[:, m], 0]
+        p2 = _EDGE_KEY[edges[:, m], 1]
+        v1 = data[si + p1[:, 0], sj + p1[:, 1]]
+        v2 = data[si + p2[:, 0], sj + p2[:, 1]]
+        f = (level - v1) / (v2 - v1)
+        fi = 1.0 - f
+        points[:, m, 0] = p1[:, 0]*fi + p2[:, 0]*f + si + 0.5
+        points[:, m, 1] = p1[:, 1]*fi + p2[:, 1]*f + sj + 0.5
+    if extend_to_edge:
+        # check bounds
+        points -= 1
+        np.clip(points[..., 0], 0, data.shape[0] - 2, out=points[..., 0])
+        np.clip(points[..., 1], 0, data.shape[1] - 2, out=points[..., 1])
 
     if not connected:
-        return lines
-                
-    # turn disjoint list of segments into continuous lines
-
-    points = {}  # maps each point to its connections
-    for a, b in lines:
-        if a[1] not in points:
-            points[a[1]] = []
-        points[a[1]].append([a, b])
-        if b[1] not in points:
-            points[b[1]] = []
-        points[b[1]].append([b, a])
-
-    # rearrange into chains
-    for k in list(points.keys()):
-        try:
-            chains = points[k]
-        except KeyError:  # already used this point elsewhere
-            continue
-        for chain in chains:
-            x = None
-            while True:
-                if x == chain[-1][1]:
-                    break  # nothing left to do on this chain
-                    
-                x = chain[-1][1]
-                if x == k:
-                    # chain has looped; we're done and can ignore the opposite
-                    # chain
-                    break
-                y = chain[-2][1]
-                connects = points[x]
-                for conn in connects[:]:
-                    if conn[1][1] != y:
-                        chain.extend(conn[1:])
-                del points[x]
-            if chain[0][1] == chain[-1][1]:
-                # looped chain; no need to continue the other direction
-                chains.pop()
-                break
-                
-    # extract point locations 
-    lines = []
-    for chain in points.values():
-        if len(chain) == 2:
-            # join together ends of chain
-            chain = chain[1][1:][::-1] + chain[0]
-        else:
-            chain = chain[0]
-        lines.append([pt[0] for pt in chain])
-    
-    return lines  # a list of pairs of points
+        return points
+
+    # Identify the crossed edges of the grid: edges 0 and 2 of a cell are
+    # along the second axis, edges 1 and 3 along the first one.
+    n0, n1 = data.shape
+    ids = np.empty((len(si), 2), dtype=np.intp)
+    for m in [0, 1]:
+        e = edges[:, m]
+        gi = si + (e == 2)
+        gj = sj + (e == 3)
+        ids[:, m] = np.where(e % 2 == 0, gi * (n1 - 1) + gj,
+                             n0 * (n1 - 1) + gi * n1 + gj)
+    return _chain_segments(points, ids, n0 * (n1 - 1) + (n0 - 1) * n1)
+
+
+def _chain_segments(points, ids, n_ids):
+    """Assemble oriented segments into connected paths
+
+    Each segment ends where at most one other segment starts, so that the
+    segments form a set of chains and loops. These are ordered with pointer
+    jumping, in a logarithmic number of array operations.
+    """
+    n = len(points)
+    if n == 0:
+        return []
+    segments = np.arange(n)
+    starting = np.full(n_ids, -1, dtype=np.intp)
+    starting[ids[:, 0]] = segments
+    nxt = starting[ids[:, 1]]
+    steps = int(np.ceil(np.log2(n))) + 1
+
+    # the smallest segment of each loop starts it
+    label = segments.copy()
+    jump = nxt.copy()
+    for _ in range(steps):
+        valid = jump >= 0
+        target = jump[valid]
+        label[valid] = np.minimum(label[valid], label[target])
+        jump[valid] = jump[target]
+    loop_start = (jump >= 0) & (label == segments)
+    prev = np.full(n, -1, dtype=np.intp)
+    prev[nxt[nxt >= 0]] = segments[nxt >= 0]
+    prev[loop_start] = -1
+
+    # the first segment of each path, and the position of each segment
+    first = segments.copy()
+    depth = (prev >= 0).astype(np.intp)
+    jump = prev.copy()
+    for _ in range(steps):
+        valid = jump >= 0
+        if not valid.any():
+            break
+        target = jump[valid]
+        first[valid] = first[target]
+        depth[valid] += depth[target]
+        jump[valid] = jump[target]
+    order = np.lexsort((depth, first))
+
+    # the start of each segment, and the end of the last one of each path
+    ends = np.append(np.nonzero(np.diff(first[order]))[0] + 1, n)
+    path_points = np.insert(points[order, 0], ends, points[order[ends - 1], 1],
+                            axis=0)
+    return np.split(path_points, (ends + np.arange(1, len(ends) + 1))[:-1])
@@ -1,3 +1,5 @@
+from collections import OrderedDict
+
 import numpy as np
 
 _data_cache = None
@@ -6,133 +8,257 @@ _data_cache = None
 def isosurface(data, level):
     """
     Generate isosurface from volumetric data using marching cubes algorithm.
-    See Paul Bourke, "Polygonising a Scalar Field"  
+    See Paul Bourke, "Polygonising a Scalar Field"
     (http://paulbourke.net/geometry/polygonise/)
-    
+
     *data*   3D numpy array of scalar values
     *level*  The level at which to generate an isosurface
-    
-    Returns an array of vertex coordinates (Nv, 3) and an array of 
-    per-face vertex indexes (Nf, 3)    
+
+    Returns an array of vertex coordinates (Nv, 3) and an array of
+    per-face vertex indexes (Nf, 3)
+
+    See ``IsosurfaceIndex`` to extract several isosurfaces of the same data.
     """
     # For improvement, see:
-    # 
-    # Efficient implementation of Marching Cubes' cases with topological 
+    #
+    # Efficient implementation of Marching Cubes' cases with topological
     # guarantees.
     # Thomas Lewiner, Helio Lopes, Antonio Wilson Vieira and Geovan Tavares.
     # Journal of Graphics Tools 8(2): pp. 1-15 (december 2003)
+    return IsosurfaceIndex(data, cache_size=0).isosurface(level)
 
-    (face_shift_tables, edge_shifts, 
-     edge_table, n_table_faces) = _get_data_cache()
-    
-    ## mark everything below the isosurface level
-    mask = data < level
 
-    # Because we make use of the strides data attribute below, we have to make 
-    # sure that the data is contiguous (which it won't be if the user did 
-    # data.transpose() for example). Note that this doesn't copy the data if it 
-    # is already contiguous.
-    data = np.ascontiguousarray(data)
+class IsosurfaceIndex(object):
+    """Index of a volume to quickly extract its isosurfaces
 
-    ### make eight sub-fields and compute indexes for grid cells
-    index = np.zeros([x-1 for x in data.shape], dtype=np.ubyte)
-    fields = np.empty((2, 2, 2), dtype=object)
-    slices = [slice(0, -1), slice(1, None)]
-    for i in [0, 1]:
-        for j in [0, 1]:
-            for k in [0, 1]:
-                fields[i, j, k] = mask[slices[i], slices[j], slices[k]]
-                # this is just to match Bourk's vertex numbering scheme:
-                vertIndex = i - 2*j*i + 3*j + 4*k
-                index += (fields[i, j, k] * 2**vertIndex).astype(np.ubyte)
-    
-    ### Generate table of edges that have been cut
-    cut_edges = np.zeros([x+1 for x in index.shape]+[3], dtype=np.uint32)
-    edges = edge_table[index]
-    for i, shift in enumerate(edge_shifts[:12]):        
-        slices = [slice(shift[j], cut_edges.shape[j]+(shift[j]-1)) 
-                  for j in range(3)]
-        cut_edges[slices[0], slices[1], slices[2], shift[3]] += edges & 2**i
-    
-    # for each cut edge, interpolate to see where exactly the edge is cut and 
-    # generate vertex positions
-    m = cut_edges > 0
-    vertex_inds = np.argwhere(m)  # argwhere is slow!
-    vertexes = vertex_inds[:, :3].astype(np.float32).copy()
-    dataFlat = data.reshape(data.shape[0]*data.shape[1]*data.shape[2])
-    
-    ## re-use the cut_edges array as a lookup table for vertex IDs
-    cut_edges[vertex_inds[:, 0], 
-              vertex_inds[:, 1], 
-              vertex_inds[:, 2], 
-              vertex_inds[:, 3]] = np.arange(vertex_inds.shape[0])
-    
-    for i in [0, 1, 2]:
-        vim = vertex_inds[:, 3] == i
-        vi = vertex_inds[vim, :3]
-        vi_flat = (vi * (np.array(data.strides[:3]) // 
-                         data.itemsize)[np.newaxis, :]).sum(axis=1)
-        v1 = dataFlat[vi_flat]
-        v2 = dataFlat[vi_flat + data.strides[i]//data.itemsize]
-        vertexes[vim, i] += (level-v1) / (v2-v1)
-    
-    ### compute the set of vertex indexes for each face. 
-    
-    ## This works, but runs a bit slower.
-    ## all cells with at least one face:
-    #cells = np.argwhere((index != 0) & (index != 255))  
-    #cellInds = index[cells[:, 0], cells[:, 1], cells[:, 2]]
-    #verts = faceTable[cellInds]
-    #mask = verts[..., 0, 0] != 9
-    ## we now have indexes into cut_edges:
-    #verts[...,:3] += cells[:, np.newaxis, np.newaxis,:]
-    #verts = verts[mask]
-    ## and these are the vertex indexes we want:
-    #faces = cut_edges[verts[..., 0], verts[..., 1], verts[..., 2], 
-    #                  verts[..., 3]]  
-    
-    # To allow this to be vectorized efficiently, we count the number of faces 
-    # in each grid cell and handle each group of cells with the same number 
-    # together.
-    
-    # determine how many faces to assign to each grid cell
-    n_faces = n_table_faces[index]
-    tot_faces = n_faces.sum()
-    faces = np.empty((tot_faces, 3), dtype=np.uint32)
-    ptr = 0
-    
-    ## this helps speed up an indexing operation later on
-    cs = np.array(cut_edges.strides)//cut_edges.itemsize
-    cut_edges = cut_edges.flatten()
+    The cells of the volume are grouped in blocks, and the minimum and
+    maximum of each block are precomputed, so that only the blocks that
+    straddle the level are visited by the marching cubes (a span space
+    index). The triangles of each block are cached for the last levels, so
+    that when part of the data changes only the blocks around it are
+    computed again.
+
+    Parameters
+    ----------
+    data : ndarray
+        3D array of scalar values. The array is not copied: call
+        ``set_data`` or ``update`` when its values change.
+    block_size : int
+        The number of cells along each side of the blocks.
+    cache_size : int
+        The number of levels to keep the triangles of.
+    """
 
-    ## this, strangely, does not seem to help.
-    #ins = np.array(index.strides)/index.itemsize
-    #index = index.flatten()
+    def __init__(self, data, block_size=8, cache_size=4):
+        self._block_size = int(block_size)
+        self._cache_size = int(cache_size)
+        self._cache = OrderedDict()
+        self.set_data(data)
 
-    for i in range(1, 6):
-        # expensive:
-        # all cells which require i faces  (argwhere is expensive)
-        cells = np.argwhere(n_faces == i)  
-        if cells.shape[0] == 0:
-            continue
-        # index values of cells to process for this round:
-        cellInds = index[cells[:, 0], cells[:, 1], cells[:, 2]]
-        
-        # expensive:
-        verts = face_shift_tables[i][cellInds]
-        # we now have indexes into cut_edges:
-        verts[..., :3] += (cells[:, np.newaxis,
-                                 np.newaxis, :]).astype(np.uint16)
-        verts = verts.reshape((verts.shape[0]*i,)+verts.shape[2:])
-        
-        # expensive:
-        verts = (verts * cs[np.newaxis, np.newaxis, :]).sum(axis=2)
-        vert_inds = cut_edges[verts]
-        nv = vert_inds.shape[0]
-        faces[ptr:ptr+nv] = vert_inds  # .reshape((nv, 3))
-        ptr += nv
-        
-    return vertexes, faces
+    @property
+    def data(self):
+        """The 3D array of scalar values"""
+        return self._data
+
+    def set_data(self, data, region=None):
+        """Set new data, and index it
+
+        Parameters
+        ----------
+        data : ndarray
+            3D array of scalar values.
+        region : tuple of slice | None
+            The region where the new data differs from the current data, as
+            a tuple of three slices with a step of 1. Only the blocks around
+            it are indexed and computed again. By default, all of the data
+            is new.
+        """
+        data = np.ascontiguousarray(data)
+        if data.ndim != 3 or min(data.shape) < 2:
+            raise ValueError('data must be a 3D array with at least 2 values '
+                             'along each axis')
+        if region is not None:
+            if data.shape != self._data.shape or \
+                    data.dtype != self._data.dtype:
+                raise ValueError('data with a region must have the shape and '
+                                 'type of the current data')
+            self._data = data
+            self.update(region)
+            return
+        self._data = data
+        n_blocks = [-(-(n - 1) // self._block_size) for n in data.shape]
+        self._block_min = np.empty(n_blocks, dtype=data.dtype)
+        self._block_max = np.empty(n_blocks, dtype=data.dtype)
+        self._cache.clear()
+        self._index_blocks((slice(None),) * 3)
+
+    def update(self, region=None):
+        """Update the index after the data changed in place
+
+        Parameters
+        ----------
+        region : tuple of slice | None
+            The region of the data that changed, as a tuple of three slices
+            with a step of 1. By default, all of the data changed.
+        """
+        if region is None:
+            self.set_data(self._data)
+            return
+        if len(region) != 3:
+            raise ValueError('region must be a tuple of three slices')
+        blocks = []
+        for r, n in zip(region, self._data.shape):
+            start, stop, step = r.indices(n)
+            if step != 1:
+                raise ValueError('the slices of the region must have a step '
+                                 'of 1')
+            if stop <= start:
+                return
+            # the cells touching the changed values
+            blocks.append(slice(max(start - 1, 0) // self._block_size,
+                                min(stop - 1, n - 2) // self._block_size + 1))
+        blocks = tuple(blocks)
+        self._index_blocks(blocks)
+        dirty = np.zeros(self._block_min.shape, bool)
+        dirty[blocks] = True
+        dirty = np.ravel_multi_index(np.nonzero(dirty), dirty.shape)
+        for entry in self._cache.values():
+            entry['dirty'] = np.union1d(entry['dirty'], dirty)
+            entry['surface'] = None
+
+    def isosurface(self, level):
+        """Generate the isosurface at a level
+
+        Parameters
+        ----------
+        level : float
+            The level at which to generate an isosurface.
+
+        Returns
+        -------
+        vertices : ndarray
+            Array (Nv, 3) of vertex coordinates.
+        faces : ndarray
+            Array (Nf, 3) of vertex indices.
+        """
+        level = float(level)
+        entry = self._cache.pop(level, None)
+        if entry is None:
+            active = (self._block_min < level) & (self._block_max >= level)
+            blocks = np.ravel_multi_index(np.nonzero(active), active.shape)
+            edges, block_ids = self._triangles(blocks, level)
+            entry = dict(edges=edges, blocks=block_ids, surface=None,
+                         dirty=np.zeros(0, np.intp))
+        elif len(entry['dirty']):
+            # compute the triangles of the changed blocks again
+            keep = ~np.isin(entry['blocks'], entry['dirty'])
+            dirty = np.unravel_index(entry['dirty'], self._block_min.shape)
+            active = (self._block_min[dirty] < level) & \
+                (self._block_max[dirty] >= level)
+            edges, block_ids = self._triangles(entry['dirty'][active], level)
+            entry['edges'] = np.concatenate([entry['edges'][keep], edges])
+            entry['blocks'] = np.concatenate([entry['blocks'][keep],
+                                              block_ids])
+            entry['dirty'] = np.zeros(0, np.intp)
+        if entry['surface'] is None:
+            entry['surface'] = self._weld(entry['edges'], level)
+        if self._cache_size > 0:
+            self._cache[level] = entry
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return entry['surface']
+
+    def _index_blocks(self, blocks):
+        """Compute the minimum and maximum of a range of blocks"""
+        b = self._block_size
+        data = self._data
+        ranges = [range(*s.indices(n)) for s, n in
+                  zip(blocks, self._block_min.shape)]
+        # the values of the cells of the blocks, along each axis
+        values = data[tuple(slice(r.start * b, min(r.stop * b + 1, n))
+                            for r, n in zip(ranges, data.shape))]
+        lo = hi = values
+        for axis, r in enumerate(ranges):
+            starts = np.arange(len(r)) * b
+            ends = np.minimum(starts + b, values.shape[axis] - 1)
+            lo = np.fmin(np.fmin.reduceat(lo, starts, axis=axis),
+                         np.take(lo, ends, axis=axis))
+            hi = np.maximum(np.maximum.reduceat(hi, starts, axis=axis),
+                            np.take(hi, ends, axis=axis))
+        # NaN values are not below any level, like values above all levels:
+        # they are ignored by the minimum, and make the maximum infinite
+        hi = np.where(np.isnan(hi), np.inf, hi)
+        self._block_min[blocks] = lo
+        self._block_max[blocks] = hi
+
+    def _triangles(self, blocks, level, chunk=256):
+        """The edge IDs of the triangles of the blocks at a level, and the
+        block of each triangle
+        """
+        edge_shifts, n_table_faces, tri_table = _get_data_cache()[1:]
+        data = self._data
+        b = self._block_size
+        shape = np.array(data.shape)
+        # indices of the corners of the cells of a block, clipped to the data
+        corner = np.arange(b + 1)
+        edges = [np.zeros((0, 3), np.intp)]
+        block_ids = [np.zeros(0, np.intp)]
+        for start in range(0, len(blocks), chunk):
+            ids = blocks[start:start + chunk]
+            origin = np.stack(np.unravel_index(ids, self._block_min.shape),
+                              axis=1) * b
+            x, y, z = [np.minimum(origin[:, axis, None] + corner, n - 1)
+                       for axis, n in enumerate(data.shape)]
+            values = data[x[:, :, None, None], y[:, None, :, None],
+                          z[:, None, None, :]]
+
+            # mark everything below the isosurface level, and compute the
+            # case of each cell
+            mask = values < level
+            index = np.zeros((len(ids), b, b, b), dtype=np.ubyte)
+            slices = [slice(0, -1), slice(1, None)]
+            for i in [0, 1]:
+                for j in [0, 1]:
+                    for k in [0, 1]:
+                        # this is just to match Bourk's vertex numbering
+                        # scheme:
+                        vert_index = i - 2*j*i + 3*j + 4*k
+                        index += mask[:, slices[i], slices[j], slices[k]] * \
+                            np.ubyte(2**vert_index)
+            blk, ci, cj, ck = np.nonzero((index != 0) & (index != 255))
+            cells = origin[blk] + np.stack([ci, cj, ck], axis=1)
+            inside = (cells < shape - 1).all(axis=1)
+            cells = cells[inside]
+            cases = index[blk, ci, cj, ck][inside]
+            blk = blk[inside]
+
+            # the triangles of each cell, as the IDs of the grid edges of
+            # their vertices
+            n_faces = n_table_faces[cases].astype(np.intp)
+            cell = np.repeat(np.arange(len(cases)), n_faces)
+            face = np.arange(len(cell)) - np.repeat(np.cumsum(n_faces) -
+                                                    n_faces, n_faces)
+            shifts = edge_shifts[tri_table[cases[cell], face]]
+            points = cells[cell, None, :] + shifts[..., :3]
+            edges.append(((points[..., 0] * shape[1] + points[..., 1]) *
+                          shape[2] + points[..., 2]) * 3 + shifts[..., 3])
+            block_ids.append(ids[blk[cell]])
+        return np.concatenate(edges), np.concatenate(block_ids)
+
+    def _weld(self, edges, level):
+        """Vertices and faces from the edge IDs of triangles"""
+        data = self._data
+        ids, faces = np.unique(edges, return_inverse=True)
+        faces = faces.reshape(-1, 3).astype(np.uint32)
+        axis = ids % 3
+        points = np.stack(np.unravel_index(ids // 3, data.shape), axis=1)
+        v1 = data[points[:, 0], points[:, 1], points[:, 2]]
+        other = points.copy()
+        other[np.arange(len(ids)), axis] += 1
+        v2 = data[other[:, 0], other[:, 1], other[:, 2]]
+        vertices = points.astype(np.float32)
+        vertices[np.arange(len(ids)), axis] += (level - v1) / (v2 - v1)
+        return vertices, faces
 
 
 def _get_data_cache():
@@ -462,17 +588,12 @@ def _get_data_cache():
             # will need the extra precision.
         ], dtype=np.uint16) 
         n_table_faces = np.array([len(f)/3 for f in triTable], dtype=np.ubyte)
-        face_shift_tables = [None]
-        for i in range(1, 6):
-            ## compute lookup table of index: vertexes mapping
-            faceTableI = np.zeros((len(triTable), i*3), dtype=np.ubyte)
-            faceTableInds = np.argwhere(n_table_faces == i)[:, 0]
-            faceTableI[faceTableInds] = np.array([triTable[j] for j in
-                                                 faceTableInds])
-            faceTableI = faceTableI.reshape((len(triTable), i, 3))
-            face_shift_tables.append(edge_shifts[faceTableI])
-            
-        _data_cache = (face_shift_tables, edge_shifts, edge_table, 
-                       n_table_faces)
+        # the edges of the triangles of each cell case, padded to 5 triangles
+        tri_table = np.zeros((len(triTable), 5, 3), dtype=np.intp)
+        for i, f in enumerate(triTable):
+            tri_table[i, :len(f) // 3] = np.reshape(f, (-1, 3))
+
+        _data_cache = (edge_table, edge_shifts.astype(np.intp),
+                       n_table_faces, tri_table)
         
     return _data_cache
@@ -75,6 +75,8 @@ class MeshData(object):
         # self._vertices, 3 edge / face and 2 verts/edge
         # inverse mappings
         self._vertex_faces = None  # maps vertex ID to a list of face IDs
+        # (offsets, face IDs) CSR arrays of the faces of each vertex
+        self._vertex_face_adjacency = None
         self._vertex_edges = None  # maps vertex ID to a list of edge IDs
 
         # Per-vertex data
@@ -158,6 +160,7 @@ class MeshData(object):
         self._edges = None
         self._edges_indexed_by_faces = None
         self._vertex_faces = None
+        self._vertex_face_adjacency = None
         self._vertices_indexed_by_faces = None
         self.reset_normals()
         self._vertex_colors_indexed_by_faces = None
@@ -328,20 +331,18 @@ class MeshData(object):
         """
         if self._vertex_normals is None:
             faceNorms = self.get_face_normals()
-            vertFaces = self.get_vertex_faces()
-            self._vertex_normals = np.empty(self._vertices.shape,
-                                            dtype=np.float32)
-            for vindex in range(self._vertices.shape[0]):
-                faces = vertFaces[vindex]
-                if len(faces) == 0:
-                    self._vertex_normals[vindex] = (0, 0, 0)
-                    continue
-                norms = faceNorms[faces]  # get all face normals
-                norm = norms.sum(axis=0)  # sum normals
-                renorm = (norm**2).sum()**0.5
-                if renorm > 0:
-                    norm /= renorm
-                self._vertex_normals[vindex] = norm
+            # sum the normals of the faces of each vertex
+            n_vertices = len(self.get_vertices())
+            faces = self.get_faces().ravel().astype(np.intp)
+            norms = np.empty((n_vertices, 3), dtype=np.float32)
+            for axis in range(3):
+                norms[:, axis] = np.bincount(
+                    faces, np.repeat(faceNorms[:, axis], 3),
+                    minlength=n_vertices)
+            renorm = np.sqrt((norms ** 2).sum(axis=1))
+            nonzero = renorm > 0
+            norms[nonzero] /= renorm[nonzero, np.newaxis]
+            self._vertex_normals = norms
 
         if indexed is None:
             return self._vertex_normals
@@ -548,6 +549,7 @@ class MeshData(object):
         self._faces = np.empty(faces.shape[:2], dtype=np.uint32)
         self._vertices = []
         self._vertex_faces = []
+        self._vertex_face_adjacency = None
         self._face_normals = None
         self._vertex_normals = None
         for i in range(faces.shape[0]):
@@ -570,15 +572,37 @@ class MeshData(object):
     def get_vertex_faces(self):
         """
         List mapping each vertex index to a list of face indices that use it.
+
+        See ``get_vertex_face_adjacency`` for the same mapping as arrays.
         """
         if self._vertex_faces is None:
-            self._vertex_faces = [[] for i in range(len(self.get_vertices()))]
-            for i in range(self._faces.shape[0]):
-                face = self._faces[i]
-                for ind in face:
-                    self._vertex_faces[ind].append(i)
+            offsets, faces = self.get_vertex_face_adjacency()
+            self._vertex_faces = np.split(faces, offsets[1:-1])
         return self._vertex_faces
 
+    def get_vertex_face_adjacency(self):
+        """Faces using each vertex, in compressed sparse row format
+
+        The faces using vertex ``i`` are ``faces[offsets[i]:offsets[i+1]]``,
+        in increasing order. The arrays are cached until the faces change.
+
+        Returns
+        -------
+        offsets : ndarray
+            Array (Nv + 1,) of the start of the faces of each vertex.
+        faces : ndarray
+            Array (3 * Nf,) of face indices, grouped by vertex.
+        """
+        if self._vertex_face_adjacency is None:
+            n_vertices = len(self.get_vertices())
+            vertices = self.get_faces().ravel().astype(np.intp)
+            order = np.argsort(vertices, kind='stable')
+            offsets = np.zeros(n_vertices + 1, dtype=np.intp)
+            np.cumsum(np.bincount(vertices, minlength=n_vertices),
+                      out=offsets[1:])
+            self._vertex_face_adjacency = (offsets, order // 3)
+        return self._vertex_face_adjacency
+
     def _compute_edges(self, indexed=None):
         if indexed is None:
             if self._faces is not None:
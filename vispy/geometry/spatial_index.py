@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""Spatial index of 2D items for fast hit-testing on the CPU
+"""
+
+from __future__ import division
+
+import numpy as np
+
+
+class GridIndex(object):
+    """Uniform grid index of 2D points or boxes
+
+    The items are sorted by the cell of the grid that holds their center, so
+    that the items of a row of cells are contiguous. Queries only look at
+    the cells they overlap, and then test the items exactly.
+
+    Parameters
+    ----------
+    points : array
+        Array of shape (N, 2) of the items, or of the center of their
+        boxes. Further columns are ignored.
+    extents : array | None
+        Array of shape (N, 2) of the half size of the box of the items, or
+        None if the items are points.
+    cell_size : float | None
+        The size of the cells of the grid. By default, there are about two
+        items per cell.
+    """
+    def __init__(self, points, extents=None, cell_size=None):
+        self._cell_size = cell_size
+        self._build(points, extents)
+
+    def __len__(self):
+        return len(self._points)
+
+    def _build(self, points, extents):
+        points = np.array(points, dtype=np.float64)[:, :2]
+        self._points = points
+        if extents is not None:
+            extents = np.abs(np.array(extents, dtype=np.float64))[:, :2]
+            self._max_extent = extents.max(axis=0) if len(extents) else \
+                np.zeros(2)
+        else:
+            self._max_extent = np.zeros(2)
+        self._extents = extents
+
+        finite = points[np.isfinite(points).all(axis=1)]
+        if len(finite):
+            lo, hi = finite.min(axis=0), finite.max(axis=0)
+        else:
+            lo, hi = np.zeros(2), np.zeros(2)
+        size = hi - lo
+        cell = self._cell_size
+        if cell is None:
+            # about two items per cell, over the dimensions that have a size
+            flat = size > 0
+            area = np.prod(size[flat]) if flat.any() else 1.
+            dims = max(flat.sum(), 1)
+            cell = (2. * area / max(len(points), 1)) ** (1. / dims)
+        shape = np.clip(np.floor(size / cell) + 1, 1, 2 ** 15)
+        self._origin, self._hi = lo, hi
+        self._cell = np.where(size > 0, size / shape, 1.)
+        self._shape = shape.astype(np.int64)
+
+        keys = self._keys(points)
+        self._order = np.argsort(keys, kind='stable')
+        self._sorted_keys = keys[self._order]
+
+    def _cells(self, points):
+        cells = np.nan_to_num(np.floor((points - self._origin) / self._cell))
+        return np.clip(cells, 0, self._shape - 1).astype(np.int64)
+
+    def _keys(self, points):
+        cells = self._cells(points)
+        return cells[:, 1] * self._shape[0] + cells[:, 0]
+
+    def update(self, offset, points, extents=None):
+        """Move a range of items
+
+        Only the items that change of cell are sorted again, unless they
+        leave the grid, which is then built again.
+
+        Parameters
+        ----------
+        offset : int
+            The index of the first item to move.
+        points : array
+            Array of shape (M, 2) of the new position of the items.
+        extents : array | None
+            Array of shape (M, 2) of the new half size of the boxes of the
+            items, if the index holds boxes.
+        """
+        points = np.array(points, dtype=np.float64)[:, :2]
+        stop = offset + len(points)
+        if offset < 0 or stop > len(self._points):
+            raise ValueError('items %d to %d do not exist, there are %d '
+                             'items' % (offset, stop, len(self._points)))
+        if (extents is None) != (self._extents is None):
+            raise ValueError('extents must be given if and only if the index '
+                             'holds boxes')
+        old_keys = self._keys(self._points[offset:stop])
+        self._points[offset:stop] = points
+        if extents is not None:
+            extents = np.abs(np.array(extents, dtype=np.float64))[:, :2]
+            self._extents[offset:stop] = extents
+            if len(extents):
+                self._max_extent = np.maximum(self._max_extent,
+                                              extents.max(axis=0))
+        if not ((points >= self._origin) & (points <= self._hi)).all():
+            self._build(self._points, self._extents)
+            return
+
+        new_keys = self._keys(points)
+        moved = np.nonzero(new_keys != old_keys)[0]
+        if len(moved) == 0:
+            return
+        is_moved = np.zeros(len(self._points), dtype=bool)
+        is_moved[offset + moved] = True
+        keep = ~is_moved[self._order]
+        keys, order = self._sorted_keys[keep], self._order[keep]
+        moved_order = np.argsort(new_keys[moved], kind='stable')
+        moved_keys = new_keys[moved][moved_order]
+        where = np.searchsorted(keys, moved_keys, 'right')
+        self._sorted_keys = np.insert(keys, where, moved_keys)
+        self._order = np.insert(order, where, offset + moved[moved_order])
+
+    def query_box(self, lo, hi):
+        """Find the items in a box
+
+        Parameters
+        ----------
+        lo : array-like
+            The lower corner of the box.
+        hi : array-like
+            The upper corner of the box.
+
+        Returns
+        -------
+        index : array
+            The sorted index of the points in the box, or of the boxes that
+            overlap it.
+        """
+        lo = np.asarray(lo, dtype=np.float64)[:2]
+        hi = np.asarray(hi, dtype=np.float64)[:2]
+        candidates = self._candidates(lo - self._max_extent,
+                                      hi + self._max_extent)
+        points = self._points[candidates]
+        if self._extents is None:
+            inside = ((points >= lo) & (points <= hi)).all(axis=1)
+        else:
+            extents = self._extents[candidates]
+            inside = ((points + extents >= lo) &
+                      (points - extents <= hi)).all(axis=1)
+        return np.sort(candidates[inside])
+
+    def _candidates(self, lo, hi):
+        """The items of the cells overlapping a box"""
+        if (hi < lo).any() or not len(self._points):
+            return np.zeros(0, dtype=np.int64)
+        (x0, y0), (x1, y1) = self._cells(np.array([lo, hi]))
+        rows = np.arange(y0, y1 + 1) * self._shape[0]
+        starts = np.searchsorted(self._sorted_keys, rows + x0, 'left')
+        stops = np.searchsorted(self._sorted_keys, rows + x1, 'right')
+        return np.concatenate([self._order[a:b]
+                               for a, b in zip(starts, stops)] +
+                              [np.zeros(0, dtype=self._order.dtype)])
+
+    def query_radius(self, center, radius):
+        """Find the points within a distance of a position
+
+        Parameters
+        ----------
+        center : array-like
+            The position.
+        radius : float
+            The distance.
+
+        Returns
+        -------
+        index : array
+            The index of the points, sorted by distance.
+        distance : array
+            The distance of the points.
+        """
+        center = np.asarray(center, dtype=np.float64)[:2]
+        index = self.query_box(center - radius, center + radius)
+        distance = np.sqrt(((self._points[index] - center) ** 2).sum(axis=1))
+        close = distance <= radius
+        index, distance = index[close], distance[close]
+        order = np.argsort(distance, kind='stable')
+        return index[order], distance[order]
+
+    def nearest(self, center, k=1):
+        """Find the nearest points to a position
+
+        Parameters
+        ----------
+        center : array-like
+            The position.
+        k : int
+            The number of points to find.
+
+        Returns
+        -------
+        index : array
+            The index of the k nearest points, sorted by distance.
+        distance : array
+            The distance of the points.
+        """
+        center = np.asarray(center, dtype=np.float64)[:2]
+        k = min(k, len(self._points))
+        if k <= 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        # grow the searched disc until it holds k points
+        radius = self._cell.max()
+        far = np.abs(np.array([self._origin, self._hi]) - center).max()
+        while True:
+            index, distance = self.query_radius(center, radius)
+            if len(index) >= k or radius > 2 * far:
+                break
+            radius *= 2
+        return index[:k], distance[:k]
+
+
+def _imap_square(tr, center, half):
+    """The bounding box of a square around *center*, mapped by *tr*"""
+    x, y = center[0], center[1]
+    corners = np.array([[x - half, y - half], [x + half, y - half],
+                        [x - half, y + half], [x + half, y + half]],
+                       dtype=np.float64)
+    mapped = tr.map(corners)
+    mapped = mapped[:, :2] / mapped[:, 3:4]
+    return mapped.min(axis=0), mapped.max(axis=0)
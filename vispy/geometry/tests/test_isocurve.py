@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+
+from vispy.geometry.isocurve import isocurve
+from vispy.testing import run_tests_if_main
+
+
+def test_isocurve_segments():
+    """Test the segments of isocurves"""
+    data = np.zeros((3, 3))
+    data[1, 1] = 1
+    segments = isocurve(data, 0.5)
+    assert segments.shape == (4, 2, 2)
+    # the segments cross the grid edges halfway to the center, in cell
+    # order
+    assert_allclose(segments, [[[1.5, 1.0], [1.0, 1.5]],
+                               [[1.0, 1.5], [1.5, 2.0]],
+                               [[1.5, 1.0], [2.0, 1.5]],
+                               [[1.5, 2.0], [2.0, 1.5]]])
+    assert isocurve(data, 2).shape == (0, 2, 2)
+
+
+def test_isocurve_connected():
+    """Test the assembly of isocurve segments into paths"""
+    x, y = np.indices((40, 30))
+    data = np.hypot(x - 10, y - 10)
+    # a closed loop around the center
+    paths = isocurve(data, 5.3, connected=True)
+    assert len(paths) == 1
+    path = paths[0]
+    assert_array_equal(path[0], path[-1])
+    assert len(np.unique(path[:-1], axis=0)) == len(path) - 1
+    assert_allclose(np.hypot(*(path - 10.5).T), 5.3, atol=0.1)
+    # consecutive points are in neighboring cells
+    assert (np.abs(np.diff(path, axis=0)) <= 1).all()
+    # the segments are the same as the disconnected ones
+    segments = isocurve(data, 5.3)
+    assert len(segments) == len(path) - 1
+
+    # a loop, and a line cut by the edges of the data
+    data = np.minimum(data, 41. - x)
+    paths = isocurve(data, 5.3, connected=True, extend_to_edge=True)
+    assert len(paths) == 2
+    loop, line = sorted(paths, key=lambda p: p[0, 0])
+    assert_array_equal(loop[0], loop[-1])
+    # on pixel centers, from edge to edge
+    assert_allclose(line[:, 0], 41 - 5.3 + 0.5)
+    assert sorted([line[0, 1], line[-1, 1]]) == [0, 30]
+    assert len(line) == 32
+    assert isocurve(data, 100, connected=True) == []
+
+
+run_tests_if_main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+
+from vispy.geometry.isosurface import isosurface, IsosurfaceIndex
+from vispy.testing import run_tests_if_main, assert_raises
+
+
+def _sphere(shape, center, radius):
+    x, y, z = np.indices(shape)
+    return np.sqrt((x - center[0]) ** 2 + (y - center[1]) ** 2 +
+                   (z - center[2]) ** 2) - radius
+
+
+def _assert_same_surface(surface, expected):
+    """Check that two surfaces have the same faces, independently of the
+    order of their vertices and faces
+    """
+    tris = []
+    for vertices, faces in (surface, expected):
+        # the positions of the vertices of each face, in sorted order
+        tri = np.round(vertices[faces], 4)
+        order = np.lexsort(tri.transpose(2, 0, 1)[::-1])
+        tri = np.take_along_axis(tri, order[..., None], axis=1)
+        tri = tri.reshape(len(faces), 9)
+        tris.append(tri[np.lexsort(tri.T[::-1])])
+    assert_array_equal(*tris)
+
+
+def test_isosurface():
+    """Test the isosurface of a sphere"""
+    data = _sphere((20, 21, 22), (10, 9.5, 11.2), 6.3)
+    vertices, faces = isosurface(data, 0)
+    assert vertices.dtype == np.float32
+    assert faces.dtype == np.uint32
+    assert len(faces) > 0
+    # the vertices are on the grid edges, close to the sphere
+    assert_allclose(np.sqrt(((vertices - (10, 9.5, 11.2)) ** 2).sum(-1)),
+                    6.3, atol=0.1)
+    assert ((vertices % 1 != 0).sum(axis=1) <= 1).all()
+    # each vertex is shared by the faces around it, and each edge of this
+    # closed surface by two faces
+    assert_array_equal(np.unique(faces), np.arange(len(vertices)))
+    edges = np.sort(np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]],
+                                    faces[:, [2, 0]]]), axis=1)
+    counts = np.unique(edges, axis=0, return_counts=True)[1]
+    assert (counts == 2).all()
+
+    vertices, faces = isosurface(data, -10)
+    assert vertices.shape == (0, 3) and faces.shape == (0, 3)
+    assert_raises(ValueError, isosurface, data[0], 0)
+
+
+def test_isosurface_index():
+    """Test isosurface level caching and partial updates"""
+    np.random.seed(0)
+    data = np.random.normal(size=(30, 25, 19)).astype(np.float32)
+    index = IsosurfaceIndex(data, block_size=4, cache_size=2)
+    for block_size in (1, 7, 64):
+        other = IsosurfaceIndex(data, block_size=block_size)
+        for level in (-0.5, 0.3):
+            _assert_same_surface(index.isosurface(level),
+                                 other.isosurface(level))
+
+    # the surfaces of the last levels are kept
+    surface = index.isosurface(0.3)
+    assert index.isosurface(0.3) is surface
+    index.isosurface(0.1)
+    index.isosurface(0.2)
+    assert index.isosurface(0.3) is not surface
+
+    # only the blocks around the changed region are computed again
+    data[3:9, 20:25, 0:5] = np.random.normal(size=(6, 5, 5))
+    index.update((slice(3, 9), slice(20, None), slice(0, 5)))
+    for level in (0.2, 0.3, 1.5):
+        expected = IsosurfaceIndex(data).isosurface(level)
+        _assert_same_surface(index.isosurface(level), expected)
+
+    new_data = data.copy()
+    new_data[-1] = 5
+    index.set_data(new_data, (slice(29, 30), slice(None), slice(None)))
+    expected = isosurface(new_data, 0.3)
+    _assert_same_surface(index.isosurface(0.3), expected)
+    assert_raises(ValueError, index.set_data, new_data[1:],
+                  (slice(0, 1),) * 3)
+    assert_raises(ValueError, index.update, (slice(0, 4, 2),) * 3)
+
+
+def test_isosurface_nan():
+    """Test that NaN values are handled like values above the level"""
+    np.random.seed(1)
+    data = np.random.rand(20, 20, 20).astype(np.float32)
+    data[5, 6, 7] = np.nan
+    data[12:15, 12:15, 12:15] = 0.1  # below the level, next to a NaN
+    data[13, 13, 13] = np.nan
+    # NaN values are never below the level, like large values
+    above = np.where(np.isnan(data), 2, data)
+    for block_size in (1, 8, 64):
+        for level in (0.3, 0.5):
+            faces = IsosurfaceIndex(data, block_size).isosurface(level)[1]
+            assert len(faces) == len(isosurface(above, level)[1])
+
+
+run_tests_if_main()
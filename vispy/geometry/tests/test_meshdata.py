@@ -3,7 +3,7 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 
 import numpy as np
-from numpy.testing import assert_array_equal
+from numpy.testing import assert_array_equal, assert_allclose
 
 from vispy.testing import run_tests_if_main
 from vispy.geometry.meshdata import MeshData
@@ -31,4 +31,30 @@ def test_meshdata():
     assert_array_equal(square_edges, mesh.get_edges())
 
 
+def test_vertex_face_adjacency():
+    """Test the faces of each vertex and the vertex normals"""
+    vertices = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0],
+                         [0, 0, 1], [5, 5, 5]], dtype=np.float32)
+    faces = np.array([[0, 1, 2], [0, 2, 3], [0, 4, 1]], dtype=np.uint32)
+    mesh = MeshData(vertices=vertices, faces=faces)
+
+    offsets, vertex_faces = mesh.get_vertex_face_adjacency()
+    assert_array_equal(offsets, [0, 3, 5, 7, 8, 9, 9])
+    assert_array_equal(vertex_faces, [0, 1, 2, 0, 2, 0, 1, 1, 2])
+    assert mesh.get_vertex_face_adjacency()[0] is offsets
+    assert [list(f) for f in mesh.get_vertex_faces()] == \
+        [[0, 1, 2], [0, 2], [0, 1], [1], [2], []]
+
+    normals = mesh.get_vertex_normals()
+    assert_array_equal(normals[2:], [[0, 0, 1], [0, 0, 1], [0, 1, 0],
+                                     [0, 0, 0]])
+    assert_allclose(normals[1], np.array([0, 1, 1]) / np.sqrt(2.), rtol=1e-6)
+    assert normals.dtype == np.float32
+
+    # the adjacency follows the faces
+    mesh.set_faces(faces[:2])
+    offsets, vertex_faces = mesh.get_vertex_face_adjacency()
+    assert_array_equal(offsets, [0, 2, 3, 5, 6, 6, 6])
+
+
 run_tests_if_main()
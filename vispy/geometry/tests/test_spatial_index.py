@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+from numpy.testing import assert_array_equal, assert_allclose
+
+from vispy.testing import assert_raises, run_tests_if_main
+from vispy.geometry import GridIndex
+
+
+def _in_box(points, lo, hi, extents=0):
+    inside = (points + extents >= lo) & (points - extents <= hi)
+    return np.nonzero(inside.all(axis=1))[0]
+
+
+def test_grid_index_points():
+    """Test the queries of a grid index of points against brute force"""
+    rng = np.random.RandomState(0)
+    points = rng.randn(5000, 2) * [100, 1]
+    index = GridIndex(points)
+    assert len(index) == 5000
+    for lo, hi in (([-10, -.1], [10, .1]), ([-1e3, -1e3], [1e3, 1e3]),
+                   ([500, 0], [600, 1]), ([1, 1], [0, 0])):
+        assert_array_equal(index.query_box(lo, hi), _in_box(points, lo, hi))
+
+    center = np.array([3., .2])
+    distance = np.sqrt(((points - center) ** 2).sum(axis=1))
+    found, found_distance = index.query_radius(center, 5)
+    assert_array_equal(found, np.argsort(distance)[:len(found)])
+    assert_array_equal(np.sort(found), np.nonzero(distance <= 5)[0])
+    assert_allclose(found_distance, distance[found])
+    found, found_distance = index.nearest(center, k=10)
+    assert_array_equal(found, np.argsort(distance)[:10])
+    # from far away
+    found, _ = index.nearest([1e4, 1e4], k=3)
+    distance = np.sqrt(((points - 1e4) ** 2).sum(axis=1))
+    assert_array_equal(found, np.argsort(distance)[:3])
+    assert len(index.nearest(center, k=6000)[0]) == 5000
+
+
+def test_grid_index_update():
+    """Test moving the items of a grid index"""
+    rng = np.random.RandomState(1)
+    points = rng.rand(2000, 2)
+    index = GridIndex(points, cell_size=0.05)
+    lo, hi = [0.2, 0.3], [0.6, 0.5]
+    # within the grid, and out of it
+    for moved in (rng.rand(300, 2), rng.rand(10, 2) * 3 - 1):
+        index.update(100, moved)
+        points[100:100 + len(moved)] = moved
+        assert_array_equal(index.query_box(lo, hi), _in_box(points, lo, hi))
+        assert_array_equal(index.query_box([-1, -1], [2, 2]),
+                           _in_box(points, [-1, -1], [2, 2]))
+    assert_raises(ValueError, index.update, 1990, rng.rand(20, 2))
+    assert_raises(ValueError, index.update, 0, rng.rand(2, 2),
+                  extents=np.ones((2, 2)))
+
+
+def test_grid_index_boxes():
+    """Test a grid index of boxes"""
+    rng = np.random.RandomState(2)
+    centers = rng.rand(1000, 2) * 10
+    extents = rng.rand(1000, 2) * 0.5
+    index = GridIndex(centers, extents)
+    lo, hi = [4, 4], [5, 4.5]
+    assert_array_equal(index.query_box(lo, hi),
+                       _in_box(centers, lo, hi, extents))
+    extents[:5] = 3
+    index.update(0, centers[:5], extents[:5])
+    assert_array_equal(index.query_box(lo, hi),
+                       _in_box(centers, lo, hi, extents))
+
+    # items in a line, or at the same place
+    for points in (np.c_[np.arange(10.), np.zeros(10)], np.ones((5, 2))):
+        index = GridIndex(points)
+        assert_array_equal(index.query_box([0.5, -1], [3, 1]),
+                           _in_box(points, [0.5, -1], [3, 1]))
+    assert len(GridIndex(np.zeros((0, 2))).query_box([0, 0], [1, 1])) == 0
+
+
+run_tests_if_main()
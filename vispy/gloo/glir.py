@@ -165,6 +165,11 @@ The type can be 'float', 'vec2', 'vec3', 'vec4'. If the first value
 element is zero, the remaining elements represent the data to pass to
 ``glVertexAttribNf``.
 
+The value can have a fourth element with the type of the data in the
+buffer: 'uint8', 'int8', 'uint16' or 'int16'. The data is then
+normalized to [0, 1] (or [-1, 1] for signed types) when read by the
+shader. Float data is assumed otherwise.
+
 It is an error to provide this command before the shaders are set. After
 resetting shaders, all uniforms and attributes have to be re-submitted.
 
@@ -178,6 +183,8 @@ DRAW
    ('DRAW', 4, 'lines', (0, 100))
    # Example: Draw 100 lines using index buffer with id 5
    ('DRAW', 4, 'points', (5, 'unsigned_int', 100))
+   # Example: Same, from an offset of 40 bytes in the index buffer
+   ('DRAW', 4, 'points', (5, 'unsigned_int', 100, 40))
 
 Applies to: Program
 
@@ -189,7 +196,8 @@ which can be 'points', 'lines', 'line_strip', 'line_loop', 'lines_adjacency',
 If the ``selection`` argument has two elements, it contains two integers
 ``(start, count)``. If it has three elements, it contains
 ``(<index-buffer-id>, gtype, count)``, where ``gtype`` is
-'unsigned_byte','unsigned_short', or 'unsigned_int'.
+'unsigned_byte','unsigned_short', or 'unsigned_int'. A fourth element is
+the offset of the first index in the index buffer, in bytes.
 
 SIZE
 ~~~~
@@ -355,12 +363,42 @@ cause shaders to be detached and deleted. See the
 `OpenGL documentation <https://www.khronos.org/registry/OpenGL-Refpages/gl4/html/glLinkProgram.xhtml>`_
 for details on program linking.
 
+Packed binary representation
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+A list of GLIR commands can be packed into a compact binary stream with
+``encode_glir``, for sending to another process without serializing each
+command to JSON. The stream consists of a header (the bytes ``GLIR``, a
+version byte and the number of commands as uint32), followed by the
+commands. Each command is an opcode byte (the index of the command name
+in ``GLIR_OPCODES``), a byte with the number of values that follow
+(the id and the arguments), and the values themselves. Each value starts
+with a one-character tag:
+
+- ``N``: None
+- ``?``: bool (uint8)
+- ``i``: int (int64)
+- ``d``: float (float64)
+- ``s``: short string (uint16 length + utf-8 bytes); each short string
+  is added to a string table the first time it appears
+- ``S``: reference to a previously sent short string (uint16 index)
+- ``L``: long string, e.g. shader code (uint32 length + utf-8 bytes)
+- ``t``: tuple (uint16 length + values)
+- ``a``: small inline array (dtype, shape and raw bytes)
+- ``b``: reference to an array in the buffer list (uint32 index,
+  dtype and shape). These arrays are not copied into the stream.
+
+All numbers are little-endian. A dtype is written as a uint8 length
+followed by the ascii ``dtype.str``, a shape as a uint8 number of
+dimensions followed by one uint32 per dimension.
+
 """
 
 import os
 import sys
 import re
 import json
+import struct
 import weakref
 from distutils.version import LooseVersion
 
@@ -368,6 +406,7 @@ import numpy as np
 
 from . import gl
 from ..util import logger
+from ..util.frame_timing import get_timer
 
 # TODO: expose these via an extension space in .gl?
 _internalformats = [
@@ -395,6 +434,13 @@ _internalformats = [
 ]
 _internalformats = dict([(enum.name, enum) for enum in _internalformats])
 
+# Blend equations of EXT_blend_minmax, core in desktop GL and ES 3.0
+_blend_equations = [
+    gl.Enum('GL_MIN', 32775),
+    gl.Enum('GL_MAX', 32776),
+]
+_blend_equations = dict([(enum.name, enum) for enum in _blend_equations])
+
 # Value to mark a glir object that was just deleted. So we can safely
 # ignore it (and not raise an error that the object could not be found).
 # This can happen e.g. if A is created, A is bound to B and then A gets
@@ -410,13 +456,31 @@ def as_enum(enum):
         try:
             enum = getattr(gl, 'GL_' + enum.upper())
         except AttributeError:
+            name = 'GL_' + enum.upper()
             try:
-                enum = _internalformats['GL_' + enum.upper()]
+                enum = _internalformats.get(name) or _blend_equations[name]
             except KeyError:
                 raise ValueError('Could not find int value for enum %r' % enum)
     return enum
 
 
+# FUNC commands that set GL state, mapped to the number of leading arguments
+# that select which state is set (e.g. the target of glHint). The
+# remaining arguments are the value. glEnable/glDisable are special cased.
+_STATE_FUNCS = {'glEnable': 1, 'glDisable': 1, 'glHint': 1,
+                'glViewport': 0, 'glDepthRange': 0, 'glFrontFace': 0,
+                'glCullFace': 0, 'glLineWidth': 0, 'glPolygonOffset': 0,
+                'glClearColor': 0, 'glClearDepth': 0, 'glClearStencil': 0,
+                'glBlendFuncSeparate': 0, 'glBlendColor': 0,
+                'glBlendEquationSeparate': 0, 'glScissor': 0,
+                'glDepthFunc': 0, 'glDepthMask': 0, 'glColorMask': 0,
+                'glSampleCoverage': 0}
+
+# FUNC commands that change state tracked under another name
+_STATE_ALIASES = {'glBlendFunc': 'glBlendFuncSeparate',
+                  'glBlendEquation': 'glBlendEquationSeparate'}
+
+
 class _GlirQueueShare(object):
     """This class contains the actual queues of GLIR commands that are
     collected until a context becomes available to execute the commands.
@@ -491,9 +555,46 @@ class _GlirQueueShare(object):
         if self._verbose:
             show = self._verbose if isinstance(self._verbose, str) else None
             self.show(show)
-        parser.parse(self._filter(self.clear(), parser))
+        commands = self._filter(self.clear(), parser)
+        timer = get_timer()
+        if timer is None:
+            parser.parse(commands)
+            return
+        nbytes = sum(command[3].nbytes for command in commands
+                     if command[0] == 'DATA' and
+                     isinstance(command[3], np.ndarray))
+        draws = sum(command[0] == 'DRAW' for command in commands)
+        timer.count('glir_commands', len(commands))
+        timer.count('upload_bytes', nbytes)
+        timer.count('draw_calls', draws)
+        with timer.span('flush', 'glir', commands=len(commands),
+                        bytes=nbytes, draws=draws):
+            with timer.gpu_span(parser):
+                parser.parse(commands)
 
     def _filter(self, commands, parser):
+        """ Remove commands that have no effect before they are parsed.
+
+        This drops DATA/SIZE commands that are overridden by a SIZE
+        command, FUNC and UNIFORM commands that do not change the state
+        last sent to the parser, and merges DATA commands that write to
+        overlapping or adjacent regions of the same buffer. The number of
+        removed commands is accumulated in ``parser.filter_counts``.
+        """
+        n = len(commands)
+        commands = self._filter_resized(commands)
+        counts = getattr(parser, 'filter_counts', None)
+        if counts is not None:
+            counts['resized'] += n - len(commands)
+        if getattr(parser, '_shadow_state', None) is not None:
+            commands = self._filter_redundant(commands, parser)
+        n = len(commands)
+        commands = self._coalesce_data(commands)
+        if counts is not None:
+            counts['data'] += n - len(commands)
+        return commands
+
+    def _filter_resized(self, commands):
         """ Filter DATA/SIZE commands that are overridden by a
         SIZE command.
         """
@@ -508,6 +609,111 @@ class _GlirQueueShare(object):
             commands2.append(command)
         return list(reversed(commands2))
 
+    def _filter_redundant(self, commands, parser):
+        """ Filter FUNC commands that set GL state to the value it already
+        has, and UNIFORM commands that set the value a uniform already has.
+        The state is tracked on the parser, across flushes.
+        """
+        state = parser._shadow_state
+        uniforms = parser._shadow_uniforms
+        counts = parser.filter_counts
+        commands2 = []
+        for command in commands:
+            cmd = command[0]
+            if cmd == 'FUNC':
+                name = command[1]
+                nkey = _STATE_FUNCS.get(name, None)
+                if nkey is not None:
+                    args = tuple(as_enum(a) for a in command[2:])
+                    if name in ('glEnable', 'glDisable'):
+                        key, value = ('glEnable',) + args, name == 'glEnable'
+                    else:
+                        key, value = (name,) + args[:nkey], args[nkey:]
+                    if state.get(key, None) == value:
+                        counts['state'] += 1
+                        continue
+                    state[key] = value
+                elif name in _STATE_ALIASES:
+                    state.pop((_STATE_ALIASES[name],), None)
+            elif cmd == 'UNIFORM':
+                key = command[1], command[2]
+                value = command[4]
+                last = uniforms.get(key, None)
+                if last is not None and np.array_equal(last, value):
+                    counts['uniform'] += 1
+                    continue
+                uniforms[key] = np.array(value, copy=True)
+            elif cmd in ('LINK', 'CREATE', 'DELETE'):
+                # Uniform values are lost when a program is (re)linked
+                id_ = command[1]
+                for key in [k for k in uniforms if k[0] == id_]:
+                    del uniforms[key]
+            commands2.append(command)
+        return commands2
+
+    def _coalesce_data(self, commands):
+        """ Merge DATA commands that write to overlapping or adjacent
+        regions of the same buffer into a single DATA command.
+
+        Writes are only merged if no DRAW or SIZE command comes between
+        them. The merged command takes the place of the last write.
+        """
+        # Collect groups of buffer writes: id -> list of command indices
+        groups = []
+        pending = {}
+        for i, command in enumerate(commands):
+            cmd = command[0]
+            if cmd == 'DRAW':
+                groups.extend(pending.values())
+                pending = {}
+            elif cmd == 'DATA' and len(command) == 4 and \
+                    isinstance(command[2], int) and \
+                    isinstance(command[3], np.ndarray):
+                pending.setdefault(command[1], []).append(i)
+            elif cmd in ('SIZE', 'DELETE') and command[1] in pending:
+                groups.append(pending.pop(command[1]))
+        groups.extend(pending.values())
+
+        replace = {}
+        for indices in groups:
+            if len(indices) < 2:
+                continue
+            # Split the writes into clusters of touching byte ranges
+            ranges = sorted((commands[i][2],
+                             commands[i][2] + commands[i][3].nbytes, i)
+                            for i in indices)
+            clusters = [[ranges[0]]]
+            for r in ranges[1:]:
+                if r[0] <= max(c[1] for c in clusters[-1]):
+                    clusters[-1].append(r)
+                else:
+                    clusters.append([r])
+            for cluster in clusters:
+                if len(cluster) < 2:
+                    continue
+                start = cluster[0][0]
+                stop = max(c[1] for c in cluster)
+                last = max(c[2] for c in cluster)
+                # Apply the writes in their original order
+                data = np.empty(stop - start, np.uint8)
+                for i in sorted(c[2] for c in cluster):
+                    offset, values = commands[i][2:]
+                    values = np.ascontiguousarray(values).reshape(-1)
+                    data[offset - start:offset - start + values.nbytes] = \
+                        values.view(np.uint8)
+                for c in cluster:
+                    replace[c[2]] = None
+                replace[last] = ('DATA', commands[last][1], start, data)
+
+        if not replace:
+            return commands
+        commands2 = []
+        for i, command in enumerate(commands):
+            command = replace.get(i, command)
+            if command is not None:
+                commands2.append(command)
+        return commands2
+
 
 class GlirQueue(object):
     """ Representation of a queue of GLIR commands
@@ -658,6 +864,295 @@ def as_es2_command(command):
     return command
 
 
+## Packed binary GLIR
+
+GLIR_OPCODES = ('CURRENT', 'CREATE', 'DELETE', 'UNIFORM', 'TEXTURE',
+                'ATTRIBUTE', 'DRAW', 'SIZE', 'DATA', 'WRAPPING',
+                'INTERPOLATION', 'ATTACH', 'FRAMEBUFFER', 'FUNC', 'SWAP',
+                'LINK')
+_OPCODE_MAP = dict((name, i) for i, name in enumerate(GLIR_OPCODES))
+
+_GLIR_MAGIC = b'GLIR'
+_GLIR_VERSION = 1
+_HEADER = struct.Struct('<4sBI')
+_COMMAND = struct.Struct('<BB')
+_TAG = struct.Struct('<c')
+_BOOL = struct.Struct('<c?')
+_INT = struct.Struct('<cq')
+_FLOAT = struct.Struct('<cd')
+_TAG_U8 = struct.Struct('<cB')
+_TAG_U16 = struct.Struct('<cH')
+_TAG_U32 = struct.Struct('<cI')
+_U8 = struct.Struct('<B')
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_I64 = struct.Struct('<q')
+_F64 = struct.Struct('<d')
+
+# Strings up to this length are interned in the string table
+_MAX_SHORT_STRING = 64
+# Arrays up to this size (e.g. uniform values) are stored in the stream
+_MAX_INLINE_ARRAY = 64
+
+
+class PackedGlirCommands(object):
+    """ A list of GLIR commands in the packed binary representation
+
+    Iterating over this object decodes the commands into tuples, so it
+    can be passed directly to ``GlirParser.parse()``.
+
+    Parameters
+    ----------
+    header : bytes
+        The packed command stream.
+    buffers : list
+        The arrays referenced by the command stream. These can be numpy
+        arrays or bytes-like objects.
+    """
+
+    def __init__(self, header, buffers=()):
+        self.header = header
+        self.buffers = list(buffers)
+        magic, version, count = _HEADER.unpack_from(header, 0)
+        if magic != _GLIR_MAGIC:
+            raise ValueError('Not a packed GLIR command stream')
+        if version != _GLIR_VERSION:
+            raise ValueError('Unsupported packed GLIR version %i' % version)
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return _GlirDecoder(self.header, self.buffers).iter_commands()
+
+    @property
+    def nbytes(self):
+        """ The total number of bytes in the header and the buffers.
+        """
+        return len(self.header) + sum(memoryview(b).nbytes
+                                      for b in self.buffers)
+
+
+class GlirEncoder(object):
+    """ Encoder for the packed binary GLIR representation
+
+    The encoder writes into a preallocated byte arena that is reused
+    between calls to ``encode()``, so that it is cheap to encode the
+    commands of each frame with the same encoder.
+
+    Parameters
+    ----------
+    size : int
+        The initial size of the arena in bytes. It grows when needed.
+    """
+
+    def __init__(self, size=65536):
+        self._arena = bytearray(size)
+        self._pos = 0
+        self._strings = {}
+        self._buffers = []
+
+    def encode(self, commands):
+        """ Encode a list of GLIR commands.
+
+        Returns a ``PackedGlirCommands`` object. Arrays larger than a
+        few values are not copied but referenced in its buffer list.
+        """
+        self._pos = 0
+        self._strings = {}
+        self._buffers = []
+        self._reserve(_HEADER.size)
+        self._pos = _HEADER.size
+        count = 0
+        for command in commands:
+            try:
+                opcode = _OPCODE_MAP[command[0]]
+            except KeyError:
+                raise ValueError('Invalid GLIR command %r' % (command[0],))
+            self._reserve(_COMMAND.size)
+            _COMMAND.pack_into(self._arena, self._pos, opcode,
+                               len(command) - 1)
+            self._pos += _COMMAND.size
+            for value in command[1:]:
+                self._write_value(value)
+            count += 1
+        _HEADER.pack_into(self._arena, 0, _GLIR_MAGIC, _GLIR_VERSION, count)
+        header = bytes(self._arena[:self._pos])
+        buffers, self._buffers = self._buffers, []
+        return PackedGlirCommands(header, buffers)
+
+    def _reserve(self, nbytes):
+        needed = self._pos + nbytes
+        if needed > len(self._arena):
+            size = max(2 * len(self._arena), needed)
+            self._arena.extend(bytes(size - len(self._arena)))
+
+    def _write(self, fmt, *values):
+        self._reserve(fmt.size)
+        fmt.pack_into(self._arena, self._pos, *values)
+        self._pos += fmt.size
+
+    def _write_bytes(self, data):
+        n = len(data)
+        self._reserve(n)
+        self._arena[self._pos:self._pos + n] = data
+        self._pos += n
+
+    def _write_dtype_shape(self, value):
+        dtype = value.dtype.str.encode('ascii')
+        self._write(_U8, len(dtype))
+        self._write_bytes(dtype)
+        self._write(_U8, value.ndim)
+        for dim in value.shape:
+            self._write(_U32, dim)
+
+    def _write_value(self, value):
+        if value is None:
+            self._write(_TAG, b'N')
+        elif isinstance(value, (bool, np.bool_)):
+            self._write(_BOOL, b'?', bool(value))
+        elif isinstance(value, (int, np.integer)):
+            self._write(_INT, b'i', int(value))
+        elif isinstance(value, (float, np.floating)):
+            self._write(_FLOAT, b'd', float(value))
+        elif isinstance(value, str):
+            if len(value) > _MAX_SHORT_STRING:
+                data = value.encode('utf-8')
+                self._write(_TAG_U32, b'L', len(data))
+                self._write_bytes(data)
+            elif value in self._strings:
+                self._write(_TAG_U16, b'S', self._strings[value])
+            else:
+                self._strings[value] = len(self._strings)
+                data = value.encode('utf-8')
+                self._write(_TAG_U16, b's', len(data))
+                self._write_bytes(data)
+        elif isinstance(value, (tuple, list)):
+            self._write(_TAG_U16, b't', len(value))
+            for subvalue in value:
+                self._write_value(subvalue)
+        elif isinstance(value, np.ndarray):
+            value = np.ascontiguousarray(value)
+            if value.nbytes <= _MAX_INLINE_ARRAY:
+                self._write(_TAG, b'a')
+                self._write_dtype_shape(value)
+                self._write_bytes(value.tobytes())
+            else:
+                self._write(_TAG_U32, b'b', len(self._buffers))
+                self._write_dtype_shape(value)
+                self._buffers.append(value)
+        else:
+            raise TypeError('Cannot encode GLIR value of type %s'
+                            % type(value).__name__)
+
+
+class _GlirDecoder(object):
+    """ Walks a packed binary GLIR stream and yields command tuples.
+    """
+
+    def __init__(self, header, buffers):
+        self._data = memoryview(header)
+        self._buffers = buffers
+        self._strings = []
+        self._pos = 0
+
+    def iter_commands(self):
+        _, _, count = _HEADER.unpack_from(self._data, 0)
+        self._pos = _HEADER.size
+        for _ in range(count):
+            opcode, nvalues = _COMMAND.unpack_from(self._data, self._pos)
+            self._pos += _COMMAND.size
+            values = [self._read_value() for _ in range(nvalues)]
+            yield (GLIR_OPCODES[opcode],) + tuple(values)
+
+    def _read(self, fmt):
+        values = fmt.unpack_from(self._data, self._pos)
+        self._pos += fmt.size
+        return values
+
+    def _read_bytes(self, nbytes):
+        data = self._data[self._pos:self._pos + nbytes]
+        self._pos += nbytes
+        return data
+
+    def _read_dtype_shape(self):
+        n, = self._read(_U8)
+        dtype = np.dtype(bytes(self._read_bytes(n)).decode('ascii'))
+        ndim, = self._read(_U8)
+        shape = tuple(self._read(_U32)[0] for _ in range(ndim))
+        return dtype, shape
+
+    def _read_value(self):
+        tag, = self._read(_TAG)
+        if tag == b'N':
+            return None
+        elif tag == b'?':
+            return self._read(_U8)[0] != 0
+        elif tag == b'i':
+            return self._read(_I64)[0]
+        elif tag == b'd':
+            return self._read(_F64)[0]
+        elif tag == b's':
+            n, = self._read(_U16)
+            value = bytes(self._read_bytes(n)).decode('utf-8')
+            self._strings.append(value)
+            return value
+        elif tag == b'S':
+            return self._strings[self._read(_U16)[0]]
+        elif tag == b'L':
+            n, = self._read(_U32)
+            return bytes(self._read_bytes(n)).decode('utf-8')
+        elif tag == b't':
+            n, = self._read(_U16)
+            return tuple(self._read_value() for _ in range(n))
+        elif tag == b'a':
+            dtype, shape = self._read_dtype_shape()
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            data = self._read_bytes(nbytes)
+            return np.frombuffer(data, dtype).reshape(shape).copy()
+        elif tag == b'b':
+            index, = self._read(_U32)
+            dtype, shape = self._read_dtype_shape()
+            buffer = self._buffers[index]
+            if not isinstance(buffer, np.ndarray):
+                buffer = np.frombuffer(buffer, dtype).reshape(shape)
+            return buffer
+        raise ValueError('Invalid tag %r in packed GLIR stream' % (tag,))
+
+
+def encode_glir(commands):
+    """ Pack a list of GLIR commands into the binary representation.
+
+    Returns a ``PackedGlirCommands`` object.
+    """
+    return GlirEncoder().encode(commands)
+
+
+def decode_glir(header, buffers=()):
+    """ Unpack a binary GLIR stream into a list of command tuples.
+    """
+    return list(PackedGlirCommands(header, buffers))
+
+
+def _iter_batches(commands):
+    """ Group consecutive commands that share the command name and id.
+
+    Yields tuples ``(cmd, id, args_list)``.
+    """
+    key = None
+    args_list = []
+    for command in commands:
+        if command[:2] != key:
+            if args_list:
+                yield key[0], key[1] if len(key) > 1 else None, args_list
+            key = command[:2]
+            args_list = []
+        args_list.append(command[2:])
+    if args_list:
+        yield key[0], key[1] if len(key) > 1 else None, args_list
+
+
 class BaseGlirParser(object):
     """ Base class for GLIR parsers that can be attached to a GLIR queue.
     """
@@ -667,6 +1162,19 @@ class BaseGlirParser(object):
             gl_version='Unknown',
             max_texture_size=None,
         )
+        # The GL state and uniform values that were last sent to this
+        # parser, used by the GLIR queue to filter redundant commands
+        self._shadow_state = {}
+        self._shadow_uniforms = {}
+        # Number of commands removed by the GLIR queue, per reason
+        self.filter_counts = dict(resized=0, state=0, uniform=0, data=0)
+
+    def reset_shadow_state(self):
+        """ Forget the GL state that was sent to this parser, e.g. because
+        another GL context was made current or the state was changed
+        outside of GLIR.
+        """
+        self._shadow_state.clear()
 
     def is_remote(self):
         """ Whether the code is executed remotely. i.e. gloo.gl cannot
@@ -715,6 +1223,23 @@ class GlirParser(BaseGlirParser):
                           'FrameBuffer': GlirFrameBuffer,
                           }
 
+        # Map of commands that apply to an object to the method that
+        # handles them.
+        self._methodmap = {'DRAW': 'draw',  # Program
+                           'TEXTURE': 'set_texture',  # Program
+                           'UNIFORM': 'set_uniform',  # Program
+                           'ATTRIBUTE': 'set_attribute',  # Program
+                           # VertexBuffer, IndexBuffer, Texture, Shader
+                           'DATA': 'set_data',
+                           # VertexBuffer, IndexBuffer, Texture, RenderBuffer
+                           'SIZE': 'set_size',
+                           'ATTACH': 'attach',  # FrameBuffer, Program
+                           'FRAMEBUFFER': 'set_framebuffer',  # FrameBuffer
+                           'LINK': 'link_program',  # Program
+                           'WRAPPING': 'set_wrapping',  # Texture
+                           'INTERPOLATION': 'set_interpolation',  # Texture
+                           }
+
         # We keep a dict that the GLIR objects use for storing
         # per-context information. This dict is cleared each time
         # that the context is made current. This seems necessary for
@@ -740,6 +1265,7 @@ class GlirParser(BaseGlirParser):
         if cmd == 'CURRENT':
             # This context is made current
             self.env.clear()
+            self.reset_shadow_state()
             self._gl_initialize()
             self.env['fbo'] = args[0]
             gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, args[0])
@@ -773,37 +1299,39 @@ class GlirParser(BaseGlirParser):
                     raise RuntimeError('Cannot %s object %i because it '
                                        'does not exist' % (cmd, id_))
                 return
-            # Triage over command. Order of commands is set so most
-            # common ones occur first.
-            if cmd == 'DRAW':  # Program
-                ob.draw(*args)
-            elif cmd == 'TEXTURE':  # Program
-                ob.set_texture(*args)
-            elif cmd == 'UNIFORM':  # Program
-                ob.set_uniform(*args)
-            elif cmd == 'ATTRIBUTE':  # Program
-                ob.set_attribute(*args)
-            elif cmd == 'DATA':  # VertexBuffer, IndexBuffer, Texture, Shader
-                ob.set_data(*args)
-            elif cmd == 'SIZE':  # VertexBuffer, IndexBuffer,
-                ob.set_size(*args)  # Texture[1D, 2D, 3D], RenderBuffer
-            elif cmd == 'ATTACH':  # FrameBuffer, Program
-                ob.attach(*args)
-            elif cmd == 'FRAMEBUFFER':  # FrameBuffer
-                ob.set_framebuffer(*args)
-            # elif cmd == 'SHADERS':  # Program
-            #     ob.set_shaders(*args)
-            elif cmd == 'LINK':  # Program
-                ob.link_program(*args)
-            elif cmd == 'WRAPPING':  # Texture1D, Texture2D, Texture3D
-                ob.set_wrapping(*args)
-            elif cmd == 'INTERPOLATION':  # Texture1D, Texture2D, Texture3D
-                ob.set_interpolation(*args)
-            else:
+            method = self._methodmap.get(cmd, None)
+            if method is None:
                 logger.warning('Invalid GLIR command %r' % cmd)
+                return
+            getattr(ob, method)(*args)
+
+    def _parse_batch(self, cmd, id_, args_list):
+        """ Parse a run of consecutive commands that share the same command
+        name and id. The target object and its method are looked up once
+        for the whole run.
+        """
+        method = self._methodmap.get(cmd, None)
+        if method is None:
+            # CURRENT, FUNC, CREATE, DELETE, and invalid commands
+            head = (cmd,) if id_ is None else (cmd, id_)
+            for args in args_list:
+                self._parse(head + args)
+            return
+        ob = self._objects.get(id_, None)
+        if ob == JUST_DELETED:
+            return
+        if ob is None:
+            if id_ not in self._invalid_objects:
+                raise RuntimeError('Cannot %s object %i because it '
+                                   'does not exist' % (cmd, id_))
+            return
+        func = getattr(ob, method)
+        for args in args_list:
+            func(*args)
 
     def parse(self, commands):
-        """ Parse a list of commands.
+        """ Parse a list of commands. This can also be a
+        ``PackedGlirCommands`` object.
         """
 
         # Get rid of dummy objects that represented deleted objects in
@@ -815,8 +1343,8 @@ class GlirParser(BaseGlirParser):
         for id_ in to_delete:
             self._objects.pop(id_)
 
-        for command in commands:
-            self._parse(command)
+        for cmd, id_, args_list in _iter_batches(commands):
+            self._parse_batch(cmd, id_, args_list)
 
     def get_object(self, id_):
         """ Get the object with the given id or None if it does not exist.
@@ -870,17 +1398,19 @@ def glir_logger(parser_cls, file_or_filename):
             self._file.write('[]')
             self._empty = True
 
-        def _parse(self, command):
-            parser_cls._parse(self, command)
+        def _parse_batch(self, cmd, id_, args_list):
+            parser_cls._parse_batch(self, cmd, id_, args_list)
 
-            self._file.seek(self._file.tell() - 1)
-            if self._empty:
-                self._empty = False
-            else:
-                self._file.write(',\n')
-            json.dump(as_es2_command(command),
-                      self._file, cls=NumPyJSONEncoder)
-            self._file.write(']')
+            head = (cmd,) if id_ is None else (cmd, id_)
+            for args in args_list:
+                self._file.seek(self._file.tell() - 1)
+                if self._empty:
+                    self._empty = False
+                else:
+                    self._file.write(',\n')
+                json.dump(as_es2_command(head + args),
+                          self._file, cls=NumPyJSONEncoder)
+                self._file.write(']')
 
     return cls
 
@@ -1044,6 +1574,13 @@ class GlirProgram(GlirObject):
         'int': (1, gl.GL_INT, np.int32),
         'bool': (1, gl.GL_BOOL, np.int32)
     }
+    # buffer data types of normalized attributes
+    NORMALIZED_TYPES = {
+        'uint8': gl.GL_UNSIGNED_BYTE,
+        'int8': gl.GL_BYTE,
+        'uint16': gl.GL_UNSIGNED_SHORT,
+        'int16': gl.GL_SHORT,
+    }
 
     def create(self):
         self._handle = gl.glCreateProgram()
@@ -1117,10 +1654,13 @@ class GlirProgram(GlirObject):
             gl.glDetachShader(self._handle, shader.handle)
         self._attached_shaders = []
 
-        # Now we know what variables will be used by the program
+        # Now we know what variables will be used by the program. The
+        # attributes are set again, as their locations may have changed and
+        # former attributes may have become uniforms.
         self._unset_variables = self._get_active_attributes_and_uniforms()
         self._handles = {}
         self._known_invalid = set()
+        self._attributes = {}
         self._linked = True
 
     def _get_active_attributes_and_uniforms(self):
@@ -1255,8 +1795,12 @@ class GlirProgram(GlirObject):
             self._attributes[name] = 0, handle, func, value[1:]
         else:
             # Get meta data
-            vbo_id, stride, offset = value
+            vbo_id, stride, offset = value[:3]
             size, gtype, dtype = self.ATYPEINFO[type_]
+            normalized = gl.GL_FALSE
+            if len(value) > 3:
+                gtype = self.NORMALIZED_TYPES[value[3]]
+                normalized = gl.GL_TRUE
             # Get associated VBO
             vbo = self._parser.get_object(vbo_id)
             if vbo == JUST_DELETED:
@@ -1265,7 +1809,7 @@ class GlirProgram(GlirObject):
                 raise RuntimeError('Could not find VBO with id %i' % vbo_id)
             # Set data
             func = gl.glVertexAttribPointer
-            args = size, gtype, gl.GL_FALSE, stride, offset
+            args = size, gtype, normalized, stride, offset
             self._attributes[name] = vbo.handle, handle, func, args
 
     def _pre_draw(self):
@@ -1332,14 +1876,15 @@ class GlirProgram(GlirObject):
             raise
 
         # Draw
-        if len(selection) == 3:
-            # Selection based on indices
-            id_, gtype, count = selection
+        if len(selection) in (3, 4):
+            # Selection based on indices, with an optional offset in bytes
+            id_, gtype, count = selection[:3]
+            offset = selection[3] if len(selection) == 4 else None
             if count:
                 self._pre_draw()
                 ibuf = self._parser.get_object(id_)
                 ibuf.activate()
-                gl.glDrawElements(mode, count, as_enum(gtype), None)
+                gl.glDrawElements(mode, count, as_enum(gtype), offset)
                 ibuf.deactivate()
         else:
             # Selection based on start and count
@@ -31,7 +31,7 @@ import re
 import numpy as np
 
 from .globject import GLObject
-from .buffer import VertexBuffer, IndexBuffer, DataBuffer
+from .buffer import VertexBuffer, IndexBuffer, DataBuffer, DataBufferView
 from .texture import BaseTexture, Texture2D, Texture3D, Texture1D, TextureCube
 from ..util import logger
 from .util import check_enum
@@ -39,6 +39,17 @@ from .context import get_current_canvas
 from .preprocessor import preprocess
 
 
+def _base_dtype(dtype):
+    """The scalar type of the data of a buffer, or None if mixed"""
+    if dtype is None:
+        return None
+    if dtype.names is not None:
+        if len(dtype.names) != 1:
+            return None
+        dtype = dtype[0]
+    return dtype.base
+
+
 # ------------------------------------------------------------ Shader class ---
 class Shader(GLObject):
     def __init__(self, code=None):
@@ -424,6 +435,11 @@ class Program(GLObject):
                                              % (numel, data._last_dim, name))
                     self._user_variables[name] = data
                     value = (data.id, data.stride, data.offset)
+                    dtype = _base_dtype(data.dtype)
+                    if dtype is not None and dtype.kind in 'iu' and \
+                            dtype.itemsize <= 2:
+                        # integer data is normalized in the shader
+                        value += (dtype.name,)
                     self.glir.associate(data.glir)
                     self._glir.command('ATTRIBUTE', self._id,
                                        name, type_, value)
@@ -471,8 +487,11 @@ class Program(GLObject):
             'points', 'lines', 'line_strip', 'line_loop', 'lines_adjacency',
             'line_strip_adjacency', 'triangles', 'triangle_strip', or
             'triangle_fan'.
-        indices : array
-            Array of indices to draw.
+        indices : IndexBuffer | tuple | None
+            Buffer of indices to draw, or a view on one (e.g.
+            ``index_buffer[:count]``) to draw part of its indices, or a tuple
+            (first, count) selecting a range of vertices. By default all
+            vertices are drawn.
         check_error:
             Check error after draw.
 
@@ -514,21 +533,33 @@ class Program(GLObject):
         canvas.context.glir.associate(self.glir)
 
         # Indexbuffer
-        if isinstance(indices, IndexBuffer):
+        if isinstance(indices, IndexBuffer) or \
+                (isinstance(indices, DataBufferView) and
+                 isinstance(indices.base, IndexBuffer)):
             canvas.context.glir.associate(indices.glir)
             logger.debug("Program drawing %r with index buffer" % mode)
             gltypes = {np.dtype(np.uint8): 'UNSIGNED_BYTE',
                        np.dtype(np.uint16): 'UNSIGNED_SHORT',
                        np.dtype(np.uint32): 'UNSIGNED_INT'}
             selection = indices.id, gltypes[indices.dtype], indices.size
+            if indices.offset:
+                selection += (indices.offset,)
             canvas.context.glir.command('DRAW', self._id, mode, selection)
-        elif indices is None:
-            selection = 0, attributes[0].size
+        elif indices is None or isinstance(indices, tuple):
+            if indices is None:
+                selection = 0, attributes[0].size
+            else:
+                first, count = (int(i) for i in indices)
+                if first < 0 or count < 0 or \
+                        first + count > attributes[0].size:
+                    raise ValueError('Invalid vertex range %r for %d '
+                                     'vertices' % (indices, sizes[0]))
+                selection = first, count
             logger.debug("Program drawing %r with %r" % (mode, selection))
             canvas.context.glir.command('DRAW', self._id, mode, selection)
         else:
-            raise TypeError("Invalid index: %r (must be IndexBuffer)" %
-                            indices)
+            raise TypeError("Invalid index: %r (must be IndexBuffer or "
+                            "tuple)" % (indices,))
 
         # Process GLIR commands
         canvas.context.flush_commands()
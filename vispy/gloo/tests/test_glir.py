@@ -10,6 +10,7 @@ from vispy.gloo import glir
 from vispy.testing import requires_application, requires_pyopengl, run_tests_if_main
 
 import numpy as np
+import pytest
 
 
 def test_queue():
@@ -66,6 +67,157 @@ def test_queue():
     assert shader3.startswith('precision')
 
 
+def test_queue_filter_redundant():
+    """Test removal of redundant state, uniform and data commands"""
+    q = glir.GlirQueue()
+    parser = glir.GlirParser()
+    flt = q._shared._filter
+
+    # State changes are compared against the state sent before
+    cmds = [('FUNC', 'glEnable', 'blend'),
+            ('FUNC', 'glBlendFuncSeparate', 'src_alpha', 'one', 'one', 'one'),
+            ('FUNC', 'glEnable', 'blend'),
+            ('FUNC', 'glClear', 16384),
+            ('FUNC', 'glEnable', 'depth_test'),
+            ('FUNC', 'glClear', 16384)]
+    assert flt(cmds, parser) == cmds[:2] + cmds[3:]
+    cmds = [('FUNC', 'glEnable', 'blend'),
+            ('FUNC', 'glBlendFuncSeparate', 'src_alpha', 'one', 'one', 'one'),
+            ('FUNC', 'glDisable', 'depth_test'),
+            ('FUNC', 'glEnable', 'depth_test')]
+    assert flt(cmds, parser) == cmds[2:]
+    assert parser.filter_counts['state'] == 3
+    # glBlendFunc changes the state set by glBlendFuncSeparate
+    cmds = [('FUNC', 'glBlendFunc', 'one', 'zero'),
+            ('FUNC', 'glBlendFuncSeparate', 'src_alpha', 'one', 'one', 'one')]
+    assert flt(cmds, parser) == cmds
+    # Making a context current forgets the state
+    parser.reset_shadow_state()
+    cmds = [('FUNC', 'glEnable', 'blend')]
+    assert flt(cmds, parser) == cmds
+
+    # Uniforms are compared against the last value sent
+    cmds = [('UNIFORM', 1, 'u_a', 'vec2', np.array([1., 2.], np.float32)),
+            ('UNIFORM', 1, 'u_b', 'vec2', np.array([1., 2.], np.float32)),
+            ('UNIFORM', 2, 'u_a', 'vec2', np.array([1., 2.], np.float32)),
+            ('UNIFORM', 1, 'u_a', 'vec2', np.array([1., 2.], np.float32))]
+    assert flt(cmds, parser) == cmds[:3]
+    cmds = [('UNIFORM', 1, 'u_a', 'vec2', np.array([1., 2.], np.float32)),
+            ('UNIFORM', 1, 'u_b', 'vec2', np.array([1., 3.], np.float32))]
+    assert flt(cmds, parser) == cmds[1:]
+    # Linking a program resets its uniforms
+    cmds = [('LINK', 1),
+            ('UNIFORM', 1, 'u_a', 'vec2', np.array([1., 2.], np.float32)),
+            ('UNIFORM', 2, 'u_a', 'vec2', np.array([1., 2.], np.float32))]
+    assert flt(cmds, parser) == cmds[:2]
+    assert parser.filter_counts['uniform'] == 3
+
+    # Overlapping and adjacent buffer writes are merged
+    a = np.arange(4, dtype=np.float32)
+    b = np.arange(10, 14, dtype=np.float32)
+    c = np.arange(20, 22, dtype=np.float32)
+    cmds = [('DATA', 3, 0, a),
+            ('DATA', 4, 0, a),
+            ('DATA', 3, 8, b),
+            ('DATA', 3, 40, c),
+            ('DATA', 3, 24, c)]
+    cmds2 = flt(cmds, parser)
+    assert [c2[:3] for c2 in cmds2] == [('DATA', 4, 0), ('DATA', 3, 40),
+                                        ('DATA', 3, 0)]
+    assert cmds2[0][3] is a
+    assert cmds2[1][3] is c
+    merged = cmds2[2][3].view(np.float32)
+    assert np.array_equal(merged, [0, 1, 10, 11, 12, 13, 20, 21])
+    assert parser.filter_counts['data'] == 2
+    # but not across a draw
+    cmds = [('DATA', 3, 0, a), ('DRAW', 1, 'points', (0, 4)),
+            ('DATA', 3, 0, b)]
+    assert flt(cmds, parser) == cmds
+
+
+def test_packed_glir():
+    """Test the packed binary GLIR representation"""
+    arr = np.arange(200, dtype=np.float32).reshape(100, 2)
+    shader = 'void main() {\n    gl_FragColor = vec4(1.0);\n}\n' * 3
+    commands = [('CURRENT', 0, 1),
+                ('CREATE', 4, 'VertexBuffer'),
+                ('SIZE', 4, arr.nbytes),
+                ('DATA', 4, 0, arr),
+                ('DATA', 5, 0, shader),
+                ('SIZE', 6, (500, 300, 3), 'rgb', None),
+                ('UNIFORM', 7, 'u_scale', 'vec3',
+                 np.array([1, 2, 3], np.float32)),
+                ('UNIFORM', 7, 'u_scale', 'vec3',
+                 np.array([4, 5, 6], np.float32)),
+                ('FUNC', 'glEnable', 'blend'),
+                ('FUNC', 'glColorMask', True, False, True, np.bool_(True)),
+                ('FUNC', 'glDepthRange', 0.0, np.float32(0.5)),
+                ('DRAW', 7, 'triangles', (0, 100)),
+                ('SWAP',)]
+    packed = glir.encode_glir(commands)
+    assert len(packed) == len(commands)
+    # large arrays are referenced, not copied
+    assert len(packed.buffers) == 1
+    assert packed.buffers[0] is arr
+    assert packed.nbytes < len(packed.header) + arr.nbytes + 1
+    # repeated strings are interned
+    assert packed.header.count(b'u_scale') == 1
+
+    decoded = list(packed)
+    assert len(decoded) == len(commands)
+    for c1, c2 in zip(commands, decoded):
+        assert c1[0] == c2[0]
+        assert len(c1) == len(c2)
+        for v1, v2 in zip(c1[1:], c2[1:]):
+            if isinstance(v1, np.ndarray):
+                assert v1.dtype == v2.dtype
+                assert np.array_equal(v1, v2)
+            else:
+                assert v1 == v2
+    assert decoded[3][3] is arr
+    assert isinstance(decoded[9][5], bool)
+
+    # decoding from raw bytes, as received from another process
+    decoded = glir.decode_glir(packed.header, [arr.tobytes()])
+    assert np.array_equal(decoded[3][3], arr)
+
+    # reusing an encoder
+    encoder = glir.GlirEncoder(size=8)
+    packed1 = encoder.encode(commands)
+    packed2 = encoder.encode(commands[:2])
+    assert packed1.header == packed.header
+    assert len(list(packed2)) == 2
+
+    with pytest.raises(ValueError):
+        glir.encode_glir([('FOO', 1)])
+    with pytest.raises(ValueError):
+        glir.decode_glir(b'NOPE' + packed.header[4:])
+
+
+def test_parser_batches():
+    """Test that the parser dispatches runs of commands per object"""
+    parser = glir.GlirParser()
+    program = mock.MagicMock()
+    parser._objects[1] = program
+    parser._invalid_objects.add(2)
+    commands = [('UNIFORM', 1, 'u_a', 'float', 1.0),
+                ('UNIFORM', 1, 'u_b', 'float', 2.0),
+                ('UNIFORM', 2, 'u_a', 'float', 1.0),
+                ('DRAW', 1, 'points', (0, 10)),
+                ('UNIFORM', 1, 'u_a', 'float', 3.0)]
+    batches = list(glir._iter_batches(commands))
+    assert [(b[0], b[1], len(b[2])) for b in batches] == [
+        ('UNIFORM', 1, 2), ('UNIFORM', 2, 1), ('DRAW', 1, 1),
+        ('UNIFORM', 1, 1)]
+    parser.parse(glir.encode_glir(commands))
+    assert program.set_uniform.call_args_list == [
+        mock.call('u_a', 'float', 1.0), mock.call('u_b', 'float', 2.0),
+        mock.call('u_a', 'float', 3.0)]
+    program.draw.assert_called_once_with('points', (0, 10))
+    with pytest.raises(RuntimeError):
+        parser.parse([('UNIFORM', 3, 'u_a', 'float', 1.0)])
+
+
 @requires_application()
 def test_log_parser():
     """Test GLIR log parsing
@@ -276,6 +276,21 @@ class ProgramTest(unittest.TestCase):
             assert glir_cmd[0] == 'DRAW'
             assert len(glir_cmd[-1]) == 3
 
+            # Draw part of the elements
+            program.draw('triangles', indices[:6])
+            glir_cmd = glir.clear()[-1]
+            assert glir_cmd[-1] == (indices.id, 'UNSIGNED_BYTE', 6)
+            program.draw('triangles', indices[3:6])
+            glir_cmd = glir.clear()[-1]
+            assert glir_cmd[-1] == (indices.id, 'UNSIGNED_BYTE', 3, 3)
+
+            # Draw a range of vertices
+            program.draw('line_strip', (2, 5))
+            glir_cmd = glir.clear()[-1]
+            assert glir_cmd[0] == 'DRAW'
+            assert glir_cmd[-1] == (2, 5)
+            self.assertRaises(ValueError, program.draw, 'lines', (8, 5))
+
             # Invalid mode
             self.assertRaises(ValueError, program.draw, 'nogeometricshape')
             # Invalid index
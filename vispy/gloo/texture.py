@@ -151,6 +151,12 @@ class BaseTexture(GLObject):
         """
         return self._format
 
+    @property
+    def internalformat(self):
+        """ The internal (storage) format of the texture, or None.
+        """
+        return self._internalformat
+
     @property
     def wrapping(self):
         """ Texture wrapping mode """
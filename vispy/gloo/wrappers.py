@@ -9,7 +9,7 @@ from copy import deepcopy
 
 from . import gl
 from ..color import Color
-from ..util import logger
+from ..util import logger, frame_timing
 
 
 __all__ = ('set_viewport', 'set_depth_range', 'set_front_face',  # noqa
@@ -641,42 +641,43 @@ def read_pixels(viewport=None, alpha=True, mode='color', out_type='unsigned_byte
     if context.shared.parser.is_remote():
         raise RuntimeError('Cannot use read_pixels() with remote GLIR parser')
 
-    finish()  # noqa - finish first, also flushes GLIR commands
-    type_dict = {'unsigned_byte': gl.GL_UNSIGNED_BYTE,
-                 np.uint8: gl.GL_UNSIGNED_BYTE,
-                 'float': gl.GL_FLOAT,
-                 np.float32: gl.GL_FLOAT}
-    type_ = _check_conversion(out_type, type_dict)
-    if viewport is None:
-        viewport = gl.glGetParameter(gl.GL_VIEWPORT)
-    viewport = np.array(viewport, int)
-    if viewport.ndim != 1 or viewport.size != 4:
-        raise ValueError('viewport should be 1D 4-element array-like, not %s'
-                         % (viewport,))
-    x, y, w, h = viewport
-    gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)  # PACK, not UNPACK
-    if mode == 'depth':
-        fmt = gl.GL_DEPTH_COMPONENT
-        shape = (h, w, 1)
-    elif mode == 'stencil':
-        fmt = gl.GL_STENCIL_INDEX8
-        shape = (h, w, 1)
-    elif alpha:
-        fmt = gl.GL_RGBA
-        shape = (h, w, 4)
-    else:
-        fmt = gl.GL_RGB
-        shape = (h, w, 3)
-    im = gl.glReadPixels(x, y, w, h, fmt, type_)
-    gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 4)
-    # reshape, flip, and return
-    if not isinstance(im, np.ndarray):
-        np_dtype = np.uint8 if type_ == gl.GL_UNSIGNED_BYTE else np.float32
-        im = np.frombuffer(im, np_dtype)
-
-    im.shape = shape
-    im = im[::-1, ...]  # flip the image
-    return im
+    with frame_timing.span('read_pixels', 'readback'):
+        finish()  # noqa - finish first, also flushes GLIR commands
+        type_dict = {'unsigned_byte': gl.GL_UNSIGNED_BYTE,
+                     np.uint8: gl.GL_UNSIGNED_BYTE,
+                     'float': gl.GL_FLOAT,
+                     np.float32: gl.GL_FLOAT}
+        type_ = _check_conversion(out_type, type_dict)
+        if viewport is None:
+            viewport = gl.glGetParameter(gl.GL_VIEWPORT)
+        viewport = np.array(viewport, int)
+        if viewport.ndim != 1 or viewport.size != 4:
+            raise ValueError('viewport should be 1D 4-element array-like, '
+                             'not %s' % (viewport,))
+        x, y, w, h = viewport
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)  # PACK, not UNPACK
+        if mode == 'depth':
+            fmt = gl.GL_DEPTH_COMPONENT
+            shape = (h, w, 1)
+        elif mode == 'stencil':
+            fmt = gl.GL_STENCIL_INDEX8
+            shape = (h, w, 1)
+        elif alpha:
+            fmt = gl.GL_RGBA
+            shape = (h, w, 4)
+        else:
+            fmt = gl.GL_RGB
+            shape = (h, w, 3)
+        im = gl.glReadPixels(x, y, w, h, fmt, type_)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 4)
+        # reshape, flip, and return
+        if not isinstance(im, np.ndarray):
+            np_dtype = np.uint8 if type_ == gl.GL_UNSIGNED_BYTE else np.float32
+            im = np.frombuffer(im, np_dtype)
+
+        im.shape = shape
+        im = im[::-1, ...]  # flip the image
+        return im
 
 
 def get_gl_configuration():
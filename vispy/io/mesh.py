@@ -6,13 +6,91 @@
 """
 
 import os
+import json
+import tempfile
 from os import path as op
 
+import numpy as np
+
 from .wavefront import WavefrontReader, WavefrontWriter
 from .stl import load_stl
+from ..util import logger
+
+_MESH_ARRAYS = ('vertices', 'faces', 'normals', 'texcoords')
+_MESH_CACHE_VERSION = 1
+
+
+def _mesh_cache_dir(fname, cache):
+    """The directory of the binary cache of a mesh file"""
+    if cache is True:
+        return fname + '.cache'
+    return op.join(cache, op.basename(fname) + '.cache')
+
+
+def _mesh_cache_key(fname, options):
+    """What identifies the contents of a mesh file, read with options"""
+    stat = os.stat(fname)
+    return dict(path=op.abspath(fname), size=stat.st_size,
+                mtime=stat.st_mtime_ns, version=_MESH_CACHE_VERSION,
+                options=options)
+
+
+def _read_mesh_cache(fname, cache, options):
+    """The memory mapped arrays of a cached mesh, or None if the cache is
+    missing or out of date.
+    """
+    cache_dir = _mesh_cache_dir(fname, cache)
+    try:
+        with open(op.join(cache_dir, 'key.json')) as fid:
+            key = json.load(fid)
+        arrays = key.pop('arrays')
+        if key != _mesh_cache_key(fname, options):
+            return None
+        return tuple(np.load(op.join(cache_dir, name + '.npy'), mmap_mode='r')
+                     if name in arrays else None for name in _MESH_ARRAYS)
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+
+def _write_mesh_cache(fname, cache, options, mesh):
+    """Write the arrays of a mesh to its binary cache"""
+    cache_dir = _mesh_cache_dir(fname, cache)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        key_fname = op.join(cache_dir, 'key.json')
+        if op.isfile(key_fname):
+            os.remove(key_fname)
+        arrays = []
+        for name, array in zip(_MESH_ARRAYS, mesh):
+            if array is not None:
+                _save_replace(op.join(cache_dir, name + '.npy'), array)
+                arrays.append(name)
+        # the key is written last, so that it only exists with all arrays
+        key = _mesh_cache_key(fname, options)
+        key['arrays'] = arrays
+        with open(key_fname, 'w') as fid:
+            json.dump(key, fid)
+    except (IOError, OSError) as err:
+        logger.warning('Could not write mesh cache %s: %s' % (cache_dir, err))
+
+
+def _save_replace(fname, array):
+    """Save an array to a temporary file that then replaces *fname*
+
+    The arrays of an earlier read may still map the old file, which must
+    not be overwritten in place.
+    """
+    fd, tmp_fname = tempfile.mkstemp(suffix='.npy', dir=op.dirname(fname))
+    try:
+        with os.fdopen(fd, 'wb') as fid:
+            np.save(fid, array)
+        os.replace(tmp_fname, fname)
+    except Exception:
+        os.remove(tmp_fname)
+        raise
 
 
-def read_mesh(fname):
+def read_mesh(fname, cache=False, weld=False):
     """Read mesh data from file.
 
     Parameters
@@ -20,6 +98,14 @@ def read_mesh(fname):
     fname : str
         File name to read. Format will be inferred from the filename.
         Currently only '.obj' and '.obj.gz' are supported.
+    cache : bool | str
+        If True, keep a binary copy of the mesh data in a ``.cache``
+        directory next to the file, and if a string, in that directory.
+        Later reads of the unchanged file return read-only memory mapped
+        arrays from that copy, which is much faster for large meshes.
+    weld : bool
+        For STL files, merge the identical vertices of the triangles into an
+        indexed mesh. The normals are still those of the faces.
 
     Returns
     -------
@@ -32,6 +118,19 @@ def read_mesh(fname):
     texcoords : array | None
         Texture coordinates.
     """
+    options = dict(weld=weld)
+    if cache:
+        mesh = _read_mesh_cache(fname, cache, options)
+        if mesh is not None:
+            return mesh
+    mesh = _read_mesh(fname, **options)
+    if cache:
+        _write_mesh_cache(fname, cache, options, mesh)
+    return mesh
+
+
+def _read_mesh(fname, weld):
+    """Read mesh data from file, see ``read_mesh``"""
     # Check format
     fmt = op.splitext(fname)[1].lower()
     if fmt == '.gz':
@@ -40,8 +139,8 @@ def read_mesh(fname):
     if fmt in ('.obj'):
         return WavefrontReader.read(fname)
     elif fmt in ('.stl'):
-        file_obj = open(fname, mode='rb')
-        mesh = load_stl(file_obj)
+        with open(fname, mode='rb') as file_obj:
+            mesh = load_stl(file_obj, weld=weld)
         vertices = mesh['vertices']
         faces = mesh['faces']
         normals = mesh['face_normals']
@@ -6,8 +6,13 @@
 # See https://github.com/mikedh/trimesh/blob/master/LICENSE.md for
 # the license.
 
+import io
+import time
+
 import numpy as np
 
+from ..util import logger
+
 
 class HeaderError(Exception):
     # the exception raised if an STL file object doesn't match its header
@@ -21,9 +26,11 @@ _stl_dtype = np.dtype([('normals', np.float32, (3)),
 # define a numpy datatype for the header of a binary STL file
 _stl_dtype_header = np.dtype([('header', np.void, 80),
                               ('face_count', np.int32)])
+# the file objects backed by a file, that can be memory mapped
+_mappable_files = (io.FileIO, io.BufferedReader, io.BufferedRandom)
 
 
-def load_stl(file_obj, file_type=None):
+def load_stl(file_obj, file_type=None, weld=False):
     '''
     Load an STL file from a file object.
 
@@ -31,6 +38,7 @@ def load_stl(file_obj, file_type=None):
     ----------
     file_obj: open file- like object
     file_type: not used
+    weld: bool, merge the identical vertices of the faces
 
     Returns
     ----------
@@ -39,6 +47,7 @@ def load_stl(file_obj, file_type=None):
               faces:        (m,3) int, indexes of vertices
               face_normals: (m,3) float, normal vector of each face
     '''
+    t0 = time.time()
     # save start of file obj
     file_pos = file_obj.tell()
     try:
@@ -46,23 +55,88 @@ def load_stl(file_obj, file_type=None):
         # if that is true, it is almost certainly a binary STL file
         # if the header doesn't match the file length a HeaderError will be
         # raised
-        return load_stl_binary(file_obj)
+        result = load_stl_binary(file_obj, weld=weld)
     except HeaderError:
         # move the file back to where it was initially
         file_obj.seek(file_pos)
         # try to load the file as an ASCII STL
         # if the header doesn't match the file length a HeaderError will be
         # raised
-        return load_stl_ascii(file_obj)
+        result = load_stl_ascii(file_obj, weld=weld)
+    logger.debug('loading STL took %0.3f seconds: %d faces, %d vertices, '
+                 '%0.1f MB' % (time.time() - t0, len(result['faces']),
+                               len(result['vertices']),
+                               sum(a.nbytes for a in result.values()) / 1e6))
+    return result
+
+
+def _weld_vertices(vertices):
+    '''
+    Merge the identical vertices of a mesh.
 
+    The vertices are sorted by a hash of their coordinates, and compared
+    exactly within runs of equal hashes.
 
-def load_stl_binary(file_obj):
+    Parameters
+    ----------
+    vertices: (n,3) float, vertices
+
+    Returns
+    ----------
+    unique: (k,3) float, the distinct vertices, in order of first use
+    index: (n,) int, the index of each vertex in unique
+    '''
+    # adding zero merges -0.0 and 0.0
+    keys = np.ascontiguousarray(vertices + vertices.dtype.type(0))
+    keys = keys.view(np.uint32 if keys.dtype.itemsize == 4 else np.uint64)
+    keys = keys.reshape(len(vertices), -1)
+    hashes = np.zeros(len(keys), np.uint64)
+    for i, prime in enumerate((0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+                               0x165667B19E3779F9)):
+        hashes ^= keys[:, i].astype(np.uint64) * np.uint64(prime)
+    order = np.argsort(hashes)
+    hashes = hashes[order]
+    new_hash = np.ones(len(keys), bool)
+    new_hash[1:] = hashes[1:] != hashes[:-1]
+    sorted_keys = keys[order]
+    new = np.ones(len(keys), bool)
+    new[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    if (new & ~new_hash).any():
+        # different vertices with the same hash: sort the vertices instead
+        order = np.lexsort(keys.T[::-1])
+        sorted_keys = keys[order]
+        new[1:] = (sorted_keys[1:] != sorted_keys[:-1]).any(axis=1)
+    starts = np.flatnonzero(new)
+    # number the distinct vertices in order of first use
+    first = np.minimum.reduceat(order, starts)
+    rank = np.empty(len(starts), np.intp)
+    rank[np.argsort(first)] = np.arange(len(starts))
+    index = np.empty(len(vertices), np.intp)
+    index[order] = rank[np.cumsum(new) - 1]
+    return vertices[np.sort(first)], index
+
+
+def _weld(result):
+    '''
+    Merge the identical vertices of a loaded STL file.
+    '''
+    vertices, index = _weld_vertices(result['vertices'])
+    result['vertices'] = vertices
+    result['faces'] = index.reshape((-1, 3))
+    return result
+
+
+def load_stl_binary(file_obj, weld=False):
     '''
     Load a binary STL file from a file object.
 
+    The triangle records are memory mapped if the file object is backed by
+    a file.
+
     Parameters
     ----------
     file_obj: open file- like object
+    weld: bool, merge the identical vertices of the faces
 
     Returns
     ----------
@@ -78,7 +152,8 @@ def load_stl_binary(file_obj):
     if len(header_data) < header_length:
         raise HeaderError('Binary STL file not long enough to contain header!')
 
-    header = np.fromstring(header_data, dtype=_stl_dtype_header)
+    header = np.frombuffer(header_data, dtype=_stl_dtype_header)
+    face_count = int(header['face_count'][0])
 
     # now we check the length from the header versus the length of the file
     # data_start should always be position 84, but hard coding that felt ugly
@@ -95,7 +170,7 @@ def load_stl_binary(file_obj):
     # of the file doesn't match the header, the loaded version is almost
     # certainly going to be garbage.
     len_data = data_end - data_start
-    len_expected = header['face_count'] * _stl_dtype.itemsize
+    len_expected = face_count * _stl_dtype.itemsize
 
     # this check is to see if this really is a binary STL file.
     # if we don't do this and try to load a file that isn't structured properly
@@ -106,22 +181,31 @@ def load_stl_binary(file_obj):
 
     # all of our vertices will be loaded in order due to the STL format,
     # so faces are just sequential indices reshaped.
-    faces = np.arange(header['face_count'] * 3).reshape((-1, 3))
-    blob = np.fromstring(file_obj.read(), dtype=_stl_dtype)
-
-    result = {'vertices': blob['vertices'].reshape((-1, 3)),
-              'face_normals': blob['normals'].reshape((-1, 3)),
+    faces = np.arange(face_count * 3).reshape((-1, 3))
+    if face_count and isinstance(file_obj, _mappable_files):
+        # map the records of the file, rather than reading them into memory
+        blob = np.memmap(file_obj, dtype=_stl_dtype, mode='r',
+                         offset=data_start, shape=(face_count,))
+        file_obj.seek(data_end)
+    else:
+        blob = np.frombuffer(file_obj.read(), dtype=_stl_dtype)
+
+    # the fields of the records are strided, this copies them once
+    result = {'vertices': np.array(blob['vertices']).reshape((-1, 3)),
+              'face_normals': np.array(blob['normals']).reshape((-1, 3)),
               'faces': faces}
-    return result
+    del blob
+    return _weld(result) if weld else result
 
 
-def load_stl_ascii(file_obj):
+def load_stl_ascii(file_obj, weld=False):
     '''
     Load an ASCII STL file from a file object.
 
     Parameters
     ----------
     file_obj: open file- like object
+    weld: bool, merge the identical vertices of the faces
 
     Returns
     ----------
@@ -158,9 +242,10 @@ def load_stl_ascii(file_obj):
     face_normals = blob[normal_index].astype(np.float64)
     vertices = blob[vertex_index.reshape((-1, 3))].astype(np.float64)
 
-    return {'vertices': vertices,
-            'faces': faces,
-            'face_normals': face_normals}
+    result = {'vertices': vertices,
+              'faces': faces,
+              'face_normals': face_normals}
+    return _weld(result) if weld else result
 
 
 _stl_loaders = {'stl': load_stl,
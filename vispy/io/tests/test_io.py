@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) Vispy Development Team. All Rights Reserved.
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import io
+import os
 import numpy as np
 from os import path as op
 from numpy.testing import assert_allclose, assert_array_equal
 
 from vispy.io import write_mesh, read_mesh, load_data_file
+from vispy.io.stl import load_stl, _stl_dtype, _stl_dtype_header
+from vispy.io.wavefront import WavefrontReader
 from vispy.geometry import _fast_cross_3d
 from vispy.util import _TempDir
 from vispy.testing import (run_tests_if_main, assert_equal, assert_raises,
@@ -84,6 +88,162 @@ def test_meshio():
     assert np.all(out_faces == faces)
 
 
+def _read_lines(fname):
+    """Read an OBJ file line by line"""
+    with open(fname, 'rb') as fid:
+        reader = WavefrontReader(fid)
+        try:
+            while True:
+                reader.readLine()
+        except EOFError:
+            pass
+    return reader.finish()
+
+
+def test_wavefront_chunks():
+    """Test reading wavefront files in chunks"""
+    fname_out = op.join(temp_dir, 'temp.obj')
+    texts = [
+        'v 0 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1 0.5 0.5 0.5\n# comment\n'
+        'f 1 2 3\nf 1 3 4\n\ng group\nf 2 4 3\n',
+        'v 0 0 0\r\nv 1 0 0\r\nv 1 1 0\r\nv 0 1 0\r\nvt 0 0\r\n'
+        'vt 1 0\r\nvt 1 1\r\nvn 0 0 1\r\nvn 0 0 -1\r\n'
+        'f 1/1/1 2/2/1 3/3/1 4/3/2\r\nf 4/3/2 3/3/1 2/2/1 1/1/1',
+        'v 0 0 0\nv 1 0 0\nv 0 1 0\nvn 0 0 1\nf 1//1 2//1 3//1\n'
+        'f 2//1 3//1 1//1\n',
+        # index sets of different forms, and an indented line
+        'v 0 0 0\nv 1 0 0\nv 0 1 0\nvt 0 0\nf 1 2 3\nf 1/1 2/1 3/1\n',
+        'v 0 0 0\n  v 1 0 0\nv 0 1 0\nf 1 2 3\n',
+    ]
+    for text in texts:
+        with open(fname_out, 'w') as fid:
+            fid.write(text)
+        mesh1 = _read_lines(fname_out)
+        for chunk_size in (5, 2 ** 22):
+            with open(fname_out, 'rb') as fid:
+                reader = WavefrontReader(fid)
+                if not reader.readChunks(chunk_size):
+                    assert text in texts[3:]
+                    continue
+                mesh2 = reader.finish()
+            for m1, m2 in zip(mesh1, mesh2):
+                if m1 is None:
+                    assert m2 is None
+                else:
+                    assert_equal(m1.dtype, m2.dtype)
+                    assert_array_equal(m1, m2)
+        for m1, m2 in zip(mesh1, read_mesh(fname_out)):
+            assert_array_equal(m1, m2)
+
+    # relative indices
+    with open(fname_out, 'w') as fid:
+        fid.write('v 0 0 0\nv 1 0 0\nv 0 1 0\nf -3 -2 -1\nv 0 0 1\n'
+                  'f 1 3 -1\n')
+    vertices, faces, _, _ = read_mesh(fname_out)
+    assert_array_equal(faces, [[0, 1, 2], [0, 2, 3]])
+    assert_array_equal(vertices[3], [0, 0, 1])
+    with open(fname_out, 'w') as fid:
+        fid.write('v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 4\n')
+    assert_raises(IndexError, read_mesh, fname_out)
+    with open(fname_out, 'w') as fid:
+        fid.write('v 0 0 0\nv 1 0 0\nv 0 1 0\nv 0 0 1\nf 1 2 3\n'
+                  'f 1 2 3 4\n')
+    assert_raises(RuntimeError, read_mesh, fname_out)
+
+
+def test_read_mesh_cache():
+    """Test the binary cache of read_mesh"""
+    fname_out = op.join(temp_dir, 'cached.obj')
+    vertices = np.random.rand(4, 3).astype(np.float32)
+    faces = np.array([[0, 1, 2], [0, 2, 3]])
+    write_mesh(fname_out, vertices, faces, None, None, overwrite=True)
+    mesh1 = read_mesh(fname_out, cache=True)
+    assert op.isdir(fname_out + '.cache')
+    mesh2 = read_mesh(fname_out, cache=True)
+    assert isinstance(mesh2[0], np.memmap)
+    assert mesh2[3] is None
+    for m1, m2 in zip(mesh1, mesh2):
+        if m1 is not None:
+            assert_array_equal(m1, m2)
+
+    # a changed file is read again
+    write_mesh(fname_out, vertices[:3], faces[:1], None, None,
+               overwrite=True)
+    stat = os.stat(fname_out)
+    os.utime(fname_out, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    mesh3 = read_mesh(fname_out, cache=True)
+    assert_equal(len(mesh3[0]), 3)
+    assert_equal(len(read_mesh(fname_out, cache=True)[0]), 3)
+    # the arrays of the earlier reads still map the old cache
+    assert_array_equal(mesh2[0], mesh1[0])
+    assert_array_equal(mesh2[1], faces)
+
+    # the cache is written again while its arrays are mapped
+    write_mesh(fname_out, vertices, faces, None, None, overwrite=True)
+    stat = os.stat(fname_out)
+    os.utime(fname_out, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+    mesh4 = read_mesh(fname_out, cache=True)
+    assert_equal(len(mesh4[0]), 4)
+    assert_array_equal(mesh3[0], vertices[:3])
+    assert_array_equal(read_mesh(fname_out, cache=True)[1], faces)
+    assert_equal(sorted(os.listdir(fname_out + '.cache')),
+                 ['faces.npy', 'key.json', 'normals.npy', 'vertices.npy'])
+
+    # in another directory
+    cache_dir = op.join(temp_dir, 'mesh_cache')
+    read_mesh(fname_out, cache=cache_dir)
+    mesh = read_mesh(fname_out, cache=cache_dir)
+    assert isinstance(mesh[1], np.memmap)
+    assert_array_equal(mesh[1], faces)
+
+
+def test_stl():
+    """Test reading binary and ASCII STL files"""
+    rng = np.random.RandomState(0)
+    points = rng.rand(20, 3).astype(np.float32)
+    points[0] = -0., 0., 0.
+    points[1] = 0., 0., 0.
+    triangles = points[rng.randint(0, 20, (50, 3))]
+    records = np.zeros(50, _stl_dtype)
+    records['vertices'] = triangles
+    records['normals'] = rng.rand(50, 3)
+    header = np.zeros(1, _stl_dtype_header)
+    header['face_count'] = 50
+    fname_out = op.join(temp_dir, 'temp.stl')
+    with open(fname_out, 'wb') as fid:
+        fid.write(header.tobytes() + records.tobytes())
+    ascii_out = op.join(temp_dir, 'ascii.stl')
+    with open(ascii_out, 'w') as fid:
+        fid.write('solid test\n')
+        for normal, triangle in zip(records['normals'], triangles):
+            fid.write('facet normal %.9g %.9g %.9g\nouter loop\n'
+                      % tuple(normal))
+            for vertex in triangle:
+                fid.write('vertex %.9g %.9g %.9g\n' % tuple(vertex))
+            fid.write('endloop\nendfacet\n')
+        fid.write('endsolid test\n')
+
+    vertices, faces, normals, texcoords = read_mesh(fname_out)
+    assert_array_equal(vertices, triangles.reshape(-1, 3))
+    assert_array_equal(faces, np.arange(150).reshape(-1, 3))
+    assert_array_equal(normals, records['normals'])
+    assert texcoords is None
+    with open(fname_out, 'rb') as fid:
+        mesh = load_stl(io.BytesIO(fid.read()))
+    assert_array_equal(mesh['vertices'], vertices)
+
+    # the identical vertices are merged, in order of first use
+    for fname in (fname_out, ascii_out):
+        vertices, faces, normals, _ = read_mesh(fname, weld=True)
+        distinct = np.unique(triangles.reshape(-1, 3) + 0., axis=0)
+        assert_equal(len(vertices), len(distinct))
+        assert_allclose(vertices[faces], triangles)
+        first_use = [np.flatnonzero(faces.ravel() == i)[0]
+                     for i in range(len(vertices))]
+        assert (np.diff(first_use) > 0).all()
+        assert_allclose(normals, records['normals'])
+
+
 def _slow_calculate_normals(rr, tris):
     """Efficiently compute vertex normals for triangulated surface"""
     # first, compute triangle normals
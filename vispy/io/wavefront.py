@@ -20,12 +20,102 @@ The classes are written with compatibility of Python3 in mind.
 
 import numpy as np
 import time
+import warnings
 from gzip import GzipFile
 from os import path as op
 
 from ..geometry import _calculate_normals
 from ..util import logger
 
+# the whitespace characters, by byte value
+_SPACE = np.zeros(256, bool)
+_SPACE[[9, 10, 11, 12, 13, 32]] = True
+
+# the commands parsed in bulk
+_BULK_COMMANDS = (b'v', b'vt', b'vn', b'f')
+
+
+def _fromstring(text, dtype, count):
+    """ Parse *count* whitespace separated numbers, or return None if the
+    text holds something else.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        try:
+            values = np.fromstring(text, dtype=dtype, sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+    return values if len(values) == count else None
+
+
+def _count_per_line(mask, line_ends):
+    """ The number of true values of a mask in each line """
+    return np.diff(np.searchsorted(np.flatnonzero(mask),
+                                   np.append(0, line_ends)))
+
+
+def _parse_chunk(chunk):
+    """ Parse the vertex, texture coordinate, normal and face lines of a
+    chunk of an OBJ file with numpy.
+
+    The chunk must end with a newline. Returns a dict with the numbers of
+    the lines of each command, as ``(values, counts)`` with the number of
+    values or index sets of each line, the other lines, and for the faces
+    the number of v, vt and vn lines before each face. Returns None if the
+    chunk has lines that only the line based reader understands.
+    """
+    buf = np.frombuffer(chunk, np.uint8)
+    ends = np.flatnonzero(buf == 10)
+    starts = np.append(0, ends[:-1] + 1)
+    padded = np.append(buf, [10, 10])
+    first, second = padded[starts], padded[starts + 1]
+    third = padded[starts + 2]
+    kinds = np.zeros(len(starts), np.int8)
+    kinds[(first == ord('v')) & _SPACE[second] & (second != 10)] = 1
+    for i, c in ((2, 't'), (3, 'n')):
+        kinds[(first == ord('v')) & (second == ord(c)) & _SPACE[third] &
+              (third != 10)] = i
+    kinds[(first == ord('f')) & _SPACE[second] & (second != 10)] = 4
+    kinds[(first == ord('#')) | (starts == ends)] = 5
+    parsed = dict(other=[chunk[starts[i]:ends[i]]
+                         for i in np.flatnonzero(kinds == 0)])
+    parsed['refs'] = np.stack([np.cumsum(kinds == i)[kinds == 4]
+                               for i in (1, 2, 3)], axis=1)
+
+    # the runs of lines of the same command
+    runs = np.append(0, np.flatnonzero(np.diff(kinds)) + 1)
+    run_ends = np.append(runs[1:], len(kinds))
+    for i, command in enumerate(_BULK_COMMANDS):
+        text = b''.join([chunk[starts[a]:ends[b - 1] + 1] for a, b in
+                         zip(runs, run_ends) if kinds[a] == i + 1])
+        # the keyword is the only text of these lines that is not a number
+        text = text.replace(command, b' ' * len(command))
+        if not text:
+            parsed[command] = np.zeros((0, 1)), np.zeros(0, np.intp)
+            continue
+        chars = np.frombuffer(text, np.uint8)
+        space = chars <= 32
+        token_start = ~space
+        token_start[1:] &= space[:-1]
+        line_ends = np.flatnonzero(chars == 10)
+        counts = _count_per_line(token_start, line_ends)
+        n_fields = 1
+        if command == b'f':
+            # the number of fields of the index sets, from their slashes
+            slashes = _count_per_line(chars == ord('/'), line_ends)
+            if counts[0]:
+                n_fields = slashes[0] // counts[0] + 1
+            if (slashes != (n_fields - 1) * counts).any():
+                return None
+            text = text.replace(b'//', b'/0/').replace(b'/', b' ')
+            values = _fromstring(text, np.int64, counts.sum() * n_fields)
+        else:
+            values = _fromstring(text, np.float64, counts.sum())
+        if values is None:
+            return None
+        parsed[command] = values.reshape(-1, n_fields), counts
+    return parsed
+
 
 class WavefrontReader(object):
 
@@ -68,16 +158,19 @@ class WavefrontReader(object):
         fmt = op.splitext(fname)[1].lower()
         assert fmt in ('.obj', '.gz')
         opener = open if fmt == '.obj' else GzipFile
+        t0 = time.time()
         with opener(fname, 'rb') as f:
-            try:
-                reader = WavefrontReader(f)
-                while True:
-                    reader.readLine()
-            except EOFError:
-                pass
+            reader = WavefrontReader(f)
+            if not reader.readChunks():
+                f.seek(0)
+                try:
+                    reader = WavefrontReader(f)
+                    while True:
+                        reader.readLine()
+                except EOFError:
+                    pass
 
         # Done
-        t0 = time.time()
         mesh = reader.finish()
         logger.debug('reading mesh took ' +
                      str(time.time() - t0) +
@@ -103,7 +196,14 @@ class WavefrontReader(object):
             self._vn.append(self.readTuple(line))
         elif line.startswith('f '):
             self._faces.append(self.readFace(line))
-        elif line.startswith('#'):
+        else:
+            self.readOther(line)
+
+    def readOther(self, line):
+        """ Processes a stripped line that has no vertex, texture coordinate,
+        normal or face.
+        """
+        if line.startswith('#'):
             pass  # Comment
         elif line.startswith('mtllib '):
             logger.warning('Notice reading .OBJ: material properties are '
@@ -116,6 +216,105 @@ class WavefrontReader(object):
             logger.warning('Notice reading .OBJ: ignoring %s command.'
                            % line.strip())
 
+    def readChunks(self, chunk_size=2**22):
+        """ Reads the file in large chunks, and parses them with numpy.
+
+        This is much faster than reading the file line by line. Returns
+        False if the file has lines that only ``readLine`` understands, e.g.
+        faces with index sets of different forms.
+        """
+        parts = dict((command, []) for command in _BULK_COMMANDS)
+        refs = []
+        # the number of v, vt and vn lines in the previous chunks
+        n_lines = np.zeros(3, np.intp)
+        rest = b''
+        while True:
+            data = self._f.read(chunk_size)
+            chunk = rest + data
+            cut = chunk.rfind(b'\n') + 1 if data else len(chunk)
+            chunk, rest = chunk[:cut], chunk[cut:]
+            if chunk:
+                parsed = _parse_chunk(chunk if chunk.endswith(b'\n')
+                                      else chunk + b'\n')
+                if parsed is None:
+                    return False
+                for line in parsed['other']:
+                    line = line.decode('ascii', 'ignore').strip()
+                    if any(line.startswith(command.decode() + ' ')
+                           for command in _BULK_COMMANDS):
+                        return False
+                    self.readOther(line)
+                for command in _BULK_COMMANDS:
+                    parts[command].append(parsed[command])
+                refs.append(parsed['refs'] + n_lines)
+                n_lines += [len(parsed[c][1]) for c in (b'v', b'vt', b'vn')]
+            if not data:
+                break
+
+        # the first values of each line
+        lines = {}
+        for command, n in ((b'v', 3), (b'vt', 3), (b'vn', 3), (b'f', None)):
+            chunks = [p for p in parts[command] if len(p[1])] or \
+                parts[command][:1] or [(np.zeros((0, 1)), np.zeros(0, int))]
+            if len(set(p[0].shape[1] for p in chunks)) > 1:
+                return False
+            values = np.concatenate([p[0] for p in chunks])
+            counts = np.concatenate([p[1] for p in chunks])
+            if n is not None:
+                if command == b'vt':
+                    n = min([n] + list(counts))
+                elif (counts < n).any():
+                    return False
+                offsets = np.cumsum(counts) - counts
+                values = values.ravel()[offsets[:, None] + np.arange(n)]
+            lines[command] = values, counts
+        self._v = lines[b'v'][0]
+        self._vt = lines[b'vt'][0]
+        self._vn = lines[b'vn'][0]
+
+        indices, counts = lines[b'f']
+        if not len(counts):
+            return True
+        if (counts != counts[0]).any():
+            raise RuntimeError(
+                'Vispy requires that all faces are either triangles or quads.')
+
+        # absolute indices of the index sets, with -1 where not given
+        n_fields = indices.shape[1]
+        indices = indices.reshape(len(counts), counts[0], n_fields)
+        refs = np.concatenate(refs)[:, None, :n_fields]
+        indices = np.where(indices > 0, indices - 1,
+                           np.where(indices < 0, refs + indices, -1))
+        fields = [0]
+        if n_fields > 1 and (indices[..., 1] >= 0).all():
+            fields.append(1)
+        elif len(self._vt):
+            logger.warning('Ignoring texture coordinates because it is not '
+                           'specified for all faces.')
+        if n_fields > 2 and (indices[..., 2] >= 0).all():
+            fields.append(2)
+        sources = [self._v, self._vt, self._vn]
+        sizes = [len(sources[field]) for field in fields]
+        keys = indices[..., fields].reshape(-1, len(fields))
+        if ((keys < 0) | (keys >= sizes)).any():
+            raise IndexError('Face index out of range while reading .OBJ')
+
+        # the vertices are the distinct index sets, in order of appearance
+        if np.prod(sizes, dtype=float) < 2 ** 62:
+            keys = np.ravel_multi_index(keys.T, sizes)
+        _, first, inverse = np.unique(keys, return_index=True,
+                                      return_inverse=True,
+                                      axis=0 if keys.ndim == 2 else None)
+        order = np.argsort(first)
+        rank = np.empty(len(order), np.intp)
+        rank[order] = np.arange(len(order))
+        self._faces = rank[inverse.ravel()].reshape(len(counts), counts[0])
+        sets = indices.reshape(-1, n_fields)[first[order]]
+        self._vertices = self._v[sets[:, 0]]
+        self._texcords = self._vt[sets[:, 1]] if 1 in fields else None
+        self._normals = self._vn[sets[:, 2]] if 2 in fields else None
+        return True
+
     def readTuple(self, line, n=3):
         """ Reads a tuple of numbers. e.g. vertices, normals or teture coords.
         """
@@ -202,17 +401,17 @@ class WavefrontReader(object):
         BaseMesh instance.
         """
         self._vertices = np.array(self._vertices, 'float32')
-        if self._faces:
+        if len(self._faces):
             self._faces = np.array(self._faces, 'uint32')
         else:
             # Use vertices only
             self._vertices = np.array(self._v, 'float32')
             self._faces = None
-        if self._normals:
+        if self._normals is not None and len(self._normals):
             self._normals = np.array(self._normals, 'float32')
         else:
             self._normals = self._calculate_normals()
-        if self._texcords:
+        if self._texcords is not None and len(self._texcords):
             self._texcords = np.array(self._texcords, 'float32')
         else:
             self._texcords = None
@@ -5,6 +5,8 @@
 from __future__ import division
 
 import weakref
+from collections import OrderedDict
+
 import numpy as np
 
 from .. import gloo
@@ -14,6 +16,7 @@ from ..visuals.transforms import TransformSystem
 from ..color import Color
 from ..util import logger, Frozen
 from ..util.profiler import Profiler
+from ..util.frame_timing import get_timer
 from .subscene import SubScene
 from .events import SceneMouseEvent
 from .widgets import Widget
@@ -109,6 +112,9 @@ class SceneCanvas(app.Canvas, Frozen):
     This can cause problems with accessibility, as increasing the OS detection
     time or using a dedicated double-click button will not be respected.
     """
+    # Maximum number of offscreen framebuffers kept for rendering/picking
+    _max_render_targets = 4
+
     def __init__(self, title='VisPy canvas', size=(800, 600), position=None,
                  show=False, autoswap=True, app=None, create_native=True,
                  vsync=False, resizable=True, decorate=True, fullscreen=False,
@@ -123,6 +129,12 @@ class SceneCanvas(app.Canvas, Frozen):
         self._fb_stack = []
         self._vp_stack = []
         self._mouse_handler = None
+        # Offscreen framebuffers, reused between renders
+        self._render_targets = OrderedDict()
+        # Picking image of the full canvas, kept until the scene changes
+        # {elements: IDs} of the picking passes of the current scene
+        self._picking_ids = {}
+        self._picking_dirty = True
         self.transforms = TransformSystem(canvas=self)
         self._bgcolor = Color(bgcolor).rgba
         
@@ -188,6 +200,8 @@ class SceneCanvas(app.Canvas, Frozen):
         node : instance of Node
             Not used.
         """
+        # Any change to the scene makes the cached picking image invalid
+        self._picking_dirty = True
         # TODO: use node bounds to keep track of minimum drawable area
         if self._drawing:
             return
@@ -244,13 +258,8 @@ class SceneCanvas(app.Canvas, Frozen):
         
         """
         self.set_current()
-        # Set up a framebuffer to render to
-        offset = (0, 0) if region is None else region[:2]
-        csize = self.size if region is None else region[2:]
-        s = self.pixel_scale
-        size = tuple([x * s for x in csize]) if size is None else size
-        fbo = gloo.FrameBuffer(color=gloo.RenderBuffer(size[::-1]),
-                               depth=gloo.RenderBuffer(size[::-1]))
+        offset, csize, size = self._render_size(region, size)
+        fbo = self._get_render_target(size)
 
         self.push_fbo(fbo, offset, csize)
         try:
@@ -259,9 +268,105 @@ class SceneCanvas(app.Canvas, Frozen):
         finally:
             self.pop_fbo()
 
+    def render_frames(self, frames, region=None, size=None, bgcolor=None,
+                      crop=None, out=None):
+        """Render a sequence of frames offscreen and yield the image arrays.
+
+        This is intended for rendering many frames, e.g. to export a video.
+        The framebuffers are reused for all frames, and readbacks are
+        double-buffered: the draw commands of frame N+1 are submitted
+        before frame N is read back, so that the GPU can render frame N
+        while the next frame is prepared.
+
+        Parameters
+        ----------
+        frames : iterable | int
+            The scene is rendered each time an item of this iterable has been
+            produced, so this is typically a generator that updates the scene
+            and then yields. If an int, the scene is rendered this number of
+            times.
+        region : tuple | None
+            Specifies the region of the canvas to render. See ``render()``.
+        size : tuple | None
+            Specifies the size of the image arrays. See ``render()``.
+        bgcolor : instance of Color | None
+            The background color to use.
+        crop : array-like | None
+            The pixels read from the framebuffer. See ``render()``.
+        out : array | None
+            Array of type ubyte and shape (h, w, 4) to read each frame into.
+            If given, this array is yielded for every frame, so its contents
+            must be used before the next frame is requested.
+
+        Yields
+        ------
+        image : array
+            Numpy array of type ubyte and shape (h, w, 4). Index [0, 0] is the
+            upper-left corner of the rendered region.
+        """
+        if isinstance(frames, int):
+            frames = range(frames)
+        self.set_current()
+        offset, csize, size = self._render_size(region, size)
+        fbos = [self._get_render_target(size, i) for i in range(2)]
+        pending = None
+        for i, _ in enumerate(frames):
+            fbo = fbos[i % 2]
+            self.push_fbo(fbo, offset, csize)
+            try:
+                self._draw_scene(bgcolor=bgcolor)
+                # Submit the commands without waiting for them
+                self.context.flush()
+            finally:
+                self.pop_fbo()
+            if pending is not None:
+                yield self._read_render_target(pending, crop, out)
+            pending = fbo
+        if pending is not None:
+            yield self._read_render_target(pending, crop, out)
+
+    def _render_size(self, region, size):
+        """Return the offset and size of a region of the canvas, and the
+        size of the framebuffer to render it to.
+        """
+        offset = (0, 0) if region is None else region[:2]
+        csize = self.size if region is None else region[2:]
+        s = self.pixel_scale
+        size = tuple([x * s for x in csize]) if size is None else size
+        return offset, csize, tuple(size)
+
+    def _get_render_target(self, size, slot=0):
+        """Return a framebuffer with color and depth buffers of the given
+        size. Framebuffers are kept in a small pool keyed by size and slot,
+        so that repeated renders do not allocate new GPU buffers.
+        """
+        key = (tuple(size), slot)
+        fbo = self._render_targets.pop(key, None)
+        if fbo is None:
+            fbo = gloo.FrameBuffer(color=gloo.RenderBuffer(size[::-1]),
+                                   depth=gloo.RenderBuffer(size[::-1]))
+            # Drop the least recently used framebuffers
+            while len(self._render_targets) >= self._max_render_targets:
+                self._render_targets.popitem(last=False)
+        self._render_targets[key] = fbo
+        return fbo
+
+    def _read_render_target(self, fbo, crop=None, out=None):
+        """Read the image of a framebuffer, optionally into *out*.
+        """
+        with fbo:
+            img = fbo.read(crop=crop)
+        if out is None:
+            return img
+        out[...] = img
+        return out
+
     def _draw_scene(self, bgcolor=None):
         if bgcolor is None:
             bgcolor = self._bgcolor
+        timer = get_timer()
+        if timer is not None:
+            timer.begin_frame()
         self.context.clear(color=bgcolor, depth=True)
         self.draw_visual(self.scene)
 
@@ -278,6 +383,7 @@ class SceneCanvas(app.Canvas, Frozen):
             this draw.
         """
         prof = Profiler()
+        timer = get_timer()
         
         # make sure this canvas's context is active
         self.set_current()
@@ -301,7 +407,11 @@ class SceneCanvas(app.Canvas, Frozen):
                             invisible_node = node
                         else:
                             if hasattr(node, 'draw'):
-                                node.draw()
+                                if timer is None:
+                                    node.draw()
+                                else:
+                                    with timer.span(str(node), 'draw'):
+                                        node.draw()
                                 prof.mark(str(node))
                 else:
                     if node is invisible_node:
@@ -466,7 +576,155 @@ class SceneCanvas(app.Canvas, Frozen):
         visuals = [VisualNode._visual_ids.get(x, None) for x in ids]
         return [v for v in visuals if v is not None]
 
-    def _render_picking(self, crop):
+    def element_at(self, pos):
+        """Return the visual and the index of its element at a given position
+
+        The elements are the markers of Markers visuals, the faces of Mesh
+        visuals, and the segments of Line visuals drawn with the 'gl' method,
+        given by the index of their first vertex.
+
+        Parameters
+        ----------
+        pos : tuple
+            The position in logical coordinates to query.
+
+        Returns
+        -------
+        visual : instance of Visual | None
+            The visual at the position, if it exists.
+        element : int | None
+            The index of the element at the position, or None if the
+            elements of the visual are not known.
+        """
+        tr = self.transforms.get_transform('canvas', 'framebuffer')
+        fbpos = tr.map(pos)[:2]
+        crop = (fbpos[0], fbpos[1], 1, 1)
+        try:
+            id_ = self._render_picking(crop)[0, 0]
+        except RuntimeError:
+            # Without read_pixels() support, hit-test the visuals that
+            # index their elements, and fall back to bounds checking.
+            near = self.elements_near(pos, radius=0)
+            if near:
+                vis = min(near, key=lambda v: near[v][1][0])
+                return vis, int(near[vis][0][0])
+            return self._visual_bounds_at(pos), None
+        vis = VisualNode._visual_ids.get(id_)
+        if vis is None:
+            return None, None
+        picking = getattr(vis, '_element_picking', None)
+        if picking is None or not picking.supported:
+            return vis, None
+        element = picking.picked_elements(
+            self._render_picking(crop, elements=True))[0, 0]
+        return vis, (int(element) if element >= 0 else None)
+
+    def elements_near(self, pos, radius=10):
+        """Return the elements of the visuals near a position, without
+        rendering
+
+        Markers and Mesh visuals keep a spatial index of their markers and
+        faces, which is built on the first query and kept up to date with
+        their data. The hit tests use the x and y coordinates of the visuals,
+        and are meant for 2D views.
+
+        Parameters
+        ----------
+        pos : tuple
+            The position in logical coordinates to query.
+        radius : float
+            The distance in logical pixels from *pos* to search for elements.
+            With 0, only the elements under *pos* are found.
+
+        Returns
+        -------
+        elements : dict
+            For each visual with elements within *radius*, the tuple of the
+            index of the elements, sorted by distance, and of their distance.
+        """
+        pos = np.asarray(pos, dtype=np.float64)[:2]
+        result = {}
+        for node in self._indexed_visuals(self.scene):
+            tr = self.scene.node_transform(node)
+            index, distance = node._elements_near(tr, pos, radius)
+            if len(index):
+                result[node] = index, distance
+        return result
+
+    def _indexed_visuals(self, node):
+        """The interactive visuals under *node* that index their elements"""
+        if not node.visible:
+            return
+        for ch in node.children:
+            for vis in self._indexed_visuals(ch):
+                yield vis
+        if isinstance(node, VisualNode) and node.interactive and \
+                hasattr(node, '_elements_near'):
+            yield node
+
+    def elements_in(self, region):
+        """Return the elements of the visuals in a region of the canvas
+
+        The picking images are rendered once for any number of queries,
+        until the scene changes.
+
+        Parameters
+        ----------
+        region : array-like
+            Either a rectangle (x, y, w, h), or a lasso polygon given by an
+            array of shape (N, 2) of its vertices, in logical coordinates.
+
+        Returns
+        -------
+        elements : dict
+            The index of the elements of each visual in the region, as a
+            sorted array, or None if the elements of the visual are not known.
+            See ``element_at``.
+        """
+        region = np.asarray(region, dtype=np.float64)
+        tr = self.transforms.get_transform('canvas', 'framebuffer')
+        if region.ndim == 1:
+            x, y, w, h = region
+            corners = tr.map([[x, y], [x + w, y + h]])[:, :2]
+            polygon = None
+        elif region.ndim == 2 and region.shape[1] == 2 and len(region) >= 3:
+            polygon = corners = tr.map(region)[:, :2]
+        else:
+            raise ValueError('region must be a rectangle (x, y, w, h) or an '
+                             'array of shape (N, 2) with N >= 3, not %r'
+                             % (region.shape,))
+        x0, y0 = np.floor(corners.min(axis=0))
+        x1, y1 = np.ceil(corners.max(axis=0))
+        crop = (x0, y0, x1 - x0, y1 - y0)
+        ids = self._render_picking(crop)
+        inside = ids > 0
+        if polygon is not None:
+            # framebuffer coordinates of the center of the pixels, whose
+            # rows go down from the top of the crop
+            h, w = ids.shape
+            col, row = np.meshgrid(np.arange(w), np.arange(h))
+            centers = np.stack([x0 + col.ravel() + 0.5,
+                                y0 + h - 1 - row.ravel() + 0.5], axis=1)
+            inside &= _points_in_polygon(centers, polygon).reshape(h, w)
+
+        result = {}
+        element_ids = None
+        for id_ in np.unique(ids[inside]):
+            vis = VisualNode._visual_ids.get(id_)
+            if vis is None:
+                continue
+            picking = getattr(vis, '_element_picking', None)
+            if picking is None or not picking.supported:
+                result[vis] = None
+                continue
+            if element_ids is None:
+                element_ids = self._render_picking(crop, elements=True)
+            elements = picking.picked_elements(
+                element_ids[inside & (ids == id_)])
+            result[vis] = np.unique(elements[elements >= 0])
+        return result
+
+    def _render_picking(self, crop, elements=False):
         """Render the scene in picking mode, returning a 2D array of visual 
         IDs in the area specified by crop.
         
@@ -476,16 +734,53 @@ class SceneCanvas(app.Canvas, Frozen):
             The crop (x, y, w, h) of the framebuffer to read. For picking the
             full canvas is rendered and cropped on read as it is much faster
             than triggering transform updates across the scene with every
-            click.
+            click. The IDs of the full canvas are kept, so that subsequent
+            queries do not render the scene again until it has changed.
+        elements : bool
+            If True, return the element picking IDs of the visuals instead.
+        """
+        if self._picking_dirty:
+            self._picking_ids = {}
+        ids = self._picking_ids.get(elements)
+        if ids is None or ids.shape != tuple(self.physical_size[::-1]):
+            ids = self._render_picking_ids(elements)
+            self._picking_ids[elements] = ids
+        x, y, w, h = np.array(crop, int)
+        # Crop in framebuffer coordinates, which have the origin in the
+        # lower-left corner, while the IDs have it in the upper-left corner.
+        # Pixels outside the canvas have ID 0.
+        H, W = ids.shape
+        id_ = np.zeros((h, w), 'int32')
+        y0, y1 = max(H - y - h, 0), min(H - y, H)
+        x0, x1 = max(x, 0), min(x + w, W)
+        if y1 > y0 and x1 > x0:
+            oy = y0 - (H - y - h)
+            ox = x0 - x
+            id_[oy:oy + y1 - y0, ox:ox + x1 - x0] = ids[y0:y1, x0:x1]
+        return id_
+
+    def _render_picking_ids(self, elements=False):
+        """Render the full canvas in picking mode into a framebuffer that
+        is reused between calls, and return the 2D array of visual IDs, or
+        of element IDs if *elements* is True.
         """
+        self.set_current()
+        fbo = self._get_render_target(self.physical_size, 'picking')
         try:
-            self._scene.picking = True
-            img = self.render(bgcolor=(0, 0, 0, 0), crop=crop)
+            self._scene.picking = 'elements' if elements else True
+            self.push_fbo(fbo, (0, 0), self.size)
+            try:
+                self._draw_scene(bgcolor=(0, 0, 0, 0))
+                img = fbo.read()
+            finally:
+                self.pop_fbo()
         finally:
             self._scene.picking = False
-        img = img.astype('int32') * [2**0, 2**8, 2**16, 2**24]
-        id_ = img.sum(axis=2).astype('int32')
-        return id_
+        # The scene is unchanged, apart from toggling picking mode
+        self._picking_dirty = False
+        # RGBA bytes are the little-endian bytes of the ID
+        img = np.ascontiguousarray(img, np.uint8)
+        return img.view('<u4')[..., 0].astype('int32')
 
     def on_resize(self, event):
         """Resize handler
@@ -496,6 +791,7 @@ class SceneCanvas(app.Canvas, Frozen):
             The resize event.
         """
         self._update_transforms()
+        self._picking_dirty = True
         
         if self._central_widget is not None:
             self._central_widget.size = self.size
@@ -626,3 +922,17 @@ class SceneCanvas(app.Canvas, Frozen):
         
         self.transforms.configure(viewport=viewport, fbo_size=fb_size,
                                   fbo_rect=fb_rect)
+
+
+def _points_in_polygon(points, polygon):
+    """Test which points are inside a polygon, with the even-odd rule"""
+    x, y = points[:, 0], points[:, 1]
+    inside = np.zeros(len(points), dtype=bool)
+    xa, ya = polygon[-1]
+    for xb, yb in polygon:
+        crosses = (ya > y) != (yb > y)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            xc = xa + (y - ya) * (xb - xa) / (yb - ya)
+        inside ^= crosses & (x < xc)
+        xa, ya = xb, yb
+    return inside
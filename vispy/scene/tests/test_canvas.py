@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+from unittest import mock
+
+import numpy as np
+
+from vispy import scene
+from vispy.util import logger
+from vispy.util.ptime import time
+from vispy.testing import requires_application, TestingCanvas, \
+    run_tests_if_main
+
+
+@requires_application()
+def test_picking_cache():
+    """Test that the picking image is reused until the scene changes"""
+    with TestingCanvas(size=(100, 80)) as c:
+        rect1 = scene.visuals.Rectangle(center=(30, 30), width=20, height=20,
+                                        color='red', parent=c.scene)
+        rect2 = scene.visuals.Rectangle(center=(70, 50), width=20, height=20,
+                                        color='blue', parent=c.scene)
+        rect1.interactive = True
+        rect2.interactive = True
+        c.render()
+        with mock.patch.object(c, '_render_picking_ids',
+                               wraps=c._render_picking_ids) as render:
+            assert c.visual_at((30, 30)) is rect1
+            assert c.visual_at((70, 50)) is rect2
+            assert c.visual_at((5, 5)) is None
+            assert c.visuals_at((30, 30), radius=5) == [rect1]
+            assert render.call_count == 1
+
+            # Changing a transform invalidates the picking image
+            rect2.transform = scene.transforms.STTransform(translate=(0, 20))
+            assert c.visual_at((70, 70)) is rect2
+            assert c.visual_at((70, 50)) is None
+            assert render.call_count == 2
+
+            # Queries outside of the canvas return no visuals
+            assert (c._render_picking((-5, -5, 10, 10))[:5, 5:] == 0).all()
+            assert render.call_count == 2
+
+
+@requires_application()
+def test_element_picking():
+    """Test picking the markers, faces and line segments of visuals"""
+    with TestingCanvas(size=(100, 80)) as c:
+        markers = scene.visuals.Markers(parent=c.scene)
+        markers.set_data(np.array([[10, 10], [20, 10], [30, 10]], np.float32),
+                         size=6, edge_width=0, face_color='red')
+        vertices = np.array([[40, 40], [60, 40], [40, 60], [60, 60]],
+                            np.float32)
+        faces = np.array([[0, 1, 2], [1, 3, 2]], np.uint32)
+        mesh = scene.visuals.Mesh(vertices=vertices, faces=faces,
+                                  color='green', parent=c.scene)
+        line = scene.visuals.Line(pos=np.array([[70, 10], [90, 10], [90, 70]],
+                                               np.float32),
+                                  color='blue', parent=c.scene)
+        rect = scene.visuals.Rectangle(center=(20, 60), width=10, height=10,
+                                       color='white', parent=c.scene)
+        for node in (markers, mesh, line, rect):
+            node.interactive = True
+        c.render()
+
+        # one rendering of each picking image serves all queries
+        with mock.patch.object(c, '_render_picking_ids',
+                               wraps=c._render_picking_ids) as render:
+            assert c.element_at((20, 10)) == (markers, 1)
+            assert c.element_at((30, 10)) == (markers, 2)
+            assert c.element_at((44, 44)) == (mesh, 0)
+            assert c.element_at((56, 56)) == (mesh, 1)
+            assert c.element_at((20, 60)) == (rect, None)
+            assert c.element_at((5, 70)) == (None, None)
+
+            picked = c.elements_in((0, 0, 100, 80))
+            assert set(picked) == {markers, mesh, line, rect}
+            assert list(picked[markers]) == [0, 1, 2]
+            assert list(picked[mesh]) == [0, 1]
+            assert list(picked[line]) == [0, 1]
+            assert picked[rect] is None
+
+            picked = c.elements_in((15, 5, 20, 10))
+            assert list(picked) == [markers]
+            assert list(picked[markers]) == [1, 2]
+            picked = c.elements_in((85, 30, 10, 20))
+            assert list(picked[line]) == [1]
+            # a lasso around the lower-left half of the mesh
+            picked = c.elements_in([[38, 38], [52, 38], [38, 52]])
+            assert list(picked) == [mesh]
+            assert list(picked[mesh]) == [0]
+            assert render.call_count == 2
+
+            # the elements follow the data
+            markers.set_data(np.array([[30, 10]], np.float32), size=6,
+                             edge_width=0)
+            assert c.element_at((30, 10)) == (markers, 0)
+            assert c.element_at((10, 10)) == (None, None)
+
+        # lines with connect arrays have no known elements
+        line.set_data(connect=np.array([[0, 1], [1, 2]]))
+        assert list(c.elements_in((85, 30, 10, 20))) == [line]
+        assert c.elements_in((85, 30, 10, 20))[line] is None
+
+
+@requires_application()
+def test_elements_near():
+    """Test hit-testing markers and faces without rendering"""
+    with TestingCanvas(size=(100, 80)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.PanZoomCamera(rect=(0, 0, 10, 8), aspect=None)
+        markers = scene.visuals.Markers(parent=view.scene)
+        markers.set_data(np.array([[1, 1], [2, 1], [3, 1]], np.float32),
+                         size=4, edge_width=0)
+        mesh = scene.visuals.Mesh(
+            vertices=np.array([[4, 4], [6, 4], [4, 6], [6, 6]], np.float32),
+            faces=np.array([[0, 1, 2], [1, 3, 2]], np.uint32),
+            parent=view.scene)
+        markers.interactive = mesh.interactive = True
+        c.render()
+        to_canvas = view.scene.node_transform(c.scene)
+
+        def canvas_pos(x, y):
+            return to_canvas.map([x, y])[:2]
+
+        # markers are hit within their size
+        x, y = canvas_pos(2, 1)
+        assert list(c.elements_near((x, y), radius=0)) == [markers]
+        index, distance = c.elements_near((x + 1, y), radius=0)[markers]
+        assert list(index) == [1] and list(distance) == [0]
+        assert c.elements_near((x + 3, y), radius=0) == {}
+        index, distance = c.elements_near((x + 3, y), radius=2)[markers]
+        assert list(index) == [1]
+        assert np.allclose(distance, 1)
+        index, _ = c.elements_near((x + 7, y), radius=100)[markers]
+        assert list(index) == [2, 1, 0]
+
+        # faces are hit within their triangle
+        x, y = canvas_pos(4.5, 4.5)
+        assert list(c.elements_near((x, y), radius=0)[mesh][0]) == [0]
+        x, y = canvas_pos(5.5, 5.5)
+        assert list(c.elements_near((x, y), radius=0)[mesh][0]) == [1]
+        x, y = canvas_pos(7, 5)
+        index, distance = c.elements_near((x, y), radius=12)[mesh]
+        assert list(index) == [1]
+        assert np.allclose(distance, 10)
+
+        # the index follows the data
+        markers.set_subdata(offset=1, pos=np.array([[8, 7]], np.float32))
+        x, y = canvas_pos(8, 7)
+        assert list(c.elements_near((x, y), radius=0)[markers][0]) == [1]
+        markers.set_data(np.array([[8, 7]], np.float32), size=4)
+        assert list(c.elements_near((x, y), radius=0)[markers][0]) == [0]
+
+        # without reading the framebuffer, element_at hit-tests the indices
+        with mock.patch.object(c, '_render_picking',
+                               side_effect=RuntimeError):
+            assert c.element_at((x, y)) == (markers, 0)
+            assert c.element_at(canvas_pos(5.5, 5.5)) == (mesh, 1)
+
+
+@requires_application()
+def test_render_frames():
+    """Test streaming offscreen rendering and its frame rate"""
+    with TestingCanvas(size=(100, 80)) as c:
+        rect = scene.visuals.Rectangle(center=(30, 30), width=20, height=20,
+                                       color='red', parent=c.scene)
+
+        def move(n):
+            for i in range(n):
+                rect.transform = scene.transforms.STTransform(
+                    translate=(i * 5, 0))
+                yield
+
+        expected = [c.render() for _ in move(4)]
+        frames = [im.copy() for im in c.render_frames(move(4))]
+        assert len(frames) == 4
+        for im1, im2 in zip(expected, frames):
+            assert np.array_equal(im1, im2)
+
+        # render into a preallocated array
+        out = np.zeros((80, 100, 4), np.uint8)
+        for im1, im2 in zip(expected, c.render_frames(move(4), out=out)):
+            assert im2 is out
+            assert np.array_equal(im1, im2)
+
+        # the framebuffers are reused
+        n_targets = len(c._render_targets)
+        c.render()
+        list(c.render_frames(2))
+        assert len(c._render_targets) == n_targets
+
+        # benchmark the offscreen path
+        n = 50
+        t0 = time()
+        for _ in range(n):
+            c.render()
+        t1 = time()
+        for _ in c.render_frames(n, out=out):
+            pass
+        t2 = time()
+        logger.info('Offscreen rendering: render() %0.1f fps, '
+                    'render_frames() %0.1f fps'
+                    % (n / (t1 - t0), n / (t2 - t1)))
+
+
+run_tests_if_main()
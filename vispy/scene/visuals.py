@@ -54,8 +54,10 @@ class VisualNode(Node):
 
     @property
     def picking(self):
-        """Boolean that determines whether this node (and its children) are
-        drawn in picking mode.
+        """Whether this node (and its children) are drawn in picking mode.
+
+        True draws the picking ID of the visuals, and 'elements' the index of
+        their elements, for the visuals that support it.
         """
         return self._picking
 
@@ -66,7 +68,10 @@ class VisualNode(Node):
         if self._picking == p:
             return
         self._picking = p
-        self._picking_filter.enabled = p
+        self._picking_filter.enabled = bool(p)
+        element_picking = getattr(self, '_element_picking', None)
+        if element_picking is not None:
+            element_picking.enabled = p == 'elements'
         self.update_gl_state(blend=not p)
 
     def _update_trsys(self, event):
@@ -229,6 +234,7 @@ def generate_docstring(subclass, clsname):
 Arrow = create_visual_node(visuals.ArrowVisual)
 Axis = create_visual_node(visuals.AxisVisual)
 Box = create_visual_node(visuals.BoxVisual)
+BrickedVolume = create_visual_node(visuals.BrickedVolumeVisual)
 ColorBar = create_visual_node(visuals.ColorBarVisual)
 Compound = create_visual_node(visuals.CompoundVisual)
 Cube = create_visual_node(visuals.CubeVisual)
@@ -256,6 +262,7 @@ Spectrogram = create_visual_node(visuals.SpectrogramVisual)
 Sphere = create_visual_node(visuals.SphereVisual)
 SurfacePlot = create_visual_node(visuals.SurfacePlotVisual)
 Text = create_visual_node(visuals.TextVisual)
+TiledImage = create_visual_node(visuals.TiledImageVisual)
 Tube = create_visual_node(visuals.TubeVisual)
 # Visual = create_visual_node(visuals.Visual)  # Should not be created
 Volume = create_visual_node(visuals.VolumeVisual)
@@ -48,12 +48,15 @@ def stft(x, n_fft=1024, step=512, fs=2*np.pi, window='hann'):
     zero_pad = n_fft - len(x)
     if zero_pad > 0:
         x = np.concatenate((x, np.zeros(zero_pad, float)))
-    n_freqs = n_fft // 2 + 1
+    x = np.ascontiguousarray(x)
     n_estimates = (len(x) - n_fft) // step + 1
-    result = np.empty((n_freqs, n_estimates), np.complex128)
-    for ii in range(n_estimates):
-        result[:, ii] = np.fft.rfft(w * x[ii * step:ii * step + n_fft]) / n_fft
-    return result
+    # all windows as a strided view of the signal, transformed in one call
+    frames = np.lib.stride_tricks.as_strided(
+        x, (n_estimates, n_fft), (x.strides[0] * step, x.strides[0]),
+        writeable=False)
+    result = np.fft.rfft(frames * w, axis=1)
+    result /= n_fft
+    return np.ascontiguousarray(result.T)
 
 
 def fft_freqs(n_fft, fs):
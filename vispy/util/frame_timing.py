@@ -0,0 +1,437 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""Structured timing of the frames drawn by vispy
+
+A :class:`FrameTimer` keeps a ring buffer of frame records. While a timer is
+active, the draw pipeline records into the current frame:
+
+* a ``'draw'`` span for each node drawn by ``SceneCanvas.draw_visual`` and
+  a ``'prepare'`` span for the ``_prepare_draw`` of each visual,
+* a ``'shader'`` span and the ``shader_builds`` counter for each build of a
+  ``ModularProgram``,
+* a ``'glir'`` span for each flush of the GLIR queue, with the number of
+  commands and of bytes uploaded, and the ``glir_commands``,
+  ``upload_bytes`` and ``draw_calls`` counters,
+* a ``'readback'`` span for each ``read_pixels``,
+* optionally, the GPU time of the GLIR flushes, measured with GL timer
+  queries if PyOpenGL provides them.
+
+A frame starts when a ``SceneCanvas`` draws its scene, and holds everything
+recorded until the next frame starts, so that the GLIR flush and readback
+that follow the drawing belong to it. When no timer is active, the hooks
+only cost a check for ``None``.
+
+Example::
+
+    with FrameTimer(max_frames=100) as timer:
+        canvas.render()
+    timer.save_chrome_trace('trace.json')
+
+The trace can be loaded in ``chrome://tracing`` or https://ui.perfetto.dev.
+"""
+
+from __future__ import division
+
+import json
+import os
+from collections import deque
+
+from . import ptime
+from .logs import logger
+
+_timer = None  # the active FrameTimer
+
+
+def get_timer():
+    """Get the active frame timer
+
+    Returns
+    -------
+    timer : instance of FrameTimer | None
+        The active timer, or None if no timer is active.
+    """
+    return _timer
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+_null_span = _NullSpan()
+
+
+def span(name, category='', **args):
+    """Time a block of code in the current frame of the active timer
+
+    This is a no-op if no timer is active.
+
+    Parameters
+    ----------
+    name : str
+        The name of the span.
+    category : str
+        The category of the span.
+    **args : dict
+        Values to record with the span.
+
+    Returns
+    -------
+    span : context manager
+        The span.
+    """
+    if _timer is None:
+        return _null_span
+    return _timer.span(name, category, **args)
+
+
+def count(name, value=1):
+    """Add to a counter of the current frame of the active timer
+
+    This is a no-op if no timer is active.
+
+    Parameters
+    ----------
+    name : str
+        The name of the counter.
+    value : int | float
+        The value to add.
+    """
+    if _timer is not None:
+        _timer.count(name, value)
+
+
+class _Span(object):
+    def __init__(self, frame, name, category, args):
+        self._frame = frame
+        self._name = name
+        self._category = category
+        self._args = args
+
+    def __enter__(self):
+        self._start = ptime.time()
+        return self
+
+    def __exit__(self, *args):
+        stop = ptime.time()
+        frame = self._frame
+        frame['spans'].append((self._name, self._category,
+                               self._start - frame['_t0'],
+                               stop - self._start, self._args))
+        frame['duration'] = max(frame['duration'], stop - frame['_t0'])
+
+
+class FrameTimer(object):
+    """Record the timings of the frames drawn while the timer is active
+
+    Parameters
+    ----------
+    max_frames : int
+        The number of frames to keep. Older frames are dropped.
+    gpu : bool
+        Whether to measure the GPU time of the GLIR flushes with GL timer
+        queries. This requires PyOpenGL and a context that supports
+        ``GL_TIME_ELAPSED`` queries, and is silently disabled otherwise.
+        The GPU time of a frame is collected during the following flushes,
+        so it is known a few frames later.
+
+    Notes
+    -----
+    Each frame record is a dict with the keys:
+
+    * ``'index'``: the number of the frame since the timer was created,
+    * ``'start'``: the start of the frame, in seconds since the timer was
+      created,
+    * ``'duration'``: the time from the start of the frame to the end of its
+      last span, in seconds,
+    * ``'gpu_time'``: the GPU time of the frame in seconds, or None until
+      the results of all its timer queries are known,
+    * ``'counters'``: a dict of counters,
+    * ``'spans'``: a list of ``(name, category, start, duration, args)``
+      tuples, with the times in seconds since the start of the frame.
+    """
+    def __init__(self, max_frames=300, gpu=False):
+        self._frames = deque(maxlen=max_frames)
+        self._frame = None
+        self._n_frames = 0
+        self._t0 = ptime.time()
+        self._gpu = _GpuTimer() if gpu else None
+
+    @property
+    def active(self):
+        """Whether this timer is recording"""
+        return _timer is self
+
+    @property
+    def frames(self):
+        """List of the frame records, from the oldest to the newest"""
+        return [_public(frame) for frame in self._frames]
+
+    def start(self):
+        """Make this timer the active timer"""
+        global _timer
+        if _timer is not None and _timer is not self:
+            _timer.stop()
+        _timer = self
+
+    def stop(self):
+        """Stop recording, and end the current frame"""
+        global _timer
+        if _timer is self:
+            _timer = None
+        self.end_frame()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def clear(self):
+        """Drop all frame records"""
+        self._frames.clear()
+        self._frame = None
+
+    def begin_frame(self):
+        """Start a new frame, and end the current one"""
+        t0 = ptime.time()
+        self._frame = {'index': self._n_frames, 'start': t0 - self._t0,
+                       'duration': 0., 'gpu_time': None, 'counters': {},
+                       'spans': [], '_t0': t0}
+        self._n_frames += 1
+        self._frames.append(self._frame)
+
+    def end_frame(self):
+        """End the current frame
+
+        What is recorded until the next frame starts is dropped.
+        """
+        self._frame = None
+
+    def span(self, name, category='', **args):
+        """Time a block of code in the current frame
+
+        Parameters
+        ----------
+        name : str
+            The name of the span.
+        category : str
+            The category of the span.
+        **args : dict
+            Values to record with the span.
+
+        Returns
+        -------
+        span : context manager
+            The span, which does nothing if there is no current frame.
+        """
+        if self._frame is None:
+            return _null_span
+        return _Span(self._frame, name, category, args)
+
+    def count(self, name, value=1):
+        """Add to a counter of the current frame
+
+        Parameters
+        ----------
+        name : str
+            The name of the counter.
+        value : int | float
+            The value to add.
+        """
+        if self._frame is not None:
+            counters = self._frame['counters']
+            counters[name] = counters.get(name, 0) + value
+
+    def gpu_span(self, parser):
+        """Measure the GPU time of the GL commands issued in a block
+
+        Parameters
+        ----------
+        parser : instance of GlirParser
+            The parser that issues the commands.
+
+        Returns
+        -------
+        span : context manager
+            The span, which does nothing if the GPU time is not measured.
+        """
+        if self._gpu is None or self._frame is None or parser.is_remote():
+            return _null_span
+        return _GpuSpan(self._gpu, parser, self._frame)
+
+    def to_jsonl(self):
+        """Export the frame records as JSON lines
+
+        Returns
+        -------
+        text : str
+            One JSON object per frame. The spans are objects with the keys
+            ``'name'``, ``'cat'``, ``'start'``, ``'duration'`` and
+            ``'args'``.
+        """
+        lines = []
+        for frame in self.frames:
+            frame['spans'] = [dict(name=name, cat=cat, start=start,
+                                   duration=duration, args=args)
+                              for name, cat, start, duration, args
+                              in frame['spans']]
+            lines.append(json.dumps(frame, default=str))
+        return ''.join(line + '\n' for line in lines)
+
+    def save_jsonl(self, fname):
+        """Save the frame records as JSON lines
+
+        Parameters
+        ----------
+        fname : str
+            The file name.
+        """
+        with open(fname, 'w') as fid:
+            fid.write(self.to_jsonl())
+
+    def to_chrome_trace(self):
+        """Export the frame records in the Chrome trace event format
+
+        Returns
+        -------
+        trace : dict
+            The trace, with complete events for the frames and spans, and
+            counter events for the counters of the frames.
+        """
+        pid = os.getpid()
+        events = []
+        for frame in self.frames:
+            ts = frame['start'] * 1e6
+            args = dict(index=frame['index'])
+            if frame['gpu_time'] is not None:
+                args['gpu_time_ms'] = frame['gpu_time'] * 1e3
+            events.append(dict(name='frame', cat='frame', ph='X', ts=ts,
+                               dur=frame['duration'] * 1e6, pid=pid, tid=0,
+                               args=args))
+            for name, cat, start, duration, args in frame['spans']:
+                events.append(dict(name=str(name), cat=cat or 'span',
+                                   ph='X', ts=ts + start * 1e6,
+                                   dur=duration * 1e6, pid=pid, tid=0,
+                                   args=args))
+            if frame['counters']:
+                events.append(dict(name='counters', ph='C', ts=ts, pid=pid,
+                                   tid=0, args=frame['counters']))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def save_chrome_trace(self, fname):
+        """Save the frame records in the Chrome trace event format
+
+        Parameters
+        ----------
+        fname : str
+            The file name.
+        """
+        with open(fname, 'w') as fid:
+            json.dump(self.to_chrome_trace(), fid, default=str)
+
+
+def _public(frame):
+    frame = dict((key, val) for key, val in frame.items()
+                 if not key.startswith('_'))
+    frame['counters'] = dict(frame['counters'])
+    frame['spans'] = list(frame['spans'])
+    return frame
+
+
+class _GpuTimer(object):
+    """GL_TIME_ELAPSED queries issued with PyOpenGL
+
+    The queries are kept per GLIR parser, i.e. per GL context, and are only
+    used while the context of their parser is current.
+    """
+    def __init__(self):
+        self._gl = None
+        self._free = {}  # parser -> list of queries
+        self._pending = []  # (parser, query, frame)
+        try:
+            from OpenGL import GL
+        except Exception:
+            logger.debug('PyOpenGL is not available, GPU times are not '
+                         'measured')
+            return
+        self._gl = GL
+
+    def _fail(self, err):
+        logger.debug('GPU times are not measured: %s' % (err,))
+        self._gl = None
+        self._free = {}
+        self._pending = []
+
+    def begin(self, parser):
+        if self._gl is None:
+            return None
+        gl = self._gl
+        try:
+            self.poll(parser)
+            free = self._free.setdefault(parser, [])
+            query = free.pop() if free else _scalar(gl.glGenQueries(1))
+            gl.glBeginQuery(gl.GL_TIME_ELAPSED, query)
+        except Exception as err:
+            self._fail(err)
+            return None
+        return query
+
+    def end(self, parser, query, frame):
+        if self._gl is None:
+            return
+        try:
+            self._gl.glEndQuery(self._gl.GL_TIME_ELAPSED)
+        except Exception as err:
+            self._fail(err)
+            return
+        frame['_gpu_pending'] = frame.get('_gpu_pending', 0) + 1
+        self._pending.append((parser, query, frame))
+
+    def poll(self, parser):
+        """Collect the results of the queries of a parser that are ready"""
+        gl = self._gl
+        pending = []
+        for item in self._pending:
+            query_parser, query, frame = item
+            if query_parser is not parser or not _scalar(
+                    gl.glGetQueryObjectuiv(query,
+                                           gl.GL_QUERY_RESULT_AVAILABLE)):
+                pending.append(item)
+                continue
+            ns = _scalar(gl.glGetQueryObjectuiv(query, gl.GL_QUERY_RESULT))
+            frame['_gpu_ns'] = frame.get('_gpu_ns', 0) + ns
+            frame['_gpu_pending'] -= 1
+            if frame['_gpu_pending'] == 0:
+                frame['gpu_time'] = frame['_gpu_ns'] * 1e-9
+            self._free[parser].append(query)
+        self._pending = pending
+
+
+def _scalar(value):
+    """The int of a value returned by PyOpenGL, which may be an array"""
+    try:
+        return int(value)
+    except TypeError:
+        return int(value[0])
+
+
+class _GpuSpan(object):
+    def __init__(self, gpu, parser, frame):
+        self._gpu = gpu
+        self._parser = parser
+        self._frame = frame
+
+    def __enter__(self):
+        self._query = self._gpu.begin(self._parser)
+        return self
+
+    def __exit__(self, *args):
+        if self._query is not None:
+            self._gpu.end(self._parser, self._query, self._frame)
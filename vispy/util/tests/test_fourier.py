@@ -32,4 +32,18 @@ def test_stft():
         assert freqs[0] == 0
         assert np.allclose(freqs[-1], last_freq, atol=1e-1)
 
+
+def test_stft_windows():
+    """Test that the STFT transforms each window"""
+    rng = np.random.RandomState(0)
+    x = rng.randn(1000)
+    n_fft, step = 64, 24
+    result = stft(x, n_fft=n_fft, step=step)
+    assert result.shape == (n_fft // 2 + 1, (len(x) - n_fft) // step + 1)
+    w = np.hanning(n_fft)
+    for ii, res in enumerate(result.T):
+        window = x[ii * step:ii * step + n_fft]
+        assert np.allclose(res, np.fft.rfft(w * window) / n_fft)
+
+
 run_tests_if_main()
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import json
+from os import path as op
+
+import numpy as np
+
+from vispy import scene
+from vispy.util import frame_timing, _TempDir
+from vispy.util.frame_timing import FrameTimer, get_timer
+from vispy.testing import (requires_application, requires_pyopengl,
+                           TestingCanvas, run_tests_if_main)
+
+temp_dir = _TempDir()
+
+
+def test_frame_timer():
+    """Test the frame records and exporters of a frame timer"""
+    timer = FrameTimer(max_frames=3)
+    assert get_timer() is None
+    # nothing is recorded when no timer is active
+    with frame_timing.span('foo'):
+        frame_timing.count('bar')
+    with timer:
+        assert get_timer() is timer and timer.active
+        with frame_timing.span('foo'):
+            frame_timing.count('bar')  # not in a frame
+        for i in range(5):
+            timer.begin_frame()
+            with frame_timing.span('outer', 'test', i=i):
+                with timer.span('inner'):
+                    pass
+                frame_timing.count('bar')
+                frame_timing.count('baz', 2)
+        frame_timing.count('bar')
+    assert get_timer() is None and not timer.active
+    frame_timing.count('bar')  # the frame ended with the timer
+
+    frames = timer.frames
+    assert [frame['index'] for frame in frames] == [2, 3, 4]
+    frame = frames[-1]
+    assert frame['counters'] == dict(bar=2, baz=2)
+    assert frame['gpu_time'] is None
+    (name0, cat0, start0, dur0, args0), (name1, cat1, start1, dur1, args1) = \
+        frame['spans']
+    assert (name0, cat0, args0) == ('inner', '', {})
+    assert (name1, cat1, args1) == ('outer', 'test', dict(i=4))
+    assert start1 <= start0 and start0 + dur0 <= start1 + dur1
+    assert frame['duration'] >= start1 + dur1
+    assert frames[0]['start'] <= frames[1]['start'] <= frame['start']
+
+    lines = timer.to_jsonl().splitlines()
+    assert len(lines) == 3
+    record = json.loads(lines[-1])
+    assert record['counters'] == frame['counters']
+    assert [span['name'] for span in record['spans']] == ['inner', 'outer']
+    assert record['spans'][1]['args'] == dict(i=4)
+
+    fname = op.join(temp_dir, 'trace.json')
+    timer.save_chrome_trace(fname)
+    with open(fname) as fid:
+        trace = json.load(fid)
+    events = trace['traceEvents']
+    assert [e['name'] for e in events if e['ph'] == 'X'] == \
+        ['frame', 'inner', 'outer'] * 3
+    counters = [e for e in events if e['ph'] == 'C']
+    assert counters[-1]['args'] == dict(bar=2, baz=2)
+    outer = [e for e in events if e['name'] == 'outer'][-1]
+    assert np.allclose(outer['dur'], dur1 * 1e6)
+
+    timer.clear()
+    assert timer.frames == []
+    # starting a timer stops the active one
+    other = FrameTimer()
+    timer.start()
+    other.start()
+    assert not timer.active and other.active
+    other.stop()
+    assert get_timer() is None
+
+
+@requires_application()
+def test_frame_timer_draw():
+    """Test the timings recorded while drawing a scene"""
+    with TestingCanvas() as c:
+        view = c.central_widget.add_view()
+        markers = scene.visuals.Markers(parent=view.scene)
+        markers.set_data(np.random.rand(100, 2).astype(np.float32))
+        line = scene.visuals.Line(np.random.rand(50, 2), parent=view.scene)
+        c.render()  # build the programs
+        with FrameTimer(gpu=True) as timer:
+            c.render()
+            markers.set_data(np.random.rand(200, 2).astype(np.float32),
+                             symbol='square')
+            c.render()
+        assert get_timer() is None
+        frames = timer.frames
+        assert len(frames) == 2
+        for frame in frames:
+            spans = frame['spans']
+            names = set(span[0] for span in spans if span[1] == 'draw')
+            assert str(markers) in names and str(line) in names
+            # the line and its subvisuals are prepared
+            names = set(span[0] for span in spans if span[1] == 'prepare')
+            assert str(markers) in names and str(line) in names
+            assert any('_GLLineVisual' in name for name in names)
+            assert 'read_pixels' in [span[0] for span in spans
+                                     if span[1] == 'readback']
+            flushes = [span for span in spans if span[1] == 'glir']
+            assert len(flushes) >= 1
+            counters = frame['counters']
+            assert counters['draw_calls'] >= 2
+            assert counters['draw_calls'] == sum(span[4]['draws']
+                                                 for span in flushes)
+            assert counters['glir_commands'] == sum(span[4]['commands']
+                                                    for span in flushes)
+        # the new symbol needs a new shader and the new data an upload
+        assert 'shader_builds' not in frames[0]['counters']
+        assert frames[1]['counters']['shader_builds'] >= 1
+        assert frames[1]['counters']['upload_bytes'] >= \
+            frames[0]['counters']['upload_bytes'] + 200 * 2 * 4
+
+
+@requires_pyopengl()
+@requires_application()
+def test_frame_timer_bricked_volume():
+    """Test the prepare span of a visual with its own draw loop"""
+    with TestingCanvas(size=(64, 64)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.TurntableCamera()
+        volume = scene.visuals.BrickedVolume(
+            np.random.rand(16, 16, 16).astype(np.float32), brick_size=8,
+            parent=view.scene)
+        view.camera.set_range()
+        with FrameTimer() as timer:
+            c.render()
+        spans = timer.frames[-1]['spans']
+        assert (str(volume), 'prepare') in [span[:2] for span in spans]
+
+
+run_tests_if_main()
@@ -37,9 +37,11 @@ from .spectrogram import SpectrogramVisual  # noqa
 from .sphere import SphereVisual  # noqa
 from .surface_plot import SurfacePlotVisual  # noqa
 from .text import TextVisual  # noqa
+from .tiled_image import TiledImageVisual  # noqa
 from .tube import TubeVisual  # noqa
 from .visual import BaseVisual, Visual, CompoundVisual  # noqa
 from .volume import VolumeVisual  # noqa
+from .bricked_volume import BrickedVolumeVisual  # noqa
 from .xyz_axis import XYZAxisVisual  # noqa
 from .border import _BorderVisual  # noqa
 from .colorbar import ColorBarVisual  # noqa
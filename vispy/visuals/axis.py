@@ -5,6 +5,7 @@
 # -----------------------------------------------------------------------------
 
 import math
+from collections import OrderedDict
 
 import numpy as np
 
@@ -20,6 +21,12 @@ from .text import TextVisual
 # 5. Reactivity to resizing (current tick lengths grow/shrink w/zoom)
 # 6. Improve tick label naming (str(x) is not good) and tick selection
 
+# The spacing of the ticks is cached for buckets of the domain span of
+# 1 / _SPAN_BUCKETS octave, and of the axis length in pixels, so that it is
+# only computed again when zooming
+_SPAN_BUCKETS = 16
+_TICK_CACHE_SIZE = 64
+
 
 class AxisVisual(CompoundVisual):
     """Axis visual
@@ -230,9 +237,14 @@ class AxisVisual(CompoundVisual):
         tick_pos, labels, tick_label_pos, anchors, axis_label_pos = \
             self.ticker.get_update()
 
-        self._line.set_data(pos=self.pos, color=self.axis_color)
+        if self._line.pos is None or \
+                not np.array_equal(self._line.pos, self.pos):
+            self._line.set_data(pos=self.pos, color=self.axis_color)
         self._ticks.set_data(pos=tick_pos, color=self.tick_color)
-        self._text.text = list(labels)
+        # the labels are only laid out again when they change
+        labels = list(labels)
+        if labels != self._text.text:
+            self._text.text = labels
         self._text.pos = tick_label_pos
         self._text.anchors = anchors
         if self.axis_label is not None:
@@ -283,6 +295,8 @@ class Ticker(object):
     def __init__(self, axis, anchors=None):
         self.axis = axis
         self._anchors = anchors
+        # {(span bucket, length in px): (step, phase)} of the major ticks
+        self._spacing_cache = OrderedDict()
 
     def get_update(self):
         major_tick_fractions, minor_tick_fractions, tick_labels = \
@@ -367,6 +381,35 @@ class Ticker(object):
         endpoints = tickvec + origins
         return origins, endpoints
 
+    def _get_major_ticks(self, dmin, dmax, n_inches):
+        """Get the major tick values, reusing the spacing of the ticks of
+        domains of about the same span, such as when panning
+        """
+        span = dmax - dmin
+        if not (span > 0 and np.isfinite(span)):
+            return _get_ticks_talbot(dmin, dmax, n_inches, 2)
+        key = (int(math.floor(math.log2(span) * _SPAN_BUCKETS)),
+               int(round(n_inches * self.axis.transforms.dpi)))
+        cache = self._spacing_cache
+        if key not in cache:
+            major = _get_ticks_talbot(dmin, dmax, n_inches, 2)
+            if len(major) < 2:
+                return major
+            step = major[1] - major[0]
+            phase = major[0] - round(major[0] / step) * step
+            if abs(phase) < 1e-9 * step:
+                phase = 0.
+            cache[key] = step, phase
+            while len(cache) > _TICK_CACHE_SIZE:
+                cache.popitem(last=False)
+            return major
+        cache.move_to_end(key)
+        step, phase = cache[key]
+        # all the ticks of the domain, and one more on either side
+        first = math.ceil((dmin - phase) / step - 1e-9) - 1
+        last = math.floor((dmax - phase) / step + 1e-9) + 1
+        return phase + np.arange(first, last + 1) * step
+
     def _get_tick_frac_labels(self):
         """Get the major ticks, minor ticks, and major labels"""
         minor_num = 4  # number of minor ticks per major division
@@ -386,19 +429,16 @@ class Ticker(object):
 
             # major = np.linspace(domain[0], domain[1], num=11)
             # major = MaxNLocator(10).tick_values(*domain)
-            major = _get_ticks_talbot(domain[0], domain[1], n_inches, 2)
+            major = self._get_major_ticks(domain[0], domain[1], n_inches)
 
             labels = ['%g' % x for x in major]
             majstep = major[1] - major[0]
-            minor = []
             minstep = majstep / (minor_num + 1)
             minstart = 0 if self.axis._stop_at_major[0] else -1
             minstop = -1 if self.axis._stop_at_major[1] else 0
-            for i in range(minstart, len(major) + minstop):
-                maj = major[0] + i * majstep
-                minor.extend(np.linspace(maj + minstep,
-                                         maj + majstep - minstep,
-                                         minor_num))
+            maj = major[0] + np.arange(minstart, len(major) + minstop) * majstep
+            minor = (maj[:, np.newaxis] +
+                     np.arange(1, minor_num + 1) * minstep).ravel()
             major_frac = major - offset
             minor_frac = np.array(minor) - offset
             if scale != 0:  # maybe something better to do here?
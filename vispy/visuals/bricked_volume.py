@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+"""
+Out-of-core volume rendering
+----------------------------
+
+The volume is split into cubic bricks of ``brick_size`` voxels, at every
+level of a multiresolution pyramid. Neighbouring bricks share the voxels
+of their common faces, so that linear interpolation is seamless across
+bricks. Each brick is ray-cast separately with the shader of the
+VolumeVisual, restricted to the box of the brick, and the bricks are
+composited back to front:
+
+* 'translucent' and 'iso' use normal alpha blending, the iso shader
+  outputs a transparent color where the ray does not hit the surface;
+* 'additive' uses ``1 - (1 - src) * (1 - dst)`` blending, which is what
+  the additive shader computes within a brick;
+* 'mip' uses max blending, which gives the maximum intensity projection
+  for monotonic colormaps.
+
+Only the bricks of a single pyramid level are drawn per frame: the finest
+level at which a voxel is not smaller than a pixel and whose bricks in the
+view frustum fit in the brick cache. Bricks are read from the data and
+uploaded on demand, and the least recently used bricks are evicted.
+"""
+
+from __future__ import division
+
+from collections import OrderedDict
+
+import numpy as np
+
+from ..gloo import Texture3D, TextureEmulated3D, VertexBuffer
+from .volume import VolumeVisual
+
+# The bricks do not write depth, so that they do not occlude each other
+_BRICK_GL_STATES = {
+    'mip': dict(blend_func=('one', 'one'), blend_equation='max',
+                depth_mask=False),
+    'translucent': dict(blend_func=('src_alpha', 'one_minus_src_alpha'),
+                        blend_equation='func_add', depth_mask=False),
+    'additive': dict(blend_func=('one', 'one_minus_src_color'),
+                     blend_equation='func_add', depth_mask=False),
+    'iso': dict(blend_func=('src_alpha', 'one_minus_src_alpha'),
+                blend_equation='func_add', depth_mask=False),
+}
+
+# corners of a cuboid, in the vertex order of the VolumeVisual
+_CORNERS = np.array([[0, 0, 0], [1, 0, 0], [0, 1, 0], [1, 1, 0],
+                     [0, 0, 1], [1, 0, 1], [0, 1, 1], [1, 1, 1]])
+
+
+def _parent(key):
+    """The key of the brick at the next coarser level"""
+    return (key[0] + 1,) + tuple(i // 2 for i in key[1:])
+
+
+class BrickedVolumeVisual(VolumeVisual):
+    """Displays a 3D volume that does not fit in memory or in a texture
+
+    The volume is streamed to the GPU in bricks, see the module docstring
+    for details.
+
+    Parameters
+    ----------
+    vol : array-like | list of array-like
+        The volume, of shape (Z, Y, X). Any object that supports NumPy
+        slicing can be used, such as a memory-mapped array or an HDF5
+        dataset. A list of volumes is used as the levels of the pyramid,
+        each level being downsampled by 2 from the previous one. Otherwise
+        the levels are decimated from the volume by strided slicing.
+    clim : tuple of two floats | None
+        The contrast limits. Default maps between the min and max of the
+        coarsest pyramid level.
+    method : {'mip', 'translucent', 'additive', 'iso'}
+        The render method to use. Default 'mip'.
+    threshold : float
+        The threshold to use for the isosurface render method. By default
+        the mean of the coarsest pyramid level is used.
+    brick_size : int
+        The size of the bricks, in voxels of their pyramid level.
+    max_bricks : int
+        Maximum number of bricks stored on the GPU. The pyramid level is
+        chosen such that all visible bricks fit.
+    max_uploads : int | None
+        Maximum number of bricks uploaded per draw. Bricks that are not
+        uploaded yet are replaced by their coarser parent brick if it is
+        available, and another draw is requested. None (default) uploads all
+        visible bricks at once.
+    **kwargs : dict
+        Keyword arguments to pass to `VolumeVisual`.
+    """
+
+    def __init__(self, vol, clim=None, method='mip', threshold=None,
+                 brick_size=64, max_bricks=64, max_uploads=None, **kwargs):
+        self._brick_size = int(brick_size)
+        self._max_bricks = int(max_bricks)
+        self._max_uploads = max_uploads
+        self._levels = None
+        self._level_shapes = None
+        # bricks on the GPU: {(level, bz, by, bx): (texture, vertices)},
+        # in order of last use
+        self._bricks = OrderedDict()
+        self._free_slots = []
+        self._draw_list = []
+        self._tex_cls = (TextureEmulated3D if kwargs.get('emulate_texture')
+                         else Texture3D)
+        self._set_levels(vol)
+        if threshold is None:
+            threshold = self._coarsest().mean()
+        VolumeVisual.__init__(self, vol, clim, method=method,
+                              threshold=threshold, **kwargs)
+
+    def _coarsest(self):
+        data, step = self._levels[-1]
+        return np.asarray(data[::step, ::step, ::step], np.float32)
+
+    def set_data(self, vol, clim=None, copy=True):
+        """Set the volume data
+
+        Parameters
+        ----------
+        vol : array-like | list of array-like
+            The volume, or the levels of its pyramid.
+        clim : tuple | None
+            Colormap limits to use. None will use the min and max values
+            of the coarsest pyramid level.
+        copy : bool
+            Unused, bricks are always copied.
+        """
+        self._set_levels(vol)
+        self._vol_shape = tuple(self._level_shapes[0])
+
+        if clim is not None:
+            clim = np.array(clim, float)
+            if not (clim.ndim == 1 and clim.size == 2):
+                raise ValueError('clim must be a 2-element array-like')
+            self._clim = tuple(clim)
+        if self._clim is None:
+            coarse = self._coarsest()
+            self._clim = coarse.min(), coarse.max()
+        self._texture_limits = self._clim
+        self.shared_program['clim'] = self.clim_normalized
+        self.shared_program['u_shape'] = (self._brick_size + 1,) * 3
+        self.clear_bricks()
+        self.update()
+
+    def _set_levels(self, vol):
+        if isinstance(vol, (list, tuple)):
+            levels = [(level, 1) for level in vol]
+        else:
+            levels = [(vol, 1)]
+            step, shape = 1, np.array(vol.shape[:3])
+            while (shape > self._brick_size).any():
+                step *= 2
+                shape = -(-np.array(vol.shape[:3]) // step)
+                levels.append((vol, step))
+        if len(levels[0][0].shape) != 3:
+            raise ValueError('Volume visual needs a 3D image.')
+        self._levels = levels
+        self._level_shapes = [-(-np.array(data.shape[:3]) // step)
+                              for data, step in levels]
+
+    def rescale_data(self):
+        """Normalize the bricks to the current contrast limits
+
+        The bricks are uploaded again when they are next drawn.
+        """
+        self._texture_limits = self._clim
+        self.clear_bricks()
+        self.shared_program['clim'] = self.clim_normalized
+        self.update()
+
+    def clear_bricks(self):
+        """Forget all bricks stored on the GPU"""
+        self._free_slots.extend(self._bricks.values())
+        self._bricks.clear()
+        self._draw_list = []
+
+    @VolumeVisual.method.setter
+    def method(self, method):
+        VolumeVisual.method.fset(self, method)
+        self.update_gl_state(**_BRICK_GL_STATES[method])
+
+    @property
+    def n_levels(self):
+        """The number of levels in the volume pyramid"""
+        return len(self._levels)
+
+    def _brick_boxes(self, level, index):
+        """The boxes of bricks in the local coordinates of the visual
+
+        As in the VolumeVisual, the local position ``p`` samples the volume
+        at voxel ``p - 0.5``. The box of a brick is extended to the border
+        of the volume for the bricks at the border.
+
+        Parameters
+        ----------
+        level : int
+            The pyramid level of the bricks.
+        index : array, shape (N, 3)
+            The (z, y, x) indices of the bricks.
+
+        Returns
+        -------
+        lo : array, shape (N, 3)
+            The (x, y, z) index of the first voxel of the bricks in their
+            level.
+        box_min, box_max : array, shape (N, 3)
+            The (x, y, z) corners of the boxes.
+        """
+        step = 2 ** level
+        shape = self._level_shapes[level][::-1]
+        lo = np.asarray(index)[:, ::-1] * self._brick_size
+        hi = np.minimum(lo + self._brick_size, shape - 1)
+        box_min = np.where(lo == 0, -0.5, lo * step + 0.5)
+        box_max = np.where(hi == shape - 1,
+                           np.array(self._vol_shape[::-1]) - 0.5,
+                           hi * step + 0.5)
+        return lo, box_min, box_max
+
+    def _read_brick(self, key):
+        """Read a brick, normalized to the texture limits"""
+        level = key[0]
+        data, step = self._levels[level]
+        shape = self._level_shapes[level]
+        bs = self._brick_size
+        lo = np.array(key[1:]) * bs
+        hi = np.minimum(lo + bs + 1, shape)
+        brick = np.array(data[lo[0] * step:hi[0] * step:step,
+                              lo[1] * step:hi[1] * step:step,
+                              lo[2] * step:hi[2] * step:step], np.float32)
+        # pad to the texture size, so that textures can be reused
+        pad = [(0, bs + 1 - n) for n in brick.shape]
+        brick = np.pad(brick, pad, mode='edge')
+        clim = self._texture_limits
+        if clim[1] == clim[0]:
+            if clim[0] != 0.:
+                brick *= 1.0 / clim[0]
+        elif clim[0] > clim[1]:
+            brick *= -1
+            brick += clim[1]
+            brick /= clim[1] - clim[0]
+        else:
+            brick -= clim[0]
+            brick /= clim[1] - clim[0]
+        return brick
+
+    def _visible_bricks(self, view):
+        """Return the keys of the bricks to draw, back to front"""
+        tr = view.transforms.get_transform('visual', 'render')
+        fb = view.transforms.get_transform('visual', 'framebuffer')
+        bs = self._brick_size
+
+        # level from the size of a voxel at the center of the volume
+        center = np.array(self._vol_shape[::-1], float) / 2
+        points = np.array([np.r_[center, 1], np.r_[center + (1, 0, 0), 1],
+                           np.r_[center + (0, 1, 0), 1],
+                           np.r_[center + (0, 0, 1), 1]])
+        mapped = fb.map(points)
+        with np.errstate(all='ignore'):
+            mapped = mapped[:, :2] / mapped[:, 3:]
+            scale = np.sqrt(((mapped[1:] - mapped[0]) ** 2).sum(-1)).max()
+        level = 0
+        if np.isfinite(scale) and scale > 0:
+            level = int(np.clip(np.floor(np.log2(1. / scale)), 0,
+                                len(self._levels) - 1))
+
+        corners = _CORNERS[np.newaxis].astype(bool)
+        while True:
+            n = np.maximum(-(-(self._level_shapes[level] - 1) // bs), 1)
+            index = np.indices(n).reshape(3, -1).T
+            _, box_min, box_max = self._brick_boxes(level, index)
+            pos = np.where(corners, box_max[:, np.newaxis],
+                           box_min[:, np.newaxis])
+            ndc = tr.map(pos.reshape(-1, 3)).reshape(len(index), 8, 4)
+            with np.errstate(all='ignore'):
+                xyz = ndc[..., :3] / ndc[..., 3:]
+            # cull bricks that are entirely outside the view frustum, but
+            # keep bricks that cross the camera plane
+            behind = ndc[..., 3] <= 0
+            outside = ((xyz < -1).all(axis=1) | (xyz > 1).all(axis=1)).any(-1)
+            visible = ~behind.all(axis=1) & (behind.any(axis=1) | ~outside)
+            depth = np.where(behind, np.inf, xyz[..., 2]).max(axis=1)
+            if visible.sum() <= self._max_bricks or \
+                    level == len(self._levels) - 1:
+                break
+            level += 1
+        order = np.argsort(-depth[visible], kind='stable')
+        index = index[np.flatnonzero(visible)[order]][:self._max_bricks]
+        return [(level,) + tuple(int(i) for i in idx) for idx in index]
+
+    def _upload_brick(self, key):
+        """Store a brick in a free or the least recently used slot"""
+        if self._free_slots:
+            tex, vertices = self._free_slots.pop()
+        elif len(self._bricks) < self._max_bricks:
+            tex = self._tex_cls((self._brick_size + 1,) * 3,
+                                interpolation=self._interpolation,
+                                wrapping='clamp_to_edge')
+            vertices = VertexBuffer()
+        else:
+            _, (tex, vertices) = self._bricks.popitem(last=False)
+        tex.set_data(self._read_brick(key))
+        _, box_min, box_max = self._brick_boxes(key[0], [key[1:]])
+        pos = np.where(_CORNERS, box_max, box_min)
+        vertices.set_data(pos.astype(np.float32))
+        self._bricks[key] = tex, vertices
+
+    def _update_bricks(self, view):
+        """Upload the visible bricks and return the bricks to draw"""
+        keys = self._visible_bricks(view)
+        missing = []
+        for key in keys:
+            if key in self._bricks:
+                self._bricks.move_to_end(key)
+            else:
+                missing.append(key)
+        if self._max_uploads is None or len(missing) <= self._max_uploads:
+            for key in missing:
+                self._upload_brick(key)
+            return keys
+
+        # upload the coarser parents of the missing bricks first, they are
+        # drawn instead of their children until all children are uploaded
+        self._update_later()
+        parents = OrderedDict()
+        if keys[0][0] + 1 < len(self._levels):
+            for key in missing:
+                parents[_parent(key)] = True
+        uploads = [key for key in parents if key not in self._bricks]
+        for key in (uploads + missing)[:self._max_uploads]:
+            self._upload_brick(key)
+        fallback = dict((_parent(key), True) for key in missing
+                        if key not in self._bricks and
+                        _parent(key) in self._bricks)
+        drawn = []
+        for key in keys:
+            parent = _parent(key)
+            if parent in fallback:
+                if fallback[parent]:
+                    self._bricks.move_to_end(parent)
+                    drawn.append(parent)
+                    fallback[parent] = False
+            elif key in self._bricks:
+                drawn.append(key)
+        return drawn
+
+    def _prepare_draw(self, view):
+        if self._need_vertex_update:
+            # the index buffer of the cuboid is shared by all bricks
+            self._create_vertex_data()
+            self._need_vertex_update = False
+        self._draw_list = []
+        size = self._brick_size + 1.
+        for key in self._update_bricks(view):
+            tex, vertices = self._bricks[key]
+            lo, box_min, box_max = self._brick_boxes(key[0], [key[1:]])
+            step = 2 ** key[0]
+            self._draw_list.append((key, dict(
+                u_volumetex=tex,
+                a_position=vertices,
+                u_box_min=tuple(box_min[0]),
+                u_box_max=tuple(box_max[0]),
+                u_tex_scale=(1. / (step * size),) * 3,
+                u_tex_offset=tuple((0.5 - 0.5 / step - lo[0]) / size),
+                u_relative_step_size=self._relative_step_size * step)))
+        return bool(self._draw_list)
+
+    def draw(self):
+        if not self.visible:
+            return
+        self._configure_gl_state()
+        if self._timed_prepare_draw() is False:
+            return
+        program = self.shared_program
+        for _, uniforms in self._draw_list:
+            for name, value in uniforms.items():
+                program[name] = value
+            self._program.draw(self._vshare.draw_mode,
+                               self._vshare.index_buffer)
@@ -20,6 +20,9 @@ You can add several items at once by specifying common or individual size: a
 single scalar means all items are the same size while a list of sizes is used
 to specify individual item sizes.
 
+The range of elements changed since the last call to ``reset_dirty`` is kept
+in ``dirty``, such that only this range needs to be uploaded to the GPU.
+
 Example
 -------
 
@@ -105,12 +108,14 @@ class ArrayList(object):
             C = _itemsize.cumsum()
             self._items[1:, 0] += C[:-1]
             self._items[0:, 1] += C
+            self._dirty = 0, self._size
 
         else:
             self._data = np.zeros(1, dtype=dtype)
             self._items = np.zeros((1, 2), dtype=int)
             self._size = 0
             self._count = 0
+            self._dirty = None
 
     @property
     def data(self):
@@ -132,6 +137,37 @@ class ArrayList(object):
         """ Describes the format of the elements in the buffer. """
         return self._data.dtype
 
+    @property
+    def dirty(self):
+        """ Range (start, stop) of the elements changed since the last call
+        to reset_dirty, or None """
+        return self._dirty
+
+    def mark_dirty(self, start=0, stop=None):
+        """ Mark a range of elements as changed
+
+        Parameters
+        ----------
+
+        start : int
+            Index of the first changed element.
+
+        stop : int | None
+            Index after the last changed element, by default the end of the
+            list.
+        """
+        stop = self._size if stop is None else stop
+        if stop <= start:
+            return
+        if self._dirty is not None:
+            start = min(start, self._dirty[0])
+            stop = max(stop, self._dirty[1])
+        self._dirty = int(start), int(stop)
+
+    def reset_dirty(self):
+        """ Mark all elements as unchanged """
+        self._dirty = None
+
     def reserve(self, capacity):
         """ Set current capacity of the underlying array"""
 
@@ -214,21 +250,25 @@ class ArrayList(object):
             if hasattr(data, "__len__"):
                 if len(data) == dstop - dstart:  # or len(data) == 1:
                     self._data[dstart:dstop] = data
+                    self.mark_dirty(dstart, dstop)
                 else:
                     self.__delitem__(key)
                     self.insert(istart, data)
             else:  # we assume len(data) = 1
                 if dstop - dstart == 1:
                     self._data[dstart:dstop] = data
+                    self.mark_dirty(dstart, dstop)
                 else:
                     self.__delitem__(key)
                     self.insert(istart, data)
 
         elif key is Ellipsis:
             self.data[...] = data
+            self.mark_dirty()
 
         elif isinstance(key, str):
             self._data[key][:self._size] = data
+            self.mark_dirty()
 
         else:
             raise TypeError("List assignment indices must be integers")
@@ -268,7 +308,7 @@ class ArrayList(object):
             raise TypeError("List deletion indices must be integers")
 
         # Remove data
-        size = self._size - (dstop - dstart)
+        self.mark_dirty(dstart)
         self._data[
             dstart:dstart + self._size - dstop] = self._data[dstop:self._size]
         self._size -= dstop - dstart
@@ -278,9 +318,8 @@ class ArrayList(object):
         self._items[istart:istart + size] = self._items[istop:istop + size]
 
         # Update other items
-        size = dstop - dstart
-        self._items[istart:istop + size + 1] -= size, size
         self._count -= istop - istart
+        self._items[istart:self._count] -= dstop - dstart
 
     def insert(self, index, data, itemsize=None):
         """ Insert data before index
@@ -346,6 +385,8 @@ class ArrayList(object):
             index += len(self)
         if index < 0 or index > len(self):
             raise IndexError("List insertion index out of range")
+        self.mark_dirty(self._items[index][0] if index < self._count
+                        else self._size, self._size + size)
 
         # Inserting
         if index < self._count:
@@ -413,3 +454,48 @@ class ArrayList(object):
         """
 
         self.insert(len(self), data, itemsize)
+
+    def compact(self, keep):
+        """
+        Remove several items at once.
+
+        Parameters
+        ----------
+
+        keep : 1-D array of bool
+            Whether to keep each item.
+
+        Returns
+        -------
+
+        removed : 1-D array of int
+            The number of elements removed before each element, including
+            itself.
+        """
+
+        if not self._sizeable:
+            raise AttributeError("List is not sizeable")
+
+        keep = np.asarray(keep, dtype=bool)
+        if len(keep) != self._count:
+            raise ValueError("Mask size does not match the number of items")
+        itemsize = self.itemsize
+        data_keep = np.repeat(keep, itemsize)
+        removed = np.cumsum(~data_keep)
+        if not len(removed) or not removed[-1]:
+            return removed
+
+        # Only the data after the first removed item changes
+        first = np.argmin(keep)
+        dstart = self._items[first][0]
+        data = self._data[dstart:self._size][data_keep[dstart:]]
+        self.mark_dirty(dstart)
+        self._data[dstart:dstart + len(data)] = data
+        self._size = dstart + len(data)
+
+        itemsize = itemsize[keep]
+        self._count = len(itemsize)
+        C = itemsize.cumsum()
+        self._items[:self._count, 1] = C
+        self._items[:self._count, 0] = C - itemsize
+        return removed
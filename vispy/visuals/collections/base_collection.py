@@ -72,6 +72,7 @@ class Item(object):
     @vertices.setter
     def vertices(self, data):
         self._vertices[...] = np.array(data)
+        self._parent._item_changed(self._key)
 
     @property
     def indices(self):
@@ -81,8 +82,9 @@ class Item(object):
     def indices(self, data):
         if self._indices is None:
             raise ValueError("Item has no indices")
-        start = self._parent.vertices._items[self._key][0]
+        start = self._parent._vertices_list._items[self._key][0]
         self._indices[...] = np.array(data) + start
+        self._parent._item_changed(self._key)
 
     @property
     def uniforms(self):
@@ -93,6 +95,7 @@ class Item(object):
         if self._uniforms is None:
             raise ValueError("Item has no associated uniform")
         self._uniforms[...] = data
+        self._parent._item_changed(self._key)
 
     def __getitem__(self, key):
         """ Get a specific uniforms value """
@@ -113,6 +116,7 @@ class Item(object):
             self._uniforms[key] = value
         else:
             raise IndexError("Unknown key")
+        self._parent._item_changed(self._key)
 
     def __str__(self):
         return "Item (%s, %s, %s)" % (self._vertices,
@@ -136,6 +140,9 @@ class BaseCollection(object):
         self._uniforms_list = None
         self._uniforms_texture = None
 
+        # Items deleted since the last update (removed lazily)
+        self._deleted = None
+
         # Make sure types are np.dtype (or None)
         vtype = np.dtype(vtype) if vtype is not None else None
         itype = np.dtype(itype) if itype is not None else None
@@ -206,6 +213,8 @@ class BaseCollection(object):
     def __len__(self):
         """ x.__len__() <==> len(x) """
 
+        if self._deleted is not None:
+            return len(self._vertices_list) - int(self._deleted.sum())
         return len(self._vertices_list)
 
     @property
@@ -252,6 +261,8 @@ class BaseCollection(object):
             an error is raised.
         """
 
+        self._compact()
+
         # Vertices
         # -----------------------------
         vertices = np.array(vertices).astype(self.vtype).ravel()
@@ -313,13 +324,17 @@ class BaseCollection(object):
         self._need_update = True
 
     def __delitem__(self, index):
-        """ x.__delitem__(y) <==> del x[y] """
+        """ x.__delitem__(y) <==> del x[y]
+
+        The items are only marked as deleted, and removed at once before the
+        next update or access.
+        """
 
         # Deleting one item
         if isinstance(index, int):
             if index < 0:
                 index += len(self)
-            if index < 0 or index > len(self):
+            if index < 0 or index >= len(self):
                 raise IndexError("Collection deletion index out of range")
             istart, istop = index, index + 1
         # Deleting several items
@@ -336,36 +351,52 @@ class BaseCollection(object):
         else:
             raise TypeError("Collection deletion indices must be integers")
 
-        vsize = len(self._vertices_list[index])
-        if self.itype is not None:
-            del self._indices_list[index]
-            self._indices_list[index:] -= vsize
+        if self._deleted is None:
+            self._deleted = np.zeros(len(self._vertices_list), bool)
+        alive = np.flatnonzero(~self._deleted)
+        self._deleted[alive[istart:istop]] = True
+        self._need_update = True
 
-        if self.utype:
-            self._vertices_list[index:]["collection_index"] -= istop - istart
-        del self._vertices_list[index]
+    def _compact(self):
+        """ Remove the deleted items from the lists """
+
+        if self._deleted is None:
+            return
+        keep = ~self._deleted
+        self._deleted = None
+        if keep.all():
+            return
+        first = np.argmin(keep)
+        vstart = self._vertices_list._items[first][0]
+
+        # Shift the vertex indices and collection indices after the first
+        # deleted item
+        removed = self._vertices_list.compact(keep)
+        if self.itype is not None:
+            istart = self._indices_list._items[first][0]
+            self._indices_list.compact(keep)
+            indices = self._indices_list.data[istart:]
+            indices -= removed[indices].astype(indices.dtype)
 
         if self.utype is not None:
-            del self._uniforms_list[index]
-
-        self._need_update = True
+            self._uniforms_list.compact(keep)
+            index = self._vertices_list.data["collection_index"][vstart:]
+            index -= np.cumsum(~keep)[index.astype(int)]
 
     def __getitem__(self, key):
         """ """
 
-        # WARNING
-        # Here we want to make sure to use buffers and texture (instead of
-        # lists) since only them are aware of any external modification.
-        if self._need_update:
-            self._update()
+        # The lists hold the data, and the changes made through an item are
+        # marked on them to be uploaded at the next update.
+        self._compact()
 
-        V = self._vertices_buffer
+        V = self._vertices_list.data
         idxs = None
         U = None
         if self._indices_list is not None:
-            idxs = self._indices_buffer
+            idxs = self._indices_list.data
         if self._uniforms_list is not None:
-            U = self._uniforms_texture.data.ravel().view(self.utype)
+            U = self._uniforms_list.data
 
         # Getting a whole field
         if isinstance(key, str):
@@ -374,9 +405,7 @@ class BaseCollection(object):
                 return V[key]
             # Getting a named field from uniforms
             elif U is not None and key in U.dtype.names:
-                # Careful, U is the whole texture that can be bigger than list
-                # return U[key]
-                return U[key][:len(self._uniforms_list)]
+                return U[key]
             else:
                 raise IndexError("Unknown field name ('%s')" % key)
 
@@ -411,32 +440,19 @@ class BaseCollection(object):
         #         found = True
         # if found: return
 
-        # WARNING
-        # Here we want to make sure to use buffers and texture (instead of
-        # lists) since only them are aware of any external modification.
-        if self._need_update:
-            self._update()
-
-        V = self._vertices_buffer
-        # I = None
-        U = None
-        # if self._indices_list is not None:
-        #     I = self._indices_buffer  # noqa
-        if self._uniforms_list is not None:
-            U = self._uniforms_texture.data.ravel().view(self.utype)
+        self._compact()
 
         # Setting a whole field
         if isinstance(key, str):
             # Setting a named field in vertices
             if key in self.vtype.names:
-                V[key] = data
+                self._vertices_list[key] = data
             # Setting a named field in uniforms
             elif self.utype and key in self.utype.names:
-                # Careful, U is the whole texture that can be bigger than list
-                # U[key] = data
-                U[key][:len(self._uniforms_list)] = data
+                self._uniforms_list[key] = data
             else:
                 raise IndexError("Unknown field name ('%s')" % key)
+            self._need_update = True
 
         # # Setting individual item
         # elif isinstance(key, int):
@@ -463,22 +479,51 @@ class BaseCollection(object):
         self._ushape = shape
         return shape
 
+    def _item_changed(self, key):
+        """ Mark the data of an item as changed """
+
+        for data_list in (self._vertices_list, self._indices_list,
+                          self._uniforms_list):
+            if data_list is not None:
+                data_list.mark_dirty(*data_list._items[key])
+        self._need_update = True
+
+    @staticmethod
+    def _upload(data_list, buffer, cls):
+        """ Upload the changed range of a list to its buffer
+
+        The buffer holds the whole underlying array of the list, whose
+        capacity grows by powers of 2, so that it is only created again when
+        the list grows beyond its capacity.
+        """
+
+        data = data_list._data
+        if buffer is None or buffer.size != len(data):
+            if buffer is not None:
+                buffer.delete()
+            buffer = cls(data)
+        elif data_list.dirty is not None:
+            start, stop = data_list.dirty
+            buffer.set_subdata(data[start:stop], offset=start)
+        data_list.reset_dirty()
+        return buffer
+
     def _update(self):
         """ Update vertex buffers & texture """
 
-        if self._vertices_buffer is not None:
-            self._vertices_buffer.delete()
-        self._vertices_buffer = VertexBuffer(self._vertices_list.data)
+        self._compact()
+        self._need_update = False
+
+        vertices_buffer = self._vertices_buffer
+        self._vertices_buffer = self._upload(
+            self._vertices_list, vertices_buffer, VertexBuffer)
+        rebind = self._vertices_buffer is not vertices_buffer
 
         if self.itype is not None:
-            if self._indices_buffer is not None:
-                self._indices_buffer.delete()
-            self._indices_buffer = IndexBuffer(self._indices_list.data)
+            self._indices_buffer = self._upload(
+                self._indices_list, self._indices_buffer, IndexBuffer)
 
         if self.utype is not None:
-            if self._uniforms_texture is not None:
-                self._uniforms_texture.delete()
-
             # We take the whole array (_data), not the data one
             texture = self._uniforms_list._data.view(np.float32)
             size = len(texture) / self._uniforms_float_count
@@ -486,13 +531,36 @@ class BaseCollection(object):
 
             # shape[2] = float count is only used in vertex shader code
             texture = texture.reshape(shape[0], shape[1], 4)
-            self._uniforms_texture = Texture2D(texture)
-            self._uniforms_texture.data = texture
-            self._uniforms_texture.interpolation = 'nearest'
-
-        if len(self._programs):
+            dirty = self._uniforms_list.dirty
+            if self._uniforms_texture is None or \
+                    self._uniforms_texture.shape[:2] != shape[:2]:
+                if self._uniforms_texture is not None:
+                    self._uniforms_texture.delete()
+                self._uniforms_texture = Texture2D(texture)
+                self._uniforms_texture.interpolation = 'nearest'
+                rebind = True
+            elif dirty is not None:
+                # Upload the rows of texels of the changed uniforms
+                texels = shape[2] // 4
+                row0 = dirty[0] * texels // shape[1]
+                row1 = -(-dirty[1] * texels // shape[1])
+                self._uniforms_texture.set_data(texture[row0:row1],
+                                                offset=(row0, 0))
+            self._uniforms_list.reset_dirty()
+
+        if rebind:
             for program in self._programs:
                 program.bind(self._vertices_buffer)
                 if self._uniforms_list is not None:
                     program["uniforms"] = self._uniforms_texture
                     program["uniforms_shape"] = self._ushape
+
+    def _draw_program(self, program, mode):
+        """ Draw the items of the collection with a program """
+
+        if self._need_update:
+            self._update()
+        if self._indices_list is not None:
+            program.draw(mode, self._indices_buffer[:self._indices_list.size])
+        else:
+            program.draw(mode, (0, self._vertices_list.size))
@@ -184,7 +184,7 @@ class Collection(BaseCollection):
     def __getitem__(self, key):
 
         program = self._programs[0]
-        for name, (storage, _, _) in program._code_variables.items():
+        for name, (storage, _, _, _) in program._code_variables.items():
             if name == key and storage == 'uniform':
                 return program[key]
         return BaseCollection.__getitem__(self, key)
@@ -199,16 +199,7 @@ class Collection(BaseCollection):
     def draw(self, mode=None):
         """ Draw collection """
 
-        if self._need_update:
-            self._update()
-
-        program = self._programs[0]
-
-        mode = mode or self._mode
-        if self._indices_list is not None:
-            program.draw(mode, self._indices_buffer)
-        else:
-            program.draw(mode)
+        self._draw_program(self._programs[0], mode or self._mode)
 
 
 class CollectionView(object):
@@ -224,7 +215,12 @@ class CollectionView(object):
 #        if "viewport" in program.hooks and viewport is not None:
 #            program["viewport"] = viewport
 
-        program.bind(collection._vertices_buffer)
+        # The buffers are bound when they are created by an update
+        if collection._vertices_buffer is not None:
+            program.bind(collection._vertices_buffer)
+            if collection._uniforms_list is not None:
+                program["uniforms"] = collection._uniforms_texture
+                program["uniforms_shape"] = collection._ushape
         for name in collection._uniforms.keys():
             program[name] = collection._uniforms[name]
 
@@ -240,18 +236,5 @@ class CollectionView(object):
 
     def draw(self):
 
-        program = self._program
         collection = self._collection
-        mode = collection._mode
-
-        if collection._need_update:
-            collection._update()
-            # self._program.bind(self._vertices_buffer)
-            if collection._uniforms_list is not None:
-                program["uniforms"] = collection._uniforms_texture
-                program["uniforms_shape"] = collection._ushape
-
-        if collection._indices_list is not None:
-            program.draw(mode, collection._indices_buffer)
-        else:
-            program.draw(mode)
+        collection._draw_program(self._program, collection._mode)
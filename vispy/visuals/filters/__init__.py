@@ -5,5 +5,5 @@
 from .base_filter import Filter  # noqa
 from .clipper import Clipper  # noqa
 from .color import Alpha, ColorFilter, IsolineFilter, ZColormapFilter  # noqa
-from .picking import PickingFilter  # noqa
+from .picking import PickingFilter, ElementPickingFilter  # noqa
 from .mesh import TextureFilter  # noqa
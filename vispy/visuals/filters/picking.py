@@ -4,6 +4,10 @@
 
 import struct
 
+import numpy as np
+
+from ...gloo import VertexBuffer
+from ..shaders import Function, Varying
 from .base_filter import Filter
 
 
@@ -57,3 +61,137 @@ class PickingFilter(Filter):
         that use this filter.
         """
         return self._id_color
+
+
+class ElementPickingFilter(Filter):
+    """Filter used to color visuals by the index of their elements, such as
+    markers, faces or line segments, for picking.
+
+    Each vertex is given the index of the element it belongs to. When
+    enabled, the fragments are colored by this index + 1, whose 4 bytes make
+    the RGBA color, such that 0 means no element. Up to 2**24 - 1 elements
+    can be told apart.
+
+    The vertex attribute is only created the first time the filter is
+    enabled, and then kept up to date by the visual with ``set_elements``.
+
+    Parameters
+    ----------
+    interpolate : bool
+        Whether the elements of the vertices vary along the primitives, as
+        the vertex index along a line strip, in which case the fragments
+        belong to the element of the first vertex. Otherwise, all vertices of
+        a primitive belong to the same element.
+    """
+    VERT_SHADER = """
+        void element_picking_vertex() {
+            $v_element = $element;
+        }
+    """
+
+    FRAG_SHADER = """
+        void element_picking_filter() {
+            if( $enabled == 0 )
+                return;
+            // The element is split in two parts that floats hold exactly,
+            // and the bytes are taken by exact multiplications
+            float id = floor($v_element.x + 0.5) * 4096.0 +
+                       floor($v_element.y + $offset) + 1.0;
+            float b1 = floor(id * 0.00390625);
+            float b2 = floor(b1 * 0.00390625);
+            float b3 = floor(b2 * 0.00390625);
+            gl_FragColor = vec4(id - b1 * 256.0, b1 - b2 * 256.0,
+                                b2 - b3 * 256.0, b3) / 255.0;
+        }
+    """
+
+    def __init__(self, interpolate=False):
+        vfunc = Function(self.VERT_SHADER)
+        ffunc = Function(self.FRAG_SHADER)
+        v_element = Varying('v_element', 'vec2')
+        vfunc['v_element'] = v_element
+        ffunc['v_element'] = v_element
+        vfunc['element'] = (0., -1.)
+        ffunc['offset'] = 0. if interpolate else 0.5
+        super(ElementPickingFilter, self).__init__(
+            vcode=vfunc, vhook='pre', fcode=ffunc, fpos=11)
+
+        self._interpolate = interpolate
+        self._buffer = None
+        self._elements = None
+        self._key = None
+        # The index of the element of the vertices with index 0
+        self.start = 0
+        self.enabled = False
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @enabled.setter
+    def enabled(self, e):
+        self._enabled = e
+        self.fshader['enabled'] = 1 if e is True else 0
+        if e and self._buffer is None:
+            self._buffer = VertexBuffer(np.zeros((0, 2), np.float32))
+            self._upload()
+
+    @property
+    def supported(self):
+        """Whether the elements of the vertices are known"""
+        return self._elements is not None
+
+    def set_elements(self, elements, key=None):
+        """Set the elements of the vertices of the visual
+
+        Parameters
+        ----------
+        elements : callable | None
+            Function returning the index of the element of each vertex, as an
+            array of integers. It is only called once the filter has been
+            enabled. None if the elements are not known.
+        key : object | None
+            If not None, the elements are not computed again while the key is
+            unchanged.
+        """
+        if key is not None and key == self._key and \
+                (elements is None) == (self._elements is None):
+            return
+        self._elements = elements
+        self._key = key
+        if self._buffer is not None:
+            self._upload()
+
+    def _upload(self):
+        if self._elements is None:
+            self.vshader['element'] = (0., -1.)
+            return
+        elements = np.asarray(self._elements())
+        data = np.empty((len(elements), 2), np.float32)
+        if self._interpolate:
+            data[:, 0] = 0
+            data[:, 1] = elements
+        else:
+            data[:, 0] = elements // 4096
+            data[:, 1] = elements % 4096
+        self._buffer.set_data(data)
+        self.vshader['element'] = self._buffer
+
+    def picked_elements(self, ids):
+        """Get the index of the elements from their picking IDs
+
+        Parameters
+        ----------
+        ids : array
+            The picking IDs read from the framebuffer.
+
+        Returns
+        -------
+        elements : array | None
+            The index of the elements, -1 where there is no element. None if
+            the elements are not known.
+        """
+        if self._elements is None:
+            return None
+        ids = np.asarray(ids, np.int64)
+        return np.where(ids > 0, ids - 1 - self.start, -1)
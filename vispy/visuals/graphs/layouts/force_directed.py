@@ -9,6 +9,10 @@ This module contains implementations for a force-directed layout, where the
 graph is modelled like a collection of springs or as a collection of
 particles attracting and repelling each other. The whole graph tries to
 reach a state which requires the minimum energy.
+
+For larger graphs, the repulsion between all pairs of nodes is approximated
+with a Barnes-Hut quadtree, and the attraction is only computed along the
+edges, such that an iteration takes O(V log V + E) time and memory.
 """
 
 import numpy as np
@@ -19,7 +23,13 @@ except ImportError:
     def issparse(*args, **kwargs):
         return False
 
-from ..util import _straight_line_vertices, _rescale_layout
+from ..util import (_straight_line_vertices, _rescale_layout, _get_edges,
+                    _get_directed_edges)
+
+# Largest number of nodes laid out with the exact repulsion by default
+_EXACT_MAX_NODES = 1000
+# Depth of the quadtree, below which nodes are considered coincident
+_QUADTREE_DEPTH = 16
 
 
 class fruchterman_reingold(object):
@@ -39,22 +49,31 @@ class fruchterman_reingold(object):
         Number of iterations to perform for layout calculation.
     pos : array
         Initial positions of the nodes
+    theta : float | None
+        Accuracy of the Barnes-Hut approximation of the repulsion: a group
+        of nodes is seen as one node when its size is less than ``theta``
+        times its distance. 0 computes the repulsion exactly. Defaults to 0
+        for graphs of up to 1000 nodes, and 0.5 for larger ones.
 
     Notes
     -----
     The algorithm is explained in more detail in the original paper [1]_.
+    The approximation of the repulsion follows Barnes and Hut [2]_.
 
     .. [1] Fruchterman, Thomas MJ, and Edward M. Reingold. "Graph drawing by
        force-directed placement." Softw., Pract. Exper. 21.11 (1991),
        1129-1164.
+    .. [2] Barnes, Josh, and Piet Hut. "A hierarchical O(N log N)
+       force-calculation algorithm." Nature 324.6096 (1986), 446-449.
     """
 
-    def __init__(self, optimal=None, iterations=50, pos=None):
+    def __init__(self, optimal=None, iterations=50, pos=None, theta=None):
         self.dim = 2
         self.optimal = optimal
         self.iterations = iterations
         self.num_nodes = None
         self.pos = pos
+        self.theta = theta
 
     def __call__(self, adjacency_mat, directed=False):
         """
@@ -64,8 +83,9 @@ class fruchterman_reingold(object):
         positions for the nodes, together with the vertices for the edges
         and the arrows.
 
-        There are two solvers here: one specially adapted for SciPy sparse
-        matrices, and the other for larger networks.
+        There are two solvers here: one for small networks given as dense
+        arrays, and the other working on the edges of the graph, for SciPy
+        sparse matrices and larger networks.
 
         Parameters
         ----------
@@ -86,14 +106,18 @@ class fruchterman_reingold(object):
             raise ValueError("Adjacency matrix should be square.")
 
         self.num_nodes = adjacency_mat.shape[0]
+        theta = self.theta
+        if theta is None:
+            theta = 0 if self.num_nodes <= _EXACT_MAX_NODES else 0.5
 
-        if issparse(adjacency_mat):
+        if issparse(adjacency_mat) or theta > 0:
             # Use the sparse solver
-            solver = self._sparse_fruchterman_reingold
+            solver = self._sparse_fruchterman_reingold(adjacency_mat,
+                                                       directed, theta)
         else:
-            solver = self._fruchterman_reingold
+            solver = self._fruchterman_reingold(adjacency_mat, directed)
 
-        for result in solver(adjacency_mat, directed):
+        for result in solver:
             yield result
 
     def _fruchterman_reingold(self, adjacency_mat, directed=False):
@@ -140,15 +164,30 @@ class fruchterman_reingold(object):
 
             yield pos, line_vertices, arrows
 
-    def _sparse_fruchterman_reingold(self, adjacency_mat, directed=False):
+    def _sparse_fruchterman_reingold(self, adjacency_mat, directed=False,
+                                     theta=0.5):
         # Optimal distance between nodes
         if self.optimal is None:
             self.optimal = 1 / np.sqrt(self.num_nodes)
 
-        # Change to list of list format
-        # Also construct the matrix in COO format for easy edge construction
-        adjacency_arr = adjacency_mat.toarray()
-        adjacency_coo = adjacency_mat.tocoo()
+        # The edges and their weights, from the matrix in COO format
+        if issparse(adjacency_mat):
+            adjacency_mat = adjacency_mat.tocoo()
+            weights = adjacency_mat.data
+        else:
+            adjacency_mat = np.asarray(adjacency_mat, float)
+            weights = adjacency_mat[np.nonzero(adjacency_mat)]
+        edges = _get_edges(adjacency_mat)
+        line_index = edges.ravel()
+        arrow_index = None
+        if directed:
+            arrow_index = _get_directed_edges(adjacency_mat).ravel()
+
+        def vertices(pos):
+            arrows = np.array([])
+            if arrow_index is not None:
+                arrows = pos[arrow_index].reshape((-1, 4))
+            return pos[line_index], arrows
 
         if self.pos is None:
             # Random initial positions
@@ -160,8 +199,7 @@ class fruchterman_reingold(object):
             pos = self.pos.astype(np.float32)
 
         # Yield initial positions
-        line_vertices, arrows = _straight_line_vertices(adjacency_coo, pos,
-                                                        directed)
+        line_vertices, arrows = vertices(pos)
         yield pos, line_vertices, arrows
 
         # The initial "temperature"  is about .1 of domain area (=1x1)
@@ -172,8 +210,8 @@ class fruchterman_reingold(object):
         # size dt.
         dt = t / float(self.iterations+1)
         for iteration in range(self.iterations):
-            delta_pos = _calculate_delta_pos(adjacency_arr, pos, t,
-                                             self.optimal)
+            delta_pos = _calculate_sparse_delta_pos(edges, weights, pos, t,
+                                                    self.optimal, theta)
             pos += delta_pos
             _rescale_layout(pos)
 
@@ -181,8 +219,7 @@ class fruchterman_reingold(object):
             t -= dt
 
             # Calculate line vertices
-            line_vertices, arrows = _straight_line_vertices(adjacency_coo,
-                                                            pos, directed)
+            line_vertices, arrows = vertices(pos)
 
             yield pos, line_vertices, arrows
 
@@ -210,3 +247,130 @@ def _calculate_delta_pos(adjacency_arr, pos, t, optimal):
     length = np.where(length < 0.01, 0.1, length)
     delta_pos = displacement * t / length[:, np.newaxis]
     return delta_pos
+
+
+def _calculate_sparse_delta_pos(edges, weights, pos, t, optimal, theta):
+    """Helper to calculate the delta position from the edges of the graph
+
+    This matches `_calculate_delta_pos` for a theta of 0, without computing
+    the distances between all pairs of nodes.
+    """
+    pos = pos.astype(np.float64)
+    displacement = _repulsion(pos, optimal * optimal, theta)
+
+    # Attraction along the edges
+    i, j = edges[:, 0], edges[:, 1]
+    delta = pos[i] - pos[j]
+    distance = np.sqrt(np.maximum((delta * delta).sum(axis=1), 0.0001))
+    for ii in range(2):
+        displacement[:, ii] -= np.bincount(
+            i, delta[:, ii] * weights * distance / optimal, len(pos))
+
+    length = np.sqrt((displacement**2).sum(axis=1))
+    length = np.where(length < 0.01, 0.1, length)
+    delta_pos = displacement * t / length[:, np.newaxis]
+    return delta_pos
+
+
+def _interleave_bits(x):
+    """Spread the lower 32 bits of x to the even bits of an uint64"""
+    x = x.astype(np.uint64) & np.uint64(0xFFFFFFFF)
+    for shift, mask in ((16, 0x0000FFFF0000FFFF), (8, 0x00FF00FF00FF00FF),
+                        (4, 0x0F0F0F0F0F0F0F0F), (2, 0x3333333333333333),
+                        (1, 0x5555555555555555)):
+        x = (x | (x << np.uint64(shift))) & np.uint64(mask)
+    return x
+
+
+def _build_quadtree(pos, depth=_QUADTREE_DEPTH):
+    """Build the levels of a quadtree of the nodes
+
+    The nodes are sorted along a Z-order curve, such that the nodes of each
+    cell, and the children of each cell, are contiguous.
+
+    Returns
+    -------
+    codes : array
+        The Z-order code of the cell of each node at the deepest level.
+    extent : float
+        The size of the root cell.
+    levels : list
+        For each level, a tuple (keys, center, count, first_child,
+        last_child) with the codes, centers of mass, numbers of nodes and
+        range of children of the cells of the level. The cells of the last
+        level are leaves.
+    """
+    low = pos.min(axis=0)
+    extent = max((pos.max(axis=0) - low).max(), 1e-12)
+    cells = np.minimum((pos - low) * (2 ** depth / extent), 2 ** depth - 1)
+    cells = cells.astype(np.uint64)
+    codes = _interleave_bits(cells[:, 0]) | \
+        (_interleave_bits(cells[:, 1]) << np.uint64(1))
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    sorted_pos = pos[order]
+
+    levels = []
+    for level in range(depth + 1):
+        keys = sorted_codes >> np.uint64(2 * (depth - level))
+        starts = np.flatnonzero(np.concatenate([[True],
+                                                keys[1:] != keys[:-1]]))
+        count = np.diff(np.append(starts, len(keys)))
+        center = np.add.reduceat(sorted_pos, starts, axis=0)
+        center /= count[:, np.newaxis]
+        levels.append([keys[starts], center, count, None, None])
+        if count.max() == 1:
+            break
+    for parent, child in zip(levels[:-1], levels[1:]):
+        child_keys = child[0] >> np.uint64(2)
+        parent[3] = np.searchsorted(child_keys, parent[0], 'left')
+        parent[4] = np.searchsorted(child_keys, parent[0], 'right')
+    return codes, extent, levels
+
+
+def _repulsion(pos, optimal2, theta, chunk=4096):
+    """Sum the repulsion of all nodes on each node
+
+    The repulsion of a cell of the quadtree is computed from its center of
+    mass when the cell does not contain the node and its size is less than
+    theta times its distance to the node, otherwise from its children.
+    """
+    depth = _QUADTREE_DEPTH
+    codes, extent, levels = _build_quadtree(pos, depth)
+    x, y = pos[:, 0].copy(), pos[:, 1].copy()
+    displacement = np.zeros((len(pos), 2))
+    for first in range(0, len(pos), chunk):
+        n_nodes = min(chunk, len(pos) - first)
+        # Pairs of a node, relative to the chunk, and a cell of the level
+        node = np.arange(n_nodes)
+        cell = np.zeros(n_nodes, np.intp)
+        for level, (keys, center, count, first_child, last_child) in \
+                enumerate(levels):
+            dx = x[first:][node] - center[cell, 0]
+            dy = y[first:][node] - center[cell, 1]
+            distance2 = np.maximum(dx * dx + dy * dy, 0.0001)
+            n_cell = count[cell]
+            if first_child is None:
+                accept = np.ones(len(node), bool)
+            else:
+                size = extent / 2 ** level
+                shift = np.uint64(2 * (depth - level))
+                accept = (n_cell == 1) | \
+                    ((size * size < theta * theta * distance2) &
+                     ((codes[first:][node] >> shift) != keys[cell]))
+            weight = n_cell[accept] * optimal2 / distance2[accept]
+            displacement[first:first + n_nodes, 0] += np.bincount(
+                node[accept], dx[accept] * weight, n_nodes)
+            displacement[first:first + n_nodes, 1] += np.bincount(
+                node[accept], dy[accept] * weight, n_nodes)
+            if accept.all():
+                break
+
+            # Open the other cells
+            node, cell = node[~accept], cell[~accept]
+            n_children = last_child[cell] - first_child[cell]
+            offsets = np.cumsum(n_children) - n_children
+            cell = np.arange(n_children.sum()) + \
+                np.repeat(first_child[cell] - offsets, n_children)
+            node = np.repeat(node, n_children)
+    return displacement
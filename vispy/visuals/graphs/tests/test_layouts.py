@@ -6,6 +6,9 @@ import numpy as np
 from numpy.testing import assert_allclose, assert_equal
 
 from vispy.visuals.graphs.layouts import get_layout
+from vispy.visuals.graphs.layouts.force_directed import (
+    _calculate_delta_pos, _calculate_sparse_delta_pos, _repulsion)
+from vispy.visuals.graphs.util import _get_edges
 from vispy.testing import (run_tests_if_main, assert_raises)
 
 
@@ -136,4 +139,41 @@ def test_circular_layout():
     assert_allclose(line_vertices, expected_vertices, atol=1e-4)
 
 
+def test_force_directed_barnes_hut():
+    rng = np.random.RandomState(0)
+    pos = rng.uniform(size=(300, 2)).astype(np.float32)
+    adjacency = (rng.uniform(size=(300, 300)) < 0.02).astype(float)
+    edges = _get_edges(adjacency)
+    weights = adjacency[np.nonzero(adjacency)]
+
+    # Without approximation, the solvers match
+    expected = _calculate_delta_pos(adjacency, pos, 0.1, 0.05)
+    delta_pos = _calculate_sparse_delta_pos(edges, weights, pos, 0.1, 0.05,
+                                            theta=0)
+    assert_allclose(delta_pos, expected, atol=1e-6)
+
+    # The approximated repulsion is close to the exact one
+    exact = _repulsion(pos.astype(np.float64), 0.0025, 0)
+    for theta in (0.5, 1.0):
+        approx = _repulsion(pos.astype(np.float64), 0.0025, theta)
+        error = np.sqrt(((approx - exact) ** 2).sum(axis=1) /
+                        (exact ** 2).sum(axis=1))
+        assert np.median(error) < 0.02 * theta
+
+    # Coincident nodes
+    same = np.zeros((5, 2))
+    assert_equal(_repulsion(same, 1., 0.5), np.zeros((5, 2)))
+
+    # The layouts of both solvers keep the generator interface
+    for theta in (None, 0.5):
+        layout = get_layout('force_directed', iterations=3, theta=theta,
+                            pos=pos[:10])
+        results = list(layout(adjacency_mat, directed=True))
+        assert len(results) == 4
+        pos_, line_vertices, arrows = results[-1]
+        assert pos_.shape == (10, 2)
+        assert_equal(line_vertices, pos_[_get_edges(adjacency_mat).ravel()])
+        assert arrows.shape == (len(line_vertices) // 2, 4)
+
+
 run_tests_if_main()
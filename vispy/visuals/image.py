@@ -86,7 +86,13 @@ _texture_lookup = """
 _apply_clim_float = """
     float apply_clim(float data) {
         data = data - $clim.x;
-        data = data / ($clim.y - $clim.x);
+        float width = $clim.y - $clim.x;
+        if (width != 0.0) {
+            data = data / width;
+        } else {
+            // a zero-width clim, e.g. from constant data, is a step
+            data = float(data > 0.0);
+        }
         return max(data, 0);
     }"""
 _apply_clim = """
@@ -110,14 +116,23 @@ _apply_gamma = """
 
 _null_color_transform = 'vec4 pass(vec4 color) { return color; }'
 _c2l = 'float cmap(vec4 color) { return (color.r + color.g + color.b) / 3.; }'
+_c2l_red = 'float cmap(vec4 color) { return color.r; }'
+
+# Internal texture formats that store luminance data on the GPU unscaled
+_texture_formats = {
+    np.dtype(np.uint8): 'r8',
+    np.dtype(np.uint16): 'r16',
+    np.dtype(np.float32): 'r32f',
+}
 
 
-def _build_color_transform(data, clim, gamma, cmap):
+def _build_color_transform(data, clim, gamma, cmap, red=False):
     if data.ndim == 2 or data.shape[2] == 1:
         fclim = Function(_apply_clim_float)
         fgamma = Function(_apply_gamma_float)
+        c2l = Function(_c2l_red if red else _c2l)
         fun = FunctionChain(
-            None, [Function(_c2l), fclim, fgamma, Function(cmap.glsl_map)]
+            None, [c2l, fclim, fgamma, Function(cmap.glsl_map)]
         )
     else:
         fclim = Function(_apply_clim)
@@ -182,9 +197,11 @@ class ImageVisual(Visual):
     """
     def __init__(self, data=None, method='auto', grid=(1, 1),
                  cmap='viridis', clim='auto', gamma=1.0,
-                 interpolation='nearest', **kwargs):
+                 interpolation='nearest', texture_format=None, **kwargs):
         self._data = None
         self._gamma = gamma
+        self._texture_format = texture_format
+        self._raw_texture = False
 
         # load 'float packed rgba8' interpolation kernel
         # to load float interpolation kernel use
@@ -300,10 +317,10 @@ class ImageVisual(Visual):
             clim = np.array(clim, float)
             if clim.shape != (2,):
                 raise ValueError('clim must have two elements')
-            if self._texture_limits is not None and (
-                (clim[0] < self._texture_limits[0])
-                or (clim[1] > self._texture_limits[1])
-            ):
+            # raw textures hold all the data, whatever the clim
+            if self._texture_limits is not None and not self._raw_texture \
+                    and ((clim[0] < self._texture_limits[0]) or
+                         (clim[1] > self._texture_limits[1])):
                 self._need_texture_upload = True
         self._clim = clim
         if self._texture_limits is not None:
@@ -464,10 +481,13 @@ class ImageVisual(Visual):
 
     def _build_texture(self):
         data = self._data
+        is_luminance = data.ndim == 2 or data.shape[2] == 1
+        if is_luminance and self._texture_format is not None:
+            return self._build_raw_texture()
         if data.dtype == np.float64:
             data = data.astype(np.float32)
 
-        if data.ndim == 2 or data.shape[2] == 1:
+        if is_luminance:
             # deal with clim on CPU b/c of texture depth limits :(
             # can eventually do this by simulating 32-bit float... maybe
             clim = self._clim
@@ -486,10 +506,43 @@ class ImageVisual(Visual):
                 self._clim = (0, 1)
 
         self._texture_limits = np.array(self._clim)
+        self._raw_texture = False
         self._need_colortransform_update = True
         self._texture.set_data(data)
         self._need_texture_upload = False
 
+    def _build_raw_texture(self):
+        """Upload luminance data unscaled, clim is applied in the shader"""
+        data = self._data
+        if self._texture_format == 'auto':
+            internalformat = _texture_formats.get(data.dtype, 'r32f')
+        else:
+            internalformat = self._texture_format
+        if internalformat.endswith('f') or data.dtype.kind != 'u':
+            # float formats, and data that normalized integer formats
+            # can not represent
+            data = data.astype(np.float32, copy=False)
+            if internalformat in ('r8', 'r16'):
+                internalformat = 'r32f'
+            limits = (0., 1.)
+        else:
+            # normalized integer formats map the dtype range to (0, 1)
+            limits = (0., float(np.iinfo(data.dtype).max))
+
+        self._texture_limits = np.array(limits)
+        if isinstance(self._clim, str) and self._clim == 'auto':
+            self._clim = np.array((np.min(data), np.max(data)), float)
+            self._need_colortransform_update = True
+        if not self._raw_texture:
+            self._raw_texture = True
+            self._need_colortransform_update = True
+        shape = data.shape[:2] + (1,)
+        if self._texture.shape != shape or \
+                self._texture.internalformat != internalformat:
+            self._texture.resize(shape, 'luminance', internalformat)
+        self._texture.set_data(data.reshape(shape))
+        self._need_texture_upload = False
+
     def _compute_bounds(self, axis, view):
         if axis > 1:
             return (0, 0)
@@ -520,7 +573,8 @@ class ImageVisual(Visual):
         if self._need_colortransform_update:
             prg = view.view_program
             self.shared_program.frag['color_transform'] = _build_color_transform(
-                self._data, self.clim_normalized, self.gamma, self.cmap
+                self._data, self.clim_normalized, self.gamma, self.cmap,
+                red=self._raw_texture
             )
             self._need_colortransform_update = False
             prg['texture2D_LUT'] = self.cmap.texture_lut() \
@@ -137,6 +137,9 @@ class IsocurveVisual(LineVisual):
         except ImportError:
             find_contours = None
 
+        if find_contours is None:
+            data = self._data.astype(float).T
+
         for level in levels_to_calc:
             # if we use skimage isoline algorithm we need to add half a
             # pixel in both (x,y) dimensions because isolines are aligned to
@@ -149,8 +152,8 @@ class IsocurveVisual(LineVisual):
                 v[:, [0, 1]] = v[:, [1, 0]]
                 v += np.array([0.5, 0.5])
             else:
-                paths = isocurve(self._data.astype(float).T, level,
-                                 extend_to_edge=True, connected=True)
+                paths = isocurve(data, level, extend_to_edge=True,
+                                 connected=True)
                 v, c = self._get_verts_and_connect(paths)
 
             level_index.append(v.shape[0])
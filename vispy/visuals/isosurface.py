@@ -5,7 +5,7 @@
 from __future__ import division
 
 from .mesh import MeshVisual
-from ..geometry.isosurface import isosurface
+from ..geometry.isosurface import IsosurfaceIndex
 from ..color import Color
 
 
@@ -30,6 +30,7 @@ class IsosurfaceVisual(MeshVisual):
     def __init__(self, data=None, level=None, vertex_colors=None,
                  face_colors=None, color=(0.5, 0.5, 1, 1), **kwargs):
         self._data = None
+        self._index = None
         self._level = level
         self._vertex_colors = vertex_colors
         self._face_colors = face_colors
@@ -61,7 +62,7 @@ class IsosurfaceVisual(MeshVisual):
         self.update()
 
     def set_data(self, data=None, vertex_colors=None, face_colors=None,
-                 color=None):
+                 color=None, region=None):
         """ Set the scalar array data
 
         Parameters
@@ -75,9 +76,17 @@ class IsosurfaceVisual(MeshVisual):
             Colors to use for each face.
         color : instance of Color
             The color to use.
+        region : tuple of slice | None
+            The region where *data* differs from the previous data, as a
+            tuple of three slices. Only the isosurface around it is computed
+            again. By default, all of the data is new.
         """
         # We only change the internal variables if they are provided
         if data is not None:
+            if region is None or self._index is None:
+                self._index = IsosurfaceIndex(data)
+            else:
+                self._index.set_data(data, region)
             self._data = data
             self._recompute = True
         if vertex_colors is not None:
@@ -97,8 +106,8 @@ class IsosurfaceVisual(MeshVisual):
             return False
 
         if self._recompute:
-            self._vertices_cache, self._faces_cache = isosurface(self._data,
-                                                                 self._level)
+            self._vertices_cache, self._faces_cache = \
+                self._index.isosurface(self._level)
             self._recompute = False
             self._update_meshvisual = True
 
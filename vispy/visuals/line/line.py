@@ -11,6 +11,7 @@ import numpy as np
 
 from ... import gloo, glsl
 from ...color import Color, ColorArray, get_colormap
+from ..filters import ElementPickingFilter
 from ..shaders import Function
 from ..visual import Visual, CompoundVisual
 from ...util.profiler import Profiler
@@ -42,6 +43,13 @@ TODO:
 
 joins = {'miter': 0, 'round': 1, 'bevel': 2}
 
+# finest level of the min/max pyramid kept by decimated lines, in bins of
+# 2 ** _LOD_BASE_LEVEL samples. Finer levels are computed from the samples.
+_LOD_BASE_LEVEL = 3
+
+# number of ring buffer slots per block of cached bounds
+_BOUNDS_BLOCK = 1024
+
 caps = {'': 0, 'none': 0, '.': 0,
         'round': 1, ')': 1, '(': 1, 'o': 1,
         'triangle in': 2, '<': 2,
@@ -87,9 +95,19 @@ class LineVisual(CompoundVisual):
         Enables or disables antialiasing.
         For method='gl', this specifies whether to use GL's line smoothing,
         which may be unavailable or inconsistent on some platforms.
+    decimate : bool
+        If True, only draw the minimum and maximum of the samples in each
+        pixel column of the view, along with the first and last samples
+        (M4 decimation). This is meant for very long time series, with x
+        coordinates sorted in increasing order and connect='strip'. Lines
+        that do not meet these conditions are drawn in full.
+    max_length : int | None
+        The maximum number of vertices kept by ``append``. If given, the
+        oldest vertices are dropped to make room for new ones.
     """
     def __init__(self, pos=None, color=(0.5, 0.5, 0.5, 1), width=1,
-                 connect='strip', method='gl', antialias=False):
+                 connect='strip', method='gl', antialias=False,
+                 decimate=False, max_length=None):
         self._line_visual = None
 
         self._changed = {'pos': False, 'color': False, 'width': False,
@@ -103,6 +121,31 @@ class LineVisual(CompoundVisual):
         self._antialias = None
         self._method = 'none'
 
+        # incremented whenever the vertex data to draw changes
+        self._data_version = 0
+        self._decimate = bool(decimate)
+        self._lod_sorted = None
+        self._lod_pyramid = []
+        # (level, first bin, last bin + 1) of the decimated data, and the
+        # index of its samples
+        self._lod_bins = None
+        self._lod_index = None
+
+        # Storage of appended vertices: grown by doubling, or a ring buffer
+        # of max_length vertices where every vertex is written twice, at
+        # slots i and i + max_length, so that the last max_length vertices
+        # are always contiguous. _pos and _color are views on it.
+        self._max_length = None
+        self._pos_store = None
+        self._color_store = None
+        self._n_appended = 0
+        self._store_version = 0
+        self._block_bounds = None
+
+        # the elements are the segments of 'gl' lines, given by the index of
+        # their first vertex
+        self._element_picking = ElementPickingFilter(interpolate=True)
+
         CompoundVisual.__init__(self, [])
 
         # don't call subclass set_data; these often have different
@@ -111,6 +154,7 @@ class LineVisual(CompoundVisual):
                             connect=connect)
         self.antialias = antialias
         self.method = method
+        self.max_length = max_length
 
     @property
     def antialias(self):
@@ -135,17 +179,47 @@ class LineVisual(CompoundVisual):
 
         self._method = method
         if self._line_visual is not None:
+            if isinstance(self._line_visual, _GLLineVisual):
+                self._line_visual.detach(self._element_picking)
             self.remove_subvisual(self._line_visual)
 
         if method == 'gl':
             self._line_visual = _GLLineVisual(self)
+            self._line_visual.attach(self._element_picking)
         elif method == 'agg':
             self._line_visual = _AggLineVisual(self)
+            self._element_picking.set_elements(None)
         self.add_subvisual(self._line_visual)
 
         for k in self._changed:
             self._changed[k] = True
 
+    @property
+    def decimate(self):
+        """Whether to only draw a min/max decimation of the visible samples
+        """
+        return self._decimate
+
+    @decimate.setter
+    def decimate(self, decimate):
+        self._decimate = bool(decimate)
+        self._reset_lod()
+        self.update()
+
+    @property
+    def max_length(self):
+        """The maximum number of vertices kept by ``append``, or None"""
+        return self._max_length
+
+    @max_length.setter
+    def max_length(self, max_length):
+        if max_length is not None:
+            max_length = int(max_length)
+            if max_length < 1:
+                raise ValueError('max_length must be at least 1')
+        self._max_length = max_length
+        self._drop_store()
+
     def set_data(self, pos=None, color=None, width=None, connect=None):
         """Set the data used to draw this visual.
 
@@ -175,11 +249,17 @@ class LineVisual(CompoundVisual):
             self._bounds = None
             self._pos = pos
             self._changed['pos'] = True
+            self._lod_sorted = None
+            self._lod_pyramid = []
 
         if color is not None:
             self._color = color
             self._changed['color'] = True
 
+        if pos is not None or color is not None or connect is not None:
+            self._drop_store()
+            self._reset_lod()
+
         if width is not None:
             self._width = width
             self._changed['width'] = True
@@ -190,6 +270,202 @@ class LineVisual(CompoundVisual):
 
         self.update()
 
+    def append(self, pos, color=None):
+        """Append vertices to the end of the line.
+
+        Only the new vertices are uploaded with the 'gl' method, so that the
+        cost of an append does not grow with the length of the line. Lines
+        drawn with the 'agg' method, or decimated, are processed in full.
+
+        Parameters
+        ----------
+        pos : array
+            Array of shape (N, 2) or (N, 3) of the new vertices, with as many
+            coordinates as the vertices of the line.
+        color : Color, tuple, or array | None
+            The colors of the new vertices, for lines with one color per
+            vertex.
+
+        Notes
+        -----
+        Only lines with connect='strip' can be appended to. If
+        ``max_length`` is set, the line keeps the last ``max_length``
+        vertices.
+        """
+        if not isinstance(self._connect, str) or self._connect != 'strip':
+            raise ValueError('only lines with connect="strip" can be '
+                             'appended to')
+        pos = np.asarray(pos, dtype=np.float32)
+        if pos.ndim != 2 or pos.shape[1] not in (2, 3):
+            raise ValueError('pos must be an array of shape (N, 2) or '
+                             '(N, 3)')
+        if self._pos_store is None:
+            self._init_store(pos.shape[1])
+        if pos.shape[1] != self._pos_store.shape[1]:
+            raise ValueError('pos must have %d coordinates, got %d'
+                             % (self._pos_store.shape[1], pos.shape[1]))
+        if self._color_store is not None:
+            if color is None:
+                raise ValueError('color must be given for lines with one '
+                                 'color per vertex')
+            rgba = ColorArray(color).rgba
+            color = np.empty((len(pos), 4), np.float32)
+            color[:] = rgba
+        elif color is not None:
+            raise ValueError('color can only be given for lines with one '
+                             'color per vertex')
+        if len(pos) == 0:
+            return
+
+        last_x = self._pos[-1, 0] if len(self._pos) else None
+        evicted = self._write_store(pos, color)
+        self._pos = self._store_view(self._pos_store)
+        if self._color_store is not None:
+            self._color = self._store_view(self._color_store)
+        self._update_bounds(pos, evicted)
+        if self._lod_sorted and (last_x is None or pos[0, 0] >= last_x):
+            self._lod_sorted = bool(np.all(pos[1:, 0] >= pos[:-1, 0]))
+        else:
+            self._lod_sorted = None
+        self._lod_pyramid = []
+        self._changed['pos'] = True
+        self._changed['color'] = True
+        self._reset_lod()
+        self.update()
+
+    def _drop_store(self):
+        self._pos_store = None
+        self._color_store = None
+        self._block_bounds = None
+        self._store_version += 1
+
+    def _init_store(self, n_dims):
+        """Start storing appended vertices, after the current ones"""
+        pos = self._pos
+        if pos is None:
+            pos = self._pos = np.zeros((0, n_dims), np.float32)
+        color = None
+        if isinstance(self._color, np.ndarray) and self._color.ndim == 2 \
+                and len(self._color) == len(pos) and len(pos) > 0:
+            color = ColorArray(self._color).rgba.astype(np.float32)
+        if self._max_length is None:
+            size = max(2 * len(pos), 1024)
+        else:
+            size = 2 * self._max_length
+        self._pos_store = np.zeros((size, pos.shape[1]), np.float32)
+        if color is not None:
+            self._color_store = np.zeros((size, 4), np.float32)
+        self._n_appended = 0
+        self._block_bounds = None
+        self._bounds = None
+        self._store_version += 1
+        self._write_store(np.asarray(pos, np.float32), color)
+
+    def _store_slots(self, start, stop):
+        """The (slot, first vertex, vertex count) ranges where the appended
+        vertices start to stop are stored
+        """
+        count = stop - start
+        length = self._max_length
+        if length is None:
+            return [(start, 0, count)]
+        first = start % length
+        head = min(count, length - first)
+        slots = [(first, 0, head), (first + length, 0, head)]
+        if head < count:
+            slots += [(0, head, count - head), (length, head, count - head)]
+        return slots
+
+    def _write_store(self, pos, color):
+        """Write vertices to the storage, and return whether old vertices
+        were dropped
+        """
+        length = self._max_length
+        dropped = len(pos)
+        if length is not None:
+            if len(pos) > length:
+                pos = pos[-length:]
+                color = None if color is None else color[-length:]
+                self._n_appended += dropped - length
+            dropped = self._n_appended + len(pos) > length
+        elif self._n_appended + len(pos) > len(self._pos_store):
+            # grow the storage
+            size = max(2 * len(self._pos_store), self._n_appended + len(pos))
+            for name in ('_pos_store', '_color_store'):
+                store = getattr(self, name)
+                if store is not None:
+                    grown = np.zeros((size,) + store.shape[1:], store.dtype)
+                    grown[:self._n_appended] = store[:self._n_appended]
+                    setattr(self, name, grown)
+            self._store_version += 1
+            dropped = False
+        else:
+            dropped = False
+        start = self._n_appended
+        for slot, first, count in self._store_slots(start, start + len(pos)):
+            self._pos_store[slot:slot + count] = pos[first:first + count]
+            if color is not None:
+                self._color_store[slot:slot + count] = \
+                    color[first:first + count]
+        self._n_appended += len(pos)
+        return dropped
+
+    def _store_range(self):
+        """The (first, count) range of slots of the vertices of the line"""
+        length = self._max_length
+        if length is None or self._n_appended <= length:
+            return 0, self._n_appended
+        return self._n_appended % length, length
+
+    def _store_view(self, store):
+        first, count = self._store_range()
+        return store[first:first + count]
+
+    def _store_state(self):
+        return self._store_version, self._n_appended
+
+    def _store_updates(self, state):
+        """The slot ranges written since the storage was in the given state,
+        or None if it must be uploaded in full
+        """
+        version, n_appended = state if state is not None else (None, None)
+        if version != self._store_version:
+            return None
+        if self._max_length is not None and \
+                self._n_appended - n_appended >= self._max_length:
+            return None
+        return [(slot, slot + count) for slot, _, count in
+                self._store_slots(n_appended, self._n_appended)]
+
+    def _update_bounds(self, pos, dropped):
+        if self._bounds is None:
+            return
+        if not dropped:
+            self._bounds = [(min(lo, pos[:, d].min()), max(hi, pos[:, d].max()))
+                            for d, (lo, hi) in enumerate(self._bounds)]
+            return
+        # The dropped vertices may have been the extremes. Keep the bounds of
+        # blocks of the ring buffer, and only update the overwritten blocks.
+        length = self._max_length
+        ring = self._pos_store[:length]
+        n_blocks = -(-length // _BOUNDS_BLOCK)
+        if self._block_bounds is None:
+            blocks = range(n_blocks)
+            self._block_bounds = np.zeros((n_blocks, ring.shape[1], 2),
+                                          np.float32)
+        else:
+            start = (self._n_appended - min(len(pos), length)) % length
+            stop = start + min(len(pos), length)
+            blocks = np.arange(start // _BOUNDS_BLOCK,
+                               (stop - 1) // _BOUNDS_BLOCK + 1) % n_blocks
+        for b in blocks:
+            block = ring[b * _BOUNDS_BLOCK:(b + 1) * _BOUNDS_BLOCK]
+            self._block_bounds[b, :, 0] = block.min(axis=0)
+            self._block_bounds[b, :, 1] = block.max(axis=0)
+        self._bounds = [(self._block_bounds[:, d, 0].min(),
+                         self._block_bounds[:, d, 1].max())
+                        for d in range(ring.shape[1])]
+
     @property
     def color(self):
         return self._color
@@ -224,7 +500,11 @@ class LineVisual(CompoundVisual):
             return self._connect
 
     def _interpret_color(self, color_in=None):
-        color_in = self._color if color_in is None else color_in
+        if color_in is None:
+            color_in = self._color
+            if isinstance(color_in, np.ndarray) and color_in.ndim == 2 and \
+                    self._pos is not None and len(color_in) == len(self._pos):
+                color_in = self._decimated(color_in)
         colormap = None
         if isinstance(color_in, str):
             try:
@@ -269,8 +549,130 @@ class LineVisual(CompoundVisual):
     def _prepare_draw(self, view):
         if self._width == 0:
             return False
+        if self._decimate:
+            self._update_lod(view)
         CompoundVisual._prepare_draw(self, view)
 
+    def _reset_lod(self):
+        self._lod_bins = None
+        self._lod_index = None
+        self._data_version += 1
+
+    def _decimated(self, data):
+        """The part of per-vertex data that is drawn"""
+        return data if self._lod_index is None else data[self._lod_index]
+
+    def _update_lod(self, view):
+        """Decimate the line for the current view if needed
+
+        The decimated data covers the visible samples and the same number
+        of samples on either side, so that it only changes when panning out
+        of that range or zooming to another level.
+        """
+        pos = self._pos
+        if pos is None or len(pos) < 2 or not isinstance(self._connect, str) \
+                or self._connect != 'strip':
+            return
+        x = pos[:, 0]
+        if self._lod_sorted is None:
+            self._lod_sorted = bool(np.all(x[1:] >= x[:-1]))
+        if not self._lod_sorted:
+            return
+
+        # the visible x range, and its width in pixels
+        corners = np.array([[-1, -1, 0, 1], [1, -1, 0, 1],
+                            [-1, 1, 0, 1], [1, 1, 0, 1]], dtype=np.float64)
+        tr = view.transforms.get_transform('visual', 'render')
+        corners = tr.imap(corners)
+        corners = corners[:, 0] / corners[:, 3]
+        x0, x1 = corners.min(), corners.max()
+        px = view.transforms.get_transform('render', 'framebuffer').map(
+            np.array([[-1, 0], [1, 0]], dtype=np.float64))
+        width = abs(px[1, 0] / px[1, 3] - px[0, 0] / px[0, 3])
+        if not (np.isfinite(x0) and np.isfinite(x1) and x1 > x0 and width):
+            return
+
+        n = len(pos)
+        # one more sample on either side, so that the line leaves the view
+        i0 = max(np.searchsorted(x, x0, 'right') - 1, 0)
+        i1 = min(np.searchsorted(x, x1, 'left') + 1, n)
+        span = max(float(x[i1 - 1] - x[i0]) * width / (x1 - x0), 1.)
+        samples_per_px = (i1 - i0) / span
+        level = int(np.log2(samples_per_px)) if samples_per_px >= 2 else 0
+
+        v0, v1 = i0 >> level, ((i1 - 1) >> level) + 1
+        if self._lod_bins is not None:
+            lod_level, b0, b1 = self._lod_bins
+            if lod_level == level and b0 <= v0 and v1 <= b1:
+                return
+        margin = v1 - v0
+        n_bins = ((n - 1) >> level) + 1
+        b0, b1 = max(v0 - margin, 0), min(v1 + margin, n_bins)
+        if level == 0:
+            index = slice(b0, b1) if (b0, b1) != (0, n) else None
+        else:
+            index = self._lod_decimate(level, b0, b1)
+        self._lod_bins = (level, b0, b1)
+        self._lod_index = index
+        self._data_version += 1
+
+    def _lod_decimate(self, level, b0, b1):
+        """Sample indices of the bins b0 to b1 of a level of the pyramid"""
+        y = self._pos[:, 1]
+        n = len(y)
+        if level < _LOD_BASE_LEVEL:
+            start = b0 << level
+            imin, imax = _minmax_bins(y[start:min(b1 << level, n)],
+                                      1 << level)
+            imin += start
+            imax += start
+        else:
+            pyramid = self._lod_pyramid
+            if not pyramid:
+                pyramid.append(_minmax_bins(y, 1 << _LOD_BASE_LEVEL))
+            while len(pyramid) <= level - _LOD_BASE_LEVEL:
+                pyramid.append(_minmax_bins(y, 2, *pyramid[-1]))
+            imin, imax = pyramid[level - _LOD_BASE_LEVEL]
+            imin, imax = imin[b0:b1], imax[b0:b1]
+        bins = np.arange(b0, b1, dtype=imin.dtype)
+        first = bins << level
+        last = np.minimum(((bins + 1) << level) - 1, n - 1)
+        index = np.sort(np.stack([first, imin, imax, last], axis=1), axis=1)
+        index = index.ravel()
+        return index[np.concatenate([[True], index[1:] != index[:-1]])]
+
+
+def _minmax_bins(y, factor, imin=None, imax=None):
+    """Indices of the minimum and maximum of y in bins of ``factor`` samples,
+    or in groups of ``factor`` bins given by their ``imin`` and ``imax``.
+    """
+    if imin is None:
+        n = len(y)
+        dtype = np.int32 if n < 2 ** 31 else np.int64
+        full = n - n % factor
+        starts = np.arange(0, n, factor, dtype=dtype)
+        bins = y[:full].reshape(-1, factor)
+        imin = np.empty(len(starts), dtype)
+        imax = np.empty(len(starts), dtype)
+        imin[:len(bins)] = bins.argmin(axis=1)
+        imax[:len(bins)] = bins.argmax(axis=1)
+        if full < n:
+            imin[-1] = y[full:].argmin()
+            imax[-1] = y[full:].argmax()
+        return imin + starts, imax + starts
+
+    out = []
+    for index, select in ((imin, np.argmin), (imax, np.argmax)):
+        full = len(index) - len(index) % factor
+        groups = index[:full].reshape(-1, factor)
+        merged = groups[np.arange(len(groups)),
+                        select(y[groups], axis=1)]
+        if full < len(index):
+            tail = index[full:]
+            merged = np.append(merged, tail[select(y[tail])])
+        out.append(merged)
+    return tuple(out)
+
 
 class _GLLineVisual(Visual):
     VERTEX_SHADER = """
@@ -295,6 +697,8 @@ class _GLLineVisual(Visual):
         self._color_vbo = gloo.VertexBuffer()
         self._connect_ibo = gloo.IndexBuffer()
         self._connect = None
+        self._data_version = None
+        self._store_state = None
 
         Visual.__init__(self, vcode=self.VERTEX_SHADER,
                         fcode=self.FRAGMENT_SHADER)
@@ -307,12 +711,26 @@ class _GLLineVisual(Visual):
     def _prepare_draw(self, view):
         prof = Profiler()
 
+        parent = self._parent
+        upload = self._data_version != parent._data_version
+        # appended vertices are drawn from their storage, and only the new
+        # ones are uploaded
+        stored = parent._pos_store is not None and parent._lod_index is None
+        updates = None
+        if upload and stored:
+            updates = parent._store_updates(self._store_state)
+
         if self._parent._changed['pos']:
             if self._parent._pos is None:
                 return False
             # todo: does this result in unnecessary copies?
-            pos = np.ascontiguousarray(self._parent._pos.astype(np.float32))
-            self._pos_vbo.set_data(pos)
+            pos = self._parent._pos
+            if upload and stored:
+                self._upload(self._pos_vbo, parent._pos_store, updates)
+            elif upload:
+                pos = self._parent._decimated(pos)
+                self._pos_vbo.set_data(
+                    np.ascontiguousarray(pos, dtype=np.float32))
             self._program.vert['position'] = self._pos_vbo
             if pos.shape[-1] == 2:
                 self._program.vert['to_vec4'] = vec2to4
@@ -322,7 +740,13 @@ class _GLLineVisual(Visual):
                 raise TypeError("Got bad position array shape: %r"
                                 % (pos.shape,))
 
-        if self._parent._changed['color']:
+        if self._parent._changed['color'] and stored and \
+                parent._color_store is not None:
+            if upload:
+                self._upload(self._color_vbo, parent._color_store, updates)
+            self._program.vert['color'] = self._color_vbo
+            self.shared_program['texture2D_LUT'] = None
+        elif self._parent._changed['color']:
             color, cmap = self._parent._interpret_color()
             # If color is not visible, just quit now
             if isinstance(color, Color) and color.is_blank:
@@ -335,7 +759,8 @@ class _GLLineVisual(Visual):
                 if color.ndim == 1:
                     self._program.vert['color'] = color
                 else:
-                    self._color_vbo.set_data(color)
+                    if upload:
+                        self._color_vbo.set_data(color)
                     self._program.vert['color'] = self._color_vbo
 
             self.shared_program['texture2D_LUT'] = cmap.texture_lut() \
@@ -367,6 +792,9 @@ class _GLLineVisual(Visual):
                 self._connect_ibo.set_data(self._connect)
         if self._connect is None:
             return False
+        self._prepare_element_picking(stored)
+        self._data_version = parent._data_version
+        self._store_state = parent._store_state() if stored else None
 
         prof('prepare')
 
@@ -374,7 +802,7 @@ class _GLLineVisual(Visual):
         if isinstance(self._connect, str) and \
                 self._connect == 'strip':
             self._draw_mode = 'line_strip'
-            self._index_buffer = None
+            self._index_buffer = parent._store_range() if stored else None
         elif isinstance(self._connect, str) and \
                 self._connect == 'segments':
             self._draw_mode = 'lines'
@@ -387,6 +815,33 @@ class _GLLineVisual(Visual):
 
         prof('draw')
 
+    def _prepare_element_picking(self, stored):
+        parent = self._parent
+        picking = parent._element_picking
+        if isinstance(self._connect, np.ndarray):
+            # vertices may be shared by several segments
+            picking.set_elements(None)
+        elif stored:
+            n_slots = len(parent._pos_store)
+            picking.start = parent._store_range()[0]
+            picking.set_elements(lambda: np.arange(n_slots),
+                                 key=('store', parent._store_version, n_slots))
+        else:
+            n = len(parent._pos)
+            index = parent._lod_index
+            picking.start = 0
+            picking.set_elements(
+                lambda: np.arange(n) if index is None else np.arange(n)[index],
+                key=parent._data_version)
+
+    @staticmethod
+    def _upload(vbo, store, updates):
+        if updates is None:
+            vbo.set_data(store)
+        else:
+            for start, stop in updates:
+                vbo.set_subdata(store[start:stop], offset=start)
+
 
 class _AggLineVisual(Visual):
     _agg_vtype = np.dtype([('a_position', np.float32, (2,)),
@@ -406,6 +861,7 @@ class _AggLineVisual(Visual):
 
         self._pos = None
         self._color = None
+        self._data_version = None
 
         self._da = DashAtlas()
         dash_index, dash_period = self._da['solid']
@@ -437,15 +893,19 @@ class _AggLineVisual(Visual):
         if self._parent._changed['pos']:
             if self._parent._pos is None:
                 return False
-            # todo: does this result in unnecessary copies?
-            self._pos = np.ascontiguousarray(
-                self._parent._pos.astype(np.float32))
             bake = True
 
         if self._parent._changed['color']:
+            bake = True
+
+        # only bake again when the data to draw changed
+        bake = bake and self._data_version != self._parent._data_version
+        if bake:
+            # todo: does this result in unnecessary copies?
+            self._pos = np.ascontiguousarray(
+                self._parent._decimated(self._parent._pos), dtype=np.float32)
             color, cmap = self._parent._interpret_color()
             self._color = color
-            bake = True
 
         if self._parent._changed['connect']:
             if self._parent._connect not in [None, 'strip']:
@@ -456,6 +916,7 @@ class _AggLineVisual(Visual):
             V, idxs = self._agg_bake(self._pos, self._color)
             self._vbo.set_data(V)
             self._index_buffer.set_data(idxs)
+            self._data_version = self._parent._data_version
 
         # self._program.prepare()
         self.shared_program.bind(self._vbo)
@@ -36,6 +36,8 @@ class LinePlotVisual(CompoundVisual):
         Edge width of the marker.
     connect : str | array
         See LineVisual.
+    max_length : int | None
+        The maximum number of points kept by ``append``. See LineVisual.
     **kwargs : keyword arguments
         Argements to pass to the super class.
 
@@ -59,12 +61,15 @@ class LinePlotVisual(CompoundVisual):
 
     def __init__(self, data=None, color='k', symbol=None, line_kind='-',
                  width=1., marker_size=10., edge_color='k', face_color='w',
-                 edge_width=1., connect='strip'):
+                 edge_width=1., connect='strip', max_length=None):
         if line_kind != '-':
             raise ValueError('Only solid lines currently supported')
-        self._line = LineVisual(method='gl', antialias=False)
+        self._line = LineVisual(method='gl', antialias=False,
+                                max_length=max_length)
         self._markers = MarkersVisual()
         self._kwargs = {}
+        # whether points were appended while markers were not shown
+        self._markers_stale = False
         CompoundVisual.__init__(self, [self._line, self._markers])
         self.set_data(data, color=color, symbol=symbol,
                       width=width, marker_size=marker_size,
@@ -125,10 +130,52 @@ class LinePlotVisual(CompoundVisual):
         if pos is not None or len(line_kwargs) > 0:
             self._line.set_data(pos=pos, **line_kwargs)
 
+        marker_kwargs = self._get_marker_kwargs()
+        if pos is None and self._markers_stale:
+            pos = self._line.pos
+        if pos is not None or len(marker_kwargs) > 0:
+            self._markers.set_data(pos=pos, **marker_kwargs)
+            self._markers_stale = False
+
+    def append(self, data):
+        """Append points to the line
+
+        Only the new points of the line are uploaded. The markers, if any
+        are shown, are set again for all points.
+
+        Parameters
+        ----------
+        data : array-like
+            The new points, as ``(Y,)``, ``(X, Y)``, ``(X, Y, Z)``,
+            ``np.array((X, Y))`` or ``np.array((X, Y, Z))``. Y values alone
+            are placed at the x coordinates following the last point.
+        """
+        if isinstance(data, tuple):
+            pos = np.array(data).T.astype(np.float32)
+        else:
+            pos = np.atleast_1d(data).astype(np.float32)
+        if pos.ndim == 1:
+            pos = pos[:, np.newaxis]
+        elif pos.ndim > 2:
+            raise ValueError('data must have at most two dimensions')
+        if pos.shape[1] == 1:
+            line_pos = self._line.pos
+            start = 0 if line_pos is None or len(line_pos) == 0 \
+                else line_pos[-1, 0] + 1
+            x = np.arange(len(pos), dtype=np.float32)[:, np.newaxis] + start
+            pos = np.concatenate((x, pos), axis=1)
+
+        self._line.append(pos)
+        if self._markers.symbol is None:
+            self._markers_stale = True
+        else:
+            self._markers.set_data(pos=self._line.pos,
+                                   **self._get_marker_kwargs())
+
+    def _get_marker_kwargs(self):
         marker_kwargs = {}
         for k in self._marker_kwargs:
             if k in self._kwargs:
                 k_ = self._kw_trans[k] if k in self._kw_trans else k
                 marker_kwargs[k_] = self._kwargs.get(k)
-        if pos is not None or len(marker_kwargs) > 0:
-            self._markers.set_data(pos=pos, **marker_kwargs)
+        return marker_kwargs
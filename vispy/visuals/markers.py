@@ -10,7 +10,10 @@ Marker Visual and shader definitions.
 import numpy as np
 
 from ..color import ColorArray
+from ..geometry import GridIndex
+from ..geometry.spatial_index import _imap_square
 from ..gloo import VertexBuffer, _check_valid
+from .filters import ElementPickingFilter
 from .shaders import Function, Variable
 from .visual import Visual
 
@@ -481,21 +484,48 @@ _marker_dict = {
 }
 marker_types = tuple(sorted(list(_marker_dict.keys())))
 
+_COLOR_ATTRIBUTES = ('a_fg_color', 'a_bg_color')
+_VECTOR_ATTRIBUTES = ('a_position',) + _COLOR_ATTRIBUTES
+
+
+def _squeeze_color(color):
+    """RGBA colors, of shape (4,) for a single color"""
+    color = ColorArray(color).rgba
+    return color[0] if len(color) == 1 else color
+
+
+def _compact_color(color):
+    """Colors as normalized uint8"""
+    color = np.asarray(color)
+    if color.dtype == np.uint8:
+        return color
+    return (np.clip(color, 0, 1) * 255 + 0.5).astype(np.uint8)
+
 
 class MarkersVisual(Visual):
     """ Visual displaying marker symbols.
     """
     def __init__(self, **kwargs):
         self._vbo = VertexBuffer()
+        # one vertex buffer per attribute in the compact layout
+        self._vbos = {}
+        self._compact = False
+        self._edge_width_rel = None
         self._v_size_var = Variable('varying float v_size')
         self._symbol = None
         self._marker_fun = None
         self._data = None
+        # index of the markers for hit-testing, built on first use
+        self._spatial_index = None
+        self._max_size = None
         self.antialias = 1
         self.scaling = False
         Visual.__init__(self, vcode=vert, fcode=frag)
         self.shared_program.vert['v_size'] = self._v_size_var
         self.shared_program.frag['v_size'] = self._v_size_var
+        # the elements are the markers
+        self._element_picking = ElementPickingFilter()
+        self.attach(self._element_picking)
         self.set_gl_state(depth_test=True, blend=True,
                           blend_func=('src_alpha', 'one_minus_src_alpha'))
         self._draw_mode = 'points'
@@ -505,7 +535,7 @@ class MarkersVisual(Visual):
 
     def set_data(self, pos=None, symbol='o', size=10., edge_width=1.,
                  edge_width_rel=None, edge_color='black', face_color='white',
-                 scaling=False):
+                 scaling=False, compact=False):
         """ Set the data used to display this visual.
 
         Parameters
@@ -527,6 +557,12 @@ class MarkersVisual(Visual):
             The color used to draw each symbol interior.
         scaling : bool
             If set to True, marker scales when rezooming.
+        compact : bool
+            If True, use a compact vertex layout: colors are stored as
+            uint8, a single color, size or edge width is set once for all
+            markers instead of per marker, and every attribute has its own
+            vertex buffer, so that ``set_subdata`` only uploads the
+            attributes that change.
 
         Notes
         -----
@@ -559,32 +595,210 @@ class MarkersVisual(Visual):
                     pos.ndim == 2 and pos.shape[1] in (2, 3))
 
             n = len(pos)
-            data = np.zeros(n, dtype=[('a_position', np.float32, 3),
-                                      ('a_fg_color', np.float32, 4),
-                                      ('a_bg_color', np.float32, 4),
-                                      ('a_size', np.float32),
-                                      ('a_edgewidth', np.float32)])
-            data['a_fg_color'] = edge_color
-            data['a_bg_color'] = face_color
-            if edge_width is not None:
-                data['a_edgewidth'] = edge_width
+            if edge_width is None:
+                edge_width = size*edge_width_rel
+            if compact:
+                data = {'a_position': np.zeros((n, 3), np.float32),
+                        'a_fg_color': _compact_color(edge_color),
+                        'a_bg_color': _compact_color(face_color),
+                        'a_size': np.array(size, np.float32),
+                        'a_edgewidth': np.array(edge_width, np.float32)}
             else:
-                data['a_edgewidth'] = size*edge_width_rel
+                data = np.zeros(n, dtype=[('a_position', np.float32, 3),
+                                          ('a_fg_color', np.float32, 4),
+                                          ('a_bg_color', np.float32, 4),
+                                          ('a_size', np.float32),
+                                          ('a_edgewidth', np.float32)])
+                data['a_fg_color'] = edge_color
+                data['a_bg_color'] = face_color
+                data['a_edgewidth'] = edge_width
+                data['a_size'] = size
             data['a_position'][:, :pos.shape[1]] = pos
-            data['a_size'] = size
             self.shared_program['u_antialias'] = self.antialias  # XXX make prop
             self._data = data
+            self._spatial_index = None
+            self._max_size = None
+            self._compact = compact
+            self._edge_width_rel = edge_width_rel
             if self._symbol is not None:
                 # If we have no symbol set, we skip drawing (_prepare_draw
                 # returns False). This causes the GLIR queue to not flush,
                 # and thus the GLIR queue fills with VBO DATA commands, resulting
                 # in a "memory leak". Thus only set the VertexBuffer data if we
                 # are actually going to draw.
-                self._vbo.set_data(data)
-                self.shared_program.bind(self._vbo)
+                self._upload_data()
+
+        self.update()
 
+    def set_subdata(self, offset=0, pos=None, size=None, edge_width=None,
+                    edge_color=None, face_color=None):
+        """ Update some attributes of a range of markers.
+
+        Only the given attributes of the range are uploaded with the compact
+        layout. With the default layout, all attributes of the range are
+        uploaded, but the markers outside of the range are not.
+
+        Parameters
+        ----------
+        offset : int
+            The index of the first marker to update.
+        pos : array | None
+            The new locations of the markers.
+        size : float | array | None
+            The new symbol sizes in px. If the edge width was set relative to
+            the size, it is updated too.
+        edge_width : float | array | None
+            The new width of the symbol outlines in pixels.
+        edge_color : Color | ColorArray | None
+            The new colors of the symbol outlines.
+        face_color : Color | ColorArray | None
+            The new colors of the symbol interiors.
+
+        Notes
+        -----
+        The range of markers starts at ``offset`` and has the length of the
+        given arrays. If only single values are given, all markers from
+        ``offset`` on are updated.
+        """
+        if self._data is None:
+            raise ValueError('set_data must be called before set_subdata')
+        n_markers = len(self._data['a_position'])
+        values = {}
+        if pos is not None:
+            pos = np.asarray(pos, np.float32)
+            if pos.ndim != 2 or pos.shape[1] not in (2, 3):
+                raise ValueError('pos must be an array of shape (N, 2) or '
+                                 '(N, 3)')
+            values['a_position'] = pos
+        if edge_color is not None:
+            values['a_fg_color'] = _squeeze_color(edge_color)
+        if face_color is not None:
+            values['a_bg_color'] = _squeeze_color(face_color)
+        if size is not None:
+            values['a_size'] = np.asarray(size, np.float32)
+            self._max_size = None
+            if edge_width is None and self._edge_width_rel is not None:
+                edge_width = values['a_size'] * self._edge_width_rel
+        if edge_width is not None:
+            edge_width = np.asarray(edge_width, np.float32)
+            if (edge_width < 0).any():
+                raise ValueError('edge_width cannot be negative')
+            values['a_edgewidth'] = edge_width
+
+        count = None
+        for name, value in values.items():
+            if value.ndim == (name in _VECTOR_ATTRIBUTES) + 1:
+                if count is not None and len(value) != count:
+                    raise ValueError('all arrays must have the same length')
+                count = len(value)
+        if count is None:
+            count = n_markers - offset
+        stop = offset + count
+        if offset < 0 or stop > n_markers:
+            raise ValueError('markers %d to %d do not exist, there are %d '
+                             'markers' % (offset, stop, n_markers))
+
+        for name, value in values.items():
+            if name == 'a_position':
+                self._data[name][offset:stop, :value.shape[1]] = value
+                self._data[name][offset:stop, value.shape[1]:] = 0
+                if self._spatial_index is not None:
+                    self._spatial_index.update(offset, value)
+            elif self._compact:
+                self._set_compact_subdata(name, value, offset, stop)
+            else:
+                self._data[name][offset:stop] = value
+        if self._symbol is not None and count > 0:
+            if not self._compact:
+                self._vbo.set_subdata(self._data[offset:stop], offset=offset)
+            elif 'a_position' in values:
+                self._vbos['a_position'].set_subdata(
+                    self._data['a_position'][offset:stop], offset=offset)
         self.update()
 
+    def _set_compact_subdata(self, name, value, offset, stop):
+        """Update an attribute of the compact layout"""
+        data = self._data[name]
+        is_color = name in _COLOR_ATTRIBUTES
+        if is_color:
+            value = _compact_color(value)
+        constant = data.ndim == is_color
+        if constant and value.ndim == is_color and \
+                (offset, stop) == (0, len(self._data['a_position'])):
+            # still a single value for all markers
+            self._data[name] = value
+            if self._symbol is not None:
+                self._upload_attribute(name)
+            return
+        if constant:
+            # from now on, the attribute is stored per marker
+            shape = (len(self._data['a_position']),) + data.shape
+            self._data[name] = np.empty(shape, value.dtype)
+            self._data[name][:] = _compact_color(data) if is_color else data
+            self._data[name][offset:stop] = value
+            if self._symbol is not None:
+                self._upload_attribute(name)
+            return
+        data[offset:stop] = value
+        if self._symbol is not None:
+            self._vbos[name].set_subdata(data[offset:stop], offset=offset)
+
+    def _elements_near(self, tr, pos, radius):
+        """Find the markers within *radius* pixels of the canvas position *pos*
+
+        The markers are found without rendering, with an index of their x and
+        y coordinates, which is meant for 2D views. *tr* maps the canvas
+        coordinates to the coordinates of the visual. The distance is
+        measured from the disc of the markers, with their size in pixels.
+
+        Returns the index of the markers and their distance in pixels, sorted
+        by distance.
+        """
+        if self._data is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        positions = self._data['a_position']
+        if self._spatial_index is None:
+            self._spatial_index = GridIndex(positions)
+        size = self._data['a_size']
+        if self._max_size is None:
+            self._max_size = size.max() if size.size else 0.
+        index = self._spatial_index.query_box(
+            *_imap_square(tr, pos, radius + self._max_size / 2.))
+        mapped = tr.imap(positions[index])
+        mapped = mapped[:, :2] / mapped[:, 3:4]
+        distance = np.sqrt(((mapped - pos[:2]) ** 2).sum(axis=1))
+        if size.ndim:
+            size = size[index]
+        distance = np.maximum(distance - size / 2., 0)
+        close = distance <= radius
+        index, distance = index[close], distance[close]
+        order = np.argsort(distance, kind='stable')
+        return index[order], distance[order]
+
+    def _upload_data(self):
+        n_markers = len(self._data['a_position'])
+        self._element_picking.set_elements(lambda: np.arange(n_markers))
+        if not self._compact:
+            self._vbo.set_data(self._data)
+            self.shared_program.bind(self._vbo)
+            return
+        for name in self._data:
+            self._upload_attribute(name)
+
+    def _upload_attribute(self, name):
+        """Upload an attribute of the compact layout"""
+        value = self._data[name]
+        if value.ndim == (name in _COLOR_ATTRIBUTES):
+            # a single value for all markers
+            if value.dtype == np.uint8:
+                value = value / 255.
+            self.shared_program[name] = tuple(float(v) for v in value.flat)
+        else:
+            if name not in self._vbos:
+                self._vbos[name] = VertexBuffer()
+            self._vbos[name].set_data(value)
+            self.shared_program[name] = self._vbos[name]
+
     @property
     def symbol(self):
         return self._symbol
@@ -601,8 +815,7 @@ class MarkersVisual(Visual):
             # marker.symbol = None
             # without drawing. At this point the memory leaking ensues
             # but this case is unlikely/makes no sense.
-            self._vbo.set_data(self._data)
-            self.shared_program.bind(self._vbo)
+            self._upload_data()
         self._symbol = symbol
         if symbol is None:
             self._marker_fun = None
@@ -12,9 +12,11 @@ from __future__ import division
 import numpy as np
 
 from .visual import Visual
+from .filters import ElementPickingFilter
 from .shaders import Function, FunctionChain
 from ..gloo import VertexBuffer
-from ..geometry import MeshData
+from ..geometry import GridIndex, MeshData
+from ..geometry.spatial_index import _imap_square
 from ..color import Color, get_colormap
 
 # Shaders for lit rendering (using phong shading)
@@ -198,6 +200,9 @@ class MeshVisual(Visual):
         # Define buffers
         self._vertices = VertexBuffer(np.zeros((0, 3), dtype=np.float32))
         self._normals = VertexBuffer(np.zeros((0, 3), dtype=np.float32))
+        # the elements are the faces
+        self._element_picking = ElementPickingFilter()
+        self.attach(self._element_picking)
         self._ambient_light_color = Color((0.3, 0.3, 0.3, 1.0))
         self._light_dir = (10, 5, -5)
         self._shininess = 1. / 200.
@@ -209,6 +214,8 @@ class MeshVisual(Visual):
 
         # Init
         self._bounds = None
+        # index of the faces for hit-testing, built on first use
+        self._spatial_index = None
         # Note we do not call subclass set_data -- often the signatures
         # do no match.
         MeshVisual.set_data(
@@ -342,8 +349,34 @@ class MeshVisual(Visual):
 
     def mesh_data_changed(self):
         self._data_changed = True
+        self._spatial_index = None
         self.update()
 
+    def _elements_near(self, tr, pos, radius):
+        """Find the faces within *radius* pixels of the canvas position *pos*
+
+        The faces are found without rendering, with an index of their x and
+        y coordinates, which is meant for 2D views. *tr* maps the canvas
+        coordinates to the coordinates of the visual.
+
+        Returns the index of the faces and their distance in pixels, sorted
+        by distance.
+        """
+        faces = self.mesh_data.get_vertices(indexed='faces')
+        if faces is None or len(faces) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        if self._spatial_index is None:
+            lo, hi = faces[:, :, :2].min(axis=1), faces[:, :, :2].max(axis=1)
+            self._spatial_index = GridIndex((lo + hi) / 2., (hi - lo) / 2.)
+        index = self._spatial_index.query_box(*_imap_square(tr, pos, radius))
+        mapped = tr.imap(faces[index].reshape(-1, faces.shape[-1]))
+        mapped = (mapped[:, :2] / mapped[:, 3:4]).reshape(-1, 3, 2)
+        distance = _triangle_distance(mapped, np.asarray(pos[:2], float))
+        close = distance <= radius
+        index, distance = index[close], distance[close]
+        order = np.argsort(distance, kind='stable')
+        return index[order], distance[order]
+
     def _update_data(self):
         md = self.mesh_data
 
@@ -353,6 +386,9 @@ class MeshVisual(Visual):
         if v.shape[-1] == 2:
             v = np.concatenate((v, np.zeros((v.shape[:-1] + (1,)))), -1)
         self._vertices.set_data(v, convert=True)
+        n_faces = len(v)
+        self._element_picking.set_elements(
+            lambda: np.repeat(np.arange(n_faces), 3))
         if self.shading == 'smooth':
             normals = md.get_vertex_normals(indexed='faces')
             self._normals.set_data(normals, convert=True)
@@ -510,3 +546,22 @@ class MeshVisual(Visual):
             return (0, 0)
         else:
             return self._bounds[axis]
+
+
+def _triangle_distance(triangles, point):
+    """Distance from a 2D point to triangles of shape (N, 3, 2)"""
+    a = triangles
+    b = np.roll(triangles, -1, axis=1)
+    edge = b - a
+    rel = point - a
+    # distance to the edges
+    length2 = (edge ** 2).sum(axis=-1)
+    t = np.clip((rel * edge).sum(axis=-1) / np.where(length2, length2, 1.),
+                0, 1)
+    distance = np.sqrt(((rel - t[..., np.newaxis] * edge) ** 2).sum(axis=-1))
+    # the point is inside when it is on the same side of all edges, which
+    # the edge distance also covers for degenerate triangles
+    cross = edge[..., 0] * rel[..., 1] - edge[..., 1] * rel[..., 0]
+    inside = ((cross >= 0).all(axis=1) | (cross <= 0).all(axis=1)) & \
+        (cross != 0).any(axis=1)
+    return np.where(inside, 0., distance.min(axis=1))
@@ -9,7 +9,7 @@ from weakref import WeakKeyDictionary
 
 from ...gloo import Program
 from ...gloo.preprocessor import preprocess
-from ...util import logger
+from ...util import logger, frame_timing
 from ...util.event import EventEmitter
 from .function import MainFunction
 from .variable import Variable
@@ -104,7 +104,9 @@ class ModularProgram(Program):
         """ Reset shader source if necesssary.
         """
         if self._need_build:
-            self._build()
+            frame_timing.count('shader_builds')
+            with frame_timing.span('build', 'shader'):
+                self._build()
             
             # after recompile, we need to upload all variables again
             # (some variables may have changed name)
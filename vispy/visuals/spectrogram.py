@@ -4,6 +4,8 @@
 # Distributed under the (new) BSD License. See LICENSE.txt for more info.
 # -----------------------------------------------------------------------------
 
+import warnings
+
 import numpy as np
 
 from .image import ImageVisual
@@ -38,11 +40,22 @@ class SpectrogramVisual(ImageVisual):
     clim : str | tuple
         Colormap limits. Should be ``'auto'`` or a two-element tuple of
         min and max values.
+    n_columns : int | None
+        If not None, the spectrogram is streamed: it shows the last
+        ``n_columns`` steps of the signal, and only the new steps are
+        computed and uploaded when samples are added with ``append``.
+
+    Notes
+    -----
+    When streaming, the image is a ring buffer of ``n_columns`` steps on the
+    GPU, with the newest step at the right. Only the samples needed for the
+    displayed steps are kept. With ``normalize=True``, each append uploads
+    the whole image again, since the normalization depends on all steps.
     """
     def __init__(self, x=None, n_fft=256, step=None, fs=1., window='hann',
                  normalize=False, color_scale='log', cmap='cubehelix',
-                 clim='auto'):
-        self._x = np.asarray(x)
+                 clim='auto', n_columns=None):
+        self._x = None if x is None else np.asarray(x)
         self._n_fft = int(n_fft)
         self._step = step
         self._fs = float(fs)
@@ -59,8 +72,26 @@ class SpectrogramVisual(ImageVisual):
                 self._color_scale not in ('log', 'linear'):
             raise ValueError('color_scale must be "linear" or "log"')
 
-        data = self._calculate_spectrogram()
-        super(SpectrogramVisual, self).__init__(data, clim=clim, cmap=cmap)
+        self._n_columns = None if n_columns is None else int(n_columns)
+        # streaming state: the spectrogram of the last steps, stored in a
+        # ring buffer, the index of the first step of the signal stored in
+        # self._x and the total number of steps computed
+        self._ring = None
+        self._first_step = 0
+        self._n_steps = 0
+
+        if self._n_columns is None:
+            data = self._calculate_spectrogram()
+            super(SpectrogramVisual, self).__init__(data, clim=clim,
+                                                    cmap=cmap)
+        else:
+            # the data is uploaded unscaled, so that scrolling does not
+            # depend on the contrast limits
+            self._stream_all()
+            super(SpectrogramVisual, self).__init__(
+                self._streamed_image(), method='subdivide',
+                clim=self._streamed_clim() if self._clim_auto else clim,
+                cmap=cmap, texture_format='r32f')
 
     @property
     def freqs(self):
@@ -77,6 +108,47 @@ class SpectrogramVisual(ImageVisual):
         self._x = np.asarray(x)
         self._update_image()
 
+    @property
+    def n_columns(self):
+        """The number of steps shown when streaming, or None"""
+        return self._n_columns
+
+    def append(self, x):
+        """Append samples to the signal
+
+        Only the spectrogram of the new steps is computed. When streaming
+        (see ``n_columns``), only the new steps are uploaded to the GPU.
+
+        Parameters
+        ----------
+        x : array-like
+            1D samples to append.
+        """
+        x = np.asarray(x)
+        if x.ndim != 1:
+            raise ValueError('x must be 1D')
+        if self._x is None or len(self._x) < self._n_fft:
+            # the first step was zero-padded, compute all steps
+            self.x = x if self._x is None else np.concatenate((self._x, x))
+            return
+        n_steps = self._count_steps(len(self._x))
+        self._x = np.concatenate((self._x, x))
+        if self._n_columns is not None:
+            self._stream()
+        elif self._normalize:
+            self._update_image()
+        else:
+            new_steps = self._count_steps(len(self._x))
+            if new_steps == n_steps:
+                return
+            new = self._compute(self._x[n_steps * self.step:
+                                        (new_steps - 1) * self.step +
+                                        self._n_fft])
+            self.set_data(np.concatenate((self._data, new), axis=1))
+            self.update()
+            if self._clim_auto:
+                self.clim = 'auto'
+
     @property
     def n_fft(self):
         """The length of fft window"""
@@ -143,24 +215,127 @@ class SpectrogramVisual(ImageVisual):
         self._normalize = normalize
         self._update_image()
 
+    def _compute(self, x):
+        """The spectrogram of a signal, with the color scale applied"""
+        idx = np.isnan(x)
+        if idx.any():
+            x = np.where(idx, np.nanmean(x), x)
+        data = stft(x, self._n_fft, self._step, self._fs, self._window)
+        data = np.abs(data)
+        return 20 * np.log10(data) if self._color_scale == 'log' else data
+
+    def _count_steps(self, n_samples):
+        """The number of complete steps in a number of samples"""
+        return max((n_samples - self._n_fft) // self.step + 1, 0)
+
     def _calculate_spectrogram(self):
         if self._x is not None:
-            x = self._x
-            nan_mean = np.nanmean(x)
-            idx = np.isnan(x)
-            x[idx] = nan_mean
-            data = stft(x, self._n_fft, self._step, self._fs, self._window)
-            data = np.abs(data)
-            data = 20 * np.log10(data) if self._color_scale == 'log' else data
+            data = self._compute(self._x)
             if self._normalize:
-                for i in range(data.shape[0]):
-                    data[i, :] -= np.mean(data[i, :])
-                    data[i, :] /= np.std(data[i, :])
+                data = data - data.mean(axis=1, keepdims=True)
+                data /= data.std(axis=1, keepdims=True)
             return data
         else:
             return None
 
+    def _stream_all(self):
+        """Compute the streamed spectrogram of the stored signal"""
+        self._ring = np.full((self._n_fft // 2 + 1, self._n_columns), np.nan,
+                             np.float32)
+        self._first_step = self._n_steps = 0
+        if self._x is not None:
+            self._stream(upload=False)
+
+    def _stream(self, upload=True):
+        """Compute the new steps of the signal and scroll the image"""
+        x, step, n_cols = self._x, self.step, self._n_columns
+        n_steps = self._count_steps(len(x))
+        start = max(self._n_steps - self._first_step, n_steps - n_cols)
+        if n_steps > start:
+            data = self._compute(x[start * step:(n_steps - 1) * step +
+                                   self._n_fft])
+            cols = np.arange(start, n_steps) + self._first_step
+            self._ring[:, cols % n_cols] = data
+            self._n_steps = self._first_step + n_steps
+            if upload:
+                self._upload_columns(cols[0] % n_cols, len(cols))
+        # drop the samples of the steps that scrolled out of the image
+        n_drop = max(n_steps - n_cols, 0)
+        if n_drop:
+            self._x = x[n_drop * step:]
+            self._first_step += n_drop
+
+    def _upload_columns(self, start, count):
+        """Upload columns of the ring buffer to the texture"""
+        self._need_vertex_update = True
+        if self._clim_auto:
+            self.clim = self._streamed_clim()
+        if self._normalize:
+            self.set_data(self._streamed_image())
+        elif not self._need_texture_upload:
+            n_cols = self._n_columns
+            for start, stop in ((start, min(start + count, n_cols)),
+                                (0, start + count - n_cols)):
+                if stop > start:
+                    data = self._ring[:, start:stop, np.newaxis]
+                    self._texture.set_data(np.ascontiguousarray(data),
+                                           offset=(0, start))
+        self.update()
+
+    def _streamed_image(self):
+        if not self._normalize:
+            return self._ring
+        with warnings.catch_warnings():
+            # steps that are not computed yet are NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            data = self._ring - np.nanmean(self._ring, axis=1, keepdims=True)
+            data /= np.nanstd(data, axis=1, keepdims=True)
+        return data
+
+    def _streamed_clim(self):
+        data = self._streamed_image()
+        data = data[np.isfinite(data)]
+        return (data.min(), data.max()) if data.size else (0., 1.)
+
+    def _build_vertex_data(self):
+        if self._n_columns is None:
+            return super(SpectrogramVisual, self)._build_vertex_data()
+        # the steps shown, from the oldest at the left of the image to the
+        # newest at the right, are in one or two ranges of columns of the
+        # ring buffer
+        n_cols = self._n_columns
+        n_shown = min(self._n_steps, n_cols)
+        first = (self._n_steps - n_shown) % n_cols
+        split = min(n_shown, n_cols - first)
+        quads = [(n_cols - n_shown, first, split),
+                 (n_cols - n_shown + split, 0, n_shown - split)]
+        unit = np.array([[0, 0], [1, 0], [1, 1], [0, 0], [1, 1], [0, 1]],
+                        np.float32)
+        position, texcoord = [], []
+        for x, col, width in quads:
+            if width > 0:
+                position.append(unit * (width, self._ring.shape[0]) + (x, 0))
+                texcoord.append((unit * (width, 1) + (col, 0)) / (n_cols, 1))
+        position = np.concatenate(position or [np.zeros((0, 2))])
+        texcoord = np.concatenate(texcoord or [np.zeros((0, 2))])
+        self._subdiv_position.set_data(position.astype(np.float32))
+        self._subdiv_texcoord.set_data(texcoord.astype(np.float32))
+        self._need_vertex_update = False
+
+    def _prepare_draw(self, view):
+        if self._n_columns is not None and self._n_steps == 0:
+            return False
+        return super(SpectrogramVisual, self)._prepare_draw(view)
+
     def _update_image(self):
+        if self._n_columns is not None:
+            self._stream_all()
+            self.set_data(self._streamed_image())
+            self._need_vertex_update = True
+            self.update()
+            if self._clim_auto:
+                self.clim = self._streamed_clim()
+            return
         data = self._calculate_spectrogram()
         self.set_data(data)
         self.update()
@@ -8,10 +8,15 @@
 Tests for AxisVisual
 """
 
+from unittest import mock
+
+import numpy as np
 from numpy.testing import assert_allclose
 
 from vispy import scene
 from vispy.scene import visuals
+from vispy.visuals import axis as axis_module
+from vispy.visuals.text import text as text_module
 from vispy.testing import (requires_application, TestingCanvas,
                            run_tests_if_main)
 
@@ -32,6 +37,46 @@ def test_axis_zero_domain():
         c.draw_visual(axis)
 
 
+@requires_application()
+def test_axis_tick_cache():
+    """Test that panning reuses the tick spacing and the label layouts"""
+    with TestingCanvas(size=(400, 100)) as c:
+        axis = visuals.Axis(pos=[[20, 50], [380, 50]], domain=(0., 10.),
+                            parent=c.scene)
+        c.render()
+        labels = list(axis._text.text)
+        step = float(labels[1]) - float(labels[0])
+        n_inches = 360. / axis.transforms.dpi
+
+        talbot = mock.patch.object(axis_module, '_get_ticks_talbot',
+                                   wraps=axis_module._get_ticks_talbot)
+        layout = mock.patch.object(text_module, '_text_to_vbo',
+                                   wraps=text_module._text_to_vbo)
+        with talbot as get_ticks, layout as text_to_vbo:
+            # panning reuses the layout of the labels
+            axis.domain = (step / 2., 10. + step / 2.)
+            c.render()
+            assert axis._text.text == labels[1:]
+            assert text_to_vbo.call_count == 0
+            # panning by a tick only lays out the new label
+            axis.domain = (step, 10. + step)
+            c.render()
+            assert axis._text.text[:-1] == labels[1:]
+            assert text_to_vbo.call_count == 1
+            assert text_to_vbo.call_args[0][0] == [axis._text.text[-1]]
+            assert get_ticks.call_count == 0
+
+            # zooming computes the spacing again
+            axis.domain = (0., 20.)
+            c.render()
+            assert get_ticks.call_count == 1
+        # the ticks are multiples of the step, that cover the domain
+        major = axis.ticker._get_major_ticks(0.25, 10.25, n_inches)
+        assert_allclose(np.diff(major), step)
+        assert major[0] < 0.25 and major[-1] > 10.25
+        assert_allclose(major / step, np.round(major / step), atol=1e-9)
+
+
 @requires_application()
 def test_rotation_angle():
 
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+
+from vispy import scene
+from vispy.scene.visuals import BrickedVolume, Volume
+from vispy.testing import (TestingCanvas, requires_application,
+                           run_tests_if_main, requires_pyopengl)
+
+
+def _blob(shape):
+    z, y, x = np.indices(shape)
+    center = np.array(shape) / 2.
+    dist2 = (x - center[2]) ** 2 + (y - center[1]) ** 2 + \
+        (z - center[0]) ** 2
+    return np.exp(-dist2 / 100.).astype(np.float32)
+
+
+@requires_pyopengl()
+@requires_application()
+def test_bricked_volume():
+    """Test that a bricked volume looks like a volume"""
+    vol = _blob((20, 25, 30))
+    with TestingCanvas(size=(80, 60)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.TurntableCamera(elevation=30, azimuth=40)
+        volume = Volume(vol, clim=(0, 1), parent=view.scene)
+        bricked = BrickedVolume(vol, clim=(0, 1), brick_size=8,
+                                max_bricks=100, parent=view.scene)
+        assert bricked.n_levels == 3
+        assert bricked.clim == (0, 1)
+        view.camera.set_range()
+        for method in ('mip', 'translucent', 'additive'):
+            volume.method = bricked.method = method
+            volume.visible, bricked.visible = True, False
+            expected = c.render()
+            volume.visible, bricked.visible = False, True
+            rendered = c.render()
+            assert np.abs(rendered.astype(int) - expected).max() <= 16
+            # the finest level, in 3 x 4 x 3 bricks
+            assert len(bricked._draw_list) == 36
+            assert set(key[0] for key in bricked._bricks) == {0}
+
+
+@requires_pyopengl()
+@requires_application()
+def test_bricked_volume_levels_and_eviction():
+    """Test pyramid level selection and LRU eviction of bricks"""
+    vol = _blob((32, 32, 32))
+    pyramid = [vol, vol[::2, ::2, ::2], vol[::4, ::4, ::4]]
+    with TestingCanvas(size=(64, 64)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.TurntableCamera(elevation=0, azimuth=0, fov=0)
+        bricked = BrickedVolume(pyramid, brick_size=8, max_bricks=10,
+                                parent=view.scene)
+        assert bricked.n_levels == 3
+        view.camera.set_range()
+
+        # the 4 x 4 x 4 bricks of the finest level do not fit, the 2 x 2 x 2
+        # bricks of the next level do
+        c.render()
+        assert set(bricked._bricks) == set(
+            (1, bz, by, bx) for bz in range(2) for by in range(2)
+            for bx in range(2))
+
+        # zoomed out: the coarsest level
+        view.camera.scale_factor *= 8
+        c.render()
+        assert [key for key, _ in bricked._draw_list] == [(2, 0, 0, 0)]
+        assert len(bricked._bricks) == 9
+
+        # zoomed in: only the bricks in the view are drawn, and the least
+        # recently used bricks are evicted
+        view.camera.scale_factor /= 128
+        view.camera.center = (12.5, 12.5, 12.5)
+        c.render()
+        assert [key for key, _ in bricked._draw_list] == [
+            (0, 1, bz, 1) for bz in range(4)][::-1]
+        assert len(bricked._bricks) == 10
+        assert [key[0] for key in bricked._bricks] == [1] * 5 + [2] + [0] * 4
+
+        # a wider clim uploads the bricks again
+        bricked.clim = (0, 2)
+        assert len(bricked._bricks) == 0
+        c.render()
+        assert len(bricked._bricks) == len(bricked._draw_list)
+
+
+@requires_pyopengl()
+@requires_application()
+def test_bricked_volume_max_uploads():
+    """Test progressive brick uploads with coarse fallbacks"""
+    vol = _blob((32, 32, 32))
+    with TestingCanvas(size=(64, 64)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.TurntableCamera(elevation=30, azimuth=40)
+        bricked = BrickedVolume(vol, brick_size=8, max_bricks=100,
+                                max_uploads=4, parent=view.scene)
+        view.camera.set_range()
+        # the coarser parents are uploaded first and drawn instead of the
+        # missing bricks
+        c.render()
+        assert [key[0] for key in bricked._bricks] == [1] * 4
+        assert len(bricked._draw_list) == 4
+        c.render()
+        assert [key[0] for key in bricked._bricks] == [1] * 8
+        assert len(bricked._draw_list) == 8
+        for _ in range(16):
+            c.render()
+        assert len(bricked._bricks) == 8 + 64
+        assert set(key[0] for key, _ in bricked._draw_list) == {0}
+        assert len(bricked._draw_list) == 64
+
+        # the draws go on without other updates until all bricks are uploaded
+        bricked.parent = None
+        bricked = BrickedVolume(vol, brick_size=8, max_bricks=100,
+                                max_uploads=4, parent=view.scene)
+        c.update()
+        for _ in range(40):
+            c.app.process_events()
+        assert len(bricked._bricks) == 8 + 64
+        assert len(bricked._draw_list) == 64
+
+
+run_tests_if_main()
@@ -1,9 +1,15 @@
 # *Very* basic collections tests
 
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from vispy import gloo
 from vispy.visuals.collections import (PathCollection, PointCollection,
                                        PolygonCollection, SegmentCollection,
                                        TriangleCollection)
-from vispy.testing import requires_application, TestingCanvas
+from vispy.visuals.collections.array_list import ArrayList
+from vispy.testing import (requires_application, TestingCanvas,
+                           run_tests_if_main)
 
 
 @requires_application()
@@ -14,3 +20,87 @@ def test_init():
         for coll in (PathCollection, PointCollection, PolygonCollection,
                      SegmentCollection, TriangleCollection):
             coll()
+
+
+def test_array_list_dirty():
+    """Test the changed range and the compaction of array lists
+    """
+    L = ArrayList(np.arange(10), itemsize=np.array([2, 3, 1, 4]))
+    assert L.dirty == (0, 10)
+    L.reset_dirty()
+    L[2] = 10
+    assert L.dirty == (5, 6)
+    L.append(np.arange(3))
+    assert L.dirty == (5, 13)
+    L.reset_dirty()
+    del L[1]
+    assert L.dirty[0] == 2
+    assert [list(item) for item in L] == [[0, 1], [10], [6, 7, 8, 9],
+                                          [0, 1, 2]]
+    L.reset_dirty()
+    removed = L.compact([True, False, True, True])
+    assert_array_equal(removed, [0, 0, 1, 1, 1, 1, 1, 1, 1, 1])
+    assert L.dirty[0] == 2
+    assert [list(item) for item in L] == [[0, 1], [6, 7, 8, 9], [0, 1, 2]]
+    assert_array_equal(L.itemsize, [2, 4, 3])
+
+
+@requires_application()
+def test_collection_update():
+    """Test the partial updates and lazy deletions of collections
+    """
+    np.random.seed(0)
+    P = np.random.uniform(-0.9, 0.9, (40, 3)).astype(np.float32)
+    P[:, 2] = 0
+    colors = np.random.uniform(size=(10, 4))
+    colors[:, 3] = 1
+    colors = colors.astype(np.float32)
+
+    def render(paths):
+        gloo.clear('black')
+        paths.draw()
+        return gloo.read_pixels(alpha=False)
+
+    with TestingCanvas(size=(50, 50)):
+        gloo.set_viewport(0, 0, 50, 50)
+        paths = PathCollection(mode="agg", color="shared")
+        paths['viewport'] = 0, 0, 50, 50
+        for i in range(4):
+            paths.append(P[4 * i:4 * i + 4], color=colors[i], itemsize=4)
+        render(paths)
+        vbuffer = paths._vertices_buffer
+        ibuffer = paths._indices_buffer
+
+        # appending within the capacity uploads the new items only
+        paths.append(P[16:20], color=colors[4], itemsize=4)
+        vdirty = paths._vertices_list.dirty
+        assert vdirty[0] == paths._vertices_list._items[4][0]
+        render(paths)
+        assert paths._vertices_buffer is vbuffer
+        assert paths._indices_buffer is ibuffer
+        assert paths._vertices_list.dirty is None
+
+        # items are removed at the next update
+        del paths[1]
+        del paths[1:3]
+        assert len(paths) == 2
+        assert len(paths._vertices_list) == 5
+        assert_array_equal(paths[1]['color'][0], colors[4])
+        assert len(paths._vertices_list) == 2
+        rendered = render(paths)
+        assert rendered.any()
+
+        ref = PathCollection(mode="agg", color="shared")
+        ref['viewport'] = 0, 0, 50, 50
+        for i in (0, 4):
+            ref.append(P[4 * i:4 * i + 4], color=colors[i], itemsize=4)
+        assert_array_equal(render(ref), rendered)
+
+        # changing an item uploads its range
+        paths[1]['color'] = colors[5]
+        ref[1]['color'] = colors[5]
+        assert paths._uniforms_list.dirty == (1, 2)
+        assert_array_equal(render(ref), render(paths))
+
+
+run_tests_if_main()
@@ -96,6 +96,65 @@ def test_image_vertex_updates():
             build_vertex_mock.assert_called_once()
 
 
+@requires_application()
+def test_image_raw_texture():
+    """Test image visual with clims applied on the GPU to raw data."""
+    size = (40, 40)
+    with TestingCanvas(size=size, bgcolor="w") as c:
+        np.random.seed(0)
+        data = np.random.rand(*size)
+        for dtype, scale in ((np.float32, 1), (np.uint8, 255),
+                             (np.uint16, 65535), (np.int16, 1000)):
+            typed = (data * scale).astype(dtype)
+            image = Image(typed, cmap='grays', texture_format='auto',
+                          parent=c.scene)
+            rendered = c.render()
+            shape_ratio = rendered.shape[0] // data.shape[0]
+            rendered1 = downsample(rendered, shape_ratio, axis=(0, 1))
+            clim = typed.min(), typed.max()
+            assert np.allclose(image.clim, clim)
+            scaled = (typed - clim[0]) / float(clim[1] - clim[0])
+            assert np.allclose(_make_rgba(scaled), rendered1, atol=1)
+
+            # changing clim does not upload the data again
+            new_clim = (0.3 * scale, 1.2 * scale)
+            with mock.patch.object(image._texture, 'set_data') as set_data:
+                image.clim = new_clim
+                rendered2 = downsample(c.render(), shape_ratio, axis=(0, 1))
+                set_data.assert_not_called()
+            scaled = np.clip((typed - new_clim[0]) / np.diff(new_clim)[0],
+                             0, 1)
+            assert np.allclose(_make_rgba(scaled), rendered2, atol=1)
+            image.parent = None
+
+        # constant data gives a zero-width clim, drawn with the lowest color
+        for dtype, texture_format in ((np.uint16, 'r16'),
+                                      (np.float32, 'r32f')):
+            image = Image(np.full(size, 3, dtype), cmap='grays',
+                          texture_format=texture_format, parent=c.scene)
+            rendered = downsample(c.render(), shape_ratio, axis=(0, 1))
+            assert np.allclose(image.clim, (3, 3))
+            assert np.allclose(_make_rgba(np.zeros(size)), rendered, atol=1)
+            image.parent = None
+
+
+@requires_application()
+def test_image_lut_sharing():
+    """Test that images with the same colormap share their LUT texture"""
+    data = np.random.RandomState(0).rand(10, 10)
+    with TestingCanvas(size=(40, 40)) as c:
+        images = [Image(data, cmap=cmap, parent=c.scene)
+                  for cmap in ('viridis', 'viridis', 'autumn')]
+        c.render()
+        luts = [image.view_program['texture2D_LUT'] for image in images]
+        assert luts[0] is luts[1]
+        assert luts[2] is not luts[0]
+        images[2].cmap = 'viridis'
+        images[2].clim = 0.2, 0.8
+        c.render()
+        assert images[2].view_program['texture2D_LUT'] is luts[0]
+
+
 def _make_rgba(array):
     if array.ndim == 2:
         out = np.stack([array] * 4, axis=2)
@@ -3,7 +3,8 @@
 import numpy as np
 from vispy import scene
 
-from vispy.testing import run_tests_if_main, requires_pyopengl
+from vispy.testing import (TestingCanvas, requires_application,
+                           run_tests_if_main, requires_pyopengl)
 
 
 @requires_pyopengl()
@@ -19,4 +20,28 @@ def test_isosurface():
     iso.color = (1.0, 0.8, 0.9, 1.0)
 
 
+@requires_pyopengl()
+@requires_application()
+def test_isosurface_region():
+    """Test updating a region of the data of an isosurface"""
+    x, y, z = np.indices((20, 20, 20))
+    vol = np.sqrt((x - 10.) ** 2 + (y - 10.) ** 2 + (z - 10.) ** 2)
+    vol = vol.astype(np.float32)
+    with TestingCanvas(size=(60, 60)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.TurntableCamera(elevation=30, azimuth=40)
+        iso = scene.visuals.Isosurface(vol, level=6, parent=view.scene)
+        ref = scene.visuals.Isosurface(level=6, parent=view.scene)
+        view.camera.set_range()
+        c.render()
+        vol[2:8, 2:8, 10:18] -= 3
+        iso.set_data(vol, region=(slice(2, 8), slice(2, 8), slice(10, 18)))
+        ref.set_data(vol.copy())
+        iso.visible, ref.visible = True, False
+        rendered = c.render()
+        iso.visible, ref.visible = False, True
+        assert np.array_equal(c.render(), rendered)
+        assert len(iso._faces_cache) == len(ref._faces_cache)
+
+
 run_tests_if_main()
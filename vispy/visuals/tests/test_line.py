@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from vispy.scene.visuals import Line, LinePlot
+from vispy.visuals.line.line import _minmax_bins
+from vispy.testing import (TestingCanvas, requires_application,
+                           run_tests_if_main, requires_pyopengl,
+                           assert_raises)
+
+
+def test_minmax_bins():
+    """Test the min/max pyramid of decimated lines"""
+    y = np.random.RandomState(0).normal(size=1003)
+    imin, imax = _minmax_bins(y, 8)
+    assert len(imin) == len(imax) == 126
+    for i in range(126):
+        assert imin[i] == 8 * i + y[8 * i:8 * i + 8].argmin()
+        assert imax[i] == 8 * i + y[8 * i:8 * i + 8].argmax()
+    # merging levels gives the same result as binning the samples
+    imin2, imax2 = _minmax_bins(y, 2, imin, imax)
+    expected = _minmax_bins(y, 16)
+    assert_array_equal(imin2, expected[0])
+    assert_array_equal(imax2, expected[1])
+
+
+@requires_pyopengl()
+@requires_application()
+def test_line_decimate():
+    """Test min/max decimation of long lines"""
+    np.random.seed(0)
+    n = 200000
+    y = np.cumsum(np.random.normal(size=n)).astype(np.float32)
+    pos = np.c_[np.arange(n, dtype=np.float32), y]
+    with TestingCanvas(size=(200, 100)) as c:
+        view = c.central_widget.add_view()
+        view.camera = 'panzoom'
+        line = Line(pos, color='w', parent=view.scene)
+        view.camera.set_range()
+        expected = c.render()
+        line.decimate = True
+        rendered = c.render()
+        # bins of 1024 samples, for about 1000 samples per pixel column
+        assert line._lod_bins == (10, 0, 196)
+        assert len(line._lod_index) < 4 * 196
+        diff = np.abs(rendered.astype(int) - expected).max(axis=-1)
+        assert (diff > 0).mean() < 0.02
+
+        # panning within the decimated range keeps the data
+        version = line._data_version
+        view.camera.rect = (1000, y.min(), 50000, y.max() - y.min())
+        c.render()
+        assert line._lod_bins[0] == 7
+        version = line._data_version
+        view.camera.rect = (2000, y.min(), 50000, y.max() - y.min())
+        c.render()
+        assert line._data_version == version
+
+        # zoomed in, only the samples around the view are drawn
+        view.camera.rect = (100000, y.min(), 50, y.max() - y.min())
+        c.render()
+        level, start, stop = line._lod_bins
+        assert level == 0
+        assert start < 100000 and 100050 < stop < start + 200
+        assert line._lod_index == slice(start, stop)
+
+        # new data or unsorted x coordinates are drawn in full
+        line.set_data(pos=pos[::-1])
+        c.render()
+        assert line._lod_index is None
+        line.decimate = False
+        line.set_data(pos=pos)
+        c.render()
+        assert line._lod_index is None
+
+
+@requires_pyopengl()
+@requires_application()
+def test_line_append():
+    """Test appending to lines, and ring buffer lines"""
+    np.random.seed(0)
+    y = np.cumsum(np.random.normal(size=3000)).astype(np.float32)
+    pos = np.c_[np.arange(3000, dtype=np.float32), y]
+    colors = np.random.uniform(size=(3000, 4)).astype(np.float32)
+    colors[:, 3] = 1
+    with TestingCanvas(size=(100, 50)) as c:
+        view = c.central_widget.add_view()
+        view.camera = 'panzoom'
+        view.camera.rect = (0, y.min(), 3000, y.max() - y.min())
+        for max_length in (None, 1000):
+            line = Line(pos[:100], color=colors[:100], max_length=max_length,
+                        parent=view.scene)
+            ref = Line(parent=view.scene)
+            c.render()
+            for start in range(100, 3000, 700):
+                stop = min(start + 700, 3000)
+                state = line._store_state()
+                line.append(pos[start:stop], color=colors[start:stop])
+                # only the new vertices are uploaded, unless the storage of
+                # the line grew
+                updates = line._store_updates(state)
+                if max_length is not None and start > 100:
+                    assert sum(b - a for a, b in updates) == 2 * (stop - start)
+                elif updates is not None:
+                    assert updates == [(start, stop)]
+                first = 0 if max_length is None else max(stop - max_length, 0)
+                assert_array_equal(line.pos, pos[first:stop])
+                line.visible, ref.visible = True, False
+                rendered = c.render()
+
+                ref.set_data(pos=pos[first:stop], color=colors[first:stop])
+                line.visible, ref.visible = False, True
+                assert_array_equal(c.render(), rendered)
+                assert line.bounds(0) == ref.bounds(0)
+                assert line.bounds(1) == ref.bounds(1)
+            line.parent = ref.parent = None
+
+        line = Line(pos[:10], connect='segments', parent=view.scene)
+        assert_raises(ValueError, line.append, pos[10:20])
+        line = Line(pos[:10], parent=view.scene)
+        assert_raises(ValueError, line.append, pos[10:20], color='red')
+        assert_raises(ValueError, line.append, pos[10:20, :1])
+
+        # y values are appended after the last x coordinate, and the hidden
+        # markers are only set when shown
+        plot = LinePlot(y[:10], parent=view.scene)
+        plot.append(y[10:20])
+        assert_array_equal(plot._line.pos[:, 0], np.arange(20))
+        assert len(plot._markers._data) == 10
+        plot.set_data(symbol='o')
+        assert len(plot._markers._data) == 20
+        plot.append((np.arange(20, 25), y[20:25]))
+        assert len(plot._markers._data) == 25
+        c.render()
+        plot.parent = None
+
+        # lines that start without data
+        line = Line(parent=view.scene)
+        line.append(pos[:5])
+        assert_array_equal(line.pos, pos[:5])
+        c.render()
+        line.parent = None
+        plot = LinePlot(max_length=20, parent=view.scene)
+        for start in range(0, 50, 10):
+            plot.append(y[start:start + 10])
+            c.render()
+        assert_array_equal(plot._line.pos, pos[30:50])
+
+
+run_tests_if_main()
@@ -2,7 +2,7 @@
 import numpy as np
 from vispy.scene.visuals import Markers
 from vispy.testing import (requires_application, TestingCanvas,
-                           run_tests_if_main)
+                           run_tests_if_main, assert_raises)
 from vispy.testing.image_tester import assert_image_approved
 
 
@@ -26,4 +26,56 @@ def test_markers():
         assert_image_approved(c.render(), "visuals/markers.png")
 
 
+def _assert_close(rendered, expected):
+    # the compact layout rounds colors to 8 bits
+    assert np.abs(rendered.astype(int) - expected).max() <= 1
+
+
+@requires_application()
+def test_markers_compact_and_subdata():
+    """Test the compact marker layout and partial updates"""
+    np.random.seed(57983)
+    data = np.random.normal(size=(30, 2), loc=50, scale=10)
+    colors = np.random.uniform(size=(30, 4))
+    colors[:, 3] = 1
+    sizes = np.random.uniform(5, 15, 30)
+
+    with TestingCanvas(size=(100, 100)) as c:
+        marker = Markers(parent=c.scene)
+        marker.set_data(data, face_color=colors, size=sizes)
+        expected = c.render()
+        marker.set_data(data, face_color=colors, size=sizes, compact=True)
+        _assert_close(c.render(), expected)
+        vbos = marker._vbos
+        assert set(vbos) == set(['a_position', 'a_bg_color', 'a_size'])
+        assert vbos['a_bg_color'].nbytes == 30 * 4
+        # a single edge color and width are set once for all markers
+        assert marker._data['a_fg_color'].shape == (4,)
+        assert marker._data['a_edgewidth'].shape == ()
+
+        for compact in (False, True):
+            marker.set_data(data, compact=compact)
+            marker.set_subdata(10, pos=data[10:20] + 5,
+                               face_color=colors[10:20])
+            marker.set_subdata(5, size=sizes[5:25])
+            marker.set_subdata(25, edge_color='red')
+            rendered = c.render()
+            new_data = data.copy()
+            new_data[10:20] += 5
+            new_colors = np.ones((30, 4))
+            new_colors[10:20] = colors[10:20]
+            new_sizes = np.full(30, 10.)
+            new_sizes[5:25] = sizes[5:25]
+            edge_colors = np.zeros((30, 4))
+            edge_colors[:, 3] = 1
+            edge_colors[25:, 0] = 1
+            marker.set_data(new_data, face_color=new_colors, size=new_sizes,
+                            edge_color=edge_colors)
+            _assert_close(rendered, c.render())
+
+        assert_raises(ValueError, marker.set_subdata, 25, pos=data[:10])
+        assert_raises(ValueError, marker.set_subdata, 0, pos=data[:2],
+                      size=sizes[:3])
+
+
 run_tests_if_main()
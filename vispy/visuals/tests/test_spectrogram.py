@@ -5,6 +5,8 @@ from vispy.scene.visuals import Spectrogram
 from vispy.testing import (requires_application, TestingCanvas,
                            run_tests_if_main, raises)
 from vispy.testing.image_tester import assert_image_approved
+from vispy.util.fourier import stft
+from vispy.visuals.transforms import STTransform
 
 
 @requires_application()
@@ -39,4 +41,54 @@ def test_spectrogram():
         with raises(ValueError):
             spec.color_scale = 'line_log'
 
+
+def test_spectrogram_append():
+    """Test appending samples to a spectrogram"""
+    np.random.seed(0)
+    x = np.random.normal(size=2000)
+    full = Spectrogram(x, n_fft=64, step=24)
+    spec = Spectrogram(x[:10], n_fft=64, step=24)
+    for chunk in np.array_split(x[10:], 7):
+        spec.append(chunk)
+    assert np.allclose(spec._data, full._data)
+    assert np.array_equal(spec.x, x)
+
+
+@requires_application()
+def test_spectrogram_streaming():
+    """Test streaming a spectrogram"""
+    n_fft, step, n_columns = 64, 32, 40
+    np.random.seed(0)
+    x = np.random.normal(size=n_fft * 60)
+    with TestingCanvas(size=(n_columns, n_fft // 2 + 1)) as c:
+        spec = Spectrogram(n_fft=n_fft, step=step, n_columns=n_columns,
+                           cmap='grays', parent=c.scene)
+        assert spec.n_columns == n_columns
+        c.render()
+        for chunk in np.array_split(x, 37):
+            spec.append(chunk)
+            c.render()
+        expected = 20 * np.log10(np.abs(stft(x, n_fft, step)))
+        n_steps = expected.shape[1]
+        cols = np.arange(n_steps - n_columns, n_steps) % n_columns
+        assert np.allclose(spec._ring[:, cols], expected[:, -n_columns:],
+                           atol=1e-4)
+        # only the samples of the last steps are kept
+        assert len(spec.x) < (n_columns + 2) * step
+        rendered = c.render()
+
+        # the newest steps are at the right of the image
+        spec.parent = None
+        full = Spectrogram(x, n_fft=n_fft, step=step, cmap='grays',
+                           clim=spec.clim, parent=c.scene)
+        full.transform = STTransform(translate=(n_columns - n_steps, 0))
+        assert np.abs(c.render().astype(int) - rendered).max() <= 1
+
+        # property changes recompute the shown steps
+        spec.n_fft = 32
+        assert spec._ring.shape == (17, n_columns)
+        assert spec._n_steps - spec._first_step == \
+            (len(spec.x) - 32) // step + 1
+
+
 run_tests_if_main()
@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 
+from os import path as op
+from unittest import mock
+
 import numpy as np
 from numpy.testing import assert_allclose
 
 from vispy.scene.visuals import Text
+from vispy.util import _TempDir
+from vispy.visuals.text import text as text_module
+from vispy.visuals.text.text import FontManager, _text_to_vbo
 from vispy.testing import (requires_application, TestingCanvas,
                            run_tests_if_main)
 from vispy.testing.image_tester import assert_image_approved
@@ -82,4 +88,108 @@ def test_face_bold_italic():
         assert font1 is font4
 
 
+@requires_application()
+def test_text_layout():
+    """Test the vectorized text layout"""
+    with TestingCanvas() as c:
+        text = Text('x', parent=c.scene)
+        font = text._font
+        size = font._lowres_size
+
+        def layout(t, anchor_x='left', anchor_y='baseline'):
+            v = _text_to_vbo(t, font, anchor_x, anchor_y, size)
+            return v['a_position'].reshape(-1, 4, 2)
+
+        # strings are laid out independently
+        single = [layout(t) for t in ('foo', 'bar')]
+        both = layout(['foo', 'bar'])
+        assert both.shape == (6, 4, 2)
+        assert_allclose(both, np.concatenate(single))
+        assert layout([]).shape == (0, 4, 2)
+
+        # empty strings take no vertices, also at the end
+        for strings in (['foo', ''], ['', 'foo', '', 'bar', ''],
+                        ['a\n', '']):
+            quads = layout(strings)
+            assert_allclose(quads, layout([t for t in strings if t]))
+        text.text = ['a', '']
+        text.text = ['a', 'b', '']
+        c.draw_visual(text)
+
+        # characters advance to the right, line breaks go down and take
+        # no vertices
+        quads = layout('ab\ncd')
+        assert (np.diff(quads[:2, 0, 0]) > 0).all()
+        assert abs(quads[2, 0, 0] - quads[0, 0, 0]) < 0.1
+        assert quads[2, 0, 1] < quads[0, 0, 1]
+        assert_allclose(quads[4:], 0)
+
+        # a tab is four spaces wide
+        tab = layout('\ta')[1]
+        spaces = layout('    a')[4]
+        assert_allclose(tab, spaces)
+
+        # anchors shift each line by (a fraction of) its width
+        left = layout('a\nbcd')
+        right = layout('a\nbcd', 'right')
+        center = layout('a\nbcd', 'center')
+        assert_allclose(left[..., 1], right[..., 1])
+        assert (right[:4, 0, 0] < left[:4, 0, 0]).all()
+        assert right[0, 0, 0] > right[1, 0, 0]
+        assert_allclose((left - right)[:4, :, 0] / 2,
+                        (center - right)[:4, :, 0], atol=1e-5)
+        top = layout('a\nbcd', 'left', 'top')
+        bottom = layout('a\nbcd', 'left', 'bottom')
+        assert (top[:4, :, 1] > bottom[:4, :, 1]).all()
+
+
+def test_glyph_cache():
+    """Test the persistent glyph cache"""
+    temp_dir = _TempDir()
+    chars = 'AVWa b'
+    font = FontManager(cache_dir=temp_dir,
+                       prewarm=chars).get_font('OpenSans')
+    fname = font._cache.filename
+    assert op.isfile(fname)
+    assert font._cache.chars(font._cache_params) == set(chars)
+
+    # a new font is populated from the cache without rendering glyphs
+    with mock.patch.object(text_module, '_load_glyph',
+                           side_effect=RuntimeError('glyph rendered')):
+        cached = FontManager(cache_dir=temp_dir).get_font('OpenSans')
+        for char in chars:
+            glyph, cached_glyph = font[char], cached[char]
+            for key in ('offset', 'advance', 'size', 'texcoords'):
+                assert_allclose(cached_glyph[key], glyph[key])
+            assert_allclose(cached._bitmaps[char], font._bitmaps[char])
+    n = len(chars)
+    ids, prev_ids = [a.ravel() for a in np.mgrid[:n, :n]]
+    assert_allclose(cached._get_kerning(ids, prev_ids),
+                    font._get_kerning(ids, prev_ids))
+    assert cached._get_kerning(ids, prev_ids).any()
+    # only the pairs with a kerning are stored
+    expected = [font[b]['kerning'].get(a, 0.) for a in chars for b in chars]
+    rows = np.array([[font._glyph_ids[b], font._glyph_ids[a]]
+                     for a in chars for b in chars])
+    assert_allclose(font._get_kerning(rows[:, 0], rows[:, 1]), expected,
+                    rtol=1e-6)
+    assert len(font._kerning_pairs) == np.count_nonzero(expected)
+
+    # new glyphs are added to the cache, a font whose glyphs are all
+    # cached already does not replace it
+    cached.prewarm('xyz')
+    assert font._cache.chars(font._cache_params) == set(chars + 'xyz')
+    font._save_cache()
+    assert font._cache.chars(font._cache_params) == set(chars + 'xyz')
+    font.prewarm('q')
+    assert font._cache.chars(font._cache_params) == set(chars + 'q')
+
+    # invalid caches are ignored and replaced
+    with open(fname, 'wb') as fid:
+        fid.write(b'VSDF garbage')
+    assert FontManager(cache_dir=temp_dir).get_font('OpenSans')._glyphs == {}
+    FontManager(cache_dir=temp_dir, prewarm='a').get_font('OpenSans')
+    assert font._cache.chars(font._cache_params) == set('a')
+
+
 run_tests_if_main()
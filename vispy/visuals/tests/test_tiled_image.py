@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+import numpy as np
+
+from vispy import scene
+from vispy.scene.visuals import Image, TiledImage
+from vispy.testing import (requires_application, TestingCanvas,
+                           run_tests_if_main)
+
+
+@requires_application()
+def test_tiled_image():
+    """Test that a tiled image looks like an image"""
+    np.random.seed(0)
+    for shape in ((30, 50), (30, 50, 3)):
+        data = np.random.rand(*shape).astype(np.float32)
+        with TestingCanvas(size=(50, 30)) as c:
+            image = Image(data, clim=(0, 1), cmap='grays', parent=c.scene)
+            expected = c.render()
+            image.parent = None
+            tiled = TiledImage(data, tile_size=16, clim=(0, 1), cmap='grays',
+                               parent=c.scene)
+            assert tiled.size == (50, 30)
+            assert tiled.n_levels == 3
+            rendered = c.render()
+            assert np.abs(rendered.astype(int) - expected).max() <= 1
+            # all full-resolution tiles are on the GPU
+            assert sorted(tiled._tiles) == [(0, ty, tx) for ty in range(2)
+                                            for tx in range(4)]
+
+
+@requires_application()
+def test_tiled_image_levels_and_eviction():
+    """Test pyramid level selection and LRU eviction of tiles"""
+    data = np.tile(np.arange(256, dtype=np.float32), (256, 1))
+    pyramid = [data, data[::2, ::2], data[::4, ::4]]
+    with TestingCanvas(size=(64, 64)) as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.PanZoomCamera(aspect=1)
+        tiled = TiledImage(pyramid, tile_size=32, max_tiles=5, clim=(0, 255),
+                           cmap='grays',
+                           parent=view.scene)
+        assert tiled.n_levels == 3
+
+        # zoomed out: the coarsest level fits in the budget
+        view.camera.rect = (0, 0, 256, 256)
+        c.render()
+        assert set(tiled._tiles) == set((2, ty, tx) for ty in range(2)
+                                        for tx in range(2))
+
+        # zoomed in: full resolution tiles, the least recently used tiles
+        # are evicted
+        view.camera.rect = (8, 8, 48, 48)
+        rendered = c.render()
+        assert len(tiled._tiles) == 5
+        assert set(key[0] for key in tiled._tiles) == {0, 2}
+        assert (0, 0, 0) in tiled._tiles
+        assert (2, 0, 0) not in tiled._tiles
+        # the data increases along x
+        assert (np.diff(rendered[32, 4:60, 0].astype(int)) >= 0).all()
+
+        # changing the clim does not upload tiles
+        tiled.clim = (0, 100)
+        tiles = list(tiled._tiles.items())
+        c.render()
+        assert list(tiled._tiles.items()) == tiles
+
+
+@requires_application()
+def test_tiled_image_max_uploads():
+    """Test progressive tile uploads with coarse fallbacks"""
+    data = np.random.rand(64, 64).astype(np.float32) + 0.5
+    with TestingCanvas(size=(64, 64), bgcolor='k') as c:
+        view = c.central_widget.add_view()
+        view.camera = scene.PanZoomCamera(aspect=1)
+        tiled = TiledImage(data, tile_size=16, max_uploads=2, clim=(0, 1),
+                           cmap='grays', parent=view.scene)
+        assert tiled.n_levels == 3
+        view.camera.rect = (0, 0, 256, 256)
+        c.render()
+        assert list(tiled._tiles) == [(2, 0, 0)]
+
+        # the coarse tile is drawn in place of the missing tiles
+        view.camera.rect = (0, 0, 64, 64)
+        rendered = c.render()
+        assert len(tiled._tiles) == 3
+        assert [key for key, slot in tiled._drawn][0] == (2, 0, 0)
+        assert (rendered[4:-4, 4:-4, :3] > 0).all()
+        for i in range(7):
+            c.render()
+        assert len(tiled._tiles) == 17
+        assert [key for key, slot in tiled._drawn][0] == (0, 0, 0)
+
+        # the draws go on without other updates until all tiles are uploaded
+        tiled.parent = None
+        tiled = TiledImage(data, tile_size=16, max_uploads=2, clim=(0, 1),
+                           cmap='grays', parent=view.scene)
+        c.update()
+        for i in range(20):
+            c.app.process_events()
+        assert len(tiled._tiles) == 16
+        assert set(key[0] for key, slot in tiled._drawn) == {0}
+
+
+run_tests_if_main()
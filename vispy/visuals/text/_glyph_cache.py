@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# -----------------------------------------------------------------------------
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+# -----------------------------------------------------------------------------
+"""
+Persistent on-disk cache of SDF glyphs, shared between processes.
+
+Each font (face, bold, italic and SDF method) is stored in a single file::
+
+    header : magic (4s), format version (uint32), index length (uint32)
+    index  : JSON with the font parameters, the glyph metrics and the
+             offset of each glyph bitmap in the data section
+    data   : the low resolution SDF bitmaps as uint8, starting at a
+             multiple of 16 bytes
+
+The data section is memory-mapped when the cache is loaded, so glyph
+bitmaps are only paged in when they are copied into a texture atlas.
+
+Files are never modified in place. A writer writes a complete new file
+next to the old one and atomically renames it over the old file, so
+readers always see a consistent file, whatever the number of concurrent
+writers. Every file is written by a single font object, which guarantees
+that the kerning of all pairs of glyphs in the file is known. Concurrent
+writers therefore do not merge their glyphs: the file is only replaced
+if it does not already contain all glyphs of the writer.
+"""
+
+import json
+import os
+import os.path as op
+import re
+import struct
+import tempfile
+
+import numpy as np
+
+from ...util import logger
+
+CACHE_VERSION = 1
+_MAGIC = b'VSDF'
+_HEADER = struct.Struct('<4sII')
+_ALIGN = 16
+
+
+class GlyphCache(object):
+    """Cache of the SDF glyphs of a font
+
+    Parameters
+    ----------
+    directory : str
+        Directory in which the cache files are stored. It is created
+        when the cache is first saved.
+    font : dict
+        Dict with entries "face", "bold", "italic".
+    method : str
+        The SDF method used to render the glyphs ('cpu' or 'gpu').
+    """
+
+    def __init__(self, directory, font, method):
+        name = '%s-%s-%s-%s' % (font['face'], font['bold'], font['italic'],
+                                method)
+        name = re.sub(r'[^\w\-.]', '_', name)
+        self._directory = directory
+        self._name = name
+        self.filename = op.join(directory, name + '.sdf')
+
+    def _read_index(self, fid, params):
+        """Read the header and index, or return None if invalid"""
+        header = fid.read(_HEADER.size)
+        if len(header) != _HEADER.size:
+            return None
+        magic, version, n_index = _HEADER.unpack(header)
+        if magic != _MAGIC or version != CACHE_VERSION:
+            return None
+        index = json.loads(fid.read(n_index).decode('utf-8'))
+        if index['params'] != params:
+            return None
+        start = _HEADER.size + n_index
+        index['data_start'] = start + (-start % _ALIGN)
+        return index
+
+    def chars(self, params):
+        """The characters stored in the cache
+
+        Parameters
+        ----------
+        params : dict
+            Parameters of the SDF rendering, which must match those of the
+            cached glyphs.
+
+        Returns
+        -------
+        chars : set
+            The cached characters, empty if there is no valid cache.
+        """
+        try:
+            with open(self.filename, 'rb') as fid:
+                index = self._read_index(fid, params)
+        except (OSError, ValueError, KeyError):
+            index = None
+        if index is None:
+            return set()
+        return set(g[0] for g in index['glyphs'])
+
+    def load(self, params):
+        """Load the cached glyphs
+
+        Parameters
+        ----------
+        params : dict
+            Parameters of the SDF rendering, which must match those of the
+            cached glyphs.
+
+        Returns
+        -------
+        glyphs : list of dict
+            The glyphs in the order they were stored, with the entries
+            "char", "offset", "advance", "kerning", "size" and "bitmap".
+            The bitmaps are read-only memory-mapped arrays. The list is
+            empty if there is no valid cache.
+        """
+        try:
+            with open(self.filename, 'rb') as fid:
+                index = self._read_index(fid, params)
+            if index is None or not index['glyphs']:
+                return []
+            data = np.memmap(self.filename, np.uint8, 'r',
+                             offset=index['data_start'])
+        except (OSError, ValueError, KeyError) as exp:
+            logger.debug('Could not read glyph cache %s: %s'
+                         % (self.filename, exp))
+            return []
+        kerning = index['kerning']
+        glyphs = []
+        for char, advance, offset, size, start in index['glyphs']:
+            w, h = size
+            bitmap = data[start:start + w * h].reshape(h, w)
+            glyphs.append(dict(char=char, offset=tuple(offset),
+                               advance=advance, size=(w, h), bitmap=bitmap,
+                               kerning=dict(kerning.get(char, {}))))
+        return glyphs
+
+    def save(self, glyphs, params):
+        """Store glyphs in the cache
+
+        The cache file is only replaced if it does not contain all the
+        given characters yet.
+
+        Parameters
+        ----------
+        glyphs : list of dict
+            The glyphs with the entries "char", "offset", "advance",
+            "kerning", "size" and "bitmap" (the low resolution SDF).
+            The kerning of every pair of these glyphs must be known.
+        params : dict
+            Parameters of the SDF rendering.
+
+        Returns
+        -------
+        saved : bool
+            Whether the cache file was written.
+        """
+        chars = set(g['char'] for g in glyphs)
+        if chars <= self.chars(params):
+            return False
+        entries, kerning, start = [], {}, 0
+        for glyph in glyphs:
+            w, h = glyph['size']
+            entries.append([glyph['char'], float(glyph['advance']),
+                            [float(o) for o in glyph['offset']], [w, h],
+                            start])
+            start += w * h
+            kern = dict((c, k) for c, k in glyph['kerning'].items()
+                        if k != 0 and c in chars)
+            if kern:
+                kerning[glyph['char']] = kern
+        index = json.dumps(dict(params=params, glyphs=entries,
+                                kerning=kerning)).encode('utf-8')
+        header = _HEADER.pack(_MAGIC, CACHE_VERSION, len(index))
+        pad = -(len(header) + len(index)) % _ALIGN
+        tmp = None
+        try:
+            if not op.isdir(self._directory):
+                os.makedirs(self._directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.tmp', prefix=self._name,
+                                       dir=self._directory)
+            with os.fdopen(fd, 'wb') as fid:
+                fid.write(header + index + b'\0' * pad)
+                for glyph in glyphs:
+                    bitmap = np.ascontiguousarray(glyph['bitmap'], np.uint8)
+                    fid.write(bitmap.tobytes())
+            os.replace(tmp, self.filename)
+        except OSError as exp:
+            # e.g. a read-only directory, or a file that is memory-mapped
+            # on Windows; the cache is merely not updated
+            logger.debug('Could not write glyph cache %s: %s'
+                         % (self.filename, exp))
+            if tmp is not None and op.isfile(tmp):
+                os.remove(tmp)
+            return False
+        return True
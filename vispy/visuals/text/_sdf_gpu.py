@@ -247,7 +247,7 @@ class SDFRendererGPU(object):
         for program in self.programs:
             program.bind(vertices)
 
-    def render_to_texture(self, data, texture, offset, size):
+    def render_to_texture(self, data, texture, offset, size, read=False):
         """Render a SDF to a texture at a given offset and size
 
         Parameters
@@ -260,6 +260,13 @@ class SDFRendererGPU(object):
             Offset (x, y) to render to inside the texture.
         size : tuple of int
             Size (w, h) to render inside the texture.
+        read : bool
+            If True, read the rendered SDF back from the texture.
+
+        Returns
+        -------
+        bitmap : array | None
+            The SDF as a 2D np.ubyte array of shape (h, w) if `read` is True.
         """
         assert isinstance(texture, Texture2D)
         set_state(blend=False, depth_test=False)
@@ -282,6 +289,10 @@ class SDFRendererGPU(object):
         with self.fbo_to[-1]:
             set_viewport(tuple(offset) + tuple(size))
             self.program_insert.draw('triangle_strip')
+            if read:
+                # read() returns rows top-down, texture rows are bottom-up
+                crop = tuple(offset) + tuple(size)
+                return self.fbo_to[-1].read(crop=crop)[::-1, :, 0].copy()
 
     def _render_edf(self, orig_tex):
         """Render an EDF to a texture"""
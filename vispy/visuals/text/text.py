@@ -11,11 +11,12 @@ from __future__ import division
 
 
 import numpy as np
+from collections import OrderedDict
 from copy import deepcopy
-import sys
 
 from ._sdf_gpu import SDFRendererGPU
 from ._sdf_cpu import _calc_distance_field
+from ._glyph_cache import GlyphCache
 from ...gloo import (TextureAtlas, IndexBuffer, VertexBuffer)
 from ...gloo import context
 from ...gloo.wrappers import _check_valid
@@ -43,9 +44,12 @@ class TextureFont(object):
         Dict with entries "face", "size", "bold", "italic".
     renderer : instance of SDFRenderer
         SDF renderer to use.
+    cache : instance of GlyphCache | None
+        Persistent glyph cache. Cached glyphs are copied into the texture
+        atlas on creation, and newly rendered glyphs are added to the cache.
 
     """
-    def __init__(self, font, renderer):
+    def __init__(self, font, renderer, cache=None):
         self._atlas = TextureAtlas(dtype=np.uint8)
         self._atlas.wrapping = 'clamp_to_edge'
         self._kernel, _ = load_spatial_filters()
@@ -62,6 +66,77 @@ class TextureFont(object):
         self._spread = 32
         assert self._spread % self.ratio == 0
         self._glyphs = {}
+        # Glyph metrics as arrays, for vectorized text layout. Rows are
+        # glyphs in the order they were loaded. The kerning is only kept for
+        # the pairs of glyphs that have one: _kerning_pairs[i, j] is the
+        # kerning of glyph i following glyph j, and is looked up as sorted
+        # (i << 32 | j) keys built when needed.
+        self._glyph_ids = {}
+        self._advance = np.zeros(0, np.float64)
+        self._offset = np.zeros((0, 2), np.float64)
+        self._size = np.zeros((0, 2), np.float64)
+        self._texcoords = np.zeros((0, 4), np.float64)
+        self._kerning_pairs = {}
+        self._kerning_keys = None
+        self._kerning_values = None
+        # Low-res SDF bitmaps, only kept to store them in the glyph cache
+        self._cache = cache
+        self._bitmaps = {}
+        self._cache_dirty = False
+        if cache is not None:
+            self._load_cache()
+
+    @property
+    def _cache_params(self):
+        return dict(size=self._font['size'], lowres_size=self._lowres_size,
+                    spread=self._spread,
+                    atlas_shape=list(self._atlas.shape[:2]))
+
+    def _load_cache(self):
+        """Put the glyphs of the glyph cache into the texture atlas"""
+        glyphs = self._cache.load(self._cache_params)
+        regions = []
+        for glyph in glyphs:
+            w, h = glyph['size']
+            region = self._atlas.get_free_region(w + 2, h + 2)
+            if region is None:
+                break
+            regions.append(region)
+        if not regions:
+            return
+        # Upload all cached glyphs at once
+        data = np.zeros((max(y + h for x, y, w, h in regions),
+                         self._atlas.shape[1], 3), np.uint8)
+        for glyph, (x, y, w, h) in zip(glyphs, regions):
+            x, y, w, h = x + 1, y + 1, w - 2, h - 2
+            char = glyph['char']
+            self._bitmaps[char] = glyph.pop('bitmap')
+            data[y:y + h, x:x + w] = self._bitmaps[char][..., np.newaxis]
+            self._glyphs[char] = glyph
+            self._set_texcoords(glyph, x, y, w, h)
+        self._atlas[:len(data)] = data
+        for glyph in glyphs[:len(regions)]:
+            self._add_to_tables(glyph['char'])
+
+    def _save_cache(self):
+        """Store the glyphs in the glyph cache"""
+        self._cache_dirty = False
+        glyphs = [dict(self._glyphs[char], bitmap=self._bitmaps[char])
+                  for char in self._glyph_ids if char in self._bitmaps]
+        self._cache.save(glyphs, self._cache_params)
+
+    def prewarm(self, chars):
+        """Load the glyphs of a set of characters
+
+        With the GPU renderer, this requires a current canvas.
+
+        Parameters
+        ----------
+        chars : str
+            The characters to load.
+        """
+        codes = np.frombuffer(chars.encode('utf-32-le'), np.uint32)
+        self._get_glyph_ids(codes.astype(np.intp))
 
     @property
     def ratio(self):
@@ -110,7 +185,15 @@ class TextureFont(object):
         x, y, w, h = region
         x, y, w, h = x + 1, y + 1, w - 2, h - 2
 
-        self._renderer.render_to_texture(data, self._atlas, (x, y), (w, h))
+        bitmap = self._renderer.render_to_texture(
+            data, self._atlas, (x, y), (w, h), read=self._cache is not None)
+        if self._cache is not None:
+            self._bitmaps[char] = bitmap
+            self._cache_dirty = True
+        self._set_texcoords(glyph, x, y, w, h)
+        self._add_to_tables(char)
+
+    def _set_texcoords(self, glyph, x, y, w, h):
         u0 = x / float(self._atlas.shape[1])
         v0 = y / float(self._atlas.shape[0])
         u1 = (x+w) / float(self._atlas.shape[1])
@@ -118,13 +201,92 @@ class TextureFont(object):
         texcoords = (u0, v0, u1, v1)
         glyph.update(dict(size=(w, h), texcoords=texcoords))
 
+    def _add_to_tables(self, char):
+        """Append the metrics of a loaded glyph to the glyph tables"""
+        glyph = self._glyphs[char]
+        n = len(self._glyph_ids)
+        if n == len(self._advance):
+            # grow the tables geometrically
+            cap = max(2 * n, 128)
+            self._advance = np.resize(self._advance, cap)
+            self._offset = np.resize(self._offset, (cap, 2))
+            self._size = np.resize(self._size, (cap, 2))
+            self._texcoords = np.resize(self._texcoords, (cap, 4))
+        self._advance[n] = glyph['advance']
+        self._offset[n] = glyph['offset']
+        self._size[n] = glyph['size']
+        self._texcoords[n] = glyph['texcoords']
+        ids = self._glyph_ids
+        ids[char] = n
+        pairs = self._kerning_pairs
+        for other, value in glyph['kerning'].items():
+            if value and other in ids:
+                pairs[n, ids[other]] = value
+        for other, i in ids.items():
+            value = self._glyphs[other]['kerning'].get(char)
+            if value and i != n:
+                pairs[i, n] = value
+        self._kerning_keys = None
+
+    def _get_kerning(self, ids, prev_ids):
+        """The kerning of glyphs following other glyphs, given as arrays of
+        glyph table rows"""
+        if self._kerning_keys is None:
+            pairs = sorted((i << 32 | j, value) for (i, j), value
+                           in self._kerning_pairs.items())
+            self._kerning_keys = np.array([key for key, _ in pairs],
+                                          np.int64)
+            self._kerning_values = np.array([value for _, value in pairs],
+                                            np.float32)
+        keys = self._kerning_keys
+        kerning = np.zeros(len(ids), np.float32)
+        if len(keys) == 0 or len(ids) == 0:
+            return kerning
+        codes = np.asarray(ids, np.int64) << 32 | prev_ids
+        index = np.minimum(np.searchsorted(keys, codes), len(keys) - 1)
+        found = keys[index] == codes
+        kerning[found] = self._kerning_values[index[found]]
+        return kerning
+
+    def _get_glyph_ids(self, codes):
+        """Return the glyph table rows for an array of unicode code points,
+        loading glyphs as necessary"""
+        uniq, inverse = np.unique(codes, return_inverse=True)
+        ids = np.empty(len(uniq), np.intp)
+        for i, code in enumerate(uniq):
+            char = chr(code)
+            if char not in self._glyph_ids:
+                self[char]
+            ids[i] = self._glyph_ids[char]
+        if self._cache_dirty:
+            self._save_cache()
+        return ids[inverse.ravel()]
+
 
 class FontManager(object):
-    """Helper to create TextureFont instances and reuse them when possible"""
+    """Helper to create TextureFont instances and reuse them when possible
+
+    Parameters
+    ----------
+    method : str
+        The SDF rendering method, 'cpu' or 'gpu'.
+    cache_dir : str | None
+        Directory of a persistent glyph cache, which can be shared between
+        processes. Fonts are populated from the cache when they are created,
+        and newly rendered glyphs are added to it. None (default) disables
+        the cache.
+    prewarm : str | None
+        Characters to load when a font is created, e.g.
+        ``string.printable``. With the GPU renderer, this requires a
+        current canvas.
+    """
     # XXX: should store a font-manager on each context,
     # or let TextureFont use a TextureAtlas for each context
-    def __init__(self, method='cpu'):
+    def __init__(self, method='cpu', cache_dir=None, prewarm=None):
         self._fonts = {}
+        self._method = method
+        self._cache_dir = cache_dir
+        self._prewarm = prewarm
         if not isinstance(method, str) or \
                 method not in ('cpu', 'gpu'):
             raise ValueError('method must be "cpu" or "gpu", got %s (%s)'
@@ -139,7 +301,12 @@ class FontManager(object):
         key = '%s-%s-%s' % (face, bold, italic)
         if key not in self._fonts:
             font = dict(face=face, bold=bold, italic=italic)
-            self._fonts[key] = TextureFont(font, self._renderer)
+            cache = None
+            if self._cache_dir is not None:
+                cache = GlyphCache(self._cache_dir, font, self._method)
+            self._fonts[key] = TextureFont(font, self._renderer, cache)
+            if self._prewarm:
+                self._fonts[key].prewarm(self._prewarm)
         return self._fonts[key]
 
 
@@ -147,8 +314,52 @@ class FontManager(object):
 # The visual
 
 
+# Escape sequence characters: {unicode: offset, ...}
+#   ord('\a') = 7
+#   ord('\b') = 8
+#   ord('\f') = 12
+#   ord('\n') = 10  => linebreak
+#   ord('\r') = 13
+#   ord('\t') = 9   => tab, set equal 4 whitespaces?
+#   ord('\v') = 11  => vertical tab, set equal 4 linebreaks?
+# If text coordinate offset > 0 -> it applies to y-direction (in lines)
+# If text coordinate offset < 0 -> it applies to x-direction (in spaces)
+_ESC_SEQ = {7: 0, 8: 0, 9: -4, 10: 1, 11: 4, 12: 0, 13: 0}
+# Lookup tables for code points below 32
+_ESC_X = np.zeros(32, np.float64)
+_ESC_Y = np.zeros(32, np.float64)
+_IS_ESC = np.zeros(32, bool)
+for _code, _off in _ESC_SEQ.items():
+    _IS_ESC[_code] = True
+    if _off < 0:
+        _ESC_X[_code] = -_off
+    else:
+        _ESC_Y[_code] = _off
+
+
 def _text_to_vbo(text, font, anchor_x, anchor_y, lowres_size):
-    """Convert text characters to VBO"""
+    """Convert text characters to VBO
+
+    Parameters
+    ----------
+    text : str | list of str
+        The text. Each string is laid out and anchored separately, and
+        the vertices of all strings are concatenated.
+    font : instance of TextureFont
+        The font to use.
+    anchor_x : str
+        Horizontal text anchor.
+    anchor_y : str
+        Vertical text anchor.
+    lowres_size : int
+        Point size of the font glyphs.
+
+    Returns
+    -------
+    vertices : array
+        Structured array with 4 vertices per character. Characters that
+        are not drawn (e.g. line breaks) give degenerate quads.
+    """
     # Necessary to flush commands before requesting current viewport because
     # There may be a set_viewport command waiting in the queue.
     # TODO: would be nicer if each canvas just remembers and manages its own
@@ -156,124 +367,127 @@ def _text_to_vbo(text, font, anchor_x, anchor_y, lowres_size):
     canvas = context.get_current_canvas()
     canvas.context.flush_commands()
 
+    if isinstance(text, str):
+        text = [text]
+    lengths = np.array([len(t) for t in text], np.intp)
+    n_char, n_text = lengths.sum(), len(text)
     text_vtype = np.dtype([('a_position', np.float32, 2),
                            ('a_texcoord', np.float32, 2)])
-    vertices = np.zeros(len(text) * 4, dtype=text_vtype)
-    prev = None
-    width = height = ascender = descender = 0
+    vertices = np.zeros(n_char * 4, dtype=text_vtype)
+    if n_char == 0:
+        return vertices
     ratio, slop = 1. / font.ratio, font.slop
-    x_off = -slop
-    # Need to make sure we have a unicode string here (Py2.7 mis-interprets
-    # characters like "•" otherwise)
-    if sys.version[0] == '2' and isinstance(text, str):
-        text = text.decode('utf-8')
+
+    # All characters as one array of code points, with the index of the
+    # string that each character belongs to
+    codes = np.frombuffer(''.join(text).encode('utf-32-le'), np.uint32)
+    codes = codes.astype(np.intp)
+    # (clipped, as a trailing empty string starts past the last character;
+    # the start of an empty string is never used for its own characters)
+    starts = np.minimum(np.concatenate([[0], np.cumsum(lengths)[:-1]]),
+                        n_char - 1)
+    text_id = np.repeat(np.arange(n_text), lengths)
+
+    low = np.minimum(codes, 31)
+    is_esc = (codes < 32) & _IS_ESC[low]
+    esc_x = np.where(is_esc, _ESC_X[low], 0.)
+    esc_y = np.where(is_esc, _ESC_Y[low], 0.)
+    draw = np.flatnonzero(~is_esc)
+
     # Need to store the original viewport, because the font[char] will
     # trigger SDF rendering, which changes our viewport
-    # todo: get rid of call to glGetParameter!
-
+    orig_viewport = canvas.context.get_viewport()
     # Also analyse chars with large ascender and descender, otherwise the
     # vertical alignment can be very inconsistent
-    for char in 'hy':
-        glyph = font[char]
-        y0 = glyph['offset'][1] * ratio + slop
-        y1 = y0 - glyph['size'][1]
-        ascender = max(ascender, y0 - slop)
-        descender = min(descender, y1 + slop)
-        height = max(height, glyph['size'][1] - 2*slop)
-
-    # Get/set the fonts whitespace length and line height (size of this ok?)
-    glyph = font[' ']
-    spacewidth = glyph['advance'] * ratio
-    lineheight = height * 1.5
-
-    # Added escape sequences characters: {unicode:offset,...}
-    #   ord('\a') = 7
-    #   ord('\b') = 8
-    #   ord('\f') = 12
-    #   ord('\n') = 10  => linebreak
-    #   ord('\r') = 13
-    #   ord('\t') = 9   => tab, set equal 4 whitespaces?
-    #   ord('\v') = 11  => vertical tab, set equal 4 linebreaks?
-    # If text coordinate offset > 0 -> it applies to x-direction
-    # If text coordinate offset < 0 -> it applies to y-direction
-    esc_seq = {7: 0, 8: 0, 9: -4, 10: 1, 11: 4, 12: 0, 13: 0}
-
-    # Keep track of y_offset to set lines at right position
-    y_offset = 0
-
-    # When a line break occur, record the vertices index value
-    vi_marker = 0
-    ii_offset = 0  # Offset since certain characters won't be drawn
-
-    # The running tracker of characters vertex index
-    vi = 0
-
-    orig_viewport = canvas.context.get_viewport()
-    for ii, char in enumerate(text):
-        if ord(char) in esc_seq:
-            if esc_seq[ord(char)] < 0:
-                # Add offset in x-direction
-                x_off += abs(esc_seq[ord(char)]) * spacewidth
-                width += abs(esc_seq[ord(char)]) * spacewidth
-            elif esc_seq[ord(char)] > 0:
-                # Add offset in y-direction and reset things in x-direction
-                dx = dy = 0
-                if anchor_x == 'right':
-                    dx = -width
-                elif anchor_x == 'center':
-                    dx = -width / 2.
-                vertices['a_position'][vi_marker:vi+4] += (dx, dy)
-                vi_marker = vi+4
-                ii_offset -= 1
-                # Reset variables that affects x-direction positioning
-                x_off = -slop
-                width = 0
-                # Add offset in y-direction
-                y_offset += esc_seq[ord(char)] * lineheight
-        else:
-            # For ordinary characters, normal procedure
-            glyph = font[char]
-            kerning = glyph['kerning'].get(prev, 0.) * ratio
-            x0 = x_off + glyph['offset'][0] * ratio + kerning
-            y0 = glyph['offset'][1] * ratio + slop - y_offset
-            x1 = x0 + glyph['size'][0]
-            y1 = y0 - glyph['size'][1]
-            u0, v0, u1, v1 = glyph['texcoords']
-            position = [[x0, y0], [x0, y1], [x1, y1], [x1, y0]]
-            texcoords = [[u0, v0], [u0, v1], [u1, v1], [u1, v0]]
-            vi = (ii + ii_offset) * 4
-            vertices['a_position'][vi:vi+4] = position
-            vertices['a_texcoord'][vi:vi+4] = texcoords
-            x_move = glyph['advance'] * ratio + kerning
-            x_off += x_move
-            ascender = max(ascender, y0 - slop)
-            descender = min(descender, y1 + slop)
-            width += x_move
-            height = max(height, glyph['size'][1] - 2*slop)
-            prev = char
-
+    ids_hy = font._get_glyph_ids(np.array([ord('h'), ord('y')]))
+    ids_space = font._get_glyph_ids(np.array([ord(' ')]))
+    gid = font._get_glyph_ids(codes[draw])
     if orig_viewport is not None:
         canvas.context.set_viewport(*orig_viewport)
 
-    dx = dy = 0
+    y0_hy = font._offset[ids_hy, 1] * ratio + slop
+    y1_hy = y0_hy - font._size[ids_hy, 1]
+    ascender_hy = max(0, (y0_hy - slop).max())
+    descender_hy = min(0, (y1_hy + slop).min())
+    height = max(0, (font._size[ids_hy, 1] - 2 * slop).max())
+    # Get the fonts whitespace length and line height (size of this ok?)
+    spacewidth = font._advance[ids_space[0]] * ratio
+    lineheight = height * 1.5
+
+    # Kerning with the previous drawn character of the same string
+    kerning = np.zeros(len(draw))
+    same = text_id[draw[1:]] == text_id[draw[:-1]]
+    kerning[1:][same] = font._get_kerning(gid[1:][same],
+                                          gid[:-1][same]) * ratio
+
+    # Horizontal advance of every character
+    advance = esc_x * spacewidth
+    advance[draw] = font._advance[gid] * ratio + kerning
+
+    # Lines: a new line starts at each string and after each line break
+    line_start = np.zeros(n_char, bool)
+    line_start[starts[lengths > 0]] = True
+    line_start[1:] |= esc_y[:-1] > 0
+    line_id = np.cumsum(line_start) - 1
+    first = np.flatnonzero(line_start)
+    cum_advance = np.cumsum(advance) - advance  # exclusive
+    x_off = -slop + cum_advance - cum_advance[first][line_id]
+    line_width = np.add.reduceat(advance, first)
+
+    # Vertical offset of each line within its string
+    cum_y = np.cumsum(esc_y) - esc_y
+    y_offset = (cum_y - cum_y[starts][text_id]) * lineheight
+
+    # Quad corners of the drawn characters
+    x0 = x_off[draw] + font._offset[gid, 0] * ratio + kerning
+    y0 = font._offset[gid, 1] * ratio + slop - y_offset[draw]
+    x1 = x0 + font._size[gid, 0]
+    y1 = y0 - font._size[gid, 1]
+
+    # Anchors
+    dx = np.zeros(len(first))
+    if anchor_x == 'right':
+        dx = -line_width
+    elif anchor_x == 'center':
+        dx = -line_width / 2.
+    ascender = np.full(n_text, ascender_hy)
+    descender = np.full(n_text, descender_hy)
+    np.maximum.at(ascender, text_id[draw], y0 - slop)
+    np.minimum.at(descender, text_id[draw], y1 + slop)
+    dy = np.zeros(n_text)
     if anchor_y == 'top':
         dy = -descender
     elif anchor_y in ('center', 'middle'):
         dy = (-descender - ascender) / 2
     elif anchor_y == 'bottom':
         dy = -ascender
-    if anchor_x == 'right':
-        dx = -width
-    elif anchor_x == 'center':
-        dx = -width / 2.
+    x0 += dx[line_id[draw]]
+    x1 += dx[line_id[draw]]
+    y0 += dy[text_id[draw]]
+    y1 += dy[text_id[draw]]
+
+    # Vertex index: line breaks take no vertices, other characters that are
+    # not drawn leave a degenerate quad, and the unused quads of a string
+    # are at its end.
+    cum_lb = np.cumsum(esc_y > 0) - (esc_y > 0)
+    quad = np.arange(n_char) - (cum_lb - cum_lb[starts][text_id])
+    vi = 4 * quad[draw]
+    position = vertices['a_position']
+    texcoord = vertices['a_texcoord']
+    u0, v0, u1, v1 = font._texcoords[gid].T
+    for k, (x, y, u, v) in enumerate(((x0, y0, u0, v0), (x0, y1, u0, v1),
+                                      (x1, y1, u1, v1), (x1, y0, u1, v0))):
+        position[vi + k, 0] = x
+        position[vi + k, 1] = y
+        texcoord[vi + k, 0] = u
+        texcoord[vi + k, 1] = v
+    position /= lowres_size
+    return vertices
 
-    # If any linebreaks occured in text, we only want to translate characters
-    # in the last line in text (those after the vi_marker)
-    vertices['a_position'][0:vi_marker] += (0, dy)
-    vertices['a_position'][vi_marker:] += (dx, dy)
-    vertices['a_position'] /= lowres_size
 
-    return vertices
+# Number of laid out strings kept by each TextVisual, so that changing some
+# of its strings only lays out the new ones
+_LAYOUT_CACHE_SIZE = 256
 
 
 class TextVisual(Visual):
@@ -416,8 +630,11 @@ class TextVisual(Visual):
         self._face = face
         self._bold = bold
         self._italic = italic
+        # {(string, anchors): vertices} of the strings laid out with the font
+        self._layouts = OrderedDict()
         self._update_font()
         self._vertices = None
+        self._n_char = None
         self._color_vbo = None
         self._anchors = (anchor_x, anchor_y)
         # Init text properties
@@ -444,7 +661,7 @@ class TextVisual(Visual):
         if text is None:
             text = []
         self._text = text
-        self._vertices = None
+        self._layout_changed = True
         self._pos_changed = True  # need to update this as well
         self._color_changed = True
         self.update()
@@ -455,8 +672,10 @@ class TextVisual(Visual):
 
     @anchors.setter
     def anchors(self, a):
+        if tuple(a) == tuple(self._anchors):
+            return
         self._anchors = a
-        self._vertices = None
+        self._layout_changed = True
         self._pos_changed = True
         self.update()
 
@@ -519,21 +738,29 @@ class TextVisual(Visual):
         # attributes / uniforms are not available until program is built
         if len(self.text) == 0:
             return False
-        if self._vertices is None:
+        if self._layout_changed:
             text = self.text
             if isinstance(text, str):
                 text = [text]
             n_char = sum(len(t) for t in text)
             # we delay creating vertices because it requires a context,
             # which may or may not exist when the object is initialized
-            self._vertices = np.concatenate([
-                _text_to_vbo(t, self._font, self._anchors[0], self._anchors[1],
-                             self._font._lowres_size) for t in text])
-            self._vertices = VertexBuffer(self._vertices)
-            idx = (np.array([0, 1, 2, 0, 2, 3], np.uint32) +
-                   np.arange(0, 4*n_char, 4, dtype=np.uint32)[:, np.newaxis])
-            self._index_buffer = IndexBuffer(idx.ravel())
+            vertices = self._layout(text)
+            if self._vertices is None:
+                self._vertices = VertexBuffer(vertices)
+            else:
+                self._vertices.set_data(vertices)
+            if n_char != self._n_char:
+                idx = (np.array([0, 1, 2, 0, 2, 3], np.uint32) +
+                       np.arange(0, 4*n_char, 4,
+                                 dtype=np.uint32)[:, np.newaxis])
+                if self._n_char is None:
+                    self._index_buffer = IndexBuffer(idx.ravel())
+                else:
+                    self._index_buffer.set_data(idx.ravel())
+                self._n_char = n_char
             self.shared_program.bind(self._vertices)
+            self._layout_changed = False
             # This is necessary to reset the GL drawing state after generating
             # SDF textures. A better way would be to enable the state to be
             # pushed/popped by the context.
@@ -582,7 +809,10 @@ class TextVisual(Visual):
                                   axis=0)
             color = np.repeat(color[:n_text], repeats, axis=0)
             assert color.shape[0] == self._vertices.size
-            self._color_vbo = VertexBuffer(color)
+            if self._color_vbo is None:
+                self._color_vbo = VertexBuffer(color)
+            else:
+                self._color_vbo.set_data(color)
             self.shared_program.vert['color'] = self._color_vbo
             self._color_changed = False
 
@@ -598,6 +828,26 @@ class TextVisual(Visual):
         self.shared_program['u_font_atlas'] = self._font._atlas
         self.shared_program['u_font_atlas_shape'] = self._font._atlas.shape[:2]
 
+    def _layout(self, text):
+        """Lay out a list of strings, reusing the vertices of the strings
+        laid out before with the same anchors
+        """
+        anchors = tuple(self._anchors)
+        layouts = self._layouts
+        missing = [t for t in OrderedDict.fromkeys(text)
+                   if (t, anchors) not in layouts]
+        if missing:
+            vertices = _text_to_vbo(missing, self._font, anchors[0],
+                                    anchors[1], self._font._lowres_size)
+            sizes = [4 * len(t) for t in missing]
+            for t, size, stop in zip(missing, sizes, np.cumsum(sizes)):
+                layouts[(t, anchors)] = vertices[stop - size:stop]
+        for t in text:
+            layouts.move_to_end((t, anchors))
+        while len(layouts) > max(_LAYOUT_CACHE_SIZE, len(text)):
+            layouts.popitem(last=False)
+        return np.concatenate([layouts[(t, anchors)] for t in text])
+
     def _prepare_transforms(self, view):
         self._pos_changed = True
         # Note that we access `view_program` instead of `shared_program`
@@ -637,6 +887,8 @@ class TextVisual(Visual):
 
     def _update_font(self):
         self._font = self._font_manager.get_font(self._face, self._bold, self._italic)
+        self._layouts.clear()
+        self._layout_changed = True
         self.update()
 
 
@@ -644,7 +896,7 @@ class SDFRendererCPU(object):
     """Render SDFs using the CPU."""
     # This should probably live in _sdf_cpu.pyx, but doing so makes
     # debugging substantially more annoying
-    def render_to_texture(self, data, texture, offset, size):
+    def render_to_texture(self, data, texture, offset, size, read=False):
         sdf = (data / 255).astype(np.float32)  # from ubyte -> float
         h, w = sdf.shape
         tex_w, tex_h = size
@@ -664,7 +916,7 @@ class SDFRendererCPU(object):
         # convert to uint8
         bitmap = (bitmap * 255).astype(np.uint8)
         # convert single channel to RGB by repeating
-        bitmap = np.tile(bitmap[..., np.newaxis],
-                         (1, 1, 3))
         texture[offset[1]:offset[1] + size[1],
-                offset[0]:offset[0] + size[0], :] = bitmap
+                offset[0]:offset[0] + size[0], :] = np.tile(
+                    bitmap[..., np.newaxis], (1, 1, 3))
+        return bitmap
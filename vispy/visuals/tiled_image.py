@@ -0,0 +1,438 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) Vispy Development Team. All Rights Reserved.
+# Distributed under the (new) BSD License. See LICENSE.txt for more info.
+
+from __future__ import division
+
+from collections import OrderedDict
+
+import numpy as np
+
+from ..gloo import Texture2D, VertexBuffer
+from ..color import get_colormap
+from .image import _build_color_transform
+from .visual import Visual
+
+VERT_SHADER = """
+attribute vec2 a_position;
+attribute vec2 a_texcoord;
+varying vec2 v_texcoord;
+
+void main() {
+    v_texcoord = a_texcoord;
+    gl_Position = $transform(vec4(a_position, 0., 1.));
+}
+"""
+
+FRAG_SHADER = """
+uniform sampler2D u_texture;
+varying vec2 v_texcoord;
+
+void main()
+{
+    gl_FragColor = $color_transform(texture2D(u_texture, v_texcoord));
+}
+"""  # noqa
+
+
+class TiledImageVisual(Visual):
+    """Visual subclass displaying a large image as a set of texture tiles.
+
+    The image is split into square tiles that are uploaded to the GPU only
+    when they intersect the current view. A multiresolution pyramid is used
+    so that a zoomed-out view draws downsampled tiles, and the tiles share a
+    single texture of a fixed size, from which the least recently used tiles
+    are evicted. This allows to display images that are much larger than
+    the maximum texture size, or that do not fit in memory.
+
+    Parameters
+    ----------
+    data : array-like | list of array-like
+        The image, of shape (M, N), (M, N, 3) or (M, N, 4). Any object that
+        supports NumPy slicing can be used, such as a memory-mapped array.
+        A list of arrays is used as the levels of the pyramid, each level
+        being downsampled (typically by 2) from the previous one. Otherwise
+        the levels are decimated from the image by strided slicing.
+    tile_size : int
+        The size of the tiles, in pixels of their pyramid level.
+    max_tiles : int
+        Maximum number of tiles stored on the GPU, which sets the size of the
+        tile texture. The pyramid level is chosen such that all visible tiles
+        fit.
+    max_uploads : int | None
+        Maximum number of tiles uploaded per draw. Tiles that are not
+        uploaded yet are replaced by a coarser tile if one is available, and
+        another draw is requested. None (default) uploads all visible tiles
+        at once.
+    cmap : str | ColorMap
+        Colormap to use for luminance images.
+    clim : str | tuple
+        Limits to use for the colormap. Can be 'auto' to auto-set bounds to
+        the min and max of the coarsest pyramid level.
+    gamma : float
+        Gamma to use during colormap lookup.  Final color will be
+        cmap(val**gamma).
+    **kwargs : dict
+        Keyword arguments to pass to `Visual`.
+
+    Notes
+    -----
+    Luminance tiles are stored as float32 ('r32f') and ``clim`` and
+    ``gamma`` are applied in the shader, so changing them does not upload
+    any tile. RGB(A) data are assumed to be scaled (0, 1), or to be uint8.
+
+    The visible tiles are determined by intersecting the rays through the
+    view with the image plane, so the visual supports 2D and 3D cameras.
+    Tiles are drawn as quads, so nonlinear transforms are only approximated
+    at the scale of a tile.
+    """
+
+    def __init__(self, data=None, tile_size=256, max_tiles=64,
+                 max_uploads=None, cmap='viridis', clim='auto', gamma=1.0,
+                 **kwargs):
+        self._levels = None
+        self._level_shapes = None
+        self._level_scales = None
+        self._channels = 1
+        self._dtype = None
+        self._tile_size = int(tile_size)
+        self._max_tiles = int(max_tiles)
+        self._max_uploads = max_uploads
+        self._gamma = float(gamma)
+        self._clim = None
+        self._cmap = None
+
+        # tiles on the GPU: {(level, ty, tx): slot}, in order of last use
+        self._tiles = OrderedDict()
+        self._free_slots = []
+        self._texture = None
+        self._slot_grid = None
+        self._drawn = None
+        self._need_colortransform_update = True
+        self._position = VertexBuffer()
+        self._texcoord = VertexBuffer()
+
+        super(TiledImageVisual, self).__init__(vcode=VERT_SHADER,
+                                               fcode=FRAG_SHADER)
+        self.set_gl_state('translucent', cull_face=False)
+        self._draw_mode = 'triangles'
+        self.shared_program['a_position'] = self._position
+        self.shared_program['a_texcoord'] = self._texcoord
+
+        self.clim = clim
+        self.cmap = cmap
+        if data is not None:
+            self.set_data(data)
+        self.freeze()
+
+    def set_data(self, data):
+        """Set the data
+
+        Parameters
+        ----------
+        data : array-like | list of array-like
+            The image, or the levels of its pyramid.
+        """
+        if isinstance(data, (list, tuple)):
+            levels = [(level, 1) for level in data]
+        else:
+            levels = [(data, 1)]
+            step, shape = 1, np.array(data.shape[:2])
+            while (shape > self._tile_size).any():
+                step *= 2
+                shape = -(-np.array(data.shape[:2]) // step)
+                levels.append((data, step))
+        shape = levels[0][0].shape
+        if len(shape) not in (2, 3) or \
+                (len(shape) == 3 and shape[2] not in (1, 3, 4)):
+            raise ValueError('data must have shape (M, N), (M, N, 3) or '
+                             '(M, N, 4), got %r' % (shape,))
+        channels = 1 if len(shape) == 2 else shape[2]
+        if channels > 1 and levels[0][0].dtype == np.uint8:
+            dtype = np.dtype(np.uint8)
+        else:
+            dtype = np.dtype(np.float32)
+        if (channels, dtype) != (self._channels, self._dtype):
+            self._texture = None
+            self._need_colortransform_update = True
+        self._levels = levels
+        self._channels = channels
+        self._dtype = dtype
+        self._level_shapes = [self._level_shape(i) for i in range(len(levels))]
+        self._level_scales = [
+            np.array(shape[:2], float) / self._level_shapes[i]
+            if levels[i][1] == 1 else np.array([levels[i][1]] * 2, float)
+            for i in range(len(levels))]
+        self.clear_tiles()
+        self._drawn = None
+        self.update()
+
+    def _level_shape(self, level):
+        data, step = self._levels[level]
+        return -(-np.array(data.shape[:2]) // step)
+
+    def clear_tiles(self):
+        """Forget all tiles stored on the GPU, e.g. when the data changed"""
+        self._tiles.clear()
+        self._free_slots = list(range(self._max_tiles))[::-1]
+        self._drawn = None
+        self.update()
+
+    @property
+    def size(self):
+        return tuple(self._level_shapes[0][::-1])
+
+    @property
+    def n_levels(self):
+        """The number of levels in the image pyramid"""
+        return len(self._levels)
+
+    @property
+    def clim(self):
+        return (self._clim if isinstance(self._clim, str) else
+                tuple(self._clim))
+
+    @clim.setter
+    def clim(self, clim):
+        if isinstance(clim, str):
+            if clim != 'auto':
+                raise ValueError('clim must be "auto" if a string')
+        else:
+            clim = np.array(clim, float)
+            if clim.shape != (2,):
+                raise ValueError('clim must have two elements')
+        self._clim = clim
+        if isinstance(clim, str):
+            self._need_colortransform_update = True
+        elif not self._need_colortransform_update:
+            self.shared_program.frag['color_transform'][1]['clim'] = \
+                self.clim_normalized
+        self.update()
+
+    @property
+    def clim_normalized(self):
+        """The clim in units of the texture data."""
+        if self._channels > 1 and self._dtype == np.uint8:
+            return tuple(np.asarray(self._clim) / 255.)
+        return tuple(self._clim)
+
+    @property
+    def cmap(self):
+        return self._cmap
+
+    @cmap.setter
+    def cmap(self, cmap):
+        self._cmap = get_colormap(cmap)
+        self._need_colortransform_update = True
+        self.update()
+
+    @property
+    def gamma(self):
+        """The gamma used when rendering the image."""
+        return self._gamma
+
+    @gamma.setter
+    def gamma(self, value):
+        if value <= 0:
+            raise ValueError("gamma must be > 0")
+        self._gamma = float(value)
+        if not self._need_colortransform_update:
+            self.shared_program.frag['color_transform'][2]['gamma'] = \
+                self._gamma
+        self.update()
+
+    def _read_tile(self, level, ty, tx):
+        """Read the data of a tile from its pyramid level"""
+        data, step = self._levels[level]
+        ts = self._tile_size
+        shape = self._level_shapes[level]
+        y0, x0 = ty * ts, tx * ts
+        y1, x1 = min(y0 + ts, shape[0]), min(x0 + ts, shape[1])
+        tile = np.asarray(data[y0 * step:y1 * step:step,
+                               x0 * step:x1 * step:step])
+        return tile.reshape(tile.shape[:2] + (self._channels,))
+
+    def _build_texture(self):
+        ts = self._tile_size
+        cols = int(np.ceil(np.sqrt(self._max_tiles)))
+        rows = int(np.ceil(self._max_tiles / cols))
+        self._slot_grid = (rows, cols)
+        shape = (rows * ts, cols * ts, self._channels)
+        internalformat = 'r32f' if self._channels == 1 else None
+        self._texture = Texture2D(shape=shape, internalformat=internalformat,
+                                  interpolation='nearest',
+                                  wrapping='clamp_to_edge')
+        self.shared_program['u_texture'] = self._texture
+        self.clear_tiles()
+
+    def _build_color_transform(self):
+        if isinstance(self._clim, str):
+            if self._channels == 1:
+                coarse = np.asarray(self._levels[-1][0][
+                    ::self._levels[-1][1], ::self._levels[-1][1]])
+                self._clim = np.array((coarse.min(), coarse.max()), float)
+            else:
+                self._clim = np.array((0., 1.) if self._dtype != np.uint8
+                                      else (0., 255.))
+        fake = np.empty((1, 1) + ((self._channels,) if self._channels > 1
+                                  else ()))
+        self.shared_program.frag['color_transform'] = _build_color_transform(
+            fake, self.clim_normalized, self._gamma, self._cmap,
+            red=self._channels == 1)
+        self._need_colortransform_update = False
+
+    def _view_to_image(self, view):
+        """Intersect rays through a grid of view points with the image plane
+
+        Returns the points in visual coordinates, and the framebuffer scale
+        (framebuffer pixels per visual unit) at the center of the view.
+        """
+        tr = view.transforms.get_transform('visual', 'render')
+        n = 5
+        grid = np.linspace(-1, 1, n)
+        xy = np.array(np.meshgrid(grid, grid)).reshape(2, -1).T
+        near = np.c_[xy, -np.ones(len(xy)), np.ones(len(xy))]
+        far = near.copy()
+        far[:, 2] = 1
+        with np.errstate(all='ignore'):
+            p0 = tr.imap(near)
+            p1 = tr.imap(far)
+            p0 = p0[:, :3] / p0[:, 3:]
+            p1 = p1[:, :3] / p1[:, 3:]
+            t = p0[:, 2] / (p0[:, 2] - p1[:, 2])
+            t[~np.isfinite(t)] = 0  # rays parallel to the image plane
+            points = p0[:, :2] + t[:, np.newaxis] * (p1 - p0)[:, :2]
+
+            # framebuffer pixels per unit length at the center of the view
+            center = points[len(points) // 2]
+            fb = view.transforms.get_transform('visual', 'framebuffer')
+            mapped = fb.map(np.array([[center[0], center[1], 0, 1],
+                                      [center[0] + 1, center[1], 0, 1],
+                                      [center[0], center[1] + 1, 0, 1]]))
+            mapped = mapped[:, :2] / mapped[:, 3:]
+            scale = np.max(np.sqrt(((mapped[1:] - mapped[0]) ** 2).sum(-1)))
+        return points, scale
+
+    def _visible_tiles(self, view):
+        """Return the level and the indices of the tiles in view"""
+        points, scale = self._view_to_image(view)
+        shape0 = self._level_shapes[0]
+        if np.isfinite(points).all():
+            lo = np.maximum(points.min(axis=0)[::-1], 0)
+            hi = np.minimum(points.max(axis=0)[::-1], shape0)
+        else:
+            lo, hi = np.zeros(2), shape0.astype(float)
+        if (hi <= lo).any():
+            return 0, np.zeros((0, 2), int)
+
+        # finest level with at most one texel per framebuffer pixel
+        level = 0
+        if np.isfinite(scale) and scale > 0:
+            level = int(np.clip(np.floor(np.log2(1. / scale)), 0,
+                                len(self._levels) - 1))
+        ts = self._tile_size
+        while True:
+            s = self._level_scales[level]
+            first = np.floor(lo / s / ts).astype(int)
+            last = np.ceil(hi / s / ts).astype(int)
+            count = np.prod(last - first)
+            if count <= self._max_tiles or level == len(self._levels) - 1:
+                break
+            level += 1
+        ty, tx = np.mgrid[first[0]:last[0], first[1]:last[1]]
+        tiles = np.c_[ty.ravel(), tx.ravel()][:self._max_tiles]
+        return level, tiles
+
+    def _upload_tile(self, key):
+        """Store a tile in a free or the least recently used slot"""
+        if self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            _, slot = self._tiles.popitem(last=False)
+        data = self._read_tile(*key).astype(self._dtype, copy=False)
+        ts, cols = self._tile_size, self._slot_grid[1]
+        offset = ((slot // cols) * ts, (slot % cols) * ts)
+        self._texture.set_data(data, offset=offset)
+        self._tiles[key] = slot
+
+    def _update_tiles(self, view):
+        """Upload the visible tiles and return the tiles to draw"""
+        level, tiles = self._visible_tiles(view)
+        keys = [(level, int(ty), int(tx)) for ty, tx in tiles]
+        # mark the cached tiles as used first, so that they are not evicted
+        missing = []
+        for key in keys:
+            if key in self._tiles:
+                self._tiles.move_to_end(key)
+            else:
+                missing.append(key)
+        n_uploads = len(missing)
+        if self._max_uploads is not None:
+            n_uploads = min(n_uploads, self._max_uploads)
+        for key in missing[:n_uploads]:
+            self._upload_tile(key)
+
+        # replace tiles that are not uploaded yet by a coarser tile
+        fallback = set()
+        for level_, ty, tx in missing[n_uploads:]:
+            for coarse in range(level_ + 1, len(self._levels)):
+                factor = self._level_scales[coarse] / \
+                    self._level_scales[level_]
+                key = (coarse, int(ty // factor[0]), int(tx // factor[1]))
+                if key in self._tiles:
+                    self._tiles.move_to_end(key)
+                    fallback.add(key)
+                    break
+        if len(missing) > n_uploads:
+            self._update_later()
+        # coarse tiles are drawn first
+        fallback = sorted(fallback, reverse=True)
+        return fallback + [key for key in keys if key in self._tiles]
+
+    def _build_vertex_data(self, keys):
+        ts = self._tile_size
+        rows, cols = self._slot_grid
+        quad = np.array([[0, 0], [1, 0], [1, 1], [0, 0], [1, 1], [0, 1]],
+                        np.float32)
+        position = np.empty((len(keys), 6, 2), np.float32)
+        texcoord = np.empty((len(keys), 6, 2), np.float32)
+        for i, key in enumerate(keys):
+            level, ty, tx = key
+            shape = self._level_shapes[level]
+            scale = self._level_scales[level][::-1]
+            x0, y0 = tx * ts, ty * ts
+            size = (min(ts, shape[1] - x0), min(ts, shape[0] - y0))
+            position[i] = ((x0, y0) + quad * size) * scale
+            slot = self._tiles[key]
+            corner = ((slot % cols) * ts, (slot // cols) * ts)
+            texcoord[i] = (corner + quad * size) / (cols * ts, rows * ts)
+        self._position.set_data(position.reshape(-1, 2))
+        self._texcoord.set_data(texcoord.reshape(-1, 2))
+
+    def _compute_bounds(self, axis, view):
+        if axis > 1:
+            return (0, 0)
+        else:
+            return (0, self.size[axis])
+
+    def _prepare_transforms(self, view):
+        view.view_program.vert['transform'] = view.get_transform()
+
+    def _prepare_draw(self, view):
+        if self._levels is None:
+            return False
+        if self._texture is None:
+            self._build_texture()
+        if self._need_colortransform_update:
+            self._build_color_transform()
+            if hasattr(self._cmap, 'texture_lut'):
+                self.shared_program['texture2D_LUT'] = \
+                    self._cmap.texture_lut()
+        keys = self._update_tiles(view)
+        if not keys:
+            return False
+        # tiles may have moved to other slots
+        drawn = [(key, self._tiles[key]) for key in keys]
+        if drawn != self._drawn:
+            self._build_vertex_data(keys)
+            self._drawn = drawn
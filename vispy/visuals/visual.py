@@ -91,9 +91,24 @@ import numpy as np
 from .. import gloo
 from ..util.event import EmitterGroup, Event
 from ..util import logger, Frozen
+from ..util.frame_timing import get_timer
 from .shaders import StatementList, MultiProgram
 from .transforms import TransformSystem
 
+# Visuals that asked for a redraw while they were drawn. A SceneCanvas
+# ignores the updates requested during its draw, so these visuals are
+# updated by a single-shot timer once the draw is done.
+_later_updates = weakref.WeakSet()
+_later_timer = None
+
+
+def _update_later_timeout(event):
+    event.source.stop()
+    visuals = list(_later_updates)
+    _later_updates.clear()
+    for visual in visuals:
+        visual.update()
+
 
 class VisualShare(object):
     """Contains data that is shared between all views of a visual.
@@ -262,6 +277,35 @@ class BaseVisual(Frozen):
         """Update the Visual"""
         self.events.update()
 
+    def _timed_prepare_draw(self):
+        """Call ``_prepare_draw`` for drawing this visual, in a ``'prepare'``
+        span of the active frame timer
+        """
+        timer = get_timer()
+        if timer is None:
+            return self._prepare_draw(view=self)
+        with timer.span(str(self), 'prepare'):
+            return self._prepare_draw(view=self)
+
+    def _update_later(self):
+        """Update the Visual once the current draw is done
+
+        This is for visuals that need another draw to finish drawing, e.g.
+        because they upload a limited amount of data per draw, and that
+        find out in ``_prepare_draw``, where ``update()`` has no effect.
+        """
+        global _later_timer
+        app = getattr(gloo.get_current_canvas(), 'app', None)
+        if app is None:
+            self.update()
+            return
+        if _later_timer is None or _later_timer.app is not app:
+            from ..app import Timer
+            _later_timer = Timer(interval=0, app=app,
+                                 connect=_update_later_timeout)
+        _later_updates.add(self)
+        _later_timer.start()
+
     def _transform_changed(self, event=None):
         self.update()
 
@@ -433,7 +477,7 @@ class Visual(BaseVisual):
         if not self.visible:
             return
         self._configure_gl_state()
-        if self._prepare_draw(view=self) is False:
+        if self._timed_prepare_draw() is False:
             return
 
         if self._vshare.draw_mode is None:
@@ -588,7 +632,7 @@ class CompoundVisual(BaseVisual):
         """
         if not self.visible:
             return
-        if self._prepare_draw(view=self) is False:
+        if self._timed_prepare_draw() is False:
             return
 
         for v in self._subvisuals:
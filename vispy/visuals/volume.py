@@ -82,6 +82,10 @@ FRAG_SHADER = """
 // uniforms
 uniform $sampler_type u_volumetex;
 uniform vec3 u_shape;
+uniform vec3 u_box_min;
+uniform vec3 u_box_max;
+uniform vec3 u_tex_scale;
+uniform vec3 u_tex_offset;
 uniform vec2 clim;
 uniform float gamma;
 uniform float u_threshold;
@@ -213,12 +217,12 @@ void main() {{
 
     // Compute the distance to the front surface or near clipping plane
     float distance = dot(nearpos-v_position, view_ray);
-    distance = max(distance, min((-0.5 - v_position.x) / view_ray.x,
-                            (u_shape.x - 0.5 - v_position.x) / view_ray.x));
-    distance = max(distance, min((-0.5 - v_position.y) / view_ray.y,
-                            (u_shape.y - 0.5 - v_position.y) / view_ray.y));
-    distance = max(distance, min((-0.5 - v_position.z) / view_ray.z,
-                            (u_shape.z - 0.5 - v_position.z) / view_ray.z));
+    distance = max(distance, min((u_box_min.x - v_position.x) / view_ray.x,
+                            (u_box_max.x - v_position.x) / view_ray.x));
+    distance = max(distance, min((u_box_min.y - v_position.y) / view_ray.y,
+                            (u_box_max.y - v_position.y) / view_ray.y));
+    distance = max(distance, min((u_box_min.z - v_position.z) / view_ray.z,
+                            (u_box_max.z - v_position.z) / view_ray.z));
 
     // Now we have the starting position on the front surface
     vec3 front = v_position + view_ray * distance;
@@ -230,8 +234,8 @@ void main() {{
         discard;
 
     // Get starting location and step vector in texture coordinates
-    vec3 step = ((v_position - front) / u_shape) / f_nsteps;
-    vec3 start_loc = front / u_shape;
+    vec3 step = ((v_position - front) * u_tex_scale) / f_nsteps;
+    vec3 start_loc = front * u_tex_scale + u_tex_offset;
 
     // For testing: show the number of steps. This helps to establish
     // whether the rays are correctly oriented
@@ -534,6 +538,14 @@ class VolumeVisual(Visual):
         self._tex.set_data(vol)  # will be efficient if vol is same shape
         self.shared_program['u_shape'] = (vol.shape[2], vol.shape[1], 
                                           vol.shape[0])
+        # the box to ray-cast, and the mapping from local to texture
+        # coordinates
+        self.shared_program['u_box_min'] = (-0.5, -0.5, -0.5)
+        self.shared_program['u_box_max'] = tuple(
+            np.array(vol.shape[2::-1]) - 0.5)
+        self.shared_program['u_tex_scale'] = tuple(
+            1. / np.array(vol.shape[2::-1]))
+        self.shared_program['u_tex_offset'] = (0., 0., 0.)
         
         shape = vol.shape[:3]
         if self._vol_shape != shape: